@@ -82,11 +82,7 @@ main() {
   # Reference:    Alfred Preferences > Advanced > Set preferences folder
   # Note:         Alfred will create necessary files in this folder
   #               if they don't exist
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set Alfred preference: syncfolder to $sync_folder"
-  else
-    defaults write "$alfred_prefs_domain" "syncfolder" -string "$sync_folder"
-  fi
+  run_defaults "$alfred_prefs_domain" "syncfolder" -string "$sync_folder"
 
   msg_success "Alfred configuration complete."
   msg_info "You may need to restart Alfred for the new settings to take effect."
@@ -88,19 +88,6 @@ msg_info "Configuring Firefox settings..."
 
 # Firefox respects some macOS defaults for system integration:
 
-run_defaults() {
-  local domain="$1"
-  local key="$2"
-  local type="$3"
-  local value="$4"
-
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set Firefox preference: '$key' to '$value'"
-  else
-    defaults write "$domain" "$key" "$type" "$value"
-  fi
-}
-
 # --- Disable Swipe Navigation ---
 # Key:          AppleEnableSwipeNavigateWithScrolls
 # Domain:       org.mozilla.firefox
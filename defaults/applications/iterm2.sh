@@ -60,11 +60,7 @@ main() {
   # Possible:     true, false
   # Set to:       true (load from custom folder)
   # Reference:    iTerm2 > Preferences > General > Preferences
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set iTerm2 preference: LoadPrefsFromCustomFolder to true"
-  else
-    defaults write com.googlecode.iterm2 LoadPrefsFromCustomFolder -bool true
-  fi
+  run_defaults com.googlecode.iterm2 LoadPrefsFromCustomFolder -bool true
 
   # --- Specify Custom Preferences Folder Path ---
   # Key:          PrefsCustomFolder
@@ -77,11 +73,7 @@ main() {
   # Reference:    iTerm2 > Preferences > General > Preferences
   # Tip:          Commit the preferences file to your dotfiles repo
   #               to sync settings across machines
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set iTerm2 preference: PrefsCustomFolder to $custom_prefs_dir"
-  else
-    defaults write com.googlecode.iterm2 PrefsCustomFolder -string "$custom_prefs_dir"
-  fi
+  run_defaults com.googlecode.iterm2 PrefsCustomFolder -string "$custom_prefs_dir"
 
   msg_success "iTerm2 configuration complete."
   msg_info "You may need to restart iTerm2 for the new settings to take effect."
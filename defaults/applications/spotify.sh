@@ -108,19 +108,6 @@ msg_info "Configuring Spotify settings..."
 
 # Spotify has limited macOS defaults support. The main user-facing preference:
 
-run_defaults() {
-  local domain="$1"
-  local key="$2"
-  local type="$3"
-  local value="$4"
-
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set Spotify preference: '$key' to '$value'"
-  else
-    defaults write "$domain" "$key" "$type" "$value"
-  fi
-}
-
 # --- Expanded Print Dialog ---
 # Key:          PMPrintingExpandedStateForPrint2
 # Domain:       com.spotify.client
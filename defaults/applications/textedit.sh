@@ -30,20 +30,6 @@
 #
 # ==============================================================================
 
-# A helper function to run `defaults write` commands or print them in dry run mode.
-run_defaults() {
-  local domain="$1"
-  local key="$2"
-  local type="$3"
-  local value="$4"
-
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set TextEdit preference: '$key' to '$value'"
-  else
-    defaults write "$domain" "$key" "$type" "$value"
-  fi
-}
-
 msg_info "Configuring TextEdit settings..."
 
 # ==============================================================================
@@ -139,11 +125,7 @@ run_defaults "com.apple.TextEdit" "NSFixedPitchFontSize" "-int" "13"
 # Source:       https://support.apple.com/guide/textedit/welcome/mac
 # Note:         This uses a string representation of the size tuple.
 #               Window position is not affected by this setting.
-if [ "$DRY_RUN_MODE" = true ]; then
-  msg_info "[Dry Run] Would set TextEdit preference: 'WinV' to '(900, 600)'"
-else
-  defaults write com.apple.TextEdit WinV -string "(900, 600)"
-fi
+run_defaults com.apple.TextEdit WinV -string "(900, 600)"
 
 # ==============================================================================
 # Link and Data Detection Settings
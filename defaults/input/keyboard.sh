@@ -36,21 +36,6 @@
 #
 # ==============================================================================
 
-# A helper function to run `defaults write` commands or print them in dry run mode.
-# This version always writes to NSGlobalDomain since these are global settings.
-run_defaults() {
-  local key="$1"
-  local type="$2"
-  local value="$3"
-
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set Keyboard preference: '$key' to '$value'"
-  else
-    # These settings are global, so we use the NSGlobalDomain.
-    defaults write NSGlobalDomain "$key" "$type" "$value"
-  fi
-}
-
 msg_info "Configuring Keyboard settings..."
 
 # ==============================================================================
@@ -75,7 +60,7 @@ msg_info "Configuring Keyboard settings..."
 # Source:       https://support.apple.com/guide/mac-help/change-keyboard-settings-mchlp1054/mac
 # Note:         A restart may be required for changes to take effect. This
 #               setting is essential for vim users who hold j/k for navigation.
-run_defaults "KeyRepeat" "-int" "1"
+run_defaults "NSGlobalDomain" "KeyRepeat" "-int" "1"
 
 # --- Delay Until Repeat ---
 # Key:          InitialKeyRepeat
@@ -95,7 +80,7 @@ run_defaults "KeyRepeat" "-int" "1"
 # Source:       https://support.apple.com/guide/mac-help/change-keyboard-settings-mchlp1054/mac
 # Note:         Shorter delay is useful when deleting text by holding
 #               backspace or navigating with arrow keys.
-run_defaults "InitialKeyRepeat" "-int" "10"
+run_defaults "NSGlobalDomain" "InitialKeyRepeat" "-int" "10"
 
 
 # ==============================================================================
@@ -120,7 +105,7 @@ run_defaults "InitialKeyRepeat" "-int" "10"
 # See also:     https://support.apple.com/guide/mac-help/use-keyboard-shortcuts-mchlp2262/mac
 # Note:         In dialogs, use Tab to move between controls and Space to
 #               activate buttons. Press Escape to cancel or Enter to confirm.
-run_defaults "AppleKeyboardUIMode" "-int" "2"
+run_defaults "NSGlobalDomain" "AppleKeyboardUIMode" "-int" "2"
 
 
 # ==============================================================================
@@ -142,7 +127,7 @@ run_defaults "AppleKeyboardUIMode" "-int" "2"
 # Source:       https://support.apple.com/guide/mac-help/change-keyboard-settings-mchlp1054/mac
 # Note:         After changing this setting, you may need to restart apps for
 #               the change to take effect. Essential for developers and vim users.
-run_defaults "ApplePressAndHoldEnabled" "-bool" "false"
+run_defaults "NSGlobalDomain" "ApplePressAndHoldEnabled" "-bool" "false"
 
 # --- Disable Auto-Correct ---
 # Key:          NSAutomaticSpellingCorrectionEnabled
@@ -158,7 +143,7 @@ run_defaults "ApplePressAndHoldEnabled" "-bool" "false"
 # Source:       https://support.apple.com/guide/mac-help/change-keyboard-settings-mchlp1054/mac
 # Note:         This is a per-app setting in some applications. This sets the
 #               system-wide default preference.
-run_defaults "NSAutomaticSpellingCorrectionEnabled" "-bool" "false"
+run_defaults "NSGlobalDomain" "NSAutomaticSpellingCorrectionEnabled" "-bool" "false"
 
 # --- Disable Smart Quotes ---
 # Key:          NSAutomaticQuoteSubstitutionEnabled
@@ -175,7 +160,7 @@ run_defaults "NSAutomaticSpellingCorrectionEnabled" "-bool" "false"
 # Source:       https://support.apple.com/guide/mac-help/change-keyboard-settings-mchlp1054/mac
 # Note:         Absolutely critical for developers. Smart quotes cause syntax
 #               errors and are one of the most common copy-paste bugs.
-run_defaults "NSAutomaticQuoteSubstitutionEnabled" "-bool" "false"
+run_defaults "NSGlobalDomain" "NSAutomaticQuoteSubstitutionEnabled" "-bool" "false"
 
 # --- Disable Auto-Capitalization ---
 # Key:          NSAutomaticCapitalizationEnabled
@@ -191,7 +176,7 @@ run_defaults "NSAutomaticQuoteSubstitutionEnabled" "-bool" "false"
 # Source:       https://support.apple.com/guide/mac-help/change-keyboard-settings-mchlp1054/mac
 # Note:         Useful to disable for developers, terminal users, and anyone
 #               who types commands or code in text fields.
-run_defaults "NSAutomaticCapitalizationEnabled" "-bool" "false"
+run_defaults "NSGlobalDomain" "NSAutomaticCapitalizationEnabled" "-bool" "false"
 
 
 msg_success "Keyboard settings applied. Note: A restart is required for these changes to take full effect."
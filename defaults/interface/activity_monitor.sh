@@ -105,20 +105,6 @@
 # Source:       https://support.apple.com/guide/activity-monitor/welcome/mac
 # See also:     man top, man ps, man vm_stat
 
-# A helper function to run `defaults write` commands or print them in dry run mode.
-run_defaults() {
-  local domain="$1"
-  local key="$2"
-  local type="$3"
-  local value="$4"
-
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set Activity Monitor preference: '$key' to '$value'"
-  else
-    defaults write "$domain" "$key" "$type" "$value"
-  fi
-}
-
 msg_info "Configuring Activity Monitor settings..."
 
 # ==============================================================================
@@ -77,20 +77,6 @@
 # Source:       man defaults
 # See also:     https://www.defaults-write.com/tag/dock/
 
-# A helper function to run `defaults write` commands or print them in dry run mode.
-run_defaults() {
-  local domain="$1"
-  local key="$2"
-  local type="$3"
-  local value="$4"
-
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set Dock preference: '$key' to '$value'"
-  else
-    defaults write "$domain" "$key" "$type" "$value"
-  fi
-}
-
 # ==============================================================================
 # Dock Preferences
 # ==============================================================================
@@ -280,13 +266,10 @@ main() {
   fi
 
   # --- Step 4: Restart the Dock ---
-  # Apply all changes at once by restarting the Dock process.
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would restart the Dock."
-  else
-    msg_info "Restarting the Dock to apply changes..."
-    killall Dock
-  fi
+  # Apply all changes at once by restarting the Dock process. dockutil changed
+  # the Dock whatever its preferences were, so this restart is unconditional;
+  # during installation it still happens only once, at the end of stage 11.
+  defaults_restart --always Dock
 
   msg_success "Dock configuration complete."
 }
@@ -90,20 +90,6 @@
 # Source:       man defaults
 # See also:     https://github.com/mathiasbynens/dotfiles/blob/main/.macos
 
-# A helper function to run `defaults write` commands or print them in dry run mode.
-run_defaults() {
-  local domain="$1"
-  local key="$2"
-  local type="$3"
-  local value="$4"
-
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set Finder preference: '$key' to '$value'"
-  else
-    defaults write "$domain" "$key" "$type" "$value"
-  fi
-}
-
 msg_info "Configuring Finder settings..."
 
 # ==============================================================================
@@ -155,11 +141,7 @@ run_defaults "com.apple.finder" "ShowStatusBar" "-bool" "true"
 # Source:       https://support.apple.com/guide/mac-help/show-or-hide-filename-extensions-mchlp2304/mac
 # Security:     Showing extensions helps identify malicious files disguised
 #               with fake extensions (e.g., "document.pdf.exe").
-if [ "$DRY_RUN_MODE" = true ]; then
-  msg_info "[Dry Run] Would set global preference: AppleShowAllExtensions to true"
-else
-  defaults write NSGlobalDomain AppleShowAllExtensions -bool true
-fi
+run_defaults NSGlobalDomain AppleShowAllExtensions -bool true
 
 # --- Default View Style ---
 # Key:          FXPreferredViewStyle
@@ -316,11 +298,7 @@ run_defaults "com.apple.finder" "QLEnableTextSelection" "-bool" "true"
 # Set to:       0.3 (faster response for efficient file management)
 # UI Location:  System Settings > Accessibility > Pointer Control > Spring-loading delay
 # Source:       https://support.apple.com/guide/mac-help/accessibility-pointer-control-settings-mchl5bb87cce/mac
-if [ "$DRY_RUN_MODE" = true ]; then
-  msg_info "[Dry Run] Would set global preference: com.apple.springing.delay to 0.3"
-else
-  defaults write NSGlobalDomain com.apple.springing.delay -float 0.3
-fi
+run_defaults NSGlobalDomain com.apple.springing.delay -float 0.3
 
 # --- Disable Window Animations ---
 # Key:          NSAutomaticWindowAnimationsEnabled
@@ -336,22 +314,15 @@ fi
 # Source:       https://support.apple.com/guide/mac-help/change-general-preferences-mchlp1225/mac
 # Note:         This affects all apps that use standard window opening behavior,
 #               not just Finder.
-if [ "$DRY_RUN_MODE" = true ]; then
-  msg_info "[Dry Run] Would set global preference: NSAutomaticWindowAnimationsEnabled to false"
-else
-  defaults write NSGlobalDomain NSAutomaticWindowAnimationsEnabled -bool false
-fi
+run_defaults NSGlobalDomain NSAutomaticWindowAnimationsEnabled -bool false
 
 # ==============================================================================
 # Apply Changes
 # ==============================================================================
 
 # Changes to Finder require restarting the Finder process to take effect.
-if [ "$DRY_RUN_MODE" = true ]; then
-  msg_info "[Dry Run] Would restart Finder to apply changes."
-else
-  msg_info "Restarting Finder to apply changes..."
-  killall Finder
-fi
+# During installation the restart is deferred to the end of stage 11, and
+# skipped if none of the settings above had to be written.
+defaults_restart Finder
 
 msg_success "Finder settings applied."
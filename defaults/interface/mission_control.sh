@@ -99,20 +99,6 @@
 # Source:       man defaults
 # See also:     https://support.apple.com/en-us/102556
 
-# A helper function to run `defaults write` commands or print them in dry run mode.
-run_defaults() {
-  local domain="$1"
-  local key="$2"
-  local type="$3"
-  local value="$4"
-
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set Mission Control preference: '$key' to '$value'"
-  else
-    defaults write "$domain" "$key" "$type" "$value"
-  fi
-}
-
 msg_info "Configuring Mission Control, Spaces, and Hot Corners settings..."
 
 # ==============================================================================
@@ -204,11 +190,7 @@ run_defaults "com.apple.spaces" "spans-displays" "-bool" "false"
 # UI Location:  System Settings > Desktop & Dock > Mission Control >
 #               When switching to an application, switch to a Space with open windows
 # Source:       https://support.apple.com/guide/mac-help/work-in-multiple-spaces-mh14112/mac
-if [ "$DRY_RUN_MODE" = true ]; then
-  msg_info "[Dry Run] Would set global preference: AppleSpacesSwitchOnActivate to true"
-else
-  defaults write NSGlobalDomain AppleSpacesSwitchOnActivate -bool true
-fi
+run_defaults NSGlobalDomain AppleSpacesSwitchOnActivate -bool true
 
 # ==============================================================================
 # Hot Corners Configuration
@@ -302,11 +284,8 @@ run_defaults "com.apple.dock" "wvous-br-modifier" "-int" "0"
 # ==============================================================================
 
 # Changes to the Dock and Mission Control require restarting the Dock process.
-if [ "$DRY_RUN_MODE" = true ]; then
-  msg_info "[Dry Run] Would restart the Dock to apply changes."
-else
-  msg_info "Restarting the Dock to apply changes..."
-  killall Dock
-fi
+# During installation the restart is deferred to the end of stage 11, and
+# skipped if none of the settings above had to be written.
+defaults_restart Dock
 
 msg_success "Mission Control settings applied."
@@ -94,21 +94,6 @@
 # Source:       man defaults
 # See also:     https://github.com/mathiasbynens/dotfiles/blob/main/.macos
 
-# A helper function to run `defaults write` commands or print them in dry run mode.
-# This version always writes to NSGlobalDomain since these are global settings.
-run_defaults() {
-  local key="$1"
-  local type="$2"
-  local value="$3"
-
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set UI/UX preference: '$key' to '$value'"
-  else
-    # These are global settings, so we use the NSGlobalDomain.
-    defaults write NSGlobalDomain "$key" "$type" "$value"
-  fi
-}
-
 msg_info "Configuring global UI and UX settings..."
 
 # ==============================================================================
@@ -133,7 +118,7 @@ msg_info "Configuring global UI and UX settings..."
 # Note:         With trackpads, Apple defaults to hiding scrollbars since
 #               two-finger scrolling is intuitive. "Always" is better for
 #               mouse users or those who prefer visual scroll indicators.
-run_defaults "AppleShowScrollBars" "-string" "Always"
+run_defaults "NSGlobalDomain" "AppleShowScrollBars" "-string" "Always"
 
 # ==============================================================================
 # Dialog Box Behavior
@@ -156,8 +141,8 @@ run_defaults "AppleShowScrollBars" "-string" "Always"
 # Source:       https://support.apple.com/guide/mac-help/save-documents-mchlp1088/mac
 # Note:         Two keys are used for compatibility across different macOS
 #               versions. Both should be set to ensure the setting works.
-run_defaults "NSNavPanelExpandedStateForSaveMode" "-bool" "true"
-run_defaults "NSNavPanelExpandedStateForSaveMode2" "-bool" "true"
+run_defaults "NSGlobalDomain" "NSNavPanelExpandedStateForSaveMode" "-bool" "true"
+run_defaults "NSGlobalDomain" "NSNavPanelExpandedStateForSaveMode2" "-bool" "true"
 
 # --- Expand Print Panel by Default ---
 # Key:          PMPrintingExpandedStateForPrint
@@ -175,8 +160,8 @@ run_defaults "NSNavPanelExpandedStateForSaveMode2" "-bool" "true"
 # Source:       https://support.apple.com/guide/mac-help/print-documents-mchlp1037/mac
 # Note:         Two keys are used for compatibility across different macOS
 #               versions. Both should be set to ensure the setting works.
-run_defaults "PMPrintingExpandedStateForPrint" "-bool" "true"
-run_defaults "PMPrintingExpandedStateForPrint2" "-bool" "true"
+run_defaults "NSGlobalDomain" "PMPrintingExpandedStateForPrint" "-bool" "true"
+run_defaults "NSGlobalDomain" "PMPrintingExpandedStateForPrint2" "-bool" "true"
 
 # ==============================================================================
 # Application Security
@@ -202,11 +187,7 @@ run_defaults "PMPrintingExpandedStateForPrint2" "-bool" "true"
 #               2. You use antivirus/anti-malware software
 #               3. You understand the risks of running unverified code
 #               This does NOT affect Gatekeeper or code signing requirements.
-if [ "$DRY_RUN_MODE" = true ]; then
-  msg_info "[Dry Run] Would set com.apple.LaunchServices preference: 'LSQuarantine' to 'false'"
-else
-  defaults write com.apple.LaunchServices LSQuarantine -bool false
-fi
+run_defaults com.apple.LaunchServices LSQuarantine -bool false
 
 
 msg_success "Global UI and UX settings applied."
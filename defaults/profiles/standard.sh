@@ -26,20 +26,6 @@
 
 # --- Helper Functions ---------------------------------------------------------
 
-# A helper function to run `defaults write` commands or print them in dry run mode.
-run_defaults() {
-  local domain="$1"
-  local key="$2"
-  local type="$3"
-  local value="$4"
-
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set '$domain' preference: '$key' to '$value'"
-  else
-    defaults write "$domain" "$key" "$type" "$value"
-  fi
-}
-
 # A helper function for sudo-required defaults
 run_sudo_defaults() {
   local domain="$1"
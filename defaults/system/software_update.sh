@@ -88,21 +88,6 @@
 #
 # Source:       https://support.apple.com/en-us/102582
 
-# A helper function to run `defaults write` commands or print them in dry run mode.
-run_defaults() {
-  local domain="$1"
-  local key="$2"
-  local type="$3"
-  local value="$4"
-
-  if [ "$DRY_RUN_MODE" = true ]; then
-    msg_info "[Dry Run] Would set App Store preference: '$key' to '$value'"
-  else
-    # These settings are for the App Store, so we use its domain.
-    defaults write "$domain" "$key" "$type" "$value"
-  fi
-}
-
 msg_info "Configuring Software Update and App Store settings..."
 
 # ==============================================================================
@@ -13,6 +13,10 @@
 # --- Initialization ---------------------------------------------------------
 # Source the centralized initialization script to set up the environment.
 source "$(dirname "${BASH_SOURCE[0]}")/lib/init.sh"
+# The stages use the security and stage-tracking libraries throughout, often
+# inside $(...), so load them once here rather than lazily.
+circus_require_module security ui_extra
+source "$DOTFILES_ROOT/lib/stage_scheduler.sh"
 
 # --- Global State Variables -------------------------------------------------
 export DRY_RUN_MODE=false
@@ -52,8 +56,11 @@ usage() {
   echo "  --role <name>            Specify the role to install (e.g., developer)."
   echo "  --privacy-profile <lvl>  Set privacy/security level (standard, privacy, lockdown)."
   echo "  --dry-run                Run the installer without making any changes."
-  echo "  --force                  Continue past critical preflight failures (not recommended)."
+  echo "  --force                  Continue past critical preflight failures (not recommended),"
+  echo "                           and re-run stages that are already up to date."
   echo "  --non-interactive        Run the installer without prompting for confirmation."
+  echo "  --jobs <n>               Run up to n independent stages at once (default: 1),"
+  echo "                           and up to n defaults scripts at once in stage 11."
   echo "  --log-file <path>        Redirect all log output to the specified file."
   echo "  --log-level <lvl>        Set the console log level (DEBUG, INFO, WARN, ERROR, CRITICAL)."
   echo "  --silent                 Alias for --log-level CRITICAL. Overrides --log-level."
@@ -96,6 +103,13 @@ main() {
       --dry-run) DRY_RUN_MODE=true; shift ;;
       --force) FORCE_MODE=true; shift ;;
       --non-interactive) INTERACTIVE_MODE=false; shift ;;
+      --jobs)
+        if [[ ! "${2:-}" =~ ^[1-9][0-9]*$ ]]; then
+          die "Error: --jobs requires a positive number."
+        fi
+        STAGE_JOBS="$2"
+        shift 2
+        ;;
       --log-file)
         if [[ -z "$2" ]] || [[ "$2" == --* ]]; then
           die "Error: --log-file requires a file path."
@@ -137,23 +151,38 @@ main() {
   prompt_for_confirmation "Ready to begin the installation."
 
   # --- Stage Definitions -------------------------------------------------------
-  # Each stage is defined as: "filename|title|description"
+  # Each stage is defined as: "filename|title|description|dependencies|mode"
+  #
+  # dependencies: numeric prefixes of the stages that must finish first.
+  # mode:         "inline" stages run in this shell with the terminal: anything
+  #               that prompts, needs sudo, or sets variables later stages
+  #               read. "isolated" stages may run in a subshell alongside
+  #               others when --jobs is greater than 1.
+  # inputs:       optional; files the stage applies, relative to the repo root
+  #               ({role} is the install role). When the stage script, these
+  #               files, the role, the privacy profile and the upstream stages'
+  #               fingerprints all match the last successful run, the stage is
+  #               reported as up to date and skipped. Stages that check live
+  #               system state, or that are cheap, leave this empty and always
+  #               run.
+  #
+  # See lib/stage_scheduler.sh.
   local INSTALL_STAGES=(
-    "00-preflight-checks.sh|Preflight Checks|Verifying system readiness"
-    "01-introduction-and-user-interaction.sh|Welcome & Configuration|Displaying introduction and gathering preferences"
-    "02-logging-setup.sh|Logging Setup|Configuring installation logging"
-    "03-homebrew-installation.sh|Homebrew & Packages|Installing Homebrew and bundled packages"
-    "04-macos-system-settings.sh|macOS Settings|Applying system preferences and defaults"
-    "05-oh-my-zsh-installation.sh|Oh My Zsh|Installing shell framework and plugins"
-    "06-repository-management.sh|Repository Sync|Updating repository and submodules"
-    "09-dotfiles-deployment.sh|Dotfiles Deployment|Deploying configuration files"
-    "10-git-configuration.sh|Git Configuration|Setting up Git preferences"
-    "11-defaults-and-additional-configuration.sh|Additional Config|Applying additional settings"
-    "14-cleanup.sh|Cleanup|Removing temporary files"
-    "15-finalization-and-reporting.sh|Finalization|Generating installation report"
-    "16-jetbrains-configuration.sh|JetBrains IDEs|Configuring development environments"
-    "17-secrets-management.sh|Secrets Management|Setting up secure credentials"
-    "18-privacy-and-security.sh|Privacy & Security|Applying security settings"
+    "00-preflight-checks.sh|Preflight Checks|Verifying system readiness||inline"
+    "01-introduction-and-user-interaction.sh|Welcome & Configuration|Displaying introduction and gathering preferences|00|inline"
+    "02-logging-setup.sh|Logging Setup|Configuring installation logging|01|inline"
+    "03-homebrew-installation.sh|Homebrew & Packages|Installing Homebrew and bundled packages|02|inline|Brewfile roles/{role}/Brewfile"
+    "04-macos-system-settings.sh|macOS Settings|Applying system preferences and defaults|02|inline|system/macos"
+    "05-oh-my-zsh-installation.sh|Oh My Zsh|Installing shell framework and plugins|02|isolated"
+    "06-repository-management.sh|Repository Sync|Updating repository and submodules|02|inline"
+    "09-dotfiles-deployment.sh|Dotfiles Deployment|Deploying configuration files|05 06|isolated"
+    "10-git-configuration.sh|Git Configuration|Setting up Git preferences|06|isolated"
+    "11-defaults-and-additional-configuration.sh|Additional Config|Applying additional settings|03 04|inline|defaults roles/{role}/defaults"
+    "14-cleanup.sh|Cleanup|Removing temporary files|03 11|isolated"
+    "15-finalization-and-reporting.sh|Finalization|Generating installation report|04 05 06 09 10 11 14|inline"
+    "16-jetbrains-configuration.sh|JetBrains IDEs|Configuring development environments|09|isolated"
+    "17-secrets-management.sh|Secrets Management|Setting up secure credentials|10|isolated"
+    "18-privacy-and-security.sh|Privacy & Security|Applying security settings|11|inline|security"
   )
 
   local TOTAL_STAGES=${#INSTALL_STAGES[@]}
@@ -170,41 +199,17 @@ main() {
   export INSTALLER_TOTAL_STAGES="$TOTAL_STAGES"
 
   # --- Execute Installation Stages --------------------------------------------
-  local stage_num=0
-  for stage_def in "${INSTALL_STAGES[@]}"; do
-    stage_num=$((stage_num + 1))
-
-    # Parse stage definition
-    IFS='|' read -r stage_file stage_title stage_desc <<< "$stage_def"
-    local stage_path="$DOTFILES_ROOT/install/$stage_file"
-
-    # Export current stage info for the stage script to use
-    export INSTALLER_CURRENT_STAGE="$stage_num"
-    export INSTALLER_STAGE_TITLE="$stage_title"
-
-    if [ -f "$stage_path" ]; then
-      # Display stage header with progress
-      ui_stage_header "$stage_num" "$TOTAL_STAGES" "$stage_title" "$stage_desc"
-
-      # Mark stage as active and record start time
-      ui_stage_start
-      local stage_start_time
-      stage_start_time=$(date +%s)
-
-      # Execute the stage
-      source "$stage_path"
-
-      # Calculate duration and mark complete
-      local stage_end_time
-      stage_end_time=$(date +%s)
-      local stage_duration=$((stage_end_time - stage_start_time))
-      ui_stage_complete
-      ui_stage_complete_msg "$stage_title" "success" "$stage_duration"
-    else
-      ui_stage_fail
-      die "Critical installation stage not found: $stage_path"
-    fi
-  done
+  # Every run is recorded in ~/.circus/runs/ for `fc runs compare`. A run that
+  # dies part-way is written by the EXIT trap with a non-zero status.
+  run_history_start
+  add_exit_trap 'run_history_finish' EXIT
+
+  stages_define "${INSTALL_STAGES[@]}"
+  stages_run
+
+  # Show which stages ran and which were already up to date.
+  ui_stages_print
+  echo ""
 
   # --- Finalization & State Management ----------------------------------------
   # After a successful installation, record the repository root and the
@@ -224,6 +229,7 @@ main() {
     echo "$PRIVACY_PROFILE" > "$state_dir/privacy_profile"
   fi
 
+  run_history_finish 0
   msg_success "Dotfiles Flying Circus setup complete!"
 }
 
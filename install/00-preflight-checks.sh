@@ -10,9 +10,14 @@
 #
 # ==============================================================================
 
+source "$DOTFILES_ROOT/lib/parallel.sh"
+source "$DOTFILES_ROOT/lib/run_history.sh"
+
 # --- Preflight Check Definitions ----------------------------------------------
-# Each check is defined as: "script_name|display_name|critical"
+# Each check is defined as: "script_name|display_name|critical[|timeout]"
 # critical: "yes" = must pass, "no" = warning only
+# timeout:  optional limit in seconds for a non-critical check; defaults to
+#           PREFLIGHT_CHECK_TIMEOUT. Critical checks never have a limit.
 declare -a PREFLIGHT_CHECKS=(
   "preflight-01-macos-check.sh|macOS Detection|yes"
   "preflight-02-root-check.sh|Not Running as Root|yes"
@@ -37,59 +42,46 @@ declare -a PREFLIGHT_CHECKS=(
   "preflight-21-install-sanity-check.sh|Installation Sanity|yes"
 )
 
+# --- Runner Settings ----------------------------------------------------------
+# PREFLIGHT_JOBS: how many non-critical checks may run at once. Critical checks
+# always run one at a time, in order, in the foreground. 1 restores the fully
+# sequential runner with a live spinner per check.
+PREFLIGHT_JOBS="${PREFLIGHT_JOBS:-4}"
+
+# PREFLIGHT_CHECK_TIMEOUT: seconds a non-critical check may run before it is
+# killed and reported as timed out. A hung `networksetup` or `softwareupdate`
+# used to stall the whole installer. 0 disables the limit. Critical checks are
+# sourced in the foreground exactly as before, with the terminal's stdin and no
+# limit, so one that prompts (admin rights, Xcode CLI tools) is never cut off.
+PREFLIGHT_CHECK_TIMEOUT="${PREFLIGHT_CHECK_TIMEOUT:-30}"
+
 # --- Result Tracking ----------------------------------------------------------
 declare -a CHECK_RESULTS=()
 declare -a CHECK_NAMES=()
 declare -a CHECK_CRITICAL=()
+declare -a CHECK_DURATIONS=()
 CHECKS_PASSED=0
 CHECKS_WARNED=0
 CHECKS_FAILED=0
 CRITICAL_FAILURES=0
 
 #
-# Run a single preflight check with spinner UI
+# Source a check script with msg_* output silenced and return its status.
 #
-# @param $1 Script filename
-# @param $2 Display name
-# @param $3 Critical flag (yes/no)
+# Runs in its own subshell, with errexit/ERR disabled inside.
 #
-run_preflight_check() {
-  local script_name="$1"
-  local display_name="$2"
-  local is_critical="$3"
-  local script_path="$DOTFILES_ROOT/install/preflight/$script_name"
-
-  CHECK_NAMES+=("$display_name")
-  CHECK_CRITICAL+=("$is_critical")
-
-  # Check if script exists
-  if [[ ! -f "$script_path" ]]; then
-    CHECK_RESULTS+=("skipped")
-    printf "  ${UI_WARNING}${UI_ICON_WARNING}${UI_RESET} ${UI_MUTED}%-40s${UI_RESET} ${UI_WARNING}Skipped (not found)${UI_RESET}\n" "$display_name"
-    CHECKS_WARNED=$((CHECKS_WARNED + 1))
-    return 0
-  fi
-
-  # Show spinner while running check
-  printf "  ${UI_PRIMARY}${UI_ICON_PENDING}${UI_RESET} %-40s ${UI_MUTED}Checking...${UI_RESET}" "$display_name"
-
-  # Run the check, capturing output
-  local check_output
-  local check_result
-
-  # Source the script in a subshell to capture the result
-  # Redirect output to suppress msg_* output during check
-  # `|| true` on the assignment, and errexit/ERR disabled inside the subshell.
-  #
-  # A preflight check returning non-zero is its NORMAL way of reporting a
-  # problem — 14 of the 21 do it. But the subshell inherits helpers.sh's
-  # `set -e` and ERR trap, so the trap called error_handler -> exit 1 the moment
-  # a check failed. That killed the subshell before `echo "EXIT_CODE:$?"` could
-  # run, and the failed assignment then tripped errexit in the caller. The
-  # result: `./install.sh --dry-run` aborted outright at the first check that
-  # reported anything — for example "Locale & Encoding" on a machine without
-  # LANG set — instead of showing a warning and continuing.
-  check_output=$(
+# A preflight check returning non-zero is its NORMAL way of reporting a
+# problem — 14 of the 21 do it. But the subshell inherits helpers.sh's
+# `set -e` and ERR trap, so the trap called error_handler -> exit 1 the moment
+# a check failed, and the failure then tripped errexit in the caller. The
+# result: `./install.sh --dry-run` aborted outright at the first check that
+# reported anything — for example "Locale & Encoding" on a machine without
+# LANG set — instead of showing a warning and continuing.
+#
+# @param $1 Absolute path to the check script
+#
+_preflight_source_check() {
+  (
     set +e
     trap - ERR
     # Override msg functions to be silent during check
@@ -99,34 +91,154 @@ run_preflight_check() {
     msg_error() { :; }
     msg_debug() { :; }
     export -f msg_info msg_success msg_warning msg_error msg_debug
-    source "$script_path" 2>&1
-    echo "EXIT_CODE:$?"
-  ) || true
+    source "$1"
+  )
+}
+
+#
+# Run one check and write "<status> <duration_ms>" to a result file. <status>
+# is the check's exit code, 124 for a timeout, or "missing" if the script does
+# not exist. Always returns 0 so it is safe both in the foreground and as a
+# pool job.
+#
+# @param $1 Script filename
+# @param $2 Timeout in seconds; 0 sources the check directly, with no limit
+# @param $3 Result file
+#
+_preflight_execute() {
+  local script_path="$DOTFILES_ROOT/install/preflight/$1"
+  local timeout="$2"
+  local result_file="$3"
+
+  if [[ ! -f "$script_path" ]]; then
+    echo "missing 0" > "$result_file"
+    return 0
+  fi
+
+  local start rc=0
+  now_ms
+  start=$NOW_MS
+  if [[ "$timeout" == "0" ]]; then
+    _preflight_source_check "$script_path" >/dev/null 2>&1 || rc=$?
+  else
+    run_with_timeout "$timeout" _preflight_source_check "$script_path" >/dev/null 2>&1 || rc=$?
+  fi
+  now_ms
+
+  echo "$rc $((NOW_MS - start))" > "$result_file"
+  return 0
+}
 
-  # Extract exit code from output
-  check_result=$(echo "$check_output" | grep "EXIT_CODE:" | cut -d: -f2)
+#
+# Record a finished check: update the counters and print its result row.
+#
+# @param $1 Display name
+# @param $2 Critical flag (yes/no)
+# @param $3 Timeout in seconds
+# @param $4 Result file written by _preflight_execute
+#
+_preflight_record() {
+  local display_name="$1"
+  local is_critical="$2"
+  local timeout="$3"
+  local result_file="$4"
+
+  local check_result="" duration_ms=""
+  if [[ -f "$result_file" ]]; then
+    read -r check_result duration_ms < "$result_file" || true
+  fi
   [[ -z "$check_result" ]] && check_result=1
+  [[ -z "$duration_ms" ]] && duration_ms=0
 
-  # Clear the "Checking..." line
-  printf "\r"
+  CHECK_NAMES+=("$display_name")
+  CHECK_CRITICAL+=("$is_critical")
+  CHECK_DURATIONS+=("$duration_ms")
+
+  if [[ "$check_result" == "missing" ]]; then
+    CHECK_RESULTS+=("skipped")
+    printf "  ${UI_WARNING}${UI_ICON_WARNING}${UI_RESET} ${UI_MUTED}%-40s${UI_RESET} ${UI_WARNING}Skipped (not found)${UI_RESET}\n" "$display_name"
+    CHECKS_WARNED=$((CHECKS_WARNED + 1))
+    run_history_check "$display_name" "skipped" 0
+    return 0
+  fi
+
+  msg_debug "Preflight check '$display_name' exited $check_result after ${duration_ms}ms"
+
+  local timed_out=false
+  if [[ "$timeout" != "0" && "$check_result" -eq "$PARALLEL_TIMEOUT_STATUS" ]]; then
+    timed_out=true
+  fi
 
   # Display result
   if [[ "$check_result" -eq 0 ]]; then
     CHECK_RESULTS+=("passed")
-    printf "  ${UI_SUCCESS}${UI_ICON_SUCCESS}${UI_RESET} %-40s ${UI_SUCCESS}Passed${UI_RESET}\n" "$display_name"
+    printf "  ${UI_SUCCESS}${UI_ICON_SUCCESS}${UI_RESET} %-40s ${UI_SUCCESS}Passed${UI_RESET}" "$display_name"
     CHECKS_PASSED=$((CHECKS_PASSED + 1))
+  elif [[ "$is_critical" == "yes" ]]; then
+    CHECK_RESULTS+=("failed")
+    printf "  ${UI_ERROR}${UI_ICON_ERROR}${UI_RESET} %-40s ${UI_ERROR}Failed (Critical)${UI_RESET}" "$display_name"
+    CHECKS_FAILED=$((CHECKS_FAILED + 1))
+    CRITICAL_FAILURES=$((CRITICAL_FAILURES + 1))
   else
-    if [[ "$is_critical" == "yes" ]]; then
-      CHECK_RESULTS+=("failed")
-      printf "  ${UI_ERROR}${UI_ICON_ERROR}${UI_RESET} %-40s ${UI_ERROR}Failed (Critical)${UI_RESET}\n" "$display_name"
-      CHECKS_FAILED=$((CHECKS_FAILED + 1))
-      CRITICAL_FAILURES=$((CRITICAL_FAILURES + 1))
+    CHECK_RESULTS+=("warned")
+    if [[ "$timed_out" == "true" ]]; then
+      printf "  ${UI_WARNING}${UI_ICON_WARNING}${UI_RESET} %-40s ${UI_WARNING}Warning (timed out after %ss)${UI_RESET}" "$display_name" "$timeout"
     else
-      CHECK_RESULTS+=("warned")
-      printf "  ${UI_WARNING}${UI_ICON_WARNING}${UI_RESET} %-40s ${UI_WARNING}Warning${UI_RESET}\n" "$display_name"
-      CHECKS_WARNED=$((CHECKS_WARNED + 1))
+      printf "  ${UI_WARNING}${UI_ICON_WARNING}${UI_RESET} %-40s ${UI_WARNING}Warning${UI_RESET}" "$display_name"
     fi
+    CHECKS_WARNED=$((CHECKS_WARNED + 1))
+  fi
+  printf " ${UI_MUTED}%sms${UI_RESET}\n" "$duration_ms"
+  run_history_check "$display_name" "${CHECK_RESULTS[${#CHECK_RESULTS[@]}-1]}" "$duration_ms"
+
+  return 0
+}
+
+#
+# Print the time limit for a check: none for a critical one, otherwise its own
+# timeout field or PREFLIGHT_CHECK_TIMEOUT.
+#
+# @param $1 Critical flag (yes/no)
+# @param $2 Optional timeout in seconds
+#
+_preflight_timeout() {
+  if [[ "$1" == "yes" ]]; then
+    echo 0
+  else
+    echo "${2:-$PREFLIGHT_CHECK_TIMEOUT}"
   fi
+}
+
+#
+# Run a single preflight check with spinner UI
+#
+# @param $1 Script filename
+# @param $2 Display name
+# @param $3 Critical flag (yes/no)
+# @param $4 Optional timeout in seconds (ignored for critical checks)
+#
+run_preflight_check() {
+  local script_name="$1"
+  local display_name="$2"
+  local is_critical="$3"
+  local timeout
+  timeout=$(_preflight_timeout "$is_critical" "${4:-}")
+
+  local result_file
+  result_file=$(mktemp "${TMPDIR:-/tmp}/circus-preflight.XXXXXX")
+
+  # Show spinner while running check
+  if [[ -f "$DOTFILES_ROOT/install/preflight/$script_name" ]]; then
+    printf "  ${UI_PRIMARY}${UI_ICON_PENDING}${UI_RESET} %-40s ${UI_MUTED}Checking...${UI_RESET}" "$display_name"
+  fi
+
+  _preflight_execute "$script_name" "$timeout" "$result_file"
+
+  # Clear the "Checking..." line
+  printf "\r\033[K"
+
+  _preflight_record "$display_name" "$is_critical" "$timeout" "$result_file"
+  rm -f "$result_file"
 
   # Deliberately return success. The check's outcome is already recorded in
   # CHECK_RESULTS / CHECKS_FAILED / CRITICAL_FAILURES, and display_preflight_summary
@@ -137,6 +249,70 @@ run_preflight_check() {
   return 0
 }
 
+#
+# Run every check, with the non-critical ones on a pool of PREFLIGHT_JOBS
+# workers, then print the results in PREFLIGHT_CHECKS order.
+#
+# The critical checks run one at a time in the foreground, with no time limit,
+# while the pool works through the rest in a background coordinator. Each check writes its result to
+# its own file, so nothing is printed until all of them are done and the
+# summary layout is identical to the sequential runner's.
+#
+run_preflight_checks_parallel() {
+  local results_dir
+  results_dir=$(mktemp -d "${TMPDIR:-/tmp}/circus-preflight.XXXXXX")
+
+  local check_def script_name display_name is_critical timeout
+  local noncritical=0
+  for check_def in "${PREFLIGHT_CHECKS[@]}"; do
+    IFS='|' read -r _ _ is_critical _ <<< "$check_def"
+    [[ "$is_critical" != "yes" ]] && noncritical=$((noncritical + 1))
+  done
+
+  printf "  ${UI_PRIMARY}${UI_ICON_PENDING}${UI_RESET} %-40s ${UI_MUTED}Checking...${UI_RESET}" \
+    "${#PREFLIGHT_CHECKS[@]} checks ($noncritical on $PREFLIGHT_JOBS workers)"
+
+  (
+    set +e
+    trap - ERR
+    pool_init "$PREFLIGHT_JOBS"
+    local index=0
+    for check_def in "${PREFLIGHT_CHECKS[@]}"; do
+      IFS='|' read -r script_name _ is_critical timeout <<< "$check_def"
+      if [[ "$is_critical" != "yes" ]]; then
+        pool_spawn _preflight_execute "$script_name" "$(_preflight_timeout no "$timeout")" "$results_dir/$index"
+      fi
+      index=$((index + 1))
+    done
+    pool_wait
+  ) &
+  local pool_pid=$!
+
+  local index=0
+  for check_def in "${PREFLIGHT_CHECKS[@]}"; do
+    IFS='|' read -r script_name _ is_critical timeout <<< "$check_def"
+    if [[ "$is_critical" == "yes" ]]; then
+      _preflight_execute "$script_name" 0 "$results_dir/$index"
+    fi
+    index=$((index + 1))
+  done
+
+  wait "$pool_pid" 2>/dev/null || true
+
+  # Clear the "Checking..." line
+  printf "\r\033[K"
+
+  index=0
+  for check_def in "${PREFLIGHT_CHECKS[@]}"; do
+    IFS='|' read -r script_name display_name is_critical timeout <<< "$check_def"
+    _preflight_record "$display_name" "$is_critical" "$(_preflight_timeout "$is_critical" "$timeout")" "$results_dir/$index"
+    index=$((index + 1))
+  done
+
+  rm -rf "$results_dir"
+  return 0
+}
+
 #
 # Display the preflight summary
 #
@@ -192,10 +368,14 @@ main() {
   printf "${UI_RESET}\n"
   echo ""
 
-  for check_def in "${PREFLIGHT_CHECKS[@]}"; do
-    IFS='|' read -r script_name display_name is_critical <<< "$check_def"
-    run_preflight_check "$script_name" "$display_name" "$is_critical"
-  done
+  if [[ "$PREFLIGHT_JOBS" -gt 1 ]]; then
+    run_preflight_checks_parallel
+  else
+    for check_def in "${PREFLIGHT_CHECKS[@]}"; do
+      IFS='|' read -r script_name display_name is_critical timeout <<< "$check_def"
+      run_preflight_check "$script_name" "$display_name" "$is_critical" "$timeout"
+    done
+  fi
 
   # Display summary.
   #
@@ -10,6 +10,299 @@
 #
 # ==============================================================================
 
+source "$DOTFILES_ROOT/lib/parallel.sh"
+
+# --- Runner Settings ----------------------------------------------------------
+# DEFAULTS_JOBS: how many defaults scripts may run at once. Defaults to the
+# installer's --jobs value; 1 sources the scripts one by one in the installer's
+# own shell, as before. With more, each script runs in its own subshell on a
+# pool of workers. Scripts that touch a common preference domain are kept in
+# one group and run in order, and groups that need sudo run in the foreground
+# with live output.
+DEFAULTS_JOBS="${DEFAULTS_JOBS:-${STAGE_JOBS:-1}}"
+
+# --- Concurrent Runner --------------------------------------------------------
+
+#
+# @description
+#   Works out which scripts may run at the same time. Reads each script once
+#   (a single awk pass over all of them) and collects the preference domains it
+#   writes: the first argument of run_defaults, run_sudo_defaults and
+#   `defaults write|delete|import|rename`, com.apple.dock for dockutil, and the
+#   base name of a plist path. A domain held in a variable is looked up among
+#   the script's literal assignments; a function parameter is skipped, since
+#   its callers name the domain. Scripts sharing a domain land in one group.
+#   A domain that cannot be worked out could be anything, so it puts every
+#   script in one group. A group is "foreground" if any script in it runs
+#   sudo, systemsetup or socketfilterfw, which may prompt for a password.
+#
+#   Prints one "index<TAB>group<TAB>lane" row per script, in argument order,
+#   where group is the index of the group's first script and lane is
+#   "foreground" or "pool".
+#
+# @param $@ Script paths.
+#
+_defaults_script_groups() {
+  local file
+  for file in "$@"; do
+    printf '\001\n'
+    cat "$file" 2>/dev/null || true
+    printf '\n'
+  done | awk '
+    function find(x) {
+      while (parent[x] != x) x = parent[x]
+      return x
+    }
+    function union(a, b) {
+      a = find(a); b = find(b)
+      if (a < b) parent[b] = a
+      else if (b < a) parent[a] = b
+    }
+    function claim(tok,   name) {
+      gsub(/["\047]/, "", tok)
+      if (tok ~ /^\$/) {
+        name = tok
+        gsub(/[${}]/, "", name)
+        if (name ~ /^[0-9@*]$/) return
+        if (!(name in vars)) { tok = "*" }
+        else {
+          tok = vars[name]
+          if (tok ~ /^\$[0-9@*{]/) return
+          if (tok ~ /^\$/) tok = "*"
+        }
+      }
+      if (tok == "" ) return
+      if (tok == "-g" || tok == "-globalDomain") tok = "NSGlobalDomain"
+      sub(/.*\//, "", tok)
+      sub(/\.plist$/, "", tok)
+      if (tok in owner) union(owner[tok], n)
+      else owner[tok] = n
+    }
+    $0 == "\001" {
+      n++
+      parent[n] = n
+      split("", vars)
+      next
+    }
+    /^[[:space:]]*#/ { next }
+    {
+      if (match($0, /^[[:space:]]*(local[[:space:]]+|readonly[[:space:]]+)?[A-Za-z_][A-Za-z0-9_]*=/)) {
+        assign = substr($0, RSTART, RLENGTH - 1)
+        sub(/^[[:space:]]*(local|readonly)?[[:space:]]*/, "", assign)
+        value = substr($0, RSTART + RLENGTH)
+        if (value ~ /^"/) { sub(/^"/, "", value); sub(/".*/, "", value) }
+        else if (value ~ /^\047/) { sub(/^\047/, "", value); sub(/\047.*/, "", value) }
+        else sub(/[[:space:];].*/, "", value)
+        vars[assign] = value
+      }
+      for (i = 1; i <= NF; i++) {
+        word = $i
+        sub(/^(\$\(|\(|!)/, "", word)
+        command_position = (i == 1 || $(i - 1) ~ /(^|[;&|(])$|^(if|elif|then|do|else|while|until|!|\$\()$/)
+        if (command_position && word ~ /^(sudo|run_sudo|run_systemsetup|run_socketfilterfw)$/) {
+          foreground[n] = 1
+        }
+        if (word == "run_defaults" || word == "run_sudo_defaults") {
+          j = i + 1
+          if ($j == "-currentHost") j++
+          if (j <= NF) claim($j)
+        } else if (word == "defaults") {
+          j = i + 1
+          if ($j == "-currentHost") j++
+          if ($j ~ /^(write|delete|import|rename)$/ && j < NF) claim($(j + 1))
+        } else if (word ~ /^dockutil/) {
+          claim("com.apple.dock")
+        }
+      }
+    }
+    END {
+      if ("*" in owner) for (k = 1; k <= n; k++) union(k, owner["*"])
+      for (k = 1; k <= n; k++) if (foreground[k]) fg[find(k)] = 1
+      for (k = 1; k <= n; k++) {
+        root = find(k)
+        printf "%d\t%d\t%s\n", k - 1, root - 1, (root in fg) ? "foreground" : "pool"
+      }
+    }
+  '
+}
+
+#
+# @description
+#   Runs one defaults script in a subshell, recording its exit status and
+#   duration in <prefix>.status and, when a defaults plan is open, the keys and
+#   restarts it declared in <prefix>.plan for the installer to merge.
+#
+# @param $1 Script path.
+# @param $2 Result file prefix.
+#
+_defaults_run_script() {
+  local file="$1"
+  local prefix="$2"
+  (
+    # The installer's EXIT handlers and pending log lines are not this
+    # script's to run or flush.
+    trap - EXIT
+    _LOG_BUFFER=""
+    _LOG_BUFFER_COUNT=0
+    _LOG_BUFFER_SUBSHELL=$BASH_SUBSHELL
+
+    now_ms
+    _defaults_started=$NOW_MS
+    trap '_defaults_rc=$?
+      now_ms
+      echo "$_defaults_rc $((NOW_MS - _defaults_started))" > "$prefix.status"
+      [ "${DEFAULTS_PLAN_ACTIVE:-false}" = true ] && defaults_plan_export > "$prefix.plan"
+      log_flush' EXIT
+
+    [ "${DEFAULTS_PLAN_ACTIVE:-false}" = true ] && defaults_plan_begin
+    DEFAULTS_PLAN_SOURCE="$file"
+    _defaults_rc=0
+    # shellcheck source=/dev/null
+    source "$file" || _defaults_rc=$?
+    exit "$_defaults_rc"
+  )
+}
+
+#
+# @description
+#   One pool worker. Works through the groups listed in <work>/groups (one
+#   line of space-separated script indices per group), claiming each with an
+#   exclusive create of <work>/claim.<group> so that no two workers take the
+#   same group. A worker that finishes early simply claims more, so nothing
+#   has to poll for free slots. Each script runs in its own subshell with its
+#   output buffered in <work>/<index>.out and its log lines held until it
+#   exits, so concurrent scripts do not interleave.
+#
+# @param $1 Work directory.
+# @param $@ All script paths.
+#
+_defaults_run_worker() {
+  local work="$1"
+  shift
+  local files=("$@")
+  local group=0 members index claimed
+  LOG_BUFFERED=true
+  LOG_BUFFER_LINES=100000
+  while IFS= read -r members; do
+    # noclobber makes the redirection an O_EXCL create: only one worker can
+    # create the claim file, and unlike mkdir it costs no fork.
+    claimed=false
+    set -C
+    { : > "$work/claim.$group"; } 2>/dev/null && claimed=true
+    set +C
+    if [ "$claimed" = true ]; then
+      for index in $members; do
+        _defaults_run_script "${files[index]}" "$work/$index" > "$work/$index.out" 2>&1 < /dev/null || true
+      done
+    fi
+    group=$((group + 1))
+  done < "$work/groups"
+}
+
+#
+# @description
+#   Runs defaults scripts concurrently. Pool groups run on up to DEFAULTS_JOBS
+#   workers in a background coordinator while the foreground groups run here
+#   with live output. Afterwards the buffered output is replayed in script
+#   order, each script's status and duration are listed, and the keys the
+#   scripts declared are merged into the open defaults plan in script order,
+#   so a later script still wins over an earlier one.
+#
+# @param $1 Directory the scripts came from, for display.
+# @param $@ Script paths.
+#
+_defaults_run_concurrent() {
+  local base_dir="$1"
+  shift
+  local files=("$@")
+
+  local work
+  work=$(mktemp -d "${TMPDIR:-/tmp}/circus-defaults.XXXXXX")
+
+  # lanes[i]: "foreground" or "pool". pool_groups[g]: the space-separated
+  # script indices of one pool group, whose first script is group_ids[g].
+  local lanes=() group_ids=() pool_groups=()
+  local index group lane g
+  while IFS=$'\t' read -r index group lane; do
+    lanes[index]="$lane"
+    [ "$lane" = "pool" ] || continue
+    g=""
+    for g in ${group_ids[@]+"${!group_ids[@]}"}; do
+      [ "${group_ids[g]}" = "$group" ] && break
+    done
+    if [ "${group_ids[g]:-}" != "$group" ]; then
+      g=${#group_ids[@]}
+      group_ids[g]="$group"
+    fi
+    pool_groups[g]="${pool_groups[g]:-}$index "
+  done < <(_defaults_script_groups "${files[@]}")
+
+  local workers=$DEFAULTS_JOBS
+  [ "$workers" -le "${#pool_groups[@]}" ] || workers=${#pool_groups[@]}
+
+  msg_info "Running ${#files[@]} defaults scripts (${#pool_groups[@]} independent groups on $workers workers)..."
+  now_ms
+  local started=$NOW_MS
+
+  printf '%s\n' ${pool_groups[@]+"${pool_groups[@]}"} > "$work/groups"
+  (
+    set +e
+    trap - ERR EXIT
+    pool_init "$workers"
+    local worker
+    for ((worker = 0; worker < workers; worker++)); do
+      pool_spawn _defaults_run_worker "$work" "${files[@]}"
+    done
+    pool_wait
+  ) &
+  local pool_pid=$!
+
+  for index in "${!files[@]}"; do
+    [ "${lanes[index]}" = "foreground" ] || continue
+    msg_info "Running configuration script: '${files[index]}'..."
+    _defaults_run_script "${files[index]}" "$work/$index" || true
+  done
+
+  wait "$pool_pid" 2>/dev/null || true
+  now_ms
+  local elapsed=$((NOW_MS - started))
+
+  for index in "${!files[@]}"; do
+    [ "${lanes[index]}" = "pool" ] || continue
+    msg_info "Running configuration script: '${files[index]}'..."
+    cat "$work/$index.out" 2>/dev/null || true
+  done
+
+  # --- Per-Script Report ---
+  local rc ms name failed=()
+  echo ""
+  for index in "${!files[@]}"; do
+    rc="" ms=0
+    [ -s "$work/$index.status" ] && read -r rc ms < "$work/$index.status"
+    name="${files[index]#"$base_dir"/}"
+    if [ "$rc" = "0" ]; then
+      printf "  ${UI_SUCCESS}${UI_ICON_SUCCESS}${UI_RESET} %-48s ${UI_MUTED}%sms${UI_RESET}\n" "$name" "$ms"
+    else
+      printf "  ${UI_WARNING}${UI_ICON_WARNING}${UI_RESET} %-48s ${UI_WARNING}exit %s${UI_RESET} ${UI_MUTED}%sms${UI_RESET}\n" "$name" "${rc:-?}" "$ms"
+      failed+=("${files[index]}")
+    fi
+    if [ "${DEFAULTS_PLAN_ACTIVE:-false}" = true ] && [ -f "$work/$index.plan" ]; then
+      # shellcheck source=/dev/null
+      source "$work/$index.plan"
+    fi
+  done
+  echo ""
+  msg_info "Defaults scripts finished in ${elapsed}ms."
+
+  local file
+  for file in ${failed[@]+"${failed[@]}"}; do
+    msg_warning "Configuration script did not complete: '$file' (continuing)."
+  done
+
+  rm -rf "$work"
+  return 0
+}
+
 #
 # Helper function to source scripts from a given directory.
 #
@@ -49,6 +342,10 @@ source_defaults_from_dir() {
   fi
 
   msg_info "Applying $type defaults from '$dir_to_source'..."
+  if [ "$DEFAULTS_JOBS" -gt 1 ] 2>/dev/null && [ ${#sh_files[@]} -gt 1 ]; then
+    _defaults_run_concurrent "$dir_to_source" "${sh_files[@]}"
+    return 0
+  fi
   for file in "${sh_files[@]}"; do
     if [ -f "$file" ]; then
       msg_info "Running configuration script: '$file'..."
@@ -60,6 +357,8 @@ source_defaults_from_dir() {
       # missing nvm ended the installer before it reached the ~30 scripts
       # queued behind it. `|| ...` also suspends errexit for the sourced
       # script, so a failing step inside one no longer aborts either.
+      # Restarts the script asks for are tied to the keys it declares.
+      DEFAULTS_PLAN_SOURCE="$file"
       # shellcheck source=/dev/null
       source "$file" || msg_warning "Configuration script did not complete: '$file' (continuing)."
     fi
@@ -69,6 +368,18 @@ source_defaults_from_dir() {
 main() {
   msg_info "Stage 11: Defaults and Additional Configuration"
 
+  # --- Open the Defaults Plan ---
+  # The scripts below only declare the preferences they want (run_defaults)
+  # and the apps to restart (defaults_restart). defaults_plan_apply at the end
+  # writes just the keys that differ and restarts each app at most once.
+  # CIRCUS_DEFAULTS_PLAN=false makes every script write and restart as it goes.
+  local use_plan=false
+  if [ "${CIRCUS_DEFAULTS_PLAN:-true}" != false ]; then
+    circus_require_module defaults_plan
+    defaults_plan_begin
+    use_plan=true
+  fi
+
   # --- Apply Base Defaults ---
   local base_defaults_dir="$DOTFILES_ROOT/defaults"
   source_defaults_from_dir "$base_defaults_dir" "base"
@@ -80,6 +391,7 @@ main() {
     local profile_script="$DOTFILES_ROOT/defaults/profiles/${PRIVACY_PROFILE}.sh"
     if [ -f "$profile_script" ]; then
       msg_info "Applying privacy profile: $PRIVACY_PROFILE"
+      DEFAULTS_PLAN_SOURCE="$profile_script"
       # shellcheck source=/dev/null
       source "$profile_script"
     else
@@ -93,6 +405,11 @@ main() {
     source_defaults_from_dir "$role_defaults_dir" "role-specific ($INSTALL_ROLE)"
   fi
 
+  # --- Apply the Defaults Plan ---
+  if [ "$use_plan" = true ]; then
+    defaults_plan_apply || msg_warning "Some defaults could not be written (continuing)."
+  fi
+
   msg_success "Defaults and additional configuration complete."
 }
 
@@ -10,6 +10,11 @@
 #
 # ==============================================================================
 
+# Batched install helpers (brew_missing, brew_install_batch) and the shared
+# Brewfile index (brewfile_missing).
+source "$DOTFILES_ROOT/lib/homebrew.sh"
+source "$DOTFILES_ROOT/lib/brewfile.sh"
+
 # --- Install Xcode Command Line Tools ---
 install_xcode_clt() {
   if xcode-select -p >/dev/null 2>&1; then
@@ -94,23 +99,25 @@ install_core_dependencies() {
     "coreutils"
   )
 
+  # Install gum if user requested rich TUI
+  if [ "$USE_GUM" = true ]; then
+    core_packages+=("gum")
+  fi
+
+  # One snapshot of what is installed and one `brew install` for whatever is
+  # missing, rather than a `brew list` and `brew install` per package.
+  brew_snapshot_installed
+  brew_missing formula "${core_packages[@]}"
+
+  local pkg
   for pkg in "${core_packages[@]}"; do
-    if brew list "$pkg" >/dev/null 2>&1; then
+    if [[ " ${BREW_MISSING[*]-} " != *" $pkg "* ]]; then
       msg_info "  $pkg: Already installed"
-    else
-      msg_info "  Installing $pkg..."
-      brew install "$pkg"
     fi
   done
 
-  # Install gum if user requested rich TUI
-  if [ "$USE_GUM" = true ]; then
-    if brew list gum >/dev/null 2>&1; then
-      msg_info "  gum: Already installed"
-    else
-      msg_info "  Installing gum for rich TUI..."
-      brew install gum
-    fi
+  if ! brew_install_batch formula ${BREW_MISSING[@]+"${BREW_MISSING[@]}"}; then
+    die "Failed to install core dependencies: ${BREW_FAILED[*]}"
   fi
 
   msg_success "Core dependencies installed."
@@ -121,8 +128,24 @@ install_role_brewfile() {
   local role_brewfile="$DOTFILES_ROOT/roles/${BOOTSTRAP_ROLE}/Brewfile"
 
   if [ -n "$BOOTSTRAP_ROLE" ] && [ -f "$role_brewfile" ]; then
-    msg_info "Installing packages from role Brewfile: $BOOTSTRAP_ROLE"
+    # `brew bundle` resolves every entry through Homebrew even when all of them
+    # are already installed; compare against the snapshot first and only hand
+    # it the file when something is actually missing.
+    local missing
+    brew_snapshot_installed
+    missing=$(
+      brewfile_missing formula "$role_brewfile"
+      brewfile_missing cask "$role_brewfile"
+      brewfile_missing mas "$role_brewfile"
+    )
+    if [ -z "$missing" ]; then
+      msg_success "Role packages already installed: $BOOTSTRAP_ROLE"
+      return 0
+    fi
+
+    msg_info "Installing $(echo "$missing" | wc -l | tr -d ' ') missing packages from role Brewfile: $BOOTSTRAP_ROLE"
     brew bundle install --file="$role_brewfile" || true
+    brew_cache_invalidate
     msg_success "Role packages installed."
   else
     msg_info "No role-specific Brewfile found. Skipping."
@@ -0,0 +1,259 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         lib/brewfile.sh
+#
+# DESCRIPTION:  One parser for every Brewfile the framework knows about, and
+#               the set arithmetic the commands built on them share: which
+#               packages are expected, which are missing, which are orphaned.
+#
+#               The files are parsed with a single awk pass into an index of
+#               "type<TAB>name<TAB>tap<TAB>source" rows, where type is tap,
+#               brew, cask or mas. A tap-qualified package ("user/tap/name") is
+#               indexed under its short name, which is what `brew list` prints,
+#               with "user/tap" in the tap column; a mas app is indexed by its
+#               numeric id. The index is cached under
+#               ~/.circus/cache/brewfile/, keyed by the files' paths, sizes and
+#               modification times, so an unchanged set of files is not
+#               parsed again.
+#
+#               What is installed comes from the snapshot in lib/homebrew.sh,
+#               so one process asks brew at most once per package kind.
+#
+# USAGE:
+#   source "$DOTFILES_ROOT/lib/brewfile.sh"
+#   brewfile_missing formula                  # expected but not installed
+#   brewfile_orphaned cask                    # installed but not expected
+#   brewfile_expected formula "$role_brewfile"
+#
+# ==============================================================================
+
+source "$DOTFILES_ROOT/lib/homebrew.sh"
+
+# Where parsed indexes are kept. Safe to delete at any time.
+BREWFILE_CACHE_DIR="${BREWFILE_CACHE_DIR:-$HOME/.circus/cache/brewfile}"
+
+# Path of the index built by the last brewfile_index call.
+BREWFILE_INDEX=""
+
+# --- Sources ----------------------------------------------------------------
+
+#
+# @description
+#   Prints the Brewfiles that define the expected package set, in precedence
+#   order: the base Brewfile, each role's Brewfile, etc/Brewfile, and the
+#   user's Brewfile-compatible ~/.config/circus/apps.conf. Only files that
+#   exist are printed.
+#
+brewfile_paths() {
+  local bf
+  for bf in "$DOTFILES_ROOT/Brewfile" "$DOTFILES_ROOT"/roles/*/Brewfile \
+            "$DOTFILES_ROOT/etc/Brewfile" "$HOME/.config/circus/apps.conf"; do
+    [ -f "$bf" ] && echo "$bf"
+  done
+  return 0
+}
+
+# --- Index ------------------------------------------------------------------
+
+#
+# @description
+#   Prints "mtime size path" for each file, the key an index is cached under.
+#   Uses $OSTYPE rather than forking `uname` to pick the stat dialect.
+#
+# @param $@ Files.
+#
+_brewfile_cache_key() {
+  case "${OSTYPE:-}" in
+    darwin*) stat -f '%m %z %N' "$@" 2>/dev/null ;;
+    *)       stat -c '%Y %s %n' "$@" 2>/dev/null ;;
+  esac
+  return 0
+}
+
+#
+# @description
+#   Parses Brewfiles into index rows. Comments and `cask_args` lines are
+#   ignored; options after the quoted name are dropped.
+#
+# @param $@ Files.
+#
+_brewfile_parse() {
+  awk '
+    {
+      line = $0
+      sub(/#.*/, "", line)
+    }
+    line ~ /^[[:space:]]*(tap|brew|cask|mas)[[:space:]]+"/ {
+      split(line, words, /[[:space:]]+/)
+      type = (words[1] == "") ? words[2] : words[1]
+      name = line
+      sub(/^[^"]*"/, "", name)
+      sub(/".*/, "", name)
+      if (name == "") next
+
+      tap = ""
+      if (type == "tap") {
+        tap = name
+      } else if (type == "mas") {
+        # mas "Name", id: 123 -- `mas list` knows apps by id.
+        if (match(line, /id:[[:space:]]*[0-9]+/) == 0) next
+        name = substr(line, RSTART, RLENGTH)
+        sub(/[^0-9]+/, "", name)
+      } else if (name ~ /\//) {
+        tap = name
+        sub(/\/[^\/]*$/, "", tap)
+        sub(/.*\//, "", name)
+      }
+      print type "\t" name "\t" tap "\t" FILENAME
+    }
+  ' "$@"
+}
+
+#
+# @description
+#   Builds, or reuses, the index of the given Brewfiles and leaves its path in
+#   BREWFILE_INDEX. The index is rebuilt when any file's size or modification
+#   time changes, or when the set of files does. It is written to a temporary
+#   file and renamed into place, so concurrent callers never read half an index.
+#
+# @param $@ Brewfiles (default: brewfile_paths).
+#
+brewfile_index() {
+  local files=("$@")
+  if [ "${#files[@]}" -eq 0 ]; then
+    local bf
+    while IFS= read -r bf; do
+      files+=("$bf")
+    done < <(brewfile_paths)
+  fi
+
+  mkdir -p "$BREWFILE_CACHE_DIR" 2>/dev/null || true
+
+  local key name
+  key=$(_brewfile_cache_key ${files[@]+"${files[@]}"})
+  name=$(printf '%s\n' ${files[@]+"${files[@]}"} | cksum | tr ' ' '-')
+  BREWFILE_INDEX="$BREWFILE_CACHE_DIR/index.$name.tsv"
+
+  if [ -f "$BREWFILE_INDEX" ] && [ -f "$BREWFILE_INDEX.key" ] &&
+     [ "$(cat "$BREWFILE_INDEX.key")" = "$key" ]; then
+    return 0
+  fi
+
+  # An unwritable cache directory still yields an index, just not a cached one.
+  local tmp
+  if ! tmp=$(mktemp "$BREWFILE_CACHE_DIR/.index.XXXXXX" 2>/dev/null); then
+    tmp=$(mktemp "${TMPDIR:-/tmp}/circus-brewfile.XXXXXX")
+    BREWFILE_INDEX="$tmp"
+  fi
+
+  if [ "${#files[@]}" -gt 0 ]; then
+    _brewfile_parse "${files[@]}" > "$tmp" 2>/dev/null || true
+  else
+    : > "$tmp"
+  fi
+
+  if [ "$BREWFILE_INDEX" != "$tmp" ]; then
+    printf '%s\n' "$key" > "$tmp.key"
+    mv -f "$tmp" "$BREWFILE_INDEX"
+    mv -f "$tmp.key" "$BREWFILE_INDEX.key"
+  fi
+}
+
+# --- Sets -------------------------------------------------------------------
+#
+# Every set is printed one name per line, sorted with LC_ALL=C and
+# deduplicated, so any two can be combined with `comm`.
+
+#
+# @description
+#   Maps a package kind to the Brewfile keyword that declares it.
+#
+# @param $1 "formula", "cask", "tap" or "mas".
+#
+_brewfile_type() {
+  case "$1" in
+    formula|formulae|brew) echo "brew" ;;
+    cask|casks) echo "cask" ;;
+    *) echo "$1" ;;
+  esac
+}
+
+#
+# @description Prints the packages of one kind that the Brewfiles declare.
+#
+# @param $1 "formula", "cask", "tap" or "mas".
+# @param $@ Brewfiles (default: brewfile_paths).
+#
+brewfile_expected() {
+  local type
+  type=$(_brewfile_type "$1")
+  shift
+
+  brewfile_index "$@"
+  awk -F '\t' -v type="$type" '$1 == type { print $2 }' "$BREWFILE_INDEX" | LC_ALL=C sort -u
+}
+
+#
+# @description
+#   Prints the installed formulae or casks, from the lib/homebrew.sh snapshot,
+#   or the ids of the installed Mac App Store apps. Take the snapshot
+#   (brew_snapshot_installed) before calling this from a command substitution,
+#   or each call will ask brew again.
+#
+# @param $1 "formula", "cask" or "mas".
+#
+brewfile_installed() {
+  local type
+  type=$(_brewfile_type "$1")
+
+  if [ "$type" = "mas" ]; then
+    mas list 2>/dev/null | awk '{ print $1 }' | LC_ALL=C sort -u
+    return 0
+  fi
+
+  brew_snapshot_installed
+
+  local installed="$_BREW_INSTALLED_FORMULAE"
+  [ "$type" = "cask" ] && installed="$_BREW_INSTALLED_CASKS"
+  printf '%s' "$installed" | awk 'NF' | LC_ALL=C sort -u
+}
+
+#
+# @description Prints the declared packages of one kind that are not installed.
+#
+# @param $1 "formula", "cask" or "mas".
+# @param $@ Brewfiles (default: brewfile_paths).
+#
+brewfile_missing() {
+  local kind="$1"
+  shift
+
+  # Snapshot here: the process substitutions below are subshells, and each
+  # would otherwise ask brew on its own. App Store apps come from `mas list`
+  # and are never in the snapshot, so they do not take one.
+  case "$kind" in
+    mas) ;;
+    *) brew_snapshot_installed ;;
+  esac
+  LC_ALL=C comm -23 <(brewfile_expected "$kind" "$@") <(brewfile_installed "$kind")
+}
+
+#
+# @description Prints the installed packages of one kind no Brewfile declares.
+#
+# @param $1 "formula" or "cask".
+# @param $@ Brewfiles (default: brewfile_paths).
+#
+brewfile_orphaned() {
+  local kind="$1"
+  shift
+
+  brew_snapshot_installed
+  LC_ALL=C comm -13 <(brewfile_expected "$kind" "$@") <(brewfile_installed "$kind")
+}
+
+export -f brewfile_paths brewfile_index brewfile_expected brewfile_installed
+export -f brewfile_missing brewfile_orphaned
+export -f _brewfile_cache_key _brewfile_parse _brewfile_type
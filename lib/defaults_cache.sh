@@ -0,0 +1,284 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         lib/defaults_cache.sh
+#
+# DESCRIPTION:  A per-run, in-memory cache of macOS preference domains.
+#
+#               `fc defaults status` and `fc config-audit` used to run one
+#               `defaults read <domain> <key>` per key, although nearly all of
+#               those keys live in a handful of domains (com.apple.dock,
+#               com.apple.finder, NSGlobalDomain). This library exports each
+#               domain once with `defaults export <domain> -`, parses the plist
+#               with a single awk pass and answers every later lookup in that
+#               domain from memory.
+#
+#               The cache lives in shell variables, so it only lasts for the
+#               current process. `run_defaults` drops a domain from it after
+#               writing to that domain.
+#
+# USAGE:
+#   circus_require_module defaults_cache
+#   if defaults_cache_get com.apple.dock autohide; then
+#     echo "$DEFAULTS_CACHE_VALUE"
+#   fi
+#
+# ==============================================================================
+
+# --- Cache State --------------------------------------------------------------
+#
+# One slot per loaded domain. A slot's keys and values are the entries from
+# its START up to (not including) its END in the flat arrays below. Parallel
+# indexed arrays, for bash 3.2. A domain whose export failed (for example a
+# plist given by path) is recorded with the "read" mode, and its keys are read
+# one at a time as before.
+
+_DEFAULTS_CACHE_DOMAINS=()
+_DEFAULTS_CACHE_MODES=()
+_DEFAULTS_CACHE_START=()
+_DEFAULTS_CACHE_END=()
+
+# "value" for a scalar; "read" for an array, dict, date or data value, whose
+# `defaults read` rendering is not worth reproducing here.
+_DEFAULTS_CACHE_KINDS=()
+_DEFAULTS_CACHE_KEYS=()
+_DEFAULTS_CACHE_VALUES=()
+
+# Result of the last successful defaults_cache_get.
+DEFAULTS_CACHE_VALUE=""
+
+#
+# @description
+#   Converts the XML plist of a `defaults export` on stdin into one
+#   tab-separated row per top-level key: the kind ("value" or "read"), the key
+#   and, for a scalar, the value as `defaults read` prints it (booleans as 1
+#   or 0, reals with %.15g).
+#
+_defaults_cache_parse() {
+  awk '
+    function decode(s) {
+      gsub(/&lt;/, "<", s)
+      gsub(/&gt;/, ">", s)
+      gsub(/&quot;/, "\"", s)
+      gsub(/&apos;/, "'"'"'", s)
+      gsub(/&amp;/, "\\&", s)
+      return s
+    }
+    function emit(kind, value) {
+      if (key == "") return
+      if (kind == "value" && (index(value, "\n") || index(value, "&#"))) {
+        kind = "read"
+      }
+      if (kind == "read") value = ""
+      printf "%s\t%s\t%s\n", kind, decode(key), decode(value)
+      key = ""
+    }
+    function tag(t,   name) {
+      name = t
+      sub(/[[:space:]].*/, "", name)
+      if (name ~ /^[?!]/) return
+
+      if (name == "dict" || name == "array") {
+        if (depth == 1) emit("read", "")
+        depth++
+      } else if (name == "/dict" || name == "/array") {
+        depth--
+      } else if (name == "dict/" || name == "array/") {
+        if (depth == 1) emit("read", "")
+      } else if (name == "true/" || name == "false/" || name == "string/") {
+        if (depth == 1) emit("value", name == "true/" ? "1" : (name == "false/" ? "0" : ""))
+      } else if (name ~ /^\//) {
+        if (depth == 1 && name == "/" open) {
+          if (open == "key") {
+            key = text
+          } else if (open == "string" || open == "integer") {
+            emit("value", text)
+          } else if (open == "real") {
+            emit("value", sprintf("%.15g", text + 0))
+          } else {
+            emit("read", "")
+          }
+        }
+        open = ""
+      } else {
+        open = name
+        text = ""
+      }
+    }
+    {
+      line = $0
+      if (open != "" && NR > 1) text = text "\n"
+      while (match(line, /<[^>]*>/)) {
+        if (open != "") text = text substr(line, 1, RSTART - 1)
+        t = substr(line, RSTART + 1, RLENGTH - 2)
+        line = substr(line, RSTART + RLENGTH)
+        tag(t)
+      }
+      if (open != "") text = text line
+    }
+  '
+}
+
+#
+# @description
+#   Makes sure a domain is in the cache, exporting and parsing it if not.
+#   Leaves its slot number in _DEFAULTS_CACHE_SLOT.
+#
+# @param $1 Preference domain.
+# @param $2 Optional file already holding the domain's export; a named file
+#           that does not exist means the export failed.
+#
+_defaults_cache_load() {
+  local domain="$1"
+  local export_file="${2:-}"
+  local i
+  for i in ${_DEFAULTS_CACHE_DOMAINS[@]+"${!_DEFAULTS_CACHE_DOMAINS[@]}"}; do
+    if [ "${_DEFAULTS_CACHE_DOMAINS[i]}" = "$domain" ]; then
+      _DEFAULTS_CACHE_SLOT=$i
+      return 0
+    fi
+  done
+
+  _DEFAULTS_CACHE_SLOT=${#_DEFAULTS_CACHE_DOMAINS[@]}
+  _DEFAULTS_CACHE_DOMAINS+=("$domain")
+  _DEFAULTS_CACHE_START+=("${#_DEFAULTS_CACHE_KEYS[@]}")
+
+  local plist="" exported=false
+  if [ -n "$export_file" ]; then
+    [ -f "$export_file" ] && exported=true
+  elif plist=$(defaults export "$domain" - 2>/dev/null); then
+    exported=true
+  fi
+
+  if [ "$exported" = true ]; then
+    _DEFAULTS_CACHE_MODES+=("export")
+    local kind key value
+    while IFS=$'\t' read -r kind key value; do
+      _DEFAULTS_CACHE_KINDS+=("$kind")
+      _DEFAULTS_CACHE_KEYS+=("$key")
+      _DEFAULTS_CACHE_VALUES+=("$value")
+    done < <(
+      if [ -n "$export_file" ]; then
+        _defaults_cache_parse < "$export_file"
+      else
+        printf '%s\n' "$plist" | _defaults_cache_parse
+      fi
+    )
+  else
+    _DEFAULTS_CACHE_MODES+=("read")
+  fi
+
+  _DEFAULTS_CACHE_END+=("${#_DEFAULTS_CACHE_KEYS[@]}")
+}
+
+#
+# @description
+#   Loads several domains into the cache at once, running their exports
+#   concurrently, up to DEFAULTS_CACHE_JOBS at a time (default 8). Each export
+#   is a separate `defaults` process that mostly waits on cfprefsd, so an
+#   audit of a dozen domains costs about one export's latency instead of a
+#   dozen. Domains already cached are skipped.
+#
+# @param $@ Preference domains.
+#
+defaults_cache_prefetch() {
+  local pending=() domain i
+  for domain in "$@"; do
+    case " ${_DEFAULTS_CACHE_DOMAINS[*]-} ${pending[*]-} " in
+      *" $domain "*) continue ;;
+    esac
+    pending+=("$domain")
+  done
+  [ ${#pending[@]} -gt 1 ] || return 0
+
+  command -v pool_init >/dev/null 2>&1 || source "$DOTFILES_ROOT/lib/parallel.sh"
+
+  local work
+  work=$(mktemp -d "${TMPDIR:-/tmp}/circus-defaults-cache.XXXXXX")
+  (
+    set +e
+    trap - ERR EXIT
+    pool_init "${DEFAULTS_CACHE_JOBS:-8}"
+    for i in "${!pending[@]}"; do
+      pool_spawn _defaults_cache_export "${pending[i]}" "$work/$i"
+    done
+    pool_wait
+  )
+
+  for i in "${!pending[@]}"; do
+    _defaults_cache_load "${pending[i]}" "$work/$i"
+  done
+  rm -rf "$work"
+}
+
+# Exports one domain to a file, leaving no file if the export fails.
+_defaults_cache_export() {
+  defaults export "$1" - > "$2" 2>/dev/null || rm -f "$2"
+}
+
+#
+# @description
+#   Looks up a preference, loading its domain into the cache on first use.
+#   Sets DEFAULTS_CACHE_VALUE to what `defaults read <domain> <key>` would
+#   print. Call it directly rather than in $(...), or the cache is filled in a
+#   subshell and thrown away.
+#
+# @param $1 Preference domain.
+# @param $2 Key.
+# @return 1 if the key is not set.
+#
+defaults_cache_get() {
+  local domain="$1" key="$2"
+  DEFAULTS_CACHE_VALUE=""
+
+  _defaults_cache_load "$domain"
+  local slot=$_DEFAULTS_CACHE_SLOT
+
+  if [ "${_DEFAULTS_CACHE_MODES[slot]}" = "export" ]; then
+    local i=${_DEFAULTS_CACHE_START[slot]}
+    local end=${_DEFAULTS_CACHE_END[slot]}
+    while [ "$i" -lt "$end" ]; do
+      if [ "${_DEFAULTS_CACHE_KEYS[i]}" = "$key" ]; then
+        if [ "${_DEFAULTS_CACHE_KINDS[i]}" = "value" ]; then
+          DEFAULTS_CACHE_VALUE="${_DEFAULTS_CACHE_VALUES[i]}"
+          return 0
+        fi
+        break
+      fi
+      i=$((i + 1))
+    done
+    # Not in the export: the key is not set.
+    [ "$i" -lt "$end" ] || return 1
+  fi
+
+  DEFAULTS_CACHE_VALUE=$(defaults read "$domain" "$key" 2>/dev/null) || return 1
+}
+
+#
+# @description
+#   Drops a domain from the cache, so the next lookup exports it again. With
+#   no argument the whole cache is cleared.
+#
+# @param $1 Preference domain (optional).
+#
+defaults_cache_invalidate() {
+  if [ "$#" -eq 0 ]; then
+    _DEFAULTS_CACHE_DOMAINS=()
+    _DEFAULTS_CACHE_MODES=()
+    _DEFAULTS_CACHE_START=()
+    _DEFAULTS_CACHE_END=()
+    _DEFAULTS_CACHE_KINDS=()
+    _DEFAULTS_CACHE_KEYS=()
+    _DEFAULTS_CACHE_VALUES=()
+    return 0
+  fi
+
+  # The slot keeps its place, renamed so it never matches; its entries are
+  # left behind and a fresh slot is appended on the next lookup.
+  local i
+  for i in ${_DEFAULTS_CACHE_DOMAINS[@]+"${!_DEFAULTS_CACHE_DOMAINS[@]}"}; do
+    [ "${_DEFAULTS_CACHE_DOMAINS[i]}" = "$1" ] && _DEFAULTS_CACHE_DOMAINS[i]=""
+  done
+  return 0
+}
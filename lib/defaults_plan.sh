@@ -0,0 +1,289 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         lib/defaults_plan.sh
+#
+# DESCRIPTION:  Diff-and-apply engine for the defaults/ scripts.
+#
+#               Stage 11 sources about 90 scripts, and each used to write all of
+#               its keys and restart its own app, whether or not anything had
+#               changed. While a plan is open, `run_defaults` only records the
+#               desired domain/key/type/value, and `defaults_restart` only
+#               records which app wants restarting. `defaults_plan_apply` then:
+#
+#                 1. reads the current values, one `defaults export` per
+#                    domain (lib/defaults_cache.sh),
+#                 2. writes only the keys whose value differs,
+#                 3. restarts each app at most once, and only if a key from the
+#                    script that asked for the restart was written,
+#                 4. reports how many keys were unchanged and how many written.
+#
+#               With no plan open both functions act immediately, as before.
+#
+# USAGE:
+#   circus_require_module defaults_plan
+#   defaults_plan_begin
+#   DEFAULTS_PLAN_SOURCE="$file"; source "$file"   # calls run_defaults ...
+#   defaults_plan_apply
+#
+# ==============================================================================
+
+circus_require_module defaults_cache
+
+# --- Plan State ---------------------------------------------------------------
+
+DEFAULTS_PLAN_ACTIVE=false
+
+# The script currently declaring keys, set by the caller before sourcing it.
+# Restarts are tied to the keys of the script that asked for them.
+DEFAULTS_PLAN_SOURCE=""
+
+# Declared keys, in order. Parallel indexed arrays (bash 3.2). A later
+# declaration of the same key replaces an earlier one, as a later write would.
+_DEFAULTS_PLAN_HOSTS=()
+_DEFAULTS_PLAN_DOMAINS=()
+_DEFAULTS_PLAN_KEYS=()
+_DEFAULTS_PLAN_TYPES=()
+_DEFAULTS_PLAN_VALUES=()
+_DEFAULTS_PLAN_SOURCES=()
+
+# Requested restarts.
+_DEFAULTS_PLAN_RESTARTS=()
+_DEFAULTS_PLAN_RESTART_SOURCES=()
+_DEFAULTS_PLAN_RESTART_ALWAYS=()
+
+# Results of the last defaults_plan_apply.
+DEFAULTS_PLAN_UNCHANGED=0
+DEFAULTS_PLAN_WRITTEN=0
+DEFAULTS_PLAN_FAILED=0
+
+#
+# @description
+#   Opens a plan: until defaults_plan_apply, `run_defaults` and
+#   `defaults_restart` record what they are asked to do instead of doing it.
+#
+defaults_plan_begin() {
+  _DEFAULTS_PLAN_HOSTS=()
+  _DEFAULTS_PLAN_DOMAINS=()
+  _DEFAULTS_PLAN_KEYS=()
+  _DEFAULTS_PLAN_TYPES=()
+  _DEFAULTS_PLAN_VALUES=()
+  _DEFAULTS_PLAN_SOURCES=()
+  _DEFAULTS_PLAN_RESTARTS=()
+  _DEFAULTS_PLAN_RESTART_SOURCES=()
+  _DEFAULTS_PLAN_RESTART_ALWAYS=()
+  DEFAULTS_PLAN_SOURCE=""
+  DEFAULTS_PLAN_ACTIVE=true
+}
+
+#
+# @description
+#   Records a desired preference value in the open plan.
+#
+# @param $1 Optional -currentHost flag.
+# @param $@ <domain> <key> <type> <value>, as for `defaults write`.
+#
+defaults_plan_add() {
+  local host=""
+  if [ "$1" = "-currentHost" ]; then
+    host="-currentHost"
+    shift
+  fi
+
+  _DEFAULTS_PLAN_HOSTS+=("$host")
+  _DEFAULTS_PLAN_DOMAINS+=("$1")
+  _DEFAULTS_PLAN_KEYS+=("$2")
+  _DEFAULTS_PLAN_TYPES+=("$3")
+  _DEFAULTS_PLAN_VALUES+=("$4")
+  _DEFAULTS_PLAN_SOURCES+=("$DEFAULTS_PLAN_SOURCE")
+}
+
+#
+# @description
+#   Restarts an app so that it picks up new preferences. In an open plan the
+#   restart waits for defaults_plan_apply, happens once however many scripts
+#   ask for it, and is skipped if none of the asking script's keys changed,
+#   unless --always is given (for changes made by other means, e.g. dockutil).
+#   Honors dry-run mode.
+#
+# @param $1 Optional --always flag.
+# @param $2 Process name, as passed to killall (Dock, Finder, SystemUIServer).
+#
+defaults_restart() {
+  local always=false
+  if [ "$1" = "--always" ]; then
+    always=true
+    shift
+  fi
+  local process="$1"
+
+  if [ "$DEFAULTS_PLAN_ACTIVE" = true ]; then
+    _DEFAULTS_PLAN_RESTARTS+=("$process")
+    _DEFAULTS_PLAN_RESTART_SOURCES+=("$DEFAULTS_PLAN_SOURCE")
+    _DEFAULTS_PLAN_RESTART_ALWAYS+=("$always")
+    return 0
+  fi
+
+  _defaults_plan_restart "$process"
+}
+
+#
+# @description
+#   Prints the open plan as commands that record it again when sourced into a
+#   shell with an open plan. A defaults script run in a subshell hands its
+#   declarations back to the installer this way.
+#
+defaults_plan_export() {
+  local i always
+  for i in ${_DEFAULTS_PLAN_DOMAINS[@]+"${!_DEFAULTS_PLAN_DOMAINS[@]}"}; do
+    printf 'DEFAULTS_PLAN_SOURCE=%q; defaults_plan_add %s%q %q %q %q\n' \
+      "${_DEFAULTS_PLAN_SOURCES[i]}" "${_DEFAULTS_PLAN_HOSTS[i]:+-currentHost }" \
+      "${_DEFAULTS_PLAN_DOMAINS[i]}" "${_DEFAULTS_PLAN_KEYS[i]}" \
+      "${_DEFAULTS_PLAN_TYPES[i]}" "${_DEFAULTS_PLAN_VALUES[i]}"
+  done
+  for i in ${_DEFAULTS_PLAN_RESTARTS[@]+"${!_DEFAULTS_PLAN_RESTARTS[@]}"}; do
+    always=""
+    [ "${_DEFAULTS_PLAN_RESTART_ALWAYS[i]}" = true ] && always="--always "
+    printf 'DEFAULTS_PLAN_SOURCE=%q; defaults_restart %s%q\n' \
+      "${_DEFAULTS_PLAN_RESTART_SOURCES[i]}" "$always" "${_DEFAULTS_PLAN_RESTARTS[i]}"
+  done
+}
+
+# Restarts one app now, or says it would in dry-run mode. An app that is not
+# running has nothing to reload, so killall failing is not an error.
+_defaults_plan_restart() {
+  if [ "${DRY_RUN_MODE:-false}" = true ]; then
+    msg_info "[Dry Run] Would restart $1 to apply changes."
+    return 0
+  fi
+  msg_info "Restarting $1 to apply changes..."
+  killall "$1" >/dev/null 2>&1 || true
+}
+
+#
+# @description
+#   Tests whether a planned key already has its desired value. Keys whose
+#   value cannot be compared (-currentHost, arrays, dictionaries) count as
+#   changed and are always written.
+#
+# @param $1 Plan index.
+#
+_defaults_plan_is_current() {
+  local i="$1"
+  [ -z "${_DEFAULTS_PLAN_HOSTS[i]}" ] || return 1
+
+  local want="${_DEFAULTS_PLAN_VALUES[i]}"
+  case "${_DEFAULTS_PLAN_TYPES[i]}" in
+    -bool|-boolean)
+      case "$want" in
+        true|TRUE|yes|YES|1) want=1 ;;
+        false|FALSE|no|NO|0) want=0 ;;
+        *) return 1 ;;
+      esac
+      ;;
+    -float)
+      # `defaults read` prints 0.5 for a value written as 0.50.
+      if [[ "$want" == *.* ]]; then
+        while [[ "$want" == *0 ]]; do want="${want%0}"; done
+        want="${want%.}"
+      fi
+      ;;
+    -int|-integer|-string) ;;
+    *) return 1 ;;
+  esac
+
+  defaults_cache_get "${_DEFAULTS_PLAN_DOMAINS[i]}" "${_DEFAULTS_PLAN_KEYS[i]}" || return 1
+  [ "$DEFAULTS_CACHE_VALUE" = "$want" ]
+}
+
+#
+# @description
+#   Closes the plan: writes the keys that differ from the current values,
+#   restarts the affected apps once each, and reports the counts. Honors
+#   dry-run mode, in which nothing is written or restarted but the report
+#   still says what would be.
+#
+# @return 1 if any key could not be written.
+#
+defaults_plan_apply() {
+  DEFAULTS_PLAN_ACTIVE=false
+  DEFAULTS_PLAN_UNCHANGED=0
+  DEFAULTS_PLAN_WRITTEN=0
+  DEFAULTS_PLAN_FAILED=0
+
+  # The last declaration of each key wins; one awk pass finds which those are.
+  local keep=() i
+  while IFS= read -r i; do
+    keep+=("$i")
+  done < <(
+    for i in ${_DEFAULTS_PLAN_DOMAINS[@]+"${!_DEFAULTS_PLAN_DOMAINS[@]}"}; do
+      printf '%s\t%s\t%s\t%s\n' "$i" "${_DEFAULTS_PLAN_HOSTS[i]}" "${_DEFAULTS_PLAN_DOMAINS[i]}" "${_DEFAULTS_PLAN_KEYS[i]}"
+    done | awk -F'\t' '
+      { k = $2 FS $3 FS $4; last[k] = $1; idx[NR] = $1; key[NR] = k }
+      END { for (n = 1; n <= NR; n++) if (last[key[n]] == idx[n]) print idx[n] }
+    '
+  )
+
+  # Sources and domains with at least one written key, newline-delimited.
+  local written_sources=$'\n' written_domains=$'\n'
+  local domain key type value host
+  for i in ${keep[@]+"${keep[@]}"}; do
+    if _defaults_plan_is_current "$i"; then
+      DEFAULTS_PLAN_UNCHANGED=$((DEFAULTS_PLAN_UNCHANGED + 1))
+      continue
+    fi
+
+    host="${_DEFAULTS_PLAN_HOSTS[i]}"
+    domain="${_DEFAULTS_PLAN_DOMAINS[i]}"
+    key="${_DEFAULTS_PLAN_KEYS[i]}"
+    type="${_DEFAULTS_PLAN_TYPES[i]}"
+    value="${_DEFAULTS_PLAN_VALUES[i]}"
+
+    if [ "${DRY_RUN_MODE:-false}" = true ]; then
+      msg_info "[Dry Run] Would set ${domain} '${key}' to '${value}'"
+    elif ! defaults ${host:+"$host"} write "$domain" "$key" "$type" "$value"; then
+      msg_warning "Could not set ${domain} '${key}' to '${value}'"
+      DEFAULTS_PLAN_FAILED=$((DEFAULTS_PLAN_FAILED + 1))
+      continue
+    fi
+    DEFAULTS_PLAN_WRITTEN=$((DEFAULTS_PLAN_WRITTEN + 1))
+    written_domains="${written_domains}${domain}"$'\n'
+    written_sources="${written_sources}${_DEFAULTS_PLAN_SOURCES[i]}"$'\n'
+  done
+
+  # Each key was compared before it was written, so the cache stays valid for
+  # the loop above and is only dropped for the written domains now.
+  while IFS= read -r domain; do
+    [ -n "$domain" ] && defaults_cache_invalidate "$domain"
+  done <<< "$written_domains"
+
+  # --- Restarts ---
+  local restarted=" " process
+  for i in ${_DEFAULTS_PLAN_RESTARTS[@]+"${!_DEFAULTS_PLAN_RESTARTS[@]}"}; do
+    process="${_DEFAULTS_PLAN_RESTARTS[i]}"
+    case "$restarted" in
+      *" $process "*) continue ;;
+    esac
+    if [ "${_DEFAULTS_PLAN_RESTART_ALWAYS[i]}" != true ]; then
+      case "$written_sources" in
+        *$'\n'"${_DEFAULTS_PLAN_RESTART_SOURCES[i]}"$'\n'*) ;;
+        *) continue ;;
+      esac
+    fi
+    restarted="$restarted$process "
+    _defaults_plan_restart "$process"
+  done
+
+  # --- Report ---
+  if [ "${DRY_RUN_MODE:-false}" = true ]; then
+    msg_info "[Dry Run] Defaults: $DEFAULTS_PLAN_WRITTEN to write, $DEFAULTS_PLAN_UNCHANGED already set."
+  else
+    msg_success "Defaults: $DEFAULTS_PLAN_WRITTEN written, $DEFAULTS_PLAN_UNCHANGED already set."
+  fi
+  if [ "$DEFAULTS_PLAN_FAILED" -gt 0 ]; then
+    msg_warning "Defaults: $DEFAULTS_PLAN_FAILED could not be written."
+    return 1
+  fi
+  return 0
+}
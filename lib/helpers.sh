@@ -47,14 +47,82 @@ LOG_MAX_SIZE=${LOG_MAX_SIZE:-10485760}
 # Number of rotated logs to keep (default 3)
 LOG_ROTATE_COUNT=${LOG_ROTATE_COUNT:-3}
 
+# Buffered file logging. When true, log lines are collected in memory and
+# written in one go on exit, at ERROR and above, or once LOG_BUFFER_LINES lines
+# are pending. Console output is never buffered.
+LOG_BUFFERED="${LOG_BUFFERED:-false}"
+LOG_BUFFER_LINES=${LOG_BUFFER_LINES:-500}
+
 # ------------------------------------------------------------------------------
-# SECTION: LOG ROTATION
+# SECTION: LOG FILE BACKEND
 # ------------------------------------------------------------------------------
+# log() used to fork `date` for every line, fork `uname` and `stat` inside
+# rotate_log_if_needed for every line, and reopen the file with `>>` for every
+# line. A DEBUG-level install spent more time logging than installing.
+#
+# The backend below keeps one descriptor open for the whole run, takes its
+# timestamps from the shell, and tracks the file size in memory so that
+# rotation only ever has to stat the file once, when it is opened.
+#
+# The descriptor number is fixed because bash 3.2 (the macOS system bash, which
+# sources this file during install) has no `exec {var}>file` allocation.
+#
+# State is per process and deliberately not exported: a child process that
+# inherits LOG_FILE_PATH opens its own descriptor on first use.
+_LOG_FD_PATH=""
+_LOG_FILE_SIZE=0
+_LOG_BUFFER=""
+_LOG_BUFFER_COUNT=0
+_LOG_BUFFER_SUBSHELL=""
+_LOG_TS=""
+_LOG_TS_SECONDS=""
+
+# printf's %(...)T formats the shell's own clock without a fork. It appeared in
+# bash 4.2; older shells fall back to at most one `date` per elapsed second.
+if [ "${BASH_VERSINFO[0]:-0}" -gt 4 ] || { [ "${BASH_VERSINFO[0]:-0}" -eq 4 ] && [ "${BASH_VERSINFO[1]:-0}" -ge 2 ]; }; then
+  _LOG_BUILTIN_CLOCK=true
+else
+  _LOG_BUILTIN_CLOCK=false
+fi
 
 #
 # @description
-#   Rotates the log file if it exceeds LOG_MAX_SIZE. Called automatically
-#   by log() when LOG_FILE_PATH is set.
+#   Prints the size of a file in bytes, or 0 if it cannot be read.
+#   Uses $OSTYPE rather than forking `uname` to pick the stat dialect.
+#
+# @param $1 The path to the file.
+#
+_log_file_size() {
+  case "${OSTYPE:-}" in
+    darwin*) stat -f%z "$1" 2>/dev/null || echo 0 ;;
+    *)       stat -c%s "$1" 2>/dev/null || echo 0 ;;
+  esac
+}
+
+#
+# @description
+#   Shifts <file>.1 .. <file>.N-1 up by one and moves <file> to <file>.1.
+#
+# @param $1 The path to the log file.
+#
+_log_shift_files() {
+  local log_file="$1"
+  local i=$LOG_ROTATE_COUNT
+  while [ "$i" -gt 1 ]; do
+    local prev=$((i - 1))
+    [ -f "${log_file}.${prev}" ] && mv "${log_file}.${prev}" "${log_file}.${i}"
+    i=$prev
+  done
+  mv "$log_file" "${log_file}.1"
+}
+
+#
+# @description
+#   Rotates the log file if it exceeds LOG_MAX_SIZE.
+#
+#   log() no longer calls this per line; it tracks the size in memory and only
+#   stats the file when opening it. This remains for callers that manage a log
+#   file of their own.
 #
 # @param $1 The path to the log file.
 #
@@ -65,27 +133,152 @@ rotate_log_if_needed() {
   [ -f "$log_file" ] || return 0
   [ "$LOG_MAX_SIZE" -gt 0 ] || return 0
 
-  # Get file size (macOS uses -f%z, Linux uses -c%s)
   local file_size
-  if [[ "$(uname)" == "Darwin" ]]; then
-    file_size=$(stat -f%z "$log_file" 2>/dev/null || echo 0)
+  file_size=$(_log_file_size "$log_file")
+
+  if [ "$file_size" -ge "$LOG_MAX_SIZE" ]; then
+    _log_shift_files "$log_file"
+  fi
+}
+
+#
+# @description
+#   Opens (or reopens) the persistent log descriptor on $1 and records its
+#   current size. This is the only place the file is stat'ed.
+#
+# @param $1 The path to the log file.
+#
+_log_open() {
+  local log_file="$1"
+
+  if [ -n "$_LOG_FD_PATH" ]; then
+    exec 8>&-
+  fi
+  _LOG_FD_PATH=""
+
+  if [ -f "$log_file" ]; then
+    _LOG_FILE_SIZE=$(_log_file_size "$log_file")
   else
-    file_size=$(stat -c%s "$log_file" 2>/dev/null || echo 0)
+    _LOG_FILE_SIZE=0
   fi
 
-  # Rotate if file exceeds max size
-  if [ "$file_size" -ge "$LOG_MAX_SIZE" ]; then
-    # Shift existing rotated logs
-    local i=$LOG_ROTATE_COUNT
-    while [ $i -gt 1 ]; do
-      local prev=$((i - 1))
-      [ -f "${log_file}.${prev}" ] && mv "${log_file}.${prev}" "${log_file}.${i}"
-      i=$prev
-    done
+  # Opening can fail (missing directory, permissions). Logging must never be
+  # the thing that aborts a run under `set -e`, so report it and carry on with
+  # console output only; the next call will try again.
+  if exec 8>>"$log_file"; then
+    _LOG_FD_PATH="$log_file"
+  else
+    return 1
+  fi 2>/dev/null
+}
+
+#
+# @description
+#   Writes already-formatted text to the log descriptor, rotating first if the
+#   tracked size has reached LOG_MAX_SIZE.
+#
+#   The size is a character count, so multibyte text and anything written to
+#   the file behind the descriptor's back make it an approximation. Rotation is
+#   a housekeeping limit, not an exact one.
+#
+# @param $1 The text to write, including its trailing newline.
+#
+_log_write() {
+  local text="$1"
+
+  if [ "$LOG_MAX_SIZE" -gt 0 ] && [ "$_LOG_FILE_SIZE" -ge "$LOG_MAX_SIZE" ]; then
+    exec 8>&-
+    _LOG_FD_PATH=""
+    _log_shift_files "$LOG_FILE_PATH" 2>/dev/null || true
+    _log_open "$LOG_FILE_PATH" || return 0
+  fi
+
+  if printf '%s' "$text" >&8 2>/dev/null; then
+    _LOG_FILE_SIZE=$((_LOG_FILE_SIZE + ${#text}))
+  else
+    # The descriptor went bad (closed by a child, file system gone). Force a
+    # reopen on the next call rather than failing this one.
+    _LOG_FD_PATH=""
+  fi
+  return 0
+}
+
+#
+# @description
+#   Sets _LOG_TS to the current local time as "YYYY-MM-DD HH:MM:SS".
+#
+#   Without the builtin clock, $SECONDS (also a builtin) is used to notice when
+#   a second has passed, so `date` runs at most once per second instead of once
+#   per line.
+#
+_log_timestamp() {
+  if [ "$_LOG_BUILTIN_CLOCK" = true ]; then
+    printf -v _LOG_TS '%(%Y-%m-%d %H:%M:%S)T' -1
+  elif [ "$SECONDS" != "$_LOG_TS_SECONDS" ] || [ -z "$_LOG_TS" ]; then
+    _LOG_TS=$(date "+%Y-%m-%d %H:%M:%S")
+    _LOG_TS_SECONDS=$SECONDS
+  fi
+}
+
+#
+# @description
+#   Writes any buffered log lines to the log file. Safe to call at any time;
+#   registered as an EXIT handler the first time a line is buffered.
+#
+log_flush() {
+  [ "$_LOG_BUFFER_COUNT" -gt 0 ] || return 0
+
+  local pending="$_LOG_BUFFER"
+  _LOG_BUFFER=""
+  _LOG_BUFFER_COUNT=0
+
+  if [ -n "$LOG_FILE_PATH" ]; then
+    if [ "$_LOG_FD_PATH" != "$LOG_FILE_PATH" ]; then
+      _log_open "$LOG_FILE_PATH" || return 0
+    fi
+    _log_write "$pending"
+  fi
+  return 0
+}
+
+#
+# @description
+#   Sends one formatted line to the log file, directly or via the buffer.
+#
+# @param $1 The numerical log level of the message.
+# @param $2 The formatted line, without a trailing newline.
+#
+_log_to_file() {
+  local level_num="$1"
+  local line="$2"
+
+  if [ "$_LOG_FD_PATH" != "$LOG_FILE_PATH" ]; then
+    # Anything buffered belongs to the previous file.
+    [ "$_LOG_BUFFER_COUNT" -gt 0 ] && log_flush
+    _log_open "$LOG_FILE_PATH" || return 0
+  fi
+
+  if [ "$LOG_BUFFERED" = true ]; then
+    # A subshell (`$(...)`, a pipeline stage, a background job) does not run the
+    # parent's EXIT trap, so anything it buffered would be lost. Lines logged
+    # from any subshell deeper than the one that started the buffer are written
+    # straight through.
+    if [ -z "$_LOG_BUFFER_SUBSHELL" ]; then
+      _LOG_BUFFER_SUBSHELL=$BASH_SUBSHELL
+      add_exit_trap 'log_flush' EXIT
+    fi
 
-    # Rotate current log to .1
-    mv "$log_file" "${log_file}.1"
+    if [ "$BASH_SUBSHELL" = "$_LOG_BUFFER_SUBSHELL" ]; then
+      _LOG_BUFFER+="$line"$'\n'
+      _LOG_BUFFER_COUNT=$((_LOG_BUFFER_COUNT + 1))
+      if [ "$level_num" -ge "$LOG_LEVEL_ERROR" ] || [ "$_LOG_BUFFER_COUNT" -ge "$LOG_BUFFER_LINES" ]; then
+        log_flush
+      fi
+      return 0
+    fi
   fi
+
+  _log_write "$line"$'\n'
 }
 
 # ------------------------------------------------------------------------------
@@ -155,13 +348,8 @@ log() {
 
   # --- Log to File (if configured) ---
   if [ -n "$LOG_FILE_PATH" ]; then
-    # Check if rotation is needed before writing
-    rotate_log_if_needed "$LOG_FILE_PATH"
-
-    # Format with a timestamp for the log file.
-    local timestamp
-    timestamp=$(date "+%Y-%m-%d %H:%M:%S")
-    echo "[$timestamp] [$level_name] $message" >> "$LOG_FILE_PATH"
+    _log_timestamp
+    _log_to_file "$level_num" "[$_LOG_TS] [$level_name] $message"
   fi
 
   # --- Log to Console (if level is high enough) ---
@@ -199,6 +387,8 @@ msg_error()   { log "$LOG_LEVEL_ERROR"   "$1"; }
 msg_critical(){ log "$LOG_LEVEL_CRITICAL" "$1"; }
 
 export -f log msg_debug msg_info msg_success msg_warning msg_error msg_critical die
+export -f log_flush rotate_log_if_needed _log_file_size _log_shift_files _log_open
+export -f _log_write _log_timestamp _log_to_file
 
 # ------------------------------------------------------------------------------
 # SECTION: USER INTERACTION FUNCTIONS
@@ -225,11 +415,10 @@ export -f prompt_for_confirmation
 # so that dry-run coverage lives in one place rather than being re-implemented
 # (and forgotten) per file.
 #
-# Individual `defaults/**` scripts still define their own local `run_defaults`,
-# which shadows this one for the remainder of the sourcing shell. These
-# definitions exist so that the ~24 files calling the helpers WITHOUT defining
-# them — notably everything under `system/macos/`, which aborts stage 4 of the
-# installer — have something to call.
+# The `defaults/**` scripts no longer define their own `run_defaults`. Each such
+# definition shadowed this one for the rest of the sourcing shell, so a script
+# without one silently ran whichever the previous script had left behind, and
+# none of them could take part in stage 11's defaults plan.
 
 #
 # @description
@@ -261,12 +450,28 @@ run_defaults() {
 
   local domain="$1" key="$2" type="$3" value="$4"
 
+  # Inside a defaults plan (stage 11, lib/defaults_plan.sh) the write is only
+  # recorded; the plan writes it later if the value actually differs, and
+  # handles dry-run mode itself.
+  if [ "${DEFAULTS_PLAN_ACTIVE:-false}" = true ]; then
+    defaults_plan_add ${host_args[@]+"${host_args[@]}"} "$domain" "$key" "$type" "$value"
+    return
+  fi
+
   if [ "${DRY_RUN_MODE:-false}" = true ]; then
     msg_info "[Dry Run] Would set ${domain} '${key}' to '${value}'"
     return 0
   fi
 
-  defaults "${host_args[@]}" write "$domain" "$key" "$type" "$value"
+  local rc=0
+  defaults "${host_args[@]}" write "$domain" "$key" "$type" "$value" || rc=$?
+
+  # A cached export of this domain (lib/defaults_cache.sh) is now out of date.
+  # Checked against the loaded-module list so a write never loads the cache.
+  case " ${_CIRCUS_LOADED_MODULES:-} " in
+    *" defaults_cache "*) defaults_cache_invalidate "$domain" ;;
+  esac
+  return "$rc"
 }
 
 #
@@ -317,8 +522,9 @@ fetch_verified_script() {
 
   # Domain allowlist (S26) and request logging (S28).
   #
-  # These live in lib/security.sh, which init.sh sources AFTER this file, so
-  # they are resolved at call time rather than at definition time — and guarded
+  # These live in lib/security.sh, which init.sh declares (as lazy-loading
+  # stubs) AFTER this file, so they are resolved at call time rather than at
+  # definition time — and guarded
   # with `declare -F` so helpers.sh stays usable on its own.
   #
   # Both controls existed and had no caller: is_allowed_domain gated nothing,
@@ -572,6 +778,44 @@ get_current_version() {
 
 export -f version_compare version_in_range get_current_version
 
+# ------------------------------------------------------------------------------
+# SECTION: JSON OUTPUT
+# ------------------------------------------------------------------------------
+
+#
+# @description
+#   Quotes a string as a JSON string literal and leaves it in JSON_STRING.
+#   It sets a variable rather than printing, so a report with hundreds of
+#   values does not fork a subshell for each one. Control characters other
+#   than tab, newline and carriage return become \u00XX escapes.
+#
+# @param $1 The string.
+#
+# @example
+#   json_string "$name"; printf '{"name": %s}\n' "$JSON_STRING"
+#
+json_string() {
+  local s="$1"
+  s="${s//\\/\\\\}"
+  s="${s//\"/\\\"}"
+  s="${s//$'\t'/\\t}"
+  s="${s//$'\n'/\\n}"
+  s="${s//$'\r'/\\r}"
+  if [[ "$s" == *[[:cntrl:]]* ]]; then
+    local code oct char hex
+    for ((code = 1; code < 32; code++)); do
+      printf -v oct '%03o' "$code"
+      printf -v char '%b' "\\0$oct"
+      [[ "$s" == *"$char"* ]] || continue
+      printf -v hex '%04x' "$code"
+      s="${s//"$char"/\\u$hex}"
+    done
+  fi
+  JSON_STRING="\"$s\""
+}
+
+export -f json_string
+
 # --- Trap Composition --------------------------------------------------------
 
 #
@@ -0,0 +1,328 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         lib/homebrew.sh
+#
+# DESCRIPTION:  Shared Homebrew helpers: one snapshot of what is installed,
+#               set arithmetic against it, and batched installation.
+#
+#               Every `brew` invocation pays Homebrew's full Ruby startup, so
+#               the per-package `brew list <name>` / `brew install <name>` loop
+#               this replaces cost two launches per package even when nothing
+#               needed installing. The batched path costs two launches for the
+#               snapshot and one for the install, however long the list.
+#
+#               Read-only queries (`brew list`, `brew deps --installed`,
+#               `brew outdated`) go through brew_query, which keeps their
+#               output in ~/.circus/cache/brew/ so fc commands run seconds
+#               apart do not each pay for them. An entry is used while it is
+#               younger than BREW_CACHE_TTL and the Cellar, Caskroom and opt
+#               directories have not changed since it was written; installs and
+#               uninstalls made through fc drop the whole cache.
+#
+# USAGE:
+#   source "$DOTFILES_ROOT/lib/homebrew.sh"
+#   brew_missing formula git jq ripgrep      # -> BREW_MISSING=(...)
+#   brew_install_batch formula "${BREW_MISSING[@]}"
+#   brew_query outdated --cask               # cached `brew outdated --cask`
+#
+# ==============================================================================
+
+# Set to false to install missing packages one `brew install` at a time.
+CIRCUS_BREW_BATCH="${CIRCUS_BREW_BATCH:-true}"
+
+# Installed-package snapshot. Newline-delimited with a leading and trailing
+# newline so membership is a single glob match; indexed and associative arrays
+# would both need a loop or bash 4.
+_BREW_SNAPSHOT_TAKEN=false
+_BREW_INSTALLED_FORMULAE=$'\n'
+_BREW_INSTALLED_CASKS=$'\n'
+
+# Results of the last brew_missing / brew_install_batch call.
+BREW_MISSING=()
+BREW_FAILED=()
+
+# Query cache. CIRCUS_BREW_CACHE=false (or `fc --no-cache`) bypasses it.
+CIRCUS_BREW_CACHE="${CIRCUS_BREW_CACHE:-true}"
+BREW_CACHE_DIR="${BREW_CACHE_DIR:-$HOME/.circus/cache/brew}"
+BREW_CACHE_TTL="${BREW_CACHE_TTL:-300}"
+
+# --- Query Cache ------------------------------------------------------------
+
+#
+# @description
+#   Prints the state an entry is valid for: the modification times of the
+#   Cellar, Caskroom and opt directories. Installing or removing a keg changes
+#   the Cellar, a cask the Caskroom, and an upgrade relinks opt. Uses $OSTYPE
+#   rather than forking `uname` to pick the stat dialect, and HOMEBREW_PREFIX
+#   (set by `brew shellenv`) rather than asking brew for its prefix.
+#
+_brew_cache_stamp() {
+  local prefix="${HOMEBREW_PREFIX:-}"
+  if [ -z "$prefix" ]; then
+    prefix=/usr/local
+    [ -d /opt/homebrew ] && prefix=/opt/homebrew
+  fi
+
+  local dirs=() dir
+  for dir in "$prefix/Cellar" "$prefix/Caskroom" "$prefix/opt"; do
+    [ -d "$dir" ] && dirs+=("$dir")
+  done
+  [ "${#dirs[@]}" -gt 0 ] || return 0
+
+  case "${OSTYPE:-}" in
+    darwin*) stat -f '%m' "${dirs[@]}" 2>/dev/null | tr '\n' ' ' ;;
+    *)       stat -c '%Y' "${dirs[@]}" 2>/dev/null | tr '\n' ' ' ;;
+  esac
+  return 0
+}
+
+#
+# @description
+#   Runs a read-only brew command, answering from the cache when a fresh entry
+#   exists. Only successful runs are stored. An entry holds a header line
+#   ("<written-at> <stamp>") and then the output; it is written to a temporary
+#   file and renamed into place, so a concurrent reader sees either the old
+#   entry or the new one, never part of one.
+#
+# @param $@ brew arguments, e.g. `list --formula -1`.
+# @return brew's exit status, or 0 for a cache hit.
+#
+brew_query() {
+  local brew_cmd="${BREW_CMD:-brew}"
+
+  if [ "$CIRCUS_BREW_CACHE" != true ]; then
+    "$brew_cmd" "$@"
+    return
+  fi
+
+  local key entry stamp now
+  key=$(printf '%s ' "$@" | tr -c 'A-Za-z0-9@._-' '_')
+  entry="$BREW_CACHE_DIR/${key%_}.out"
+  stamp=$(_brew_cache_stamp)
+  now=$(date +%s)
+
+  if [ -f "$entry" ]; then
+    local written entry_stamp
+    IFS=' ' read -r written entry_stamp < "$entry" || true
+    case "$written" in '' | *[!0-9]*) written=0 ;; esac
+    if [ "$entry_stamp" = "${stamp% }" ] &&
+       [ "$((now - written))" -lt "$BREW_CACHE_TTL" ]; then
+      tail -n +2 "$entry"
+      return 0
+    fi
+  fi
+
+  local tmp rc=0
+  mkdir -p "$BREW_CACHE_DIR" 2>/dev/null || true
+  if ! tmp=$(mktemp "$BREW_CACHE_DIR/.query.XXXXXX" 2>/dev/null); then
+    "$brew_cmd" "$@"
+    return
+  fi
+
+  printf '%s %s\n' "$now" "${stamp% }" > "$tmp"
+  "$brew_cmd" "$@" >> "$tmp" || rc=$?
+  if [ "$rc" -eq 0 ]; then
+    mv -f "$tmp" "$entry"
+    tail -n +2 "$entry"
+    return 0
+  fi
+  tail -n +2 "$tmp"
+  rm -f "$tmp"
+  return "$rc"
+}
+
+#
+# @description
+#   Drops every cached query. Called after fc installs, upgrades or removes
+#   anything, so the next query sees the change even within the TTL.
+#
+brew_cache_invalidate() {
+  rm -f "$BREW_CACHE_DIR"/*.out 2>/dev/null || true
+}
+
+# --- Snapshot ---------------------------------------------------------------
+
+#
+# @description
+#   Records the installed formulae and casks with one `brew list` each. The
+#   two listings run at the same time, since each pays Homebrew's startup.
+#   Later lookups are answered from memory until the snapshot is refreshed.
+#
+# @param $1 Optional "--refresh" to discard an existing snapshot.
+#
+brew_snapshot_installed() {
+  if [ "$_BREW_SNAPSHOT_TAKEN" = true ] && [ "${1:-}" != "--refresh" ]; then
+    return 0
+  fi
+
+  local formulae casks casks_file casks_pid
+  casks_file=$(mktemp "${TMPDIR:-/tmp}/circus-brew.XXXXXX")
+  brew_query list --cask -1 > "$casks_file" 2>/dev/null &
+  casks_pid=$!
+  formulae=$(brew_query list --formula -1 2>/dev/null || true)
+  wait "$casks_pid" 2>/dev/null || true
+  casks=$(cat "$casks_file")
+  rm -f "$casks_file"
+
+  _BREW_INSTALLED_FORMULAE=$'\n'"$formulae"$'\n'
+  _BREW_INSTALLED_CASKS=$'\n'"$casks"$'\n'
+  _BREW_SNAPSHOT_TAKEN=true
+}
+
+#
+# @description
+#   Tests a package against the snapshot. Tap-qualified names
+#   (user/tap/name) match on their short name, which is what `brew list` shows.
+#
+# @param $1 "formula" or "cask".
+# @param $2 The package name.
+#
+brew_is_installed() {
+  local kind="$1"
+  local name="$2"
+  local short="${name##*/}"
+
+  brew_snapshot_installed
+
+  if [ "$kind" = "cask" ]; then
+    [[ "$_BREW_INSTALLED_CASKS" == *$'\n'"$short"$'\n'* ]]
+  else
+    [[ "$_BREW_INSTALLED_FORMULAE" == *$'\n'"$short"$'\n'* ]]
+  fi
+}
+
+#
+# @description
+#   Marks packages as installed in the snapshot without asking brew again.
+#
+# @param $1 "formula" or "cask".
+# @param $@ Package names.
+#
+_brew_snapshot_add() {
+  local kind="$1"
+  shift
+
+  local name
+  for name in "$@"; do
+    if [ "$kind" = "cask" ]; then
+      _BREW_INSTALLED_CASKS+="${name##*/}"$'\n'
+    else
+      _BREW_INSTALLED_FORMULAE+="${name##*/}"$'\n'
+    fi
+  done
+}
+
+#
+# @description
+#   Computes which of the given packages are not installed. The result is left
+#   in BREW_MISSING, in the order given.
+#
+# @param $1 "formula" or "cask".
+# @param $@ Package names.
+#
+brew_missing() {
+  local kind="$1"
+  shift
+
+  BREW_MISSING=()
+  local name
+  for name in "$@"; do
+    brew_is_installed "$kind" "$name" || BREW_MISSING+=("$name")
+  done
+}
+
+# --- Installation -----------------------------------------------------------
+
+#
+# @description
+#   Installs packages one at a time, reporting each failure. Used when batching
+#   is disabled and as the fallback when a batch fails.
+#
+# @param $1 "formula" or "cask".
+# @param $@ Package names.
+#
+_brew_install_each() {
+  local kind="$1"
+  shift
+
+  local flag=()
+  [ "$kind" = "cask" ] && flag=(--cask)
+
+  local name
+  for name in "$@"; do
+    msg_info "  Installing: $name"
+    if brew install ${flag[@]+"${flag[@]}"} "$name" 2>/dev/null; then
+      brew_cache_invalidate
+      _brew_snapshot_add "$kind" "$name"
+    else
+      msg_warning "Failed to install: $name"
+      security_log "warning" "Homebrew $kind install failed" "$name" 2>/dev/null || true
+      BREW_FAILED+=("$name")
+    fi
+  done
+}
+
+#
+# @description
+#   Installs packages with a single multi-argument `brew install`. If the batch
+#   fails, whatever did not make it in is retried individually so one bad
+#   package cannot block the rest, and each remaining failure is reported on
+#   its own. Honors DRY_RUN_MODE.
+#
+#   Callers are expected to pass only missing, already-validated names
+#   (see brew_missing and sanitize_package_name).
+#
+# @param $1 "formula" or "cask".
+# @param $@ Package names.
+# @return 0 if every package is installed afterwards, 1 otherwise. The names
+#         that failed are left in BREW_FAILED.
+#
+brew_install_batch() {
+  local kind="$1"
+  shift
+
+  BREW_FAILED=()
+  [ "$#" -gt 0 ] || return 0
+
+  if [ "${DRY_RUN_MODE:-false}" = true ]; then
+    local flag_text=""
+    [ "$kind" = "cask" ] && flag_text="--cask "
+    msg_info "[Dry Run] Would run: brew install ${flag_text}$*"
+    return 0
+  fi
+
+  if [ "$CIRCUS_BREW_BATCH" != true ] || [ "$#" -eq 1 ]; then
+    _brew_install_each "$kind" "$@"
+    [ "${#BREW_FAILED[@]}" -eq 0 ] && return 0
+    return 1
+  fi
+
+  local flag=()
+  [ "$kind" = "cask" ] && flag=(--cask)
+
+  msg_info "  Installing $# ${kind}s: $*"
+  if brew install ${flag[@]+"${flag[@]}"} "$@" 2>/dev/null; then
+    brew_cache_invalidate
+    _brew_snapshot_add "$kind" "$@"
+    return 0
+  fi
+
+  # Some of the batch may have gone in; whatever is cached is suspect.
+  brew_cache_invalidate
+
+  # The batch may have installed some packages before failing. Ask brew what is
+  # there now and only retry the rest.
+  msg_warning "Batch install failed; retrying the remaining packages individually."
+  brew_snapshot_installed --refresh
+  brew_missing "$kind" "$@"
+  _brew_install_each "$kind" ${BREW_MISSING[@]+"${BREW_MISSING[@]}"}
+
+  [ "${#BREW_FAILED[@]}" -eq 0 ] && return 0
+  return 1
+}
+
+export -f brew_query brew_cache_invalidate _brew_cache_stamp
+export -f brew_snapshot_installed brew_is_installed brew_missing brew_install_batch
+export -f _brew_snapshot_add _brew_install_each
@@ -37,11 +37,99 @@ _CIRCUS_INIT_DONE=1
 # The absolute path to the root of the dotfiles repository.
 # This provides a reliable anchor point for all other scripts.
 export DOTFILES_ROOT
-DOTFILES_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")"/.. && pwd)"
+# `${BASH_SOURCE[0]%/*}` is dirname without the fork; it is the file name
+# itself when init.sh was sourced from lib/ by a relative name.
+_CIRCUS_INIT_DIR="${BASH_SOURCE[0]%/*}"
+[[ "$_CIRCUS_INIT_DIR" == "${BASH_SOURCE[0]}" ]] && _CIRCUS_INIT_DIR="."
+DOTFILES_ROOT="$(cd "$_CIRCUS_INIT_DIR"/.. && pwd)"
+unset _CIRCUS_INIT_DIR
 
 # The root directory for the installer scripts.
 export INSTALL_DIR="$DOTFILES_ROOT/install"
 
+# --- Lazy Modules -------------------------------------------------------------
+
+# Every `fc` command, and every plugin after bin/fc execs it, sources this file.
+# Parsing lib/security.sh (~4k lines) and the installer-only half of the UI
+# library on each of those starts cost more than most commands spend doing
+# their work. Those libraries are loaded on demand instead: each of their
+# public functions starts out as a one-line stub that sources the library,
+# which replaces the stubs with the real definitions, and then re-dispatches.
+#
+# A lazily loaded library is sourced from inside a function, so it must not use
+# `declare`/`local` for its globals; plain assignments and `readonly` are fine.
+# Code that overrides one of its functions must `circus_require_module` it
+# first, or a later load will replace the override.
+# tests/lazy_modules.bats checks that the stub lists below match the functions
+# each library defines.
+
+# Where the lazy modules live, fixed now: callers (and tests) may repoint
+# DOTFILES_ROOT at a configuration tree later. Exported with the stubs.
+export _CIRCUS_LIB_DIR="$DOTFILES_ROOT/lib"
+
+# Libraries already sourced by _circus_load_module. Deliberately not exported:
+# a child process inherits the exported stubs and loads what it needs itself.
+_CIRCUS_LOADED_MODULES=""
+
+#
+# @description
+#   Sources lib/<module>.sh once. Called by a stub; if the module has already
+#   been loaded and the stub is still being called, the module does not define
+#   that function, and re-dispatching would recurse forever.
+#
+# @param $1 Module name (file name under lib/ without .sh).
+# @param $2 The function whose stub triggered the load.
+#
+_circus_load_module() {
+  case " $_CIRCUS_LOADED_MODULES " in
+    *" $1 "*)
+      echo "Internal error: lib/$1.sh does not define $2()." >&2
+      return 127
+      ;;
+  esac
+  circus_require_module "$1"
+}
+
+#
+# @description
+#   Loads lazily declared libraries now, in the current shell. Stubs called
+#   inside $(...) load their library into that subshell only, so code that
+#   calls them that way in a loop, and the installer, which uses most of them,
+#   should require the library up front.
+#
+# @param $@ Module names (file names under lib/ without .sh).
+#
+circus_require_module() {
+  local module
+  for module in "$@"; do
+    case " $_CIRCUS_LOADED_MODULES " in
+      *" $module "*) continue ;;
+    esac
+    _CIRCUS_LOADED_MODULES="$_CIRCUS_LOADED_MODULES $module"
+    source "$_CIRCUS_LIB_DIR/$module.sh"
+  done
+}
+
+#
+# @description
+#   Defines (and exports) a loading stub for each named function.
+#
+# @param $1 Module name (file name under lib/ without .sh).
+# @param $@ Functions the module defines.
+#
+circus_lazy_module() {
+  local module="$1"
+  shift
+
+  local fn
+  for fn in "$@"; do
+    eval "$fn() { _circus_load_module $module $fn && $fn \"\$@\"; }"
+    export -f "${fn?}"
+  done
+}
+
+export -f _circus_load_module circus_require_module circus_lazy_module
+
 # --- Source Helper Libraries ------------------------------------------------
 
 # The order of sourcing is important.
@@ -50,7 +138,8 @@ export INSTALL_DIR="$DOTFILES_ROOT/install"
 #    the foundational `set -e` and `trap` commands.
 source "$DOTFILES_ROOT/lib/helpers.sh"
 
-# 2. Source the enhanced UI library for terminal interface components.
+# 2. Source the core UI library (palette, icons, boxes). The rest of the UI
+#    components are loaded lazily from lib/ui_extra.sh.
 source "$DOTFILES_ROOT/lib/ui.sh"
 
 # 3. Source the configuration library, which provides role-specific settings.
@@ -69,5 +158,62 @@ fi
 # 5. Source notification helpers for long-running tasks.
 source "$DOTFILES_ROOT/lib/notify.sh"
 
-# 6. Source security library for input sanitization.
-source "$DOTFILES_ROOT/lib/security.sh"
+# 6. Declare the lazily loaded libraries (see below): the rarely used UI
+#    components, the security library and the defaults plan engine.
+circus_lazy_module ui_extra \
+  ui_print_banner ui_print_banner_mini ui_progress_bar ui_progress_bar_done \
+  ui_spinner_start ui_spinner_stop ui_stages_init ui_stage_complete \
+  ui_stage_skip ui_stage_fail ui_stage_start ui_stage_mark ui_stages_print \
+  ui_table ui_select ui_multiselect ui_confirm ui_input ui_header ui_step \
+  ui_list_item ui_keyval ui_notice ui_stage_header ui_stage_complete_msg
+
+circus_lazy_module security \
+  sanitize_string escape_for_shell sanitize_domain sanitize_package_name \
+  sanitize_path validate_path resolve_path_secure is_within_allowed_paths \
+  check_symlink_target is_path_safe validate_config_path validate_url \
+  check_not_root is_root require_non_root get_real_user \
+  sanitize_defaults_value is_yaml_safe sanitize_yaml_value \
+  validate_yaml_security safe_yaml_get security_check_input security_log \
+  sudo_audit sudo_quiet sudo_audit_view sudo_audit_clear sudo_audit_stats \
+  sudo_confirm is_destructive_command require_confirmation sudo_drop \
+  sudo_has_credentials sudo_status with_sudo_scope sudo_scope_start \
+  sudo_scope_end sudo_register_cleanup sudoers_hash sudoers_baseline_save \
+  sudoers_check sudoers_verify_before sudoers_baseline_info secure_mktemp \
+  secure_mktemp_dir secure_temp_cleanup secure_temp_register_cleanup \
+  with_secure_temp verify_temp_permissions is_symlink safe_write_check \
+  safe_write atomic_write safe_append get_real_path is_world_writable \
+  is_group_writable check_config_permissions scan_config_permissions \
+  fix_config_permissions check_config_owner has_gpg encrypt_backup \
+  decrypt_backup encrypt_and_shred create_encrypted_backup \
+  restore_encrypted_backup is_encrypted get_secure_delete_tool secure_delete \
+  secure_delete_dir secure_clear secure_delete_confirm sign_config \
+  verify_config_signature verify_before_apply list_signing_keys \
+  is_config_signed sign_all_configs verify_all_configs file_hash \
+  generate_hash_manifest verify_script_integrity verify_single_script \
+  show_hash_manifest update_script_hash is_trusted_tap verify_brew_package \
+  add_trusted_tap list_brew_taps scan_brewfile_taps is_commit_signed \
+  verify_update_signature safe_self_update show_commit_signatures \
+  snapshot_hash list_rollback_snapshots verify_snapshot_exists safe_rollback \
+  create_safety_snapshot security_event security_audit_view \
+  security_events_by_severity security_event_stats config_baseline_save \
+  config_change_check log_failed_operation check_failure_threshold \
+  view_failed_operations clear_failed_operations startup_security_check \
+  security_status security_health_report schedule_health_check \
+  is_allowed_domain secure_download list_allowed_domains verify_certificate \
+  secure_update_check save_certificate_pin log_network_request \
+  view_network_requests network_request_stats get_firewall_rules \
+  firewall_baseline_save firewall_check firewall_status get_dns_servers \
+  dns_leak_check dns_resolution_test save_expected_dns
+
+# The defaults/ scripts call defaults_restart whether or not stage 11 has opened
+# a plan; the rest of lib/defaults_plan.sh is only needed by the stage itself.
+circus_lazy_module defaults_plan defaults_restart
+
+# bin/fc calls die_if_root on every invocation. Loading 4k lines of security
+# library to compare EUID with 0 would undo the point, so this stub only loads
+# it when there is something to report.
+die_if_root() {
+  [[ $EUID -eq 0 ]] || return 0
+  _circus_load_module security die_if_root && die_if_root "$@"
+}
+export -f die_if_root
@@ -14,64 +14,51 @@ has_fzf() {
   command -v fzf &>/dev/null
 }
 
-# Get command description from a plugin file
-# Extracts the DESCRIPTION field from the header comment
+# Plugin names, descriptions and actions come from the generated index
+# (lib/plugin_index.sh) rather than grepping every plugin file per run.
+source "$DOTFILES_ROOT/lib/plugin_index.sh"
+
+# Get command description from a plugin file, truncated for menus
 get_plugin_description() {
   local plugin_file="$1"
-  local desc=""
-  
-  # Extract DESCRIPTION line from the file header
-  desc=$(grep -m1 "^# DESCRIPTION:" "$plugin_file" 2>/dev/null | sed 's/^# DESCRIPTION:[[:space:]]*//')
-  
-  if [[ -z "$desc" ]]; then
-    # Try alternate format
-    desc=$(grep -A1 "^#.*DESCRIPTION" "$plugin_file" 2>/dev/null | tail -1 | sed 's/^#[[:space:]]*//')
-  fi
-  
+  local name="${plugin_file##*/}"
+  local desc
+
+  [[ ${#PLUGIN_INDEX_NAMES[@]} -gt 0 ]] || plugin_index_load "${plugin_file%/*}"
+  desc=$(plugin_index_description "${name#fc-}") || desc=""
+
   # Truncate to 50 chars
   if [[ ${#desc} -gt 50 ]]; then
     desc="${desc:0:47}..."
   fi
-  
+
   echo "${desc:-No description}"
 }
 
 # Get all commands with descriptions
 get_all_commands() {
   local plugin_dir="$1"
-  
-  for plugin in "$plugin_dir"/fc-*; do
-    [[ -x "$plugin" ]] || continue
-    local name
-    name=$(basename "$plugin")
-    # Remove fc- prefix for display
-    local short_name="${name#fc-}"
-    local desc
-    desc=$(get_plugin_description "$plugin")
-    printf "%-15s %s\n" "$short_name" "$desc"
+
+  plugin_index_load "$plugin_dir"
+
+  local i desc
+  for i in ${PLUGIN_INDEX_NAMES[@]+"${!PLUGIN_INDEX_NAMES[@]}"}; do
+    desc="${PLUGIN_INDEX_DESCRIPTIONS[i]}"
+    # Truncate to 50 chars
+    if [[ ${#desc} -gt 50 ]]; then
+      desc="${desc:0:47}..."
+    fi
+    printf "%-15s %s\n" "${PLUGIN_INDEX_NAMES[i]}" "$desc"
   done
 }
 
-# Get subcommands/actions from a plugin's help
+# Get subcommands/actions from a plugin's header (or its case labels)
 get_plugin_actions() {
   local plugin_file="$1"
-  local actions=""
-  
-  # Try to extract actions from ACTIONS section in header
-  actions=$(awk '/^# ACTIONS:/,/^# [A-Z]/' "$plugin_file" 2>/dev/null | \
-            grep -E "^#[[:space:]]+[a-z]+" | \
-            sed 's/^#[[:space:]]*//' | \
-            head -10)
-  
-  if [[ -z "$actions" ]]; then
-    # Fallback: try to find case statements for actions
-    actions=$(grep -E "^[[:space:]]+(on|off|status|start|stop|list|show|get|set|add|remove|clear|backup|restore|help)\)" "$plugin_file" 2>/dev/null | \
-              sed 's/[[:space:]]*)//' | \
-              sed 's/^[[:space:]]*//' | \
-              sort -u)
-  fi
-  
-  echo "$actions"
+  local name="${plugin_file##*/}"
+
+  [[ ${#PLUGIN_INDEX_NAMES[@]} -gt 0 ]] || plugin_index_load "${plugin_file%/*}"
+  plugin_index_actions "${name#fc-}"
 }
 
 # Interactive command selection
@@ -115,13 +102,16 @@ interactive_select_action() {
     return 1
   fi
   
-  # Get help output for preview
-  local help_output
-  help_output=$("$DOTFILES_ROOT/bin/fc" "$command" --help 2>/dev/null)
-  
-  # Extract actions from help
+  # Actions from the plugin index; plugins that document none there are asked
+  # for their --help instead.
   local actions
-  actions=$(echo "$help_output" | grep -E "^  [a-z]+" | head -15)
+  actions=$(get_plugin_actions "$plugin_file")
+
+  if [[ -z "$actions" ]]; then
+    local help_output
+    help_output=$("$DOTFILES_ROOT/bin/fc" "$command" --help 2>/dev/null)
+    actions=$(echo "$help_output" | grep -E "^  [a-z]+" | head -15)
+  fi
   
   if [[ -z "$actions" ]]; then
     # No actions found, just run the command
@@ -24,17 +24,14 @@ _DETECTED_DISTRO=""
 
 #
 # @description
-#   Detects the current operating system.
-#
-# @return "macos", "linux", "wsl", or "unknown"
+#   Fills the _DETECTED_OS cache in the current shell. The predicates below
+#   call this rather than `$(detect_os)`: a cache filled inside a command
+#   substitution dies with the subshell, and every `is_macos` then paid for
+#   `uname` and a read of /proc/version again.
 #
-detect_os() {
-    # Return cached value if available
-    if [[ -n "$_DETECTED_OS" ]]; then
-        echo "$_DETECTED_OS"
-        return
-    fi
-    
+_detect_os_cached() {
+    [[ -n "$_DETECTED_OS" ]] && return 0
+
     case "$(uname -s)" in
         Darwin)
             _DETECTED_OS="macos"
@@ -54,7 +51,16 @@ detect_os() {
             _DETECTED_OS="unknown"
             ;;
     esac
-    
+}
+
+#
+# @description
+#   Detects the current operating system.
+#
+# @return "macos", "linux", "wsl", or "unknown"
+#
+detect_os() {
+    _detect_os_cached
     echo "$_DETECTED_OS"
 }
 
@@ -72,7 +78,8 @@ detect_distro() {
     fi
     
     # Only applicable on Linux
-    if [[ "$(detect_os)" != "linux" && "$(detect_os)" != "wsl" ]]; then
+    _detect_os_cached
+    if [[ "$_DETECTED_OS" != "linux" && "$_DETECTED_OS" != "wsl" ]]; then
         _DETECTED_DISTRO="n/a"
         echo "$_DETECTED_DISTRO"
         return
@@ -134,7 +141,8 @@ get_os_name() {
 # @return 0 (true) if macOS, 1 (false) otherwise
 #
 is_macos() {
-    [[ "$(detect_os)" == "macos" ]]
+    _detect_os_cached
+    [[ "$_DETECTED_OS" == "macos" ]]
 }
 
 #
@@ -142,9 +150,8 @@ is_macos() {
 # @return 0 (true) if Linux or WSL, 1 (false) otherwise
 #
 is_linux() {
-    local os
-    os="$(detect_os)"
-    [[ "$os" == "linux" || "$os" == "wsl" ]]
+    _detect_os_cached
+    [[ "$_DETECTED_OS" == "linux" || "$_DETECTED_OS" == "wsl" ]]
 }
 
 #
@@ -152,7 +159,8 @@ is_linux() {
 # @return 0 (true) if WSL, 1 (false) otherwise
 #
 is_wsl() {
-    [[ "$(detect_os)" == "wsl" ]]
+    _detect_os_cached
+    [[ "$_DETECTED_OS" == "wsl" ]]
 }
 
 # ------------------------------------------------------------------------------
@@ -220,7 +228,7 @@ require_linux() {
 }
 
 # Export all functions
-export -f detect_os detect_distro get_os_name
+export -f _detect_os_cached detect_os detect_distro get_os_name
 export -f is_macos is_linux is_wsl
 export -f is_debian_based is_rhel_based is_arch_based
 export -f require_macos require_linux
@@ -0,0 +1,198 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         lib/parallel.sh
+#
+# DESCRIPTION:  Small building blocks for running shell work concurrently:
+#               a millisecond clock, a per-command timeout, and a bounded
+#               worker pool.
+#
+#               Everything here has to run on the stock macOS /bin/bash 3.2,
+#               so there is no `wait -n`, no EPOCHREALTIME and no coreutils
+#               `timeout` to lean on. The pool polls its children with
+#               `kill -0`, and the timeout is a watchdog subshell.
+#
+#               Jobs report results through files, not stdout: a pool of
+#               background jobs writing to one terminal interleaves, and the
+#               callers all want to present results in a fixed order anyway.
+#
+# USAGE:
+#   source "$DOTFILES_ROOT/lib/parallel.sh"
+#
+#   now_ms; start=$NOW_MS
+#   run_with_timeout 10 some_command arg    # 124 if it was killed
+#
+#   pool_init 4
+#   for item in ...; do pool_spawn do_work "$item"; done
+#   pool_wait
+#
+# ==============================================================================
+
+# Exit status reported for a command that ran out of time. Matches coreutils
+# `timeout`, so callers can treat both the same way.
+PARALLEL_TIMEOUT_STATUS=124
+
+# Poll interval, in seconds, while waiting for a pool slot. Bash 3.2 has no
+# `wait -n`, so a free slot is found by polling.
+PARALLEL_POLL_INTERVAL="${PARALLEL_POLL_INTERVAL:-0.05}"
+
+_POOL_MAX=1
+_POOL_PIDS=()
+
+# --- Clock --------------------------------------------------------------------
+
+#
+# @description
+#   Reads the wall clock in milliseconds into NOW_MS. Uses bash 5's
+#   EPOCHREALTIME when available (no fork), otherwise perl, which ships with
+#   macOS. Falls back to whole seconds if neither is available.
+#
+now_ms() {
+  if [ -n "${EPOCHREALTIME:-}" ]; then
+    local realtime="${EPOCHREALTIME/,/.}"
+    local frac="${realtime#*.}000"
+    NOW_MS="${realtime%.*}${frac:0:3}"
+  elif command -v perl >/dev/null 2>&1; then
+    NOW_MS=$(perl -MTime::HiRes=time -e 'printf "%d", time * 1000')
+  else
+    NOW_MS=$(($(date +%s) * 1000))
+  fi
+}
+
+# --- Timeouts -----------------------------------------------------------------
+
+#
+# @description
+#   Prints a process and all of its descendants, parent first.
+#
+# @param $1 PID at the root of the tree.
+#
+_parallel_process_tree() {
+  echo "$1"
+  local child
+  for child in $(pgrep -P "$1" 2>/dev/null); do
+    _parallel_process_tree "$child"
+  done
+}
+
+#
+# @description
+#   Runs a command (function or executable) with a time limit. The command runs
+#   in a background subshell; a watchdog terminates it, and everything it
+#   started, once the limit passes. The tree is collected before anything is
+#   signalled, so a killed child cannot be reparented out of reach first.
+#
+# @param $1 Time limit in seconds. 0 or empty disables the limit.
+# @param $@ The command and its arguments.
+# @return The command's exit status, or PARALLEL_TIMEOUT_STATUS (124) if it
+#         was killed by the watchdog.
+#
+run_with_timeout() {
+  local limit="${1:-0}"
+  shift
+
+  if [ "$limit" = "0" ]; then
+    local rc=0
+    "$@" || rc=$?
+    return "$rc"
+  fi
+
+  "$@" &
+  local pid=$!
+
+  # The watchdog's own sleep is backgrounded so the TERM sent when the command
+  # finishes first can interrupt it instead of waiting the full limit out.
+  # Its output is detached so it cannot hold a caller's $(...) pipe open.
+  (
+    set +e
+    trap - ERR
+    sleep "$limit" &
+    sleep_pid=$!
+    trap 'kill "$sleep_pid" 2>/dev/null; exit 0' TERM
+    wait "$sleep_pid"
+    # shellcheck disable=SC2046
+    kill -TERM $(_parallel_process_tree "$pid") 2>/dev/null
+    exit "$PARALLEL_TIMEOUT_STATUS"
+  ) >/dev/null 2>&1 &
+  local watchdog=$!
+
+  local rc=0
+  wait "$pid" || rc=$?
+
+  local watchdog_rc=0
+  # shellcheck disable=SC2046
+  kill -TERM $(_parallel_process_tree "$watchdog") 2>/dev/null || true
+  wait "$watchdog" 2>/dev/null || watchdog_rc=$?
+
+  if [ "$watchdog_rc" -eq "$PARALLEL_TIMEOUT_STATUS" ]; then
+    return "$PARALLEL_TIMEOUT_STATUS"
+  fi
+  return "$rc"
+}
+
+# --- Worker Pool --------------------------------------------------------------
+
+#
+# @description
+#   Starts a new pool that runs at most N jobs at once. Pools do not nest; a
+#   caller that needs two should run the second one in a subshell.
+#
+# @param $1 Maximum concurrent jobs (minimum 1).
+#
+pool_init() {
+  _POOL_MAX="${1:-1}"
+  case "$_POOL_MAX" in
+    '' | *[!0-9]*) _POOL_MAX=1 ;;
+  esac
+  [ "$_POOL_MAX" -ge 1 ] || _POOL_MAX=1
+  _POOL_PIDS=()
+}
+
+#
+# @description
+#   Forgets pool members that have exited, reaping their status.
+#
+_pool_reap() {
+  local alive=()
+  local pid
+  for pid in ${_POOL_PIDS[@]+"${_POOL_PIDS[@]}"}; do
+    if kill -0 "$pid" 2>/dev/null; then
+      alive+=("$pid")
+    else
+      wait "$pid" 2>/dev/null || true
+    fi
+  done
+  _POOL_PIDS=(${alive[@]+"${alive[@]}"})
+}
+
+#
+# @description
+#   Runs a command in the background once a pool slot is free. The command's
+#   exit status is not collected; jobs record their results themselves.
+#
+# @param $@ The command and its arguments.
+#
+pool_spawn() {
+  while [ "${#_POOL_PIDS[@]}" -ge "$_POOL_MAX" ]; do
+    _pool_reap
+    [ "${#_POOL_PIDS[@]}" -ge "$_POOL_MAX" ] && sleep "$PARALLEL_POLL_INTERVAL"
+  done
+
+  "$@" &
+  _POOL_PIDS+=("$!")
+}
+
+#
+# @description
+#   Waits for every job in the pool to finish.
+#
+pool_wait() {
+  local pid
+  for pid in ${_POOL_PIDS[@]+"${_POOL_PIDS[@]}"}; do
+    wait "$pid" 2>/dev/null || true
+  done
+  _POOL_PIDS=()
+}
+
+export -f now_ms run_with_timeout _parallel_process_tree pool_init pool_spawn pool_wait _pool_reap
@@ -0,0 +1,257 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         lib/plugin_index.sh
+#
+# DESCRIPTION:  A generated index of the fc plugins: each one's name, the
+#               one-line description from its header, and its actions.
+#
+#               `fc --help` and interactive mode used to scrape every plugin
+#               file with grep and sed on each run, several forks per plugin.
+#               The index is built with one awk pass over all of them and
+#               cached; it is rebuilt whenever the plugin directory or any
+#               plugin is newer than it, which is checked with builtin tests.
+#
+# USAGE:
+#   source "$DOTFILES_ROOT/lib/plugin_index.sh"
+#   plugin_index_load "$PLUGIN_DIR"
+#   for i in "${!PLUGIN_INDEX_NAMES[@]}"; do ...; done
+#   plugin_index_actions caffeine
+#
+# ==============================================================================
+
+# --- Index File ---------------------------------------------------------------
+#
+# One row per line, tab-separated:
+#
+#   #circus-plugin-index  <version>  <plugin dir>
+#   plugin                caffeine   Prevent the Mac from sleeping.
+#   action                caffeine   on          - Prevent sleep indefinitely
+#
+# The header names the plugin directory so two checkouts sharing a HOME do not
+# read each other's index.
+
+PLUGIN_INDEX_FILE="${PLUGIN_INDEX_FILE:-$HOME/.circus/cache/plugin_index.tsv}"
+
+# Bump when the row format or the extraction rules change.
+PLUGIN_INDEX_VERSION=1
+
+# Loaded index. Parallel indexed arrays (bash 3.2).
+PLUGIN_INDEX_NAMES=()
+PLUGIN_INDEX_DESCRIPTIONS=()
+PLUGIN_INDEX_ACTION_OWNERS=()
+PLUGIN_INDEX_ACTIONS=()
+
+#
+# @description
+#   Prints index rows for every fc-* file in a directory, from a single awk
+#   process.
+#
+#   The description is the text after "# DESCRIPTION:", or the comment line
+#   following the first line mentioning DESCRIPTION when that is empty.
+#   Actions are the indented lines of the "# ACTIONS:" header section (at most
+#   10); a plugin without one falls back to the common action names found as
+#   case labels in its code.
+#
+# @param $1 Plugin directory.
+#
+_plugin_index_scan() {
+  local dir="$1"
+  local plugins=("$dir"/fc-*)
+  [ -e "${plugins[0]}" ] || return 0
+
+  awk '
+    function flush(   i, j, t) {
+      if (name == "") return
+      if (desc == "") desc = alt
+      if (desc == "") desc = "No description"
+      gsub(/\t/, " ", desc)
+      print "plugin\t" name "\t" desc
+      if (nact > 0) {
+        for (i = 1; i <= nact; i++) print "action\t" name "\t" act[i]
+      } else {
+        # Sorted, like the `sort -u` this replaces.
+        for (i = 2; i <= ncase; i++) {
+          t = cases[i]
+          for (j = i - 1; j >= 1 && cases[j] > t; j--) cases[j + 1] = cases[j]
+          cases[j + 1] = t
+        }
+        for (i = 1; i <= ncase; i++) print "action\t" name "\t" cases[i]
+      }
+    }
+    FNR == 1 {
+      flush()
+      name = FILENAME
+      sub(/.*\//, "", name)
+      sub(/^fc-/, "", name)
+      desc = ""; have_desc = 0; alt = ""; alt_line = 0
+      in_actions = 0; nact = 0; ncase = 0
+      split("", seen)
+    }
+    !have_desc && /^# DESCRIPTION:/ {
+      desc = $0
+      sub(/^# DESCRIPTION:[[:space:]]*/, "", desc)
+      have_desc = 1
+    }
+    alt_line == 0 && /^#.*DESCRIPTION/ { alt_line = FNR + 1 }
+    FNR == alt_line {
+      alt = $0
+      sub(/^#[[:space:]]*/, "", alt)
+    }
+    /^# ACTIONS:/ { in_actions = 1; next }
+    in_actions {
+      if (!/^#/ || /^# [A-Z]/) {
+        in_actions = 0
+      } else if (/^#[[:space:]]+[a-z]/ && nact < 10) {
+        line = $0
+        sub(/^#[[:space:]]*/, "", line)
+        gsub(/\t/, " ", line)
+        act[++nact] = line
+      }
+    }
+    /^[[:space:]]+(on|off|status|start|stop|list|show|get|set|add|remove|clear|backup|restore|help)\)/ {
+      label = $0
+      sub(/^[[:space:]]+/, "", label)
+      sub(/\).*/, "", label)
+      if (!(label in seen)) { seen[label] = 1; cases[++ncase] = label }
+    }
+    END { flush() }
+  ' "${plugins[@]}"
+}
+
+#
+# @description
+#   Builds the index for a plugin directory and writes it atomically.
+#
+# @param $1 Plugin directory.
+# @param $2 Output file (default PLUGIN_INDEX_FILE).
+# @return 1 if the index could not be written.
+#
+plugin_index_build() {
+  local dir="$1"
+  local out="${2:-$PLUGIN_INDEX_FILE}"
+
+  mkdir -p "${out%/*}" 2>/dev/null || return 1
+  local tmp
+  tmp=$(mktemp "${out}.XXXXXX" 2>/dev/null) || return 1
+
+  if ! {
+    printf '#circus-plugin-index\t%s\t%s\n' "$PLUGIN_INDEX_VERSION" "$dir"
+    _plugin_index_scan "$dir"
+  } > "$tmp"; then
+    rm -f "$tmp"
+    return 1
+  fi
+
+  mv -f "$tmp" "$out"
+}
+
+#
+# @description
+#   Tests whether the cached index is current for a plugin directory: same
+#   format version and directory, and neither the directory (a plugin added or
+#   removed) nor any plugin modified since it was written.
+#
+# @param $1 Plugin directory.
+#
+plugin_index_is_fresh() {
+  local dir="$1"
+  local index="$PLUGIN_INDEX_FILE"
+
+  [ -f "$index" ] || return 1
+  [ "$dir" -nt "$index" ] && return 1
+
+  local header
+  IFS= read -r header < "$index" || return 1
+  [ "$header" = "#circus-plugin-index"$'\t'"$PLUGIN_INDEX_VERSION"$'\t'"$dir" ] || return 1
+
+  local plugin
+  for plugin in "$dir"/fc-*; do
+    [ "$plugin" -nt "$index" ] && return 1
+  done
+  return 0
+}
+
+#
+# @description
+#   Reads index rows from stdin into the PLUGIN_INDEX_* arrays, keeping only
+#   plugins that are executable now.
+#
+# @param $1 Plugin directory.
+#
+_plugin_index_read() {
+  local dir="$1"
+  PLUGIN_INDEX_NAMES=()
+  PLUGIN_INDEX_DESCRIPTIONS=()
+  PLUGIN_INDEX_ACTION_OWNERS=()
+  PLUGIN_INDEX_ACTIONS=()
+
+  local kind name text
+  while IFS=$'\t' read -r kind name text; do
+    case "$kind" in
+      plugin)
+        [ -x "$dir/fc-$name" ] || continue
+        PLUGIN_INDEX_NAMES+=("$name")
+        PLUGIN_INDEX_DESCRIPTIONS+=("$text")
+        ;;
+      action)
+        PLUGIN_INDEX_ACTION_OWNERS+=("$name")
+        PLUGIN_INDEX_ACTIONS+=("$text")
+        ;;
+    esac
+  done
+}
+
+#
+# @description
+#   Loads the plugin index, rebuilding the cached copy first if it is stale.
+#   If the cache cannot be written (read-only HOME), the index is built in
+#   memory for this run.
+#
+# @param $1 Plugin directory.
+#
+plugin_index_load() {
+  local dir="$1"
+
+  if plugin_index_is_fresh "$dir" || plugin_index_build "$dir"; then
+    _plugin_index_read "$dir" < "$PLUGIN_INDEX_FILE"
+  else
+    _plugin_index_read "$dir" < <(_plugin_index_scan "$dir")
+  fi
+}
+
+#
+# @description
+#   Prints the description of a plugin from the loaded index.
+#
+# @param $1 Plugin name, without the fc- prefix.
+#
+plugin_index_description() {
+  local i
+  for i in "${!PLUGIN_INDEX_NAMES[@]}"; do
+    if [ "${PLUGIN_INDEX_NAMES[i]}" = "$1" ]; then
+      printf '%s\n' "${PLUGIN_INDEX_DESCRIPTIONS[i]}"
+      return 0
+    fi
+  done
+  return 1
+}
+
+#
+# @description
+#   Prints a plugin's actions from the loaded index, one per line.
+#
+# @param $1 Plugin name, without the fc- prefix.
+#
+plugin_index_actions() {
+  local i
+  for i in ${PLUGIN_INDEX_ACTION_OWNERS[@]+"${!PLUGIN_INDEX_ACTION_OWNERS[@]}"}; do
+    [ "${PLUGIN_INDEX_ACTION_OWNERS[i]}" = "$1" ] && printf '%s\n' "${PLUGIN_INDEX_ACTIONS[i]}"
+  done
+  return 0
+}
+
+export -f plugin_index_build plugin_index_is_fresh plugin_index_load
+export -f plugin_index_description plugin_index_actions
+export -f _plugin_index_scan _plugin_index_read
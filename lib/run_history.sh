@@ -0,0 +1,324 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         lib/run_history.sh
+#
+# DESCRIPTION:  Records each installer run as a JSON file in ~/.circus/runs/
+#               and reads those records back for `fc runs`.
+#
+#               A record holds the role, privacy profile, dry-run flag, exit
+#               status and the duration in milliseconds of every stage and
+#               preflight check. Comparing records shows whether a Brewfile
+#               change or a new defaults script made provisioning slower.
+#
+#               The files are ordinary JSON, so jq and friends can read them.
+#               The writer puts every stage and check on a line of its own,
+#               and run_history_read relies on that layout so `fc runs` works
+#               without jq.
+#
+# USAGE:
+#   source "$DOTFILES_ROOT/lib/run_history.sh"
+#   run_history_start
+#   run_history_check "Shell Version" passed 12
+#   run_history_stage 03-homebrew-installation "Homebrew & Packages" done 48211
+#   run_history_finish 0
+#
+#   run_history_read "$(run_history_files | tail -1)"
+#   echo "${RUN_STAGE_IDS[@]}"
+#
+# ==============================================================================
+
+# The installer sources this through the stage scheduler and again from stage
+# 0; the second copy must not reset the run being recorded.
+[ -n "${_RUN_HISTORY_SOURCED:-}" ] && return 0
+_RUN_HISTORY_SOURCED=true
+
+source "$DOTFILES_ROOT/lib/parallel.sh"
+
+# Where run records are written.
+RUN_HISTORY_DIR="${RUN_HISTORY_DIR:-$HOME/.circus/runs}"
+
+# How many records to keep. Older ones are removed when a new run is written.
+RUN_HISTORY_KEEP="${RUN_HISTORY_KEEP:-50}"
+
+_RUN_HISTORY_ACTIVE=false
+_RUN_HISTORY_START_MS=0
+_RUN_HISTORY_STARTED_AT=""
+_RUN_HISTORY_STAGES=()  # "id|title|status|ms"
+_RUN_HISTORY_OPEN=""    # "id|title|start_ms" of the stage running in this shell
+_RUN_HISTORY_CHECKS=()  # "name|status|ms"
+
+# Fields of the record loaded by run_history_read.
+RUN_STARTED_AT=""
+RUN_EXIT_STATUS=""
+RUN_ROLE=""
+RUN_PRIVACY_PROFILE=""
+RUN_DRY_RUN=""
+RUN_JOBS=""
+RUN_TOTAL_MS=""
+RUN_STAGE_IDS=()
+RUN_STAGE_TITLES=()
+RUN_STAGE_STATUS=()
+RUN_STAGE_MS=()
+RUN_CHECK_NAMES=()
+RUN_CHECK_STATUS=()
+RUN_CHECK_MS=()
+
+# --- Recording ----------------------------------------------------------------
+
+#
+# @description
+#   Starts recording a run. Stage and check results are collected in memory
+#   until run_history_finish writes them out. Nothing is recorded unless this
+#   has been called, so stages and checks run on their own (as in tests)
+#   leave no history behind.
+#
+run_history_start() {
+  _RUN_HISTORY_ACTIVE=true
+  _RUN_HISTORY_STAGES=()
+  _RUN_HISTORY_CHECKS=()
+  _RUN_HISTORY_OPEN=""
+  _RUN_HISTORY_STARTED_AT=$(date -u +%Y-%m-%dT%H:%M:%SZ)
+  now_ms
+  _RUN_HISTORY_START_MS=$NOW_MS
+}
+
+#
+# @description
+#   Records the outcome of one installer stage.
+#
+# @param $1 Stage id (the script name without .sh).
+# @param $2 Stage title.
+# @param $3 Status: done, uptodate or failed.
+# @param $4 Duration in milliseconds.
+#
+run_history_stage() {
+  [ "$_RUN_HISTORY_ACTIVE" = true ] || return 0
+  _RUN_HISTORY_STAGES+=("$1|$2|$3|${4:-0}")
+  [ "${_RUN_HISTORY_OPEN%%|*}" = "$1" ] && _RUN_HISTORY_OPEN=""
+  return 0
+}
+
+#
+# @description
+#   Notes that a stage is about to run in this shell. A stage that fails
+#   under errexit takes the installer down with it before its result can be
+#   recorded; run_history_finish records such a stage as failed, with the
+#   time it ran for.
+#
+# @param $1 Stage id.
+# @param $2 Stage title.
+#
+run_history_stage_begin() {
+  [ "$_RUN_HISTORY_ACTIVE" = true ] || return 0
+  now_ms
+  _RUN_HISTORY_OPEN="$1|$2|$NOW_MS"
+}
+
+#
+# @description
+#   Records the outcome of one preflight check.
+#
+# @param $1 Check display name.
+# @param $2 Status: passed, warned, failed or skipped.
+# @param $3 Duration in milliseconds.
+#
+run_history_check() {
+  [ "$_RUN_HISTORY_ACTIVE" = true ] || return 0
+  _RUN_HISTORY_CHECKS+=("$1|$2|${3:-0}")
+}
+
+#
+# @description
+#   Escapes a string for use inside a JSON string literal.
+#
+# @param $1 The string.
+#
+_run_history_json_escape() {
+  local s="$1"
+  s="${s//\\/\\\\}"
+  s="${s//\"/\\\"}"
+  s="${s//$'\t'/\\t}"
+  s="${s//$'\n'/\\n}"
+  s="${s//$'\r'/\\r}"
+  printf '%s' "$s"
+}
+
+#
+# @description
+#   Writes the record of the current run and stops recording. Safe to call
+#   more than once; only the first call writes. The file is written under a
+#   temporary name and renamed, so readers never see half a record.
+#
+# @param $1 Exit status of the run (default 1: the run stopped early).
+#
+run_history_finish() {
+  [ "$_RUN_HISTORY_ACTIVE" = true ] || return 0
+  _RUN_HISTORY_ACTIVE=false
+
+  local status="${1:-1}"
+  now_ms
+  local total_ms=$(( NOW_MS - _RUN_HISTORY_START_MS ))
+
+  if [ -n "$_RUN_HISTORY_OPEN" ]; then
+    local open_id open_title open_start
+    IFS='|' read -r open_id open_title open_start <<< "$_RUN_HISTORY_OPEN"
+    _RUN_HISTORY_STAGES+=("$open_id|$open_title|failed|$(( NOW_MS - open_start ))")
+    _RUN_HISTORY_OPEN=""
+  fi
+
+  mkdir -p "$RUN_HISTORY_DIR" 2>/dev/null || return 0
+
+  local stamp="${_RUN_HISTORY_STARTED_AT//[-:]/}"
+  local record="$RUN_HISTORY_DIR/${stamp}-$$.json"
+  local dry_run=false
+  [ "${DRY_RUN_MODE:-false}" = true ] && dry_run=true
+
+  local i id title state ms name sep
+  {
+    echo "{"
+    echo "  \"version\": 1,"
+    echo "  \"started_at\": \"$_RUN_HISTORY_STARTED_AT\","
+    echo "  \"exit_status\": $status,"
+    echo "  \"role\": \"$(_run_history_json_escape "${INSTALL_ROLE:-}")\","
+    echo "  \"privacy_profile\": \"$(_run_history_json_escape "${PRIVACY_PROFILE:-}")\","
+    echo "  \"dry_run\": $dry_run,"
+    echo "  \"jobs\": ${STAGE_JOBS:-1},"
+    echo "  \"total_ms\": $total_ms,"
+
+    echo "  \"stages\": ["
+    sep=","
+    for (( i = 0; i < ${#_RUN_HISTORY_STAGES[@]}; i++ )); do
+      [ "$i" -eq $(( ${#_RUN_HISTORY_STAGES[@]} - 1 )) ] && sep=""
+      IFS='|' read -r id title state ms <<< "${_RUN_HISTORY_STAGES[$i]}"
+      printf '    {"id": "%s", "title": "%s", "status": "%s", "ms": %s}%s\n' \
+        "$(_run_history_json_escape "$id")" "$(_run_history_json_escape "$title")" \
+        "$state" "$ms" "$sep"
+    done
+    echo "  ],"
+
+    echo "  \"preflight\": ["
+    sep=","
+    for (( i = 0; i < ${#_RUN_HISTORY_CHECKS[@]}; i++ )); do
+      [ "$i" -eq $(( ${#_RUN_HISTORY_CHECKS[@]} - 1 )) ] && sep=""
+      IFS='|' read -r name state ms <<< "${_RUN_HISTORY_CHECKS[$i]}"
+      printf '    {"name": "%s", "status": "%s", "ms": %s}%s\n' \
+        "$(_run_history_json_escape "$name")" "$state" "$ms" "$sep"
+    done
+    echo "  ]"
+    echo "}"
+  } > "$record.tmp" && mv "$record.tmp" "$record"
+
+  _run_history_prune
+  return 0
+}
+
+#
+# @description
+#   Removes the oldest records beyond RUN_HISTORY_KEEP.
+#
+_run_history_prune() {
+  local files=()
+  local file
+  while IFS= read -r file; do
+    files+=("$file")
+  done < <(run_history_files)
+
+  local excess=$(( ${#files[@]} - RUN_HISTORY_KEEP ))
+  local i=0
+  while [ "$i" -lt "$excess" ]; do
+    rm -f "${files[$i]}"
+    i=$((i + 1))
+  done
+}
+
+# --- Reading ------------------------------------------------------------------
+
+#
+# @description
+#   Lists run records, oldest first. File names start with the UTC start
+#   time, so name order is time order.
+#
+run_history_files() {
+  [ -d "$RUN_HISTORY_DIR" ] || return 0
+  local file
+  for file in "$RUN_HISTORY_DIR"/*.json; do
+    [ -f "$file" ] && echo "$file"
+  done
+  return 0
+}
+
+#
+# @description
+#   Loads a record written by run_history_finish into the RUN_* variables
+#   and arrays.
+#
+# @param $1 Path to the record.
+# @return 1 if the file cannot be read.
+#
+run_history_read() {
+  local file="$1"
+  [ -r "$file" ] || return 1
+
+  RUN_STARTED_AT=""; RUN_EXIT_STATUS=""; RUN_ROLE=""; RUN_PRIVACY_PROFILE=""
+  RUN_DRY_RUN=""; RUN_JOBS=""; RUN_TOTAL_MS=""
+  RUN_STAGE_IDS=(); RUN_STAGE_TITLES=(); RUN_STAGE_STATUS=(); RUN_STAGE_MS=()
+  RUN_CHECK_NAMES=(); RUN_CHECK_STATUS=(); RUN_CHECK_MS=()
+
+  # Patterns live in variables: bash 3.2 and 5 disagree about quoting inside
+  # a literal =~ operand.
+  local re_string='"([a-z_]+)": "(([^"\\]|\\.)*)"'
+  local re_number='"([a-z_]+)": (-?[0-9]+|true|false)'
+  local re_stage='^ *\{"id": "(([^"\\]|\\.)*)", "title": "(([^"\\]|\\.)*)", "status": "([a-z]*)", "ms": ([0-9]+)\}'
+  local re_check='^ *\{"name": "(([^"\\]|\\.)*)", "status": "([a-z]*)", "ms": ([0-9]+)\}'
+
+  local line
+  while IFS= read -r line; do
+    if [[ "$line" =~ $re_stage ]]; then
+      RUN_STAGE_IDS+=("${BASH_REMATCH[1]}")
+      RUN_STAGE_TITLES+=("$(_run_history_json_unescape "${BASH_REMATCH[3]}")")
+      RUN_STAGE_STATUS+=("${BASH_REMATCH[5]}")
+      RUN_STAGE_MS+=("${BASH_REMATCH[6]}")
+    elif [[ "$line" =~ $re_check ]]; then
+      RUN_CHECK_NAMES+=("$(_run_history_json_unescape "${BASH_REMATCH[1]}")")
+      RUN_CHECK_STATUS+=("${BASH_REMATCH[3]}")
+      RUN_CHECK_MS+=("${BASH_REMATCH[4]}")
+    elif [[ "$line" =~ $re_string ]]; then
+      case "${BASH_REMATCH[1]}" in
+        started_at) RUN_STARTED_AT="${BASH_REMATCH[2]}" ;;
+        role) RUN_ROLE=$(_run_history_json_unescape "${BASH_REMATCH[2]}") ;;
+        privacy_profile) RUN_PRIVACY_PROFILE=$(_run_history_json_unescape "${BASH_REMATCH[2]}") ;;
+      esac
+    elif [[ "$line" =~ $re_number ]]; then
+      case "${BASH_REMATCH[1]}" in
+        exit_status) RUN_EXIT_STATUS="${BASH_REMATCH[2]}" ;;
+        dry_run) RUN_DRY_RUN="${BASH_REMATCH[2]}" ;;
+        jobs) RUN_JOBS="${BASH_REMATCH[2]}" ;;
+        total_ms) RUN_TOTAL_MS="${BASH_REMATCH[2]}" ;;
+      esac
+    fi
+  done < "$file"
+  return 0
+}
+
+#
+# @description
+#   Reverses _run_history_json_escape.
+#
+# @param $1 The escaped string.
+#
+_run_history_json_unescape() {
+  local s="$1"
+  s="${s//\\n/$'\n'}"
+  s="${s//\\t/$'\t'}"
+  s="${s//\\r/$'\r'}"
+  s="${s//\\\"/\"}"
+  s="${s//\\\\/\\}"
+  printf '%s' "$s"
+}
+
+export -f run_history_start run_history_stage run_history_stage_begin run_history_check
+export -f run_history_finish
+export -f run_history_files run_history_read
+export -f _run_history_json_escape _run_history_json_unescape _run_history_prune
@@ -0,0 +1,290 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         lib/secrets_agent.sh
+#
+# DESCRIPTION:  An optional, per-user cache for resolved secrets. Fetching a
+#               secret from 1Password or Vault costs a CLI process and often an
+#               authentication round trip; the agent keeps each resolved value
+#               in memory for a while so that `fc context switch` and
+#               `fc secrets get` pay that cost once per TTL instead of once per
+#               call.
+#
+#               The agent is a small perl server (perl ships with macOS; bash
+#               cannot listen on a socket) reached over a unix socket in
+#               ~/.circus/agent/, a directory with mode 0700, so only the user
+#               can connect. Values live in the agent's memory only and are
+#               never written to disk. Every entry has its own expiry, and
+#               entries can be dropped one at a time or all at once.
+#
+#               The agent never talks to a backend itself: callers look a
+#               secret up, and on a miss fetch it the usual way and store it.
+#               When the agent is not running, every lookup is simply a miss.
+#
+# PROTOCOL:     One request per connection, one line each:
+#                 PING                      -> PONG
+#                 GET <uri>                 -> VALUE <bytes>\n<value> | MISS
+#                 PUT <ttl> <bytes> <uri>\n<value>  -> OK
+#                 DEL <uri>                 -> OK
+#                 FLUSH                     -> OK
+#                 STATS                     -> ENTRIES <n>
+#                 STOP                      -> OK, and the agent exits
+#
+# USAGE:
+#   source "$DOTFILES_ROOT/lib/secrets_agent.sh"
+#   secrets_agent_start
+#   value=$(secrets_agent_get "op://Personal/github/token") || fetch it
+#   if secrets_agent_running; then
+#     printf '%s' "$value" | secrets_agent_put "op://Personal/github/token"
+#   fi
+#
+# ==============================================================================
+
+# Where the agent's socket and pid file live. The directory is mode 0700.
+SECRETS_AGENT_DIR="${SECRETS_AGENT_DIR:-$HOME/.circus/agent}"
+SECRETS_AGENT_SOCKET="$SECRETS_AGENT_DIR/secrets.sock"
+
+# Seconds a stored secret stays valid unless the caller gives its own TTL.
+SECRETS_AGENT_TTL="${SECRETS_AGENT_TTL:-900}"
+
+# --- Perl Programs ------------------------------------------------------------
+
+# The server. Single-threaded: requests are tiny, and each client gets two
+# seconds to send its request before it is dropped.
+_SECRETS_AGENT_SERVER='
+use strict;
+use warnings;
+use IO::Socket::UNIX;
+use Socket qw(SOCK_STREAM);
+
+my ($path, $default_ttl) = @ARGV;
+umask 077;
+unlink $path;
+my $server = IO::Socket::UNIX->new(Type => SOCK_STREAM, Local => $path, Listen => 16)
+  or die "secrets agent: cannot listen on $path: $!\n";
+chmod 0600, $path;
+
+my (%value, %expires);
+my $stop = sub { unlink $path; exit 0 };
+$SIG{TERM} = $SIG{INT} = $SIG{HUP} = $stop;
+$SIG{PIPE} = "IGNORE";
+
+sub fresh {
+  my ($uri) = @_;
+  return 0 unless exists $value{$uri};
+  return 1 if $expires{$uri} > time;
+  delete $value{$uri};
+  delete $expires{$uri};
+  return 0;
+}
+
+while (1) {
+  my $client = $server->accept or next;
+  $client->autoflush(1);
+  my $ok = eval {
+    local $SIG{ALRM} = sub { die "timeout\n" };
+    alarm 2;
+    my $line = <$client>;
+    die "empty\n" unless defined $line;
+    chomp $line;
+    my ($cmd, $rest) = split / /, $line, 2;
+    $rest = "" unless defined $rest;
+
+    if ($cmd eq "PING") {
+      print $client "PONG\n";
+    } elsif ($cmd eq "GET") {
+      if (fresh($rest)) {
+        print $client "VALUE " . length($value{$rest}) . "\n" . $value{$rest};
+      } else {
+        print $client "MISS\n";
+      }
+    } elsif ($cmd eq "PUT") {
+      my ($ttl, $bytes, $uri) = split / /, $rest, 3;
+      my $data = "";
+      while (length($data) < $bytes) {
+        my $got = read($client, $data, $bytes - length($data), length($data));
+        die "short\n" unless $got;
+      }
+      $ttl = $default_ttl unless $ttl =~ /^\d+$/ && $ttl > 0;
+      $value{$uri} = $data;
+      $expires{$uri} = time + $ttl;
+      print $client "OK\n";
+    } elsif ($cmd eq "DEL") {
+      delete $value{$rest};
+      delete $expires{$rest};
+      print $client "OK\n";
+    } elsif ($cmd eq "FLUSH") {
+      %value = ();
+      %expires = ();
+      print $client "OK\n";
+    } elsif ($cmd eq "STATS") {
+      fresh($_) for keys %value;
+      print $client "ENTRIES " . scalar(keys %value) . "\n";
+    } elsif ($cmd eq "STOP") {
+      print $client "OK\n";
+      close $client;
+      $stop->();
+    } else {
+      print $client "ERR unknown command\n";
+    }
+    alarm 0;
+    1;
+  };
+  alarm 0;
+  close $client;
+}
+'
+
+# The client. Sends one request, with stdin as the value for PUT. Prints a
+# GET hit's value exactly and any other reply line as is.
+# Exit status: 0 answered, 1 miss, 2 no agent.
+_SECRETS_AGENT_CLIENT='
+use strict;
+use warnings;
+use IO::Socket::UNIX;
+use Socket qw(SOCK_STREAM);
+
+my ($path, $request) = @ARGV;
+my $sock = IO::Socket::UNIX->new(Type => SOCK_STREAM, Peer => $path) or exit 2;
+$sock->autoflush(1);
+
+if ($request =~ /^PUT (\S+) (.*)$/s) {
+  local $/;
+  my $data = <STDIN>;
+  $data = "" unless defined $data;
+  print $sock "PUT $1 " . length($data) . " $2\n" . $data;
+} else {
+  print $sock "$request\n";
+}
+
+my $reply = <$sock>;
+exit 2 unless defined $reply;
+if ($reply =~ /^VALUE (\d+)$/) {
+  my $data = "";
+  while (length($data) < $1) {
+    my $got = read($sock, $data, $1 - length($data), length($data));
+    exit 2 unless $got;
+  }
+  print $data;
+  exit 0;
+}
+exit 1 if $reply =~ /^MISS/;
+print $reply;
+exit 0;
+'
+
+# --- Client -------------------------------------------------------------------
+
+#
+# @description
+#   Sends one request to the agent.
+#
+# @param $1 The request line.
+# @return 0 answered, 1 miss, 2 agent not running.
+#
+_secrets_agent_request() {
+  [ -S "$SECRETS_AGENT_SOCKET" ] || return 2
+  command -v perl >/dev/null 2>&1 || return 2
+  perl -e "$_SECRETS_AGENT_CLIENT" "$SECRETS_AGENT_SOCKET" "$1"
+}
+
+#
+# @description Succeeds if the agent is running and answering.
+#
+secrets_agent_running() {
+  local reply
+  reply=$(_secrets_agent_request PING 2>/dev/null) && [ "$reply" = "PONG" ]
+}
+
+#
+# @description
+#   Prints a cached secret. Fails on a miss, an expired entry, or when no
+#   agent is running, so callers can fall back to fetching it themselves.
+#
+# @param $1 Secret URI.
+#
+secrets_agent_get() {
+  _secrets_agent_request "GET $1" 2>/dev/null
+}
+
+#
+# @description
+#   Stores a secret, read from stdin, in the agent. Does nothing when no agent
+#   is running, and then stdin is never read: check secrets_agent_running
+#   before piping a value in, or the writer can die of SIGPIPE.
+#
+# @param $1 Secret URI.
+# @param $2 Seconds it stays valid (default: SECRETS_AGENT_TTL).
+#
+secrets_agent_put() {
+  _secrets_agent_request "PUT ${2:-$SECRETS_AGENT_TTL} $1" >/dev/null 2>&1 || true
+}
+
+#
+# @description Drops one secret from the agent.
+#
+# @param $1 Secret URI.
+#
+secrets_agent_forget() {
+  _secrets_agent_request "DEL $1" >/dev/null 2>&1 || true
+}
+
+#
+# @description Drops every secret from the agent.
+#
+secrets_agent_flush() {
+  _secrets_agent_request "FLUSH" >/dev/null 2>&1 || true
+}
+
+#
+# @description Prints the number of live entries, or fails if no agent runs.
+#
+secrets_agent_entries() {
+  local reply
+  reply=$(_secrets_agent_request STATS 2>/dev/null) || return 1
+  echo "${reply#ENTRIES }"
+}
+
+# --- Lifecycle ----------------------------------------------------------------
+
+#
+# @description
+#   Starts the agent in the background unless one is already running. The
+#   socket directory is created, or tightened, to mode 0700 first.
+#
+# @return 1 if perl is missing or the agent did not come up.
+#
+secrets_agent_start() {
+  secrets_agent_running && return 0
+
+  if ! command -v perl >/dev/null 2>&1; then
+    msg_error "The secrets agent needs perl, which was not found."
+    return 1
+  fi
+
+  (umask 077; mkdir -p "$SECRETS_AGENT_DIR") || return 1
+  chmod 700 "$SECRETS_AGENT_DIR"
+
+  # Detached from the caller's terminal and stdio, so it outlives the shell
+  # that started it and cannot hold a $(...) pipe open.
+  nohup perl -e "$_SECRETS_AGENT_SERVER" "$SECRETS_AGENT_SOCKET" "$SECRETS_AGENT_TTL" \
+    </dev/null >/dev/null 2>&1 &
+  echo "$!" > "$SECRETS_AGENT_DIR/agent.pid"
+
+  local tries=0
+  while [ "$tries" -lt 40 ]; do
+    secrets_agent_running && return 0
+    sleep 0.05
+    tries=$((tries + 1))
+  done
+  return 1
+}
+
+#
+# @description Stops the agent; its cached secrets are gone with it.
+#
+secrets_agent_stop() {
+  _secrets_agent_request STOP >/dev/null 2>&1 || true
+  rm -f "$SECRETS_AGENT_SOCKET" "$SECRETS_AGENT_DIR/agent.pid"
+}
@@ -108,6 +108,54 @@ secrets_backend_get_secret() {
   return 0
 }
 
+# Batch key (optional, for sync)
+# Arguments: $1 = secret path (without op:// prefix)
+# Output: Key shared by the secrets that can be fetched in one call. Every
+#         op:// reference can go through a single `op inject`.
+secrets_backend_batch_key() {
+  echo "op"
+}
+
+# Fetch several secrets with one `op inject` call (optional, for sync)
+# Arguments: $1 = output directory
+# Input: "id<TAB>path" lines on stdin
+# Output: Each secret value written to $1/<id>
+# Returns 0 on success, 1 if the call failed (op inject resolves all or none)
+secrets_backend_get_secrets() {
+  local out_dir="$1"
+  local op_cmd="${OP_CMD:-op}"
+  local marker="@@circus-secret@@"
+
+  # Each reference sits on its own line under a marker naming its id, so the
+  # resolved output can be split back apart, multi-line values included.
+  local id path template=""
+  while IFS=$'\t' read -r id path; do
+    template+="$marker $id"$'\n'"{{ op://$path }}"$'\n'
+  done
+
+  local args=(inject)
+  if [ -n "$OP_ACCOUNT" ]; then
+    args+=(--account "$OP_ACCOUNT")
+  fi
+
+  local resolved
+  resolved=$(printf '%s' "$template" | "$op_cmd" "${args[@]}" 2>/dev/null) || return 1
+
+  printf '%s\n' "$resolved" | awk -v dir="$out_dir" -v marker="$marker" '
+    index($0, marker " ") == 1 {
+      if (file != "") close(file)
+      file = dir "/" substr($0, length(marker) + 2)
+      printf "" > file
+      first = 1
+      next
+    }
+    file != "" {
+      printf "%s%s", (first ? "" : "\n"), $0 > file
+      first = 0
+    }
+  '
+}
+
 # List available secrets (optional, for discovery)
 # Returns list of secret references
 secrets_backend_list_secrets() {
@@ -154,6 +154,50 @@ secrets_backend_get_secret() {
   return 0
 }
 
+# Batch key (optional, for sync)
+# Arguments: $1 = secret path (without vault:// prefix)
+# Output: Key shared by the secrets that can be fetched in one call. Fields of
+#         the same secret (path#a, path#b) come from a single read.
+secrets_backend_batch_key() {
+  echo "${1%%#*}"
+}
+
+# Fetch several fields of one secret with a single read (optional, for sync)
+# Arguments: $1 = output directory
+# Input: "id<TAB>path" lines on stdin, all with the same batch key
+# Output: Each secret value written to $1/<id>
+# Returns 0 on success, 1 if the read failed or jq is not installed
+secrets_backend_get_secrets() {
+  local out_dir="$1"
+  local vault_cmd="${VAULT_CMD:-vault}"
+
+  command -v jq >/dev/null 2>&1 || return 1
+
+  local lines=() line
+  while IFS= read -r line; do
+    lines+=("$line")
+  done
+  [ "${#lines[@]}" -gt 0 ] || return 0
+
+  local path="${lines[0]#*$'\t'}"
+  path="${path%%#*}"
+
+  local json
+  json=$("$vault_cmd" kv get -format=json "$path" 2>/dev/null) || return 1
+
+  local id secret_path
+  for line in "${lines[@]}"; do
+    id="${line%%$'\t'*}"
+    secret_path="${line#*$'\t'}"
+    if [[ "$secret_path" == *"#"* ]]; then
+      printf '%s' "$json" | jq -r --arg field "${secret_path#*#}" '.data.data[$field] // empty' > "$out_dir/$id"
+    else
+      printf '%s' "$json" | jq -r '.data.data // empty' > "$out_dir/$id"
+    fi
+  done
+  return 0
+}
+
 # List available secrets (optional, for discovery)
 # Returns list of secret references
 secrets_backend_list_secrets() {
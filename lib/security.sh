@@ -1275,7 +1275,7 @@ sudoers_baseline_info() {
 # --- S11: Secure Temp Files -------------------------------------------------
 
 # Global array to track temp files for cleanup
-declare -a SECURE_TEMP_FILES=()
+SECURE_TEMP_FILES=()
 
 # Create a secure temp file with restrictive permissions (S11)
 # Usage: tmpfile=$(secure_mktemp)
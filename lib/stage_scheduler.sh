@@ -0,0 +1,570 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         lib/stage_scheduler.sh
+#
+# DESCRIPTION:  Runs the installer's stages in dependency order, overlapping
+#               stages that do not depend on each other.
+#
+#               Each stage definition names the stages it depends on and how
+#               it has to run:
+#
+#                 inline    Sourced into the installer's own shell with live
+#                           output, exactly as stages always ran. Required for
+#                           stages that prompt, need sudo, or set variables
+#                           that later stages read (INSTALL_ROLE, PATH,
+#                           LOG_FILE_PATH).
+#                 isolated  May run in a subshell alongside other stages. Its
+#                           console output and log lines are buffered and
+#                           replayed, in stage order, once it finishes.
+#
+#               With STAGE_JOBS=1 (the default) the scheduler always picks the
+#               first ready stage, and since dependencies can only point at
+#               earlier stages, that is the original top-to-bottom order.
+#
+#               A stage may also list the files it reads. Such a stage gets a
+#               fingerprint: its script, those inputs, the role, the privacy
+#               profile, and its dependencies' fingerprints. After a real
+#               (non-dry) run the fingerprint is stored in
+#               STAGE_FINGERPRINT_DIR. Next time, if nothing has changed, the
+#               stage is reported as up to date instead of run, unless
+#               FORCE_MODE is set.
+#
+# USAGE:
+#   source "$DOTFILES_ROOT/lib/stage_scheduler.sh"
+#   stages_define "01-foo.sh|Foo|Does foo||inline" \
+#                 "02-bar.sh|Bar|Does bar|01|isolated|Brewfile roles/{role}/Brewfile"
+#   stages_run
+#
+# ==============================================================================
+
+source "$DOTFILES_ROOT/lib/parallel.sh"
+source "$DOTFILES_ROOT/lib/run_history.sh"
+
+# Maximum number of stages running at once, counting an inline stage.
+STAGE_JOBS="${STAGE_JOBS:-1}"
+
+# Directory holding the stage scripts.
+STAGE_DIR="${STAGE_DIR:-$DOTFILES_ROOT/install}"
+
+# Where fingerprints of successfully applied stages are kept.
+STAGE_FINGERPRINT_DIR="${STAGE_FINGERPRINT_DIR:-$HOME/.circus/fingerprints}"
+
+# Parsed stage table. Parallel indexed arrays, one entry per stage.
+_STAGE_FILE=()
+_STAGE_TITLE=()
+_STAGE_DESC=()
+_STAGE_DEPS=()       # space-separated indices of the stages this one needs
+_STAGE_MODE=()       # inline | isolated
+_STAGE_STATE=()      # pending | running | done | failed
+_STAGE_PID=()
+_STAGE_BUFFER=()
+_STAGE_STARTED_MS=()
+_STAGE_DURATION_MS=()
+_STAGE_REPLAYED=()
+_STAGE_INPUTS=()     # files the stage reads; empty = always run
+_STAGE_FINGERPRINT=()
+_STAGE_UPTODATE=()
+
+_STAGE_WORK_DIR=""
+
+# --- Definitions --------------------------------------------------------------
+
+#
+# @description
+#   Parses stage definitions of the form
+#   "file|title|description|dependencies|mode|inputs". Dependencies are the
+#   numeric prefixes of earlier stages' files, separated by spaces; mode
+#   defaults to inline.
+#
+#   Inputs are paths relative to DOTFILES_ROOT, separated by spaces, with
+#   {role} standing for the install role. Directories are read recursively and
+#   missing paths are allowed. A lone "-" means the stage script is the only
+#   input. Stages without inputs are never fingerprinted and always run.
+#
+# @param $@ Stage definitions, in run order.
+#
+stages_define() {
+  _STAGE_FILE=(); _STAGE_TITLE=(); _STAGE_DESC=(); _STAGE_DEPS=(); _STAGE_MODE=()
+  _STAGE_STATE=(); _STAGE_PID=(); _STAGE_BUFFER=(); _STAGE_STARTED_MS=()
+  _STAGE_DURATION_MS=(); _STAGE_REPLAYED=(); _STAGE_INPUTS=(); _STAGE_FINGERPRINT=()
+  _STAGE_UPTODATE=()
+
+  local def file title desc deps mode inputs dep j resolved found
+  local ids=()
+  for def in "$@"; do
+    IFS='|' read -r file title desc deps mode inputs <<< "$def"
+
+    resolved=""
+    for dep in $deps; do
+      found=""
+      for j in "${!ids[@]}"; do
+        if [ "${ids[$j]}" = "$dep" ]; then
+          found="$j"
+          break
+        fi
+      done
+      [ -n "$found" ] || die "Stage '$file' depends on '$dep', which is not an earlier stage."
+      resolved="$resolved $found"
+    done
+
+    case "${mode:-inline}" in
+      inline|isolated) ;;
+      *) die "Stage '$file' has an unknown mode: $mode" ;;
+    esac
+
+    ids+=("${file%%-*}")
+    _STAGE_FILE+=("$file")
+    _STAGE_TITLE+=("$title")
+    _STAGE_DESC+=("$desc")
+    _STAGE_DEPS+=("${resolved# }")
+    _STAGE_MODE+=("${mode:-inline}")
+    _STAGE_STATE+=("pending")
+    _STAGE_PID+=("")
+    _STAGE_BUFFER+=("")
+    _STAGE_STARTED_MS+=(0)
+    _STAGE_DURATION_MS+=(0)
+    _STAGE_REPLAYED+=(false)
+    _STAGE_INPUTS+=("$inputs")
+    _STAGE_FINGERPRINT+=("")
+    _STAGE_UPTODATE+=(false)
+  done
+}
+
+#
+# @description
+#   Succeeds if every dependency of a stage has finished successfully.
+#
+# @param $1 Stage index.
+#
+_stage_ready() {
+  local dep
+  for dep in ${_STAGE_DEPS[$1]}; do
+    [ "${_STAGE_STATE[$dep]}" = "done" ] || return 1
+  done
+  return 0
+}
+
+# --- Fingerprints -------------------------------------------------------------
+
+#
+# @description
+#   SHA-256 of standard input, printed as bare hex.
+#
+_stage_sha256() {
+  local sum
+  if command -v shasum &>/dev/null; then
+    sum=$(shasum -a 256)
+  else
+    sum=$(sha256sum)
+  fi
+  printf '%s\n' "${sum%% *}"
+}
+
+#
+# @description
+#   Prints the manifest a stage's fingerprint is taken over: one line per
+#   input file with its hash, plus the settings and upstream fingerprints
+#   that change what the stage would do.
+#
+# @param $1 Stage index.
+#
+_stage_manifest() {
+  local index="$1"
+  local input path dep
+  local files=()
+
+  files+=("$STAGE_DIR/${_STAGE_FILE[$index]}")
+  for input in ${_STAGE_INPUTS[$index]}; do
+    [ "$input" = "-" ] && continue
+    path="$DOTFILES_ROOT/${input//\{role\}/${INSTALL_ROLE:-}}"
+    if [ -d "$path" ]; then
+      while IFS= read -r -d '' input; do
+        files+=("$input")
+      done < <(find "$path" -type f -print0 2>/dev/null | LC_ALL=C sort -z)
+    elif [ -f "$path" ]; then
+      files+=("$path")
+    else
+      echo "missing ${path#"$DOTFILES_ROOT"/}"
+    fi
+  done
+
+  # One hashing process for every file, not one per file.
+  if command -v shasum &>/dev/null; then
+    shasum -a 256 "${files[@]}"
+  else
+    sha256sum "${files[@]}"
+  fi | sed "s|$DOTFILES_ROOT/||"
+
+  echo "role=${INSTALL_ROLE:-}"
+  echo "privacy_profile=${PRIVACY_PROFILE:-}"
+  for dep in ${_STAGE_DEPS[$index]}; do
+    echo "after ${_STAGE_FILE[$dep]} ${_STAGE_FINGERPRINT[$dep]}"
+  done
+}
+
+#
+# @description
+#   Computes a stage's fingerprint and decides whether it can be skipped.
+#   The fingerprint is kept for recording after the stage succeeds.
+#
+# @param $1 Stage index.
+# @return 0 if the stage is up to date and should be skipped.
+#
+_stage_is_uptodate() {
+  local index="$1"
+  [ -n "${_STAGE_INPUTS[$index]}" ] || return 1
+  [ -f "$STAGE_DIR/${_STAGE_FILE[$index]}" ] || return 1
+
+  _STAGE_FINGERPRINT[$index]=$(_stage_manifest "$index" | _stage_sha256)
+
+  [ "${FORCE_MODE:-false}" = true ] && return 1
+
+  local stored=""
+  local record="$STAGE_FINGERPRINT_DIR/${_STAGE_FILE[$index]%.sh}"
+  [ -f "$record" ] && stored=$(< "$record")
+  [ -n "$stored" ] && [ "$stored" = "${_STAGE_FINGERPRINT[$index]}" ] && return 0
+  return 1
+}
+
+#
+# @description
+#   Stores the fingerprint of a stage that has just been applied. Dry runs
+#   change nothing, so they record nothing.
+#
+# @param $1 Stage index.
+#
+_stage_record_fingerprint() {
+  local index="$1"
+  [ -n "${_STAGE_FINGERPRINT[$index]}" ] || return 0
+  [ "${DRY_RUN_MODE:-false}" = true ] && return 0
+
+  mkdir -p "$STAGE_FINGERPRINT_DIR" 2>/dev/null || return 0
+  local record="$STAGE_FINGERPRINT_DIR/${_STAGE_FILE[$index]%.sh}"
+  echo "${_STAGE_FINGERPRINT[$index]}" > "$record.tmp.$$" && mv "$record.tmp.$$" "$record"
+  return 0
+}
+
+#
+# @description
+#   Marks a stage as skipped because it is up to date. It counts as done, so
+#   its dependents go ahead.
+#
+# @param $1 Stage index.
+#
+_stage_skip_uptodate() {
+  local index="$1"
+  _STAGE_STATE[$index]="done"
+  _STAGE_UPTODATE[$index]=true
+  _STAGE_DURATION_MS[$index]=0
+}
+
+# --- Execution ----------------------------------------------------------------
+
+#
+# @description
+#   Prints a finished stage's closing line and updates the tracker.
+#
+# @param $1 Stage index.
+#
+_stage_finish_ui() {
+  local index="$1"
+  local seconds=$(( _STAGE_DURATION_MS[index] / 1000 ))
+
+  local status
+  if [ "${_STAGE_UPTODATE[$index]}" = true ]; then
+    status="uptodate"
+    ui_stage_mark "$index" "uptodate"
+    ui_stage_complete_msg "${_STAGE_TITLE[$index]}" "uptodate"
+  elif [ "${_STAGE_STATE[$index]}" = "done" ]; then
+    status="done"
+    ui_stage_mark "$index" "complete"
+    ui_stage_complete_msg "${_STAGE_TITLE[$index]}" "success" "$seconds"
+  else
+    status="failed"
+    ui_stage_mark "$index" "failed"
+    ui_stage_complete_msg "${_STAGE_TITLE[$index]}" "failed" "$seconds"
+  fi
+
+  run_history_stage "${_STAGE_FILE[$index]%.sh}" "${_STAGE_TITLE[$index]}" "$status" \
+    "${_STAGE_DURATION_MS[$index]}"
+}
+
+#
+# @description
+#   Runs an inline stage in the installer's shell. A failing stage aborts the
+#   installer through the ERR trap, as it always has.
+#
+# @param $1 Stage index.
+#
+_stage_run_inline() {
+  local _stage_index="$1"
+  local _stage_path="$STAGE_DIR/${_STAGE_FILE[$_stage_index]}"
+
+  if _stage_is_uptodate "$_stage_index"; then
+    _stage_skip_uptodate "$_stage_index"
+    _STAGE_REPLAYED[$_stage_index]=true
+    _stage_finish_ui "$_stage_index"
+    return 0
+  fi
+
+  export INSTALLER_CURRENT_STAGE=$(( _stage_index + 1 ))
+  export INSTALLER_STAGE_TITLE="${_STAGE_TITLE[$_stage_index]}"
+
+  ui_stage_header "$INSTALLER_CURRENT_STAGE" "${#_STAGE_FILE[@]}" \
+    "${_STAGE_TITLE[$_stage_index]}" "${_STAGE_DESC[$_stage_index]}"
+
+  if [ ! -f "$_stage_path" ]; then
+    ui_stage_mark "$_stage_index" "failed"
+    die "Critical installation stage not found: $_stage_path"
+  fi
+
+  _STAGE_STATE[$_stage_index]="running"
+  ui_stage_mark "$_stage_index" "active"
+  now_ms
+  _STAGE_STARTED_MS[$_stage_index]=$NOW_MS
+  run_history_stage_begin "${_STAGE_FILE[$_stage_index]%.sh}" "${_STAGE_TITLE[$_stage_index]}"
+
+  source "$_stage_path"
+
+  now_ms
+  _STAGE_DURATION_MS[$_stage_index]=$(( NOW_MS - _STAGE_STARTED_MS[_stage_index] ))
+  _STAGE_STATE[$_stage_index]="done"
+  _STAGE_REPLAYED[$_stage_index]=true
+  _stage_record_fingerprint "$_stage_index"
+  _stage_finish_ui "$_stage_index"
+}
+
+#
+# @description
+#   Starts an isolated stage in a background subshell. Its console output goes
+#   to a buffer file, and its log lines are held in the log buffer until it
+#   exits so concurrent stages do not interleave in the log file either.
+#
+# @param $1 Stage index.
+#
+_stage_launch() {
+  local index="$1"
+  local stage_path="$STAGE_DIR/${_STAGE_FILE[$index]}"
+  local buffer="$_STAGE_WORK_DIR/$index.out"
+
+  if [ ! -f "$stage_path" ]; then
+    ui_stage_mark "$index" "failed"
+    die "Critical installation stage not found: $stage_path"
+  fi
+
+  if _stage_is_uptodate "$index"; then
+    _stage_skip_uptodate "$index"
+    return 0
+  fi
+
+  _STAGE_BUFFER[$index]="$buffer"
+  _STAGE_STATE[$index]="running"
+  ui_stage_mark "$index" "active"
+  now_ms
+  _STAGE_STARTED_MS[$index]=$NOW_MS
+
+  (
+    export INSTALLER_CURRENT_STAGE=$(( index + 1 ))
+    export INSTALLER_STAGE_TITLE="${_STAGE_TITLE[$index]}"
+
+    # The parent's EXIT handlers and pending log lines are the parent's
+    # business; start this stage with a clean slate and its own buffer.
+    trap - EXIT
+    _LOG_BUFFER=""
+    _LOG_BUFFER_COUNT=0
+    _LOG_BUFFER_SUBSHELL=$BASH_SUBSHELL
+    LOG_BUFFERED=true
+    LOG_BUFFER_LINES=100000
+
+    # The stage times itself: the scheduler only notices it has exited at its
+    # next poll, which can be minutes later if an inline stage is running.
+    now_ms
+    _stage_own_start=$NOW_MS
+    trap 'log_flush; now_ms; echo $((NOW_MS - _stage_own_start)) > "$buffer.ms"' EXIT
+
+    source "$stage_path"
+  ) > "$buffer" 2>&1 < /dev/null &
+  _STAGE_PID[$index]=$!
+
+  msg_info "Started in parallel: ${_STAGE_TITLE[$index]}"
+}
+
+#
+# @description
+#   Collects isolated stages that have exited, recording status and duration.
+#
+_stage_reap() {
+  local index rc
+  for index in "${!_STAGE_FILE[@]}"; do
+    [ "${_STAGE_STATE[$index]}" = "running" ] || continue
+    [ -n "${_STAGE_PID[$index]}" ] || continue
+    kill -0 "${_STAGE_PID[$index]}" 2>/dev/null && continue
+
+    rc=0
+    wait "${_STAGE_PID[$index]}" 2>/dev/null || rc=$?
+    if [ -s "${_STAGE_BUFFER[$index]}.ms" ]; then
+      _STAGE_DURATION_MS[$index]=$(< "${_STAGE_BUFFER[$index]}.ms")
+    else
+      now_ms
+      _STAGE_DURATION_MS[$index]=$(( NOW_MS - _STAGE_STARTED_MS[index] ))
+    fi
+    if [ "$rc" -eq 0 ]; then
+      _STAGE_STATE[$index]="done"
+      _stage_record_fingerprint "$index"
+    else
+      _STAGE_STATE[$index]="failed"
+    fi
+  done
+}
+
+#
+# @description
+#   Replays buffered stage output in stage order: a finished isolated stage is
+#   printed once every stage before it has been printed.
+#
+# @param $1 Optional "--all" to print every finished stage without waiting on
+#           earlier ones, used when a failure means those will never run.
+#
+_stage_replay() {
+  local index
+  for index in "${!_STAGE_FILE[@]}"; do
+    [ "${_STAGE_REPLAYED[$index]}" = true ] && continue
+    case "${_STAGE_STATE[$index]}" in
+      done|failed) ;;
+      *)
+        [ "${1:-}" = "--all" ] && continue
+        return 0
+        ;;
+    esac
+
+    if [ "${_STAGE_UPTODATE[$index]}" != true ]; then
+      ui_stage_header $(( index + 1 )) "${#_STAGE_FILE[@]}" "${_STAGE_TITLE[$index]}" "${_STAGE_DESC[$index]}"
+      cat "${_STAGE_BUFFER[$index]}" 2>/dev/null || true
+    fi
+    _STAGE_REPLAYED[$index]=true
+    _stage_finish_ui "$index"
+  done
+}
+
+#
+# @description
+#   Prints the index of the first stage that has not started, if any.
+#
+_stage_next_pending() {
+  local index
+  for index in "${!_STAGE_FILE[@]}"; do
+    if [ "${_STAGE_STATE[$index]}" = "pending" ]; then
+      echo "$index"
+      return 0
+    fi
+  done
+  return 0
+}
+
+#
+# @description
+#   Succeeds if every stage before the given one has finished and its output
+#   has been printed.
+#
+# @param $1 Stage index.
+#
+_stage_replayed_before() {
+  local index=0
+  while [ "$index" -lt "$1" ]; do
+    [ "${_STAGE_REPLAYED[$index]}" = true ] || return 1
+    index=$((index + 1))
+  done
+  return 0
+}
+
+#
+# @description
+#   Counts stages that are currently running in the background.
+#
+_stage_running_count() {
+  local index count=0
+  for index in "${!_STAGE_FILE[@]}"; do
+    [ "${_STAGE_STATE[$index]}" = "running" ] && count=$((count + 1))
+  done
+  echo "$count"
+}
+
+#
+# @description
+#   Runs every defined stage, at most STAGE_JOBS at a time, each only after its
+#   dependencies have finished. Dies if a stage fails, after the stages already
+#   running have finished and all output has been replayed.
+#
+stages_run() {
+  local jobs="$STAGE_JOBS"
+  case "$jobs" in
+    '' | *[!0-9]* | 0) jobs=1 ;;
+  esac
+
+  _STAGE_WORK_DIR=$(mktemp -d "${TMPDIR:-/tmp}/circus-stages.XXXXXX")
+
+  local _sched_index _sched_running _sched_progress _sched_failed=""
+  while :; do
+    _stage_reap
+    _stage_replay
+
+    for _sched_index in "${!_STAGE_FILE[@]}"; do
+      [ "${_STAGE_STATE[$_sched_index]}" = "failed" ] && _sched_failed="$_sched_index"
+    done
+
+    _sched_running=$(_stage_running_count)
+    if [ -n "$_sched_failed" ]; then
+      [ "$_sched_running" -eq 0 ] && break
+      sleep "$PARALLEL_POLL_INTERVAL"
+      continue
+    fi
+
+    _sched_progress=false
+
+    # Isolated stages start as soon as they are ready and a slot is free.
+    if [ "$jobs" -gt 1 ]; then
+      for _sched_index in "${!_STAGE_FILE[@]}"; do
+        [ "$_sched_running" -lt "$jobs" ] || break
+        [ "${_STAGE_STATE[$_sched_index]}" = "pending" ] || continue
+        [ "${_STAGE_MODE[$_sched_index]}" = "isolated" ] || continue
+        _stage_ready "$_sched_index" || continue
+
+        _stage_launch "$_sched_index"
+        [ "${_STAGE_STATE[$_sched_index]}" = "running" ] && _sched_running=$((_sched_running + 1))
+        _sched_progress=true
+      done
+    fi
+
+    # Inline stages print live, so one only starts once every stage before it
+    # has finished and been replayed; that keeps the whole transcript in stage
+    # order. With one job this is simply the next stage in the list.
+    _sched_index=$(_stage_next_pending)
+    if [ -n "$_sched_index" ] && [ "$_sched_running" -lt "$jobs" ] \
+      && { [ "$jobs" -eq 1 ] || [ "${_STAGE_MODE[$_sched_index]}" = "inline" ]; } \
+      && _stage_ready "$_sched_index" && _stage_replayed_before "$_sched_index"; then
+      _stage_run_inline "$_sched_index"
+      _sched_progress=true
+    fi
+
+    if [ "$_sched_progress" = false ]; then
+      local _sched_pending=false
+      for _sched_index in "${!_STAGE_FILE[@]}"; do
+        case "${_STAGE_STATE[$_sched_index]}" in
+          pending|running) _sched_pending=true ;;
+        esac
+      done
+      [ "$_sched_pending" = true ] || break
+      sleep "$PARALLEL_POLL_INTERVAL"
+    fi
+  done
+
+  _stage_replay --all
+  rm -rf "$_STAGE_WORK_DIR"
+
+  if [ -n "$_sched_failed" ]; then
+    die "Installation stage failed: ${_STAGE_TITLE[$_sched_failed]}"
+  fi
+  return 0
+}
@@ -0,0 +1,904 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         lib/ui_extra.sh
+#
+# DESCRIPTION:  The larger terminal UI components: banner, progress bar,
+#               spinner, installer stage tracker, tables, gum-backed prompts
+#               and styled messages.
+#
+#               Most commands never use these, so lib/init.sh does not source
+#               this file. It defines stubs that load it on first call. It
+#               builds on the palette and icons in lib/ui.sh.
+#
+# ==============================================================================
+
+# Check if gum is available for enhanced UI
+UI_HAS_GUM=false
+command -v gum &>/dev/null && UI_HAS_GUM=true
+
+# ------------------------------------------------------------------------------
+# SECTION: ASCII ART BANNER
+# ------------------------------------------------------------------------------
+
+ui_print_banner() {
+  local width=${1:-$UI_TERM_WIDTH}
+  [[ $width -gt 80 ]] && width=80
+
+  echo ""
+  if [[ $width -ge 70 ]]; then
+    # Full ASCII art banner with gradient-like coloring
+
+    # Primary color top
+    printf "${UI_PRIMARY}${UI_BOLD}"
+    cat << 'EOF'
+    ____        __  _____ __              ________
+   / __ \____  / /_/ __(_) /__  _____    / ____(_)________  __  _______
+  / / / / __ \/ __/ /_/ / / _ \/ ___/   / /   / / ___/ __ \/ / / / ___/
+ / /_/ / /_/ / /_/ __/ / /  __(__  )   / /___/ / /  / /_/ / /_/ (__  )
+/_____/\____/\__/_/ /_/_/\___/____/    \____/_/_/   \___\_\__,_/____/
+EOF
+    # Transition
+    printf "${UI_SECONDARY}${UI_BOLD}"
+    cat << 'EOF'
+                          _____ _       _
+                         |  ___| |_   _(_)_ __   __ _
+                         | |_  | | | | | | '_ \ / _` |
+                         |  _| | | |_| | | | | | (_| |
+                         |_|   |_|\__, |_|_| |_|\__, |
+                                  |___/         |___/
+EOF
+    printf "${UI_RESET}\n"
+  else
+    # Compact banner for narrow terminals
+    printf "${UI_PRIMARY}${UI_BOLD}"
+    echo "╔═══════════════════════════════════════╗"
+    echo "║   DOTFILES FLYING CIRCUS              ║"
+    printf "${UI_RESET}${UI_SECONDARY}${UI_BOLD}"
+    echo "║         Installation Wizard           ║"
+    printf "${UI_RESET}${UI_PRIMARY}${UI_BOLD}"
+    echo "╚═══════════════════════════════════════╝"
+    printf "${UI_RESET}\n"
+  fi
+}
+
+ui_print_banner_mini() {
+  printf "${UI_PRIMARY}${UI_BOLD}${UI_BOX_H}${UI_BOX_H}${UI_BOX_H} ${UI_RESET}"
+  printf "${UI_BOLD}DOTFILES FLYING CIRCUS${UI_RESET}"
+  printf "${UI_PRIMARY}${UI_BOLD} ${UI_BOX_H}${UI_BOX_H}${UI_BOX_H}${UI_RESET}\n"
+}
+
+# ------------------------------------------------------------------------------
+# SECTION: PROGRESS BAR
+# ------------------------------------------------------------------------------
+
+#
+# Draws a progress bar
+#
+# @param $1 Current value
+# @param $2 Maximum value
+# @param $3 Width (optional, defaults to 40)
+# @param $4 Label (optional)
+#
+ui_progress_bar() {
+  local current="${1:-0}"
+  local max="${2:-100}"
+  local width="${3:-40}"
+  local label="${4:-}"
+
+  local percent=$(( current * 100 / max ))
+  local filled=$(( current * width / max ))
+  local empty=$(( width - filled ))
+
+  printf "\r${UI_RESET}"
+
+  if [[ -n "$label" ]]; then
+    printf "${UI_INFO}%s ${UI_RESET}" "$label"
+  fi
+
+  printf "${UI_MUTED}[${UI_RESET}"
+
+  # Filled portion with gradient effect
+  if [[ $filled -gt 0 ]]; then
+    printf "${UI_SUCCESS}"
+    ui_repeat "$UI_PROGRESS_FULL" "$filled"
+  fi
+
+  # Empty portion
+  if [[ $empty -gt 0 ]]; then
+    printf "${UI_MUTED}"
+    ui_repeat "$UI_PROGRESS_EMPTY" "$empty"
+  fi
+
+  printf "${UI_MUTED}]${UI_RESET} "
+  printf "${UI_BOLD}%3d%%${UI_RESET}" "$percent"
+
+  if [[ $max -gt 0 ]]; then
+    printf " ${UI_MUTED}(%d/%d)${UI_RESET}" "$current" "$max"
+  fi
+}
+
+ui_progress_bar_done() {
+  echo ""
+}
+
+# ------------------------------------------------------------------------------
+# SECTION: SPINNER
+# ------------------------------------------------------------------------------
+
+# Global spinner state (_UI_SPINNER_PID lives in lib/ui.sh for ui_cleanup)
+_UI_SPINNER_MSG=""
+
+#
+# Starts a spinner animation in the background
+#
+# @param $1 Message to display
+#
+ui_spinner_start() {
+  local message="${1:-Loading...}"
+  _UI_SPINNER_MSG="$message"
+
+  # If gum is available and we're in interactive mode, use it
+  if [[ "$UI_HAS_GUM" == "true" ]] && [[ -t 1 ]]; then
+    gum spin --spinner dot --title "$message" -- sleep infinity &
+    _UI_SPINNER_PID=$!
+    return
+  fi
+
+  # Pure bash spinner
+  (
+    local i=0
+    local frames_count=${#UI_SPINNER_FRAMES[@]}
+    while true; do
+      printf "\r${UI_PRIMARY}${UI_SPINNER_FRAMES[$i]}${UI_RESET} ${UI_INFO}%s${UI_RESET}   " "$message"
+      i=$(( (i + 1) % frames_count ))
+      sleep 0.1
+    done
+  ) &
+  _UI_SPINNER_PID=$!
+}
+
+#
+# Stops the spinner and shows a result
+#
+# @param $1 Status: "success", "error", "warning", or "info"
+# @param $2 Optional message override
+#
+ui_spinner_stop() {
+  local status="${1:-success}"
+  local message="${2:-$_UI_SPINNER_MSG}"
+
+  if [[ -n "$_UI_SPINNER_PID" ]]; then
+    kill "$_UI_SPINNER_PID" 2>/dev/null
+    wait "$_UI_SPINNER_PID" 2>/dev/null
+    _UI_SPINNER_PID=""
+  fi
+
+  printf "\r"
+
+  case "$status" in
+    success)
+      printf "${UI_SUCCESS}${UI_ICON_SUCCESS}${UI_RESET} ${UI_SUCCESS}%s${UI_RESET}\n" "$message"
+      ;;
+    error)
+      printf "${UI_ERROR}${UI_ICON_ERROR}${UI_RESET} ${UI_ERROR}%s${UI_RESET}\n" "$message"
+      ;;
+    warning)
+      printf "${UI_WARNING}${UI_ICON_WARNING}${UI_RESET} ${UI_WARNING}%s${UI_RESET}\n" "$message"
+      ;;
+    info)
+      printf "${UI_INFO}${UI_ICON_INFO}${UI_RESET} ${UI_INFO}%s${UI_RESET}\n" "$message"
+      ;;
+    *)
+      printf "%s\n" "$message"
+      ;;
+  esac
+
+  # Clear any remaining characters
+  printf "\033[K"
+}
+
+# ------------------------------------------------------------------------------
+# SECTION: STAGE PROGRESS TRACKER
+# ------------------------------------------------------------------------------
+
+# Global stage tracking. Plain assignments, not `declare`: this file is
+# sourced from inside a function on first use, where `declare` would make
+# them local to the loader.
+UI_STAGES=()
+UI_STAGE_STATUS=()
+UI_CURRENT_STAGE=0
+
+#
+# Initialize stages for tracking
+#
+# @param ... List of stage names
+#
+ui_stages_init() {
+  UI_STAGES=("$@")
+  UI_STAGE_STATUS=()
+  UI_CURRENT_STAGE=0
+  for _ in "${UI_STAGES[@]}"; do
+    UI_STAGE_STATUS+=("pending")
+  done
+}
+
+#
+# Mark a stage as complete and move to next
+#
+ui_stage_complete() {
+  if [[ $UI_CURRENT_STAGE -lt ${#UI_STAGES[@]} ]]; then
+    UI_STAGE_STATUS[$UI_CURRENT_STAGE]="complete"
+    UI_CURRENT_STAGE=$(( UI_CURRENT_STAGE + 1 ))
+    if [[ $UI_CURRENT_STAGE -lt ${#UI_STAGES[@]} ]]; then
+      UI_STAGE_STATUS[$UI_CURRENT_STAGE]="active"
+    fi
+  fi
+}
+
+#
+# Mark current stage as skipped
+#
+ui_stage_skip() {
+  if [[ $UI_CURRENT_STAGE -lt ${#UI_STAGES[@]} ]]; then
+    UI_STAGE_STATUS[$UI_CURRENT_STAGE]="skipped"
+    UI_CURRENT_STAGE=$(( UI_CURRENT_STAGE + 1 ))
+    if [[ $UI_CURRENT_STAGE -lt ${#UI_STAGES[@]} ]]; then
+      UI_STAGE_STATUS[$UI_CURRENT_STAGE]="active"
+    fi
+  fi
+}
+
+#
+# Mark current stage as failed
+#
+ui_stage_fail() {
+  if [[ $UI_CURRENT_STAGE -lt ${#UI_STAGES[@]} ]]; then
+    UI_STAGE_STATUS[$UI_CURRENT_STAGE]="failed"
+  fi
+}
+
+#
+# Start the current stage (mark as active)
+#
+ui_stage_start() {
+  if [[ $UI_CURRENT_STAGE -lt ${#UI_STAGES[@]} ]]; then
+    UI_STAGE_STATUS[$UI_CURRENT_STAGE]="active"
+  fi
+}
+
+#
+# Set the status of a stage by index. Used when stages finish out of order, so
+# the "current" stage becomes the first one that is not yet finished.
+#
+# @param $1 Stage index (0-based)
+# @param $2 Status: pending, active, complete, uptodate, skipped, failed
+#
+ui_stage_mark() {
+  local index="$1"
+  local status="$2"
+
+  [[ $index -lt ${#UI_STAGES[@]} ]] || return 0
+  UI_STAGE_STATUS[$index]="$status"
+
+  UI_CURRENT_STAGE=0
+  while [[ $UI_CURRENT_STAGE -lt ${#UI_STAGES[@]} ]]; do
+    case "${UI_STAGE_STATUS[$UI_CURRENT_STAGE]}" in
+      complete|uptodate|skipped) UI_CURRENT_STAGE=$(( UI_CURRENT_STAGE + 1 )) ;;
+      *) break ;;
+    esac
+  done
+}
+
+#
+# Print the stage progress tracker
+#
+ui_stages_print() {
+  local width="${1:-$UI_TERM_WIDTH}"
+  [[ $width -gt 80 ]] && width=80
+
+  local total=${#UI_STAGES[@]}
+  local completed=0
+  local uptodate=0
+
+  echo ""
+  printf "${UI_BOLD}${UI_PRIMARY}INSTALLATION PROGRESS${UI_RESET}\n"
+  printf "${UI_MUTED}"
+  ui_repeat "$UI_BOX_H_S" "$width"
+  printf "${UI_RESET}\n"
+
+  # Calculate how many stages per row (aim for 3 per row)
+  local cols=3
+  local col_width=$(( (width - 2) / cols ))
+  local c
+
+  local i=0
+  while [[ $i -lt $total ]]; do
+    for (( c=0; c<cols && i<total; c++, i++ )); do
+      local status="${UI_STAGE_STATUS[$i]}"
+      local name="${UI_STAGES[$i]}"
+      local icon color
+
+      case "$status" in
+        complete)
+          icon="$UI_ICON_SUCCESS"
+          color="$UI_SUCCESS"
+          completed=$((completed + 1))
+          ;;
+        uptodate)
+          icon="$UI_ICON_UPTODATE"
+          color="$UI_INFO"
+          completed=$((completed + 1))
+          uptodate=$((uptodate + 1))
+          ;;
+        active)
+          icon="$UI_ICON_ACTIVE"
+          color="$UI_PRIMARY"
+          ;;
+        failed)
+          icon="$UI_ICON_ERROR"
+          color="$UI_ERROR"
+          ;;
+        skipped)
+          icon="$UI_ICON_WARNING"
+          color="$UI_WARNING"
+          completed=$((completed + 1))
+          ;;
+        *)
+          icon="$UI_ICON_PENDING"
+          color="$UI_MUTED"
+          ;;
+      esac
+
+      # Truncate name if too long
+      local max_name_len=$(( col_width - 4 ))
+      if [[ ${#name} -gt $max_name_len ]]; then
+        name="${name:0:$(( max_name_len - 2 ))}.."
+      fi
+
+      printf " ${color}%s %-*s${UI_RESET}" "$icon" "$max_name_len" "$name"
+    done
+    echo ""
+  done
+
+  # ui_repeat rather than `tr`, which mangles multi-byte box characters.
+  printf "${UI_MUTED}"
+  ui_repeat "$UI_BOX_H_S" "$width"
+  printf "${UI_RESET}\n"
+
+  # Show progress summary
+  local percent=$(( completed * 100 / total ))
+  local current=$(( UI_CURRENT_STAGE + 1 ))
+  [[ $current -gt $total ]] && current=$total
+  printf "%*s${UI_BOLD}Stage %d/%d${UI_RESET} ${UI_MUTED}(%d%% complete)${UI_RESET}\n" \
+    $(( width - 25 )) '' \
+    "$current" "$total" "$percent"
+  if [[ $uptodate -gt 0 ]]; then
+    printf "%*s${UI_INFO}${UI_ICON_UPTODATE} %d already up to date${UI_RESET}\n" \
+      $(( width - 25 )) '' "$uptodate"
+  fi
+  echo ""
+}
+
+# ------------------------------------------------------------------------------
+# SECTION: SUMMARY TABLE
+# ------------------------------------------------------------------------------
+
+#
+# Print a formatted table
+#
+# @param $1 Column widths (comma-separated, e.g., "30,15,10")
+# @param ... Rows (comma-separated values)
+#
+ui_table() {
+  local widths_str="${1:-}"
+  shift
+  local headers="${1:-}"
+  shift
+
+  # Declared local so the loops below cannot clobber a caller's variables of the
+  # same name — see the note in ui_repeat for what that costs when it happens.
+  local i row status w
+  local widths cols
+
+  # Parse column widths
+  IFS=',' read -ra widths <<< "$widths_str"
+  local total_width=1
+  for w in "${widths[@]}"; do
+    total_width=$(( total_width + w + 3 ))
+  done
+
+  # Print top border
+  printf "${UI_PRIMARY}${UI_BOX_TL_R}"
+  for i in "${!widths[@]}"; do
+    ui_repeat "$UI_BOX_H_S" "${widths[$i]}"
+    printf "${UI_BOX_H_S}${UI_BOX_H_S}"
+    if [[ $i -lt $(( ${#widths[@]} - 1 )) ]]; then
+      printf "${UI_BOX_T_DOWN}"
+    fi
+  done
+  printf "${UI_BOX_TR_R}${UI_RESET}\n"
+
+  # Print header row
+  IFS=',' read -ra cols <<< "$headers"
+  printf "${UI_PRIMARY}${UI_BOX_V_S}${UI_RESET}"
+  for i in "${!cols[@]}"; do
+    printf " ${UI_BOLD}%-*s${UI_RESET} ${UI_PRIMARY}${UI_BOX_V_S}${UI_RESET}" "${widths[$i]}" "${cols[$i]}"
+  done
+  printf "\n"
+
+  # Print header separator
+  printf "${UI_PRIMARY}${UI_BOX_T_RIGHT}"
+  for i in "${!widths[@]}"; do
+    ui_repeat "$UI_BOX_H_S" "${widths[$i]}"
+    printf "${UI_BOX_H_S}${UI_BOX_H_S}"
+    if [[ $i -lt $(( ${#widths[@]} - 1 )) ]]; then
+      printf "${UI_BOX_CROSS}"
+    fi
+  done
+  printf "${UI_BOX_T_LEFT}${UI_RESET}\n"
+
+  # Print data rows
+  for row in "$@"; do
+    IFS=',' read -ra cols <<< "$row"
+    printf "${UI_PRIMARY}${UI_BOX_V_S}${UI_RESET}"
+    for i in "${!cols[@]}"; do
+      local cell="${cols[$i]}"
+      local cell_color=""
+
+      # Check for status indicators and colorize
+      case "$cell" in
+        *"$UI_ICON_SUCCESS"*|*"Complete"*|*"Success"*)
+          cell_color="$UI_SUCCESS"
+          ;;
+        *"$UI_ICON_ERROR"*|*"Failed"*|*"Error"*)
+          cell_color="$UI_ERROR"
+          ;;
+        *"$UI_ICON_WARNING"*|*"Skipped"*|*"Warning"*)
+          cell_color="$UI_WARNING"
+          ;;
+      esac
+
+      printf " ${cell_color}%-*s${UI_RESET} ${UI_PRIMARY}${UI_BOX_V_S}${UI_RESET}" "${widths[$i]}" "$cell"
+    done
+    printf "\n"
+  done
+
+  # Print bottom border
+  printf "${UI_PRIMARY}${UI_BOX_BL_R}"
+  for i in "${!widths[@]}"; do
+    ui_repeat "$UI_BOX_H_S" "${widths[$i]}"
+    printf "${UI_BOX_H_S}${UI_BOX_H_S}"
+    if [[ $i -lt $(( ${#widths[@]} - 1 )) ]]; then
+      printf "${UI_BOX_T_UP}"
+    fi
+  done
+  printf "${UI_BOX_BR_R}${UI_RESET}\n"
+}
+
+# ------------------------------------------------------------------------------
+# SECTION: GUM INTEGRATION (OPTIONAL ENHANCED UI)
+# ------------------------------------------------------------------------------
+
+#
+# Display a selection menu (uses gum if available, fallback to simple menu)
+#
+# @param $1 Prompt text
+# @param ... Options to choose from
+# @return Selected option (printed to stdout)
+#
+ui_select() {
+  local prompt="${1:-Select an option:}"
+  shift
+  local options=("$@")
+
+  if [[ "$UI_HAS_GUM" == "true" ]] && [[ -t 0 ]] && [[ -t 1 ]]; then
+    gum choose --header "$prompt" "${options[@]}"
+    return
+  fi
+
+  # Fallback to simple numbered menu
+  echo ""
+  printf "${UI_BOLD}%s${UI_RESET}\n" "$prompt"
+  echo ""
+
+  local i=1
+  local opt
+  for opt in "${options[@]}"; do
+    printf "  ${UI_PRIMARY}%d)${UI_RESET} %s\n" "$i" "$opt"
+    i=$((i + 1))
+  done
+
+  echo ""
+  local choice
+  while true; do
+    # Handled explicitly rather than with `|| true`, because this read sits in a
+    # `while true`. At EOF read returns immediately with an empty value, so
+    # ignoring the status would spin here forever — trading a crash for a hang,
+    # which is worse. Returning non-zero lets the caller decide.
+    if ! read -p "Enter choice [1-${#options[@]}]: " choice; then
+      echo ""
+      printf "${UI_ERROR}No input available; selection cancelled.${UI_RESET}\n" >&2
+      return 1
+    fi
+    if [[ "$choice" =~ ^[0-9]+$ ]] && [[ "$choice" -ge 1 ]] && [[ "$choice" -le ${#options[@]} ]]; then
+      echo "${options[$((choice-1))]}"
+      return
+    fi
+    printf "${UI_ERROR}Invalid selection. Please try again.${UI_RESET}\n"
+  done
+}
+
+#
+# Display a multi-select menu (uses gum if available)
+#
+# @param $1 Prompt text
+# @param ... Options (prefix with '+' for pre-selected)
+# @return Selected options (one per line)
+#
+ui_multiselect() {
+  local prompt="${1:-Select options (space to toggle):}"
+  shift
+  local options=("$@")
+  local opt num
+
+  if [[ "$UI_HAS_GUM" == "true" ]] && [[ -t 0 ]] && [[ -t 1 ]]; then
+    local selected=()
+    local items=()
+    for opt in "${options[@]}"; do
+      if [[ "$opt" == +* ]]; then
+        selected+=("${opt:1}")
+        items+=("${opt:1}")
+      else
+        items+=("$opt")
+      fi
+    done
+    if [[ ${#selected[@]} -gt 0 ]]; then
+      gum choose --no-limit --header "$prompt" --selected="${selected[*]}" "${items[@]}"
+    else
+      gum choose --no-limit --header "$prompt" "${items[@]}"
+    fi
+    return
+  fi
+
+  # Fallback: display checklist and let user type numbers
+  echo ""
+  printf "${UI_BOLD}%s${UI_RESET}\n" "$prompt"
+  echo ""
+
+  local -a selected_status=()
+  local i=1
+  for opt in "${options[@]}"; do
+    if [[ "$opt" == +* ]]; then
+      selected_status+=("1")
+      printf "  ${UI_SUCCESS}[${UI_ICON_SUCCESS}]${UI_RESET} ${UI_PRIMARY}%d)${UI_RESET} %s\n" "$i" "${opt:1}"
+    else
+      selected_status+=("0")
+      printf "  ${UI_MUTED}[ ]${UI_RESET} ${UI_PRIMARY}%d)${UI_RESET} %s\n" "$i" "$opt"
+    fi
+    i=$((i + 1))
+  done
+
+  echo ""
+  printf "${UI_INFO}Enter numbers to toggle (comma-separated), then press Enter:${UI_RESET}\n"
+  # `|| true`: at EOF (stdin closed, a pipe, cron) `read` returns non-zero,
+  # and helpers.sh runs with set -e plus an ERR trap — so this prompt aborted
+  # with "An unexpected error occurred" instead of cancelling cleanly. An
+  # empty answer is already treated as "no" below, which is the safe default.
+  read -p "> " toggles || true
+
+  IFS=',' read -ra toggle_nums <<< "$toggles"
+  for num in "${toggle_nums[@]}"; do
+    num=$(echo "$num" | tr -d ' ')
+    if [[ "$num" =~ ^[0-9]+$ ]] && [[ "$num" -ge 1 ]] && [[ "$num" -le ${#options[@]} ]]; then
+      local idx=$((num - 1))
+      if [[ "${selected_status[$idx]}" == "1" ]]; then
+        selected_status[$idx]="0"
+      else
+        selected_status[$idx]="1"
+      fi
+    fi
+  done
+
+  # Output selected items
+  for i in "${!options[@]}"; do
+    if [[ "${selected_status[$i]}" == "1" ]]; then
+      local opt="${options[$i]}"
+      [[ "$opt" == +* ]] && opt="${opt:1}"
+      echo "$opt"
+    fi
+  done
+}
+
+#
+# Display a confirmation prompt (uses gum if available)
+#
+# @param $1 Question text
+# @param $2 Default (Y/N, optional)
+# @return 0 for yes, 1 for no
+#
+ui_confirm() {
+  local question="${1:-Continue?}"
+  local default="${2:-}"
+
+  if [[ "$UI_HAS_GUM" == "true" ]] && [[ -t 0 ]] && [[ -t 1 ]]; then
+    if [[ "$default" == "Y" ]]; then
+      gum confirm --default=yes "$question"
+    elif [[ "$default" == "N" ]]; then
+      gum confirm --default=no "$question"
+    else
+      gum confirm "$question"
+    fi
+    return
+  fi
+
+  # Fallback to simple prompt
+  local prompt_suffix
+  case "$default" in
+    Y) prompt_suffix="[Y/n]" ;;
+    N) prompt_suffix="[y/N]" ;;
+    *) prompt_suffix="[y/n]" ;;
+  esac
+
+  while true; do
+    printf "${UI_BOLD}%s${UI_RESET} %s " "$question" "$prompt_suffix"
+    read -r reply
+
+    [[ -z "$reply" ]] && reply="$default"
+
+    case "$reply" in
+      [Yy]*) return 0 ;;
+      [Nn]*) return 1 ;;
+    esac
+    printf "${UI_ERROR}Please answer yes or no.${UI_RESET}\n"
+  done
+}
+
+#
+# Display styled input prompt (uses gum if available)
+#
+# @param $1 Prompt text
+# @param $2 Default value (optional)
+# @return User input
+#
+ui_input() {
+  local prompt="${1:-Enter value:}"
+  local default="${2:-}"
+
+  if [[ "$UI_HAS_GUM" == "true" ]] && [[ -t 0 ]] && [[ -t 1 ]]; then
+    if [[ -n "$default" ]]; then
+      gum input --placeholder "$default" --header "$prompt" --value "$default"
+    else
+      gum input --header "$prompt"
+    fi
+    return
+  fi
+
+  # Fallback
+  local result
+  if [[ -n "$default" ]]; then
+    # `|| true`: at EOF (stdin closed, a pipe, cron) `read` returns non-zero,
+    # and helpers.sh runs with set -e plus an ERR trap — so this prompt aborted
+    # with "An unexpected error occurred" instead of cancelling cleanly. An
+    # empty answer is already treated as "no" below, which is the safe default.
+    read -p "$prompt [$default]: " result || true
+    [[ -z "$result" ]] && result="$default"
+  else
+    # `|| true`: at EOF (stdin closed, a pipe, cron) `read` returns non-zero,
+    # and helpers.sh runs with set -e plus an ERR trap — so this prompt aborted
+    # with "An unexpected error occurred" instead of cancelling cleanly. An
+    # empty answer is already treated as "no" below, which is the safe default.
+    read -p "$prompt: " result || true
+  fi
+  echo "$result"
+}
+
+# ------------------------------------------------------------------------------
+# SECTION: STYLED MESSAGE FUNCTIONS
+# ------------------------------------------------------------------------------
+
+#
+# Print a section header
+#
+ui_header() {
+  local text="${1:-}"
+  local width="${2:-$UI_TERM_WIDTH}"
+  [[ $width -gt 80 ]] && width=80
+
+  echo ""
+  printf "${UI_PRIMARY}${UI_BOLD}"
+  ui_repeat "$UI_BOX_H" "$width"
+  printf "${UI_RESET}\n"
+  printf "${UI_PRIMARY}${UI_BOLD}  %s${UI_RESET}\n" "$text"
+  printf "${UI_PRIMARY}${UI_BOLD}"
+  ui_repeat "$UI_BOX_H" "$width"
+  printf "${UI_RESET}\n"
+  echo ""
+}
+
+#
+# Print a styled step indicator
+#
+ui_step() {
+  local step_num="${1:-1}"
+  local total_steps="${2:-1}"
+  local description="${3:-}"
+
+  printf "${UI_PRIMARY}${UI_BOLD}[%d/%d]${UI_RESET} ${UI_BOLD}%s${UI_RESET}\n" \
+    "$step_num" "$total_steps" "$description"
+}
+
+#
+# Print a styled list item
+#
+ui_list_item() {
+  local text="${1:-}"
+  local indent="${2:-0}"
+  local bullet="${3:-$UI_ICON_BULLET}"
+
+  printf '%*s' "$indent" ''
+  printf "${UI_MUTED}%s${UI_RESET} %s\n" "$bullet" "$text"
+}
+
+#
+# Print a key-value pair
+#
+ui_keyval() {
+  local key="${1:-}"
+  local value="${2:-}"
+  local key_width="${3:-20}"
+
+  printf "${UI_MUTED}%-*s${UI_RESET} ${UI_BOLD}%s${UI_RESET}\n" "$key_width" "$key:" "$value"
+}
+
+#
+# Print a notice/callout box
+#
+ui_notice() {
+  local type="${1:-info}"
+  local message="${2:-}"
+  local width="${3:-$UI_TERM_WIDTH}"
+  [[ $width -gt 80 ]] && width=80
+
+  local icon color label
+  case "$type" in
+    success) icon="$UI_ICON_SUCCESS"; color="$UI_SUCCESS"; label="SUCCESS" ;;
+    error)   icon="$UI_ICON_ERROR";   color="$UI_ERROR";   label="ERROR" ;;
+    warning) icon="$UI_ICON_WARNING"; color="$UI_WARNING"; label="WARNING" ;;
+    *)       icon="$UI_ICON_INFO";    color="$UI_INFO";    label="NOTE" ;;
+  esac
+
+  echo ""
+  printf "${color}${UI_BOX_TL_R}${UI_BOX_H_S}${UI_BOX_H_S} %s %s ${UI_BOX_H_S}" "$icon" "$label"
+  ui_repeat "$UI_BOX_H_S" "$(( width - 10 - ${#label} ))"
+  printf "${UI_BOX_TR_R}${UI_RESET}\n"
+
+  printf "${color}${UI_BOX_V_S}${UI_RESET} %-*s ${color}${UI_BOX_V_S}${UI_RESET}\n" \
+    $(( width - 4 )) "$message"
+
+  printf "${color}${UI_BOX_BL_R}"
+  ui_repeat "$UI_BOX_H_S" "$(( width - 2 ))"
+  printf "${UI_BOX_BR_R}${UI_RESET}\n"
+  echo ""
+}
+
+# ------------------------------------------------------------------------------
+# SECTION: STAGE HEADER FOR INSTALLER
+# ------------------------------------------------------------------------------
+
+#
+# Print a styled stage header with progress information
+#
+# @param $1 Stage number (current)
+# @param $2 Total stages
+# @param $3 Stage title
+# @param $4 Stage description (optional)
+#
+ui_stage_header() {
+  local stage_num="${1:-1}"
+  local total_stages="${2:-1}"
+  local title="${3:-}"
+  local description="${4:-}"
+  local width="${UI_TERM_WIDTH:-80}"
+  [[ $width -gt 80 ]] && width=80
+
+  echo ""
+
+  # Progress indicator line
+  local progress_pct=$(( stage_num * 100 / total_stages ))
+  local progress_width=$(( width - 30 ))
+  local filled=$(( stage_num * progress_width / total_stages ))
+  local empty=$(( progress_width - filled ))
+
+  printf "${UI_MUTED}Stage %d of %d ${UI_RESET}" "$stage_num" "$total_stages"
+  printf "${UI_MUTED}[${UI_RESET}"
+  if [[ $filled -gt 0 ]]; then
+    printf "${UI_SUCCESS}"
+    ui_repeat "$UI_PROGRESS_FULL" "$filled"
+  fi
+  if [[ $empty -gt 0 ]]; then
+    printf "${UI_MUTED}"
+    ui_repeat "$UI_PROGRESS_EMPTY" "$empty"
+  fi
+  printf "${UI_MUTED}]${UI_RESET} ${UI_BOLD}%d%%${UI_RESET}\n" "$progress_pct"
+
+  # Stage title box
+  printf "${UI_PRIMARY}${UI_BOX_TL_R}"
+  ui_repeat "$UI_BOX_H_S" "$(( width - 2 ))"
+  printf "${UI_BOX_TR_R}${UI_RESET}\n"
+
+  printf "${UI_PRIMARY}${UI_BOX_V}${UI_RESET}"
+  printf "  ${UI_ACCENT}${UI_ICON_ACTIVE}${UI_RESET} ${UI_BOLD}%-*s${UI_RESET}" "$(( width - 7 ))" "$title"
+  printf "${UI_PRIMARY}${UI_BOX_V}${UI_RESET}\n"
+
+  if [[ -n "$description" ]]; then
+    printf "${UI_PRIMARY}${UI_BOX_V_S}${UI_RESET}"
+    printf "    ${UI_MUTED}%-*s${UI_RESET}" "$(( width - 7 ))" "$description"
+    printf "${UI_PRIMARY}${UI_BOX_V_S}${UI_RESET}\n"
+  fi
+
+  printf "${UI_PRIMARY}${UI_BOX_BL_R}"
+  ui_repeat "$UI_BOX_H_S" "$(( width - 2 ))"
+  printf "${UI_BOX_BR_R}${UI_RESET}\n"
+  echo ""
+}
+
+#
+# Print a compact stage completion message
+#
+# @param $1 Stage title
+# @param $2 Status: "success", "uptodate", "skipped", "failed"
+# @param $3 Duration in seconds (optional)
+#
+ui_stage_complete_msg() {
+  local title="${1:-}"
+  local status="${2:-success}"
+  local duration="${3:-}"
+
+  local icon color status_text
+  case "$status" in
+    success)
+      icon="$UI_ICON_SUCCESS"
+      color="$UI_SUCCESS"
+      status_text="Complete"
+      ;;
+    uptodate)
+      icon="$UI_ICON_UPTODATE"
+      color="$UI_INFO"
+      status_text="Up to date"
+      ;;
+    skipped)
+      icon="$UI_ICON_WARNING"
+      color="$UI_WARNING"
+      status_text="Skipped"
+      ;;
+    failed)
+      icon="$UI_ICON_ERROR"
+      color="$UI_ERROR"
+      status_text="Failed"
+      ;;
+    *)
+      icon="$UI_ICON_INFO"
+      color="$UI_INFO"
+      status_text="Done"
+      ;;
+  esac
+
+  printf "${color}${icon}${UI_RESET} ${UI_BOLD}%s${UI_RESET} ${color}%s${UI_RESET}" "$title" "$status_text"
+
+  if [[ -n "$duration" ]]; then
+    printf " ${UI_MUTED}(${duration}s)${UI_RESET}"
+  fi
+  printf "\n"
+}
+
+# Export all functions
+export -f ui_print_banner ui_print_banner_mini
+export -f ui_progress_bar ui_progress_bar_done
+export -f ui_spinner_start ui_spinner_stop
+export -f ui_stages_init ui_stage_complete ui_stage_skip ui_stage_fail ui_stage_start ui_stage_mark ui_stages_print
+export -f ui_table
+export -f ui_select ui_multiselect ui_confirm ui_input
+export -f ui_header ui_step ui_list_item ui_keyval ui_notice
+export -f ui_stage_header ui_stage_complete_msg
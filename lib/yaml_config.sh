@@ -18,6 +18,9 @@
 #
 # ==============================================================================
 
+# Batched Homebrew installation shared with the installer and fc commands.
+source "$DOTFILES_ROOT/lib/homebrew.sh"
+
 # --- Dependency Check -------------------------------------------------------
 
 # Check if yq is installed
@@ -65,85 +68,411 @@ yaml_foreach() {
   done
 }
 
+# --- Compiled Configuration Cache -------------------------------------------
+#
+# Every applier used to call yq once for an array's length and again for every
+# element and every field, so a 150-entry role config cost hundreds of yq
+# launches per `fc config apply`. The loader below reads the whole file with a
+# single `yq -o=props` call, flattens it to a TSV, and caches that TSV under
+# ~/.circus/cache/yaml keyed by the file's SHA-256. Loading a cached config is
+# one hash and one read loop; no yq at all.
+#
+# Cached row format, one scalar per line:
+#
+#   <section> TAB <index> TAB <field> TAB <value>
+#
+#   packages.brew  3   -          git
+#   defaults       0   domain     com.apple.dock
+#   metadata       -   name       developer
+#
+# An absent index or field is written as "-": tab is IFS whitespace, so `read`
+# would collapse two adjacent tabs and shift every later column.
+#
+# Values keep the Java-properties escaping yq emits (\\, \n, \t, \r and a
+# backslash before any other literal), so a row is always exactly one line.
+#
+# A field that is itself a sequence or map (an `-array` defaults value, say)
+# has no scalar of its own in the props output, only children such as
+# `value.0` and `value.1`. Those nodes are looked up once more with yq at
+# compile time and cached as a single row holding the YAML that `yaml_get`
+# would have printed for them.
+
+YAML_CONFIG_CACHE_DIR="${YAML_CONFIG_CACHE_DIR:-$HOME/.circus/cache/yaml}"
+
+# Bump when the row format changes so stale caches are not misread.
+YAML_CONFIG_CACHE_VERSION=2
+
+# Loaded configuration. Parallel indexed arrays rather than associative ones:
+# this file is sourced by bash 3.2 during install.
+YAML_CFG_FILE=""
+YAML_CFG_HASH=""
+YAML_CFG_NAME=""
+YAML_CFG_DESCRIPTION=""
+YAML_CFG_BREW=()
+YAML_CFG_CASK=()
+YAML_CFG_MAS_ID=()
+YAML_CFG_MAS_NAME=()
+YAML_CFG_DEFAULTS_DOMAIN=()
+YAML_CFG_DEFAULTS_KEY=()
+YAML_CFG_DEFAULTS_TYPE=()
+YAML_CFG_DEFAULTS_VALUE=()
+YAML_CFG_DEFAULTS_DESCRIPTION=()
+YAML_CFG_ENV_NAME=()
+YAML_CFG_ENV_VALUE=()
+YAML_CFG_ALIAS_NAME=()
+YAML_CFG_ALIAS_COMMAND=()
+YAML_CFG_ALIAS_DESCRIPTION=()
+
+# Element counts per section (highest index + 1), so a missing field in one
+# element never shifts the others.
+YAML_CFG_BREW_COUNT=0
+YAML_CFG_CASK_COUNT=0
+YAML_CFG_MAS_COUNT=0
+YAML_CFG_DEFAULTS_COUNT=0
+YAML_CFG_ENV_COUNT=0
+YAML_CFG_ALIAS_COUNT=0
+
+# Print the SHA-256 of a file's contents.
+# Usage: yaml_config_hash file.yaml
+yaml_config_hash() {
+  local file="$1"
+  local sum
+  if command -v shasum &>/dev/null; then
+    sum=$(shasum -a 256 < "$file") || return 1
+  else
+    sum=$(sha256sum < "$file") || return 1
+  fi
+  printf '%s\n' "${sum%% *}"
+}
+
+# Undo the properties escaping kept in cached rows.
+# Usage: _yaml_unescape "value"   (result in _YAML_UNESCAPED)
+_yaml_unescape() {
+  local s="$1"
+  _YAML_UNESCAPED="$s"
+  [[ "$s" == *\\* ]] || return 0
+
+  local out="" c i
+  for ((i = 0; i < ${#s}; i++)); do
+    c="${s:i:1}"
+    if [[ "$c" == "\\" && $((i + 1)) -lt ${#s} ]]; then
+      i=$((i + 1))
+      c="${s:i:1}"
+      case "$c" in
+        n) c=$'\n' ;;
+        t) c=$'\t' ;;
+        r) c=$'\r' ;;
+        f) c=$'\f' ;;
+      esac
+    fi
+    out+="$c"
+  done
+  _YAML_UNESCAPED="$out"
+}
+
+# Apply the properties escaping used in cached rows.
+# Usage: _yaml_escape "value"   (result in _YAML_ESCAPED)
+_yaml_escape() {
+  local s="$1"
+  s="${s//\\/\\\\}"
+  s="${s//$'\n'/\\n}"
+  s="${s//$'\t'/\\t}"
+  s="${s//$'\r'/\\r}"
+  _YAML_ESCAPED="$s"
+}
+
+# Compile a YAML config into cached TSV rows with one yq call, plus one more
+# per element field that is a sequence or map.
+# Usage: yaml_config_compile file.yaml output.tsv
+yaml_config_compile() {
+  local file="$1"
+  local out="$2"
+  local props
+
+  # One process for the whole file. Comment lines are yq carrying YAML
+  # comments through; `key = value` lines are the data.
+  if ! props=$(yq eval -o=props '.' "$file" 2>/dev/null); then
+    return 1
+  fi
+
+  local tmp
+  tmp=$(mktemp "${out}.XXXXXX") || return 1
+
+  local line key value part section index field
+  local nested="" node failed=""
+  {
+    printf '#circus-yaml-cache\t%s\n' "$YAML_CONFIG_CACHE_VERSION"
+    while IFS= read -r line; do
+      case "$line" in
+        ''|'#'*|'!'*) continue ;;
+      esac
+      if [[ "$line" == *" = "* ]]; then
+        key="${line%% = *}"
+        value="${line#* = }"
+      elif [[ "$line" == *" =" ]]; then
+        key="${line% =}"
+        value=""
+      else
+        continue
+      fi
+
+      # Split the dotted path at its first numeric component:
+      #   defaults.4.domain -> section=defaults index=4 field=domain
+      section="" index="" field=""
+      local rest="$key"
+      while [[ -n "$rest" ]]; do
+        part="${rest%%.*}"
+        if [[ "$part" == "$rest" ]]; then rest=""; else rest="${rest#*.}"; fi
+        if [[ -z "$index" && "$part" =~ ^[0-9]+$ && -n "$section" ]]; then
+          index="$part"
+          field="$rest"
+          break
+        fi
+        section="${section:+$section.}$part"
+      done
+      # A child of a non-scalar field: remember the field, look it up below.
+      if [[ -n "$index" && "$field" == *.* ]]; then
+        node="$section"$'\t'"$index"$'\t'"${field%%.*}"
+        case "$nested" in
+          *$'\n'"$node"$'\n'*) ;;
+          *) nested+=$'\n'"$node"$'\n' ;;
+        esac
+        continue
+      fi
+      if [[ -z "$index" ]]; then
+        field="${section##*.}"
+        if [[ "$section" == *.* ]]; then section="${section%.*}"; else section=""; fi
+      fi
+
+      printf '%s\t%s\t%s\t%s\n' "${section:--}" "${index:--}" "${field:--}" "$value"
+    done <<< "$props"
+
+    while IFS=$'\t' read -r section index field; do
+      [[ -n "$section" ]] || continue
+      if ! value=$(yq eval ".${section}[${index}].${field}" "$file" 2>/dev/null); then
+        failed=1
+        break
+      fi
+      _yaml_escape "$value"
+      printf '%s\t%s\t%s\t%s\n' "$section" "$index" "$field" "$_YAML_ESCAPED"
+    done <<< "$nested"
+  } > "$tmp" || failed=1
+  if [[ -n "$failed" ]]; then
+    rm -f "$tmp"
+    return 1
+  fi
+
+  # Atomic so a concurrent reader never sees a half-written cache.
+  mv -f "$tmp" "$out"
+}
+
+# Reset the loaded configuration arrays.
+_yaml_config_reset() {
+  YAML_CFG_FILE=""
+  YAML_CFG_HASH=""
+  YAML_CFG_NAME=""
+  YAML_CFG_DESCRIPTION=""
+  YAML_CFG_BREW=(); YAML_CFG_CASK=()
+  YAML_CFG_MAS_ID=(); YAML_CFG_MAS_NAME=()
+  YAML_CFG_DEFAULTS_DOMAIN=(); YAML_CFG_DEFAULTS_KEY=(); YAML_CFG_DEFAULTS_TYPE=()
+  YAML_CFG_DEFAULTS_VALUE=(); YAML_CFG_DEFAULTS_DESCRIPTION=()
+  YAML_CFG_ENV_NAME=(); YAML_CFG_ENV_VALUE=()
+  YAML_CFG_ALIAS_NAME=(); YAML_CFG_ALIAS_COMMAND=(); YAML_CFG_ALIAS_DESCRIPTION=()
+  YAML_CFG_BREW_COUNT=0; YAML_CFG_CASK_COUNT=0; YAML_CFG_MAS_COUNT=0
+  YAML_CFG_DEFAULTS_COUNT=0; YAML_CFG_ENV_COUNT=0; YAML_CFG_ALIAS_COUNT=0
+}
+
+# Load a YAML config into the YAML_CFG_* arrays, compiling it on a cache miss.
+# Repeat calls for the same unchanged file in one process cost one hash.
+# Usage: yaml_config_load file.yaml [--reload]
+yaml_config_load() {
+  local file="$1"
+  local reload="${2:-}"
+
+  if [[ ! -f "$file" ]]; then
+    msg_error "Configuration file not found: $file"
+    return 1
+  fi
+
+  local hash
+  hash=$(yaml_config_hash "$file") || return 1
+
+  # Keyed on the content hash, not just the path, so a file edited while
+  # this process runs is loaded again.
+  if [[ "$reload" != "--reload" && "$YAML_CFG_FILE" == "$file" && "$YAML_CFG_HASH" == "$hash" ]]; then
+    return 0
+  fi
+
+  local cache="$YAML_CONFIG_CACHE_DIR/$hash.tsv"
+  local header=""
+  [[ -f "$cache" ]] && IFS= read -r header < "$cache"
+  if [[ "$header" != "#circus-yaml-cache"$'\t'"$YAML_CONFIG_CACHE_VERSION" ]]; then
+    check_yq_installed || return 1
+    mkdir -p "$YAML_CONFIG_CACHE_DIR" 2>/dev/null
+    chmod 700 "$YAML_CONFIG_CACHE_DIR" 2>/dev/null || true
+    if ! yaml_config_compile "$file" "$cache"; then
+      msg_error "Failed to parse YAML: $file"
+      return 1
+    fi
+    msg_debug "Compiled YAML config cache: $cache"
+  fi
+
+  _yaml_config_reset
+
+  local section index field value n
+  while IFS=$'\t' read -r section index field value; do
+    [[ "$section" == "#"* ]] && continue
+    [[ "$index" == "-" ]] && index=0
+    [[ "$field" == "-" ]] && field=""
+    _yaml_unescape "$value"
+    value="$_YAML_UNESCAPED"
+    n=$((index + 1))
+
+    case "$section|$field" in
+      "metadata|name")        YAML_CFG_NAME="$value" ;;
+      "metadata|description") YAML_CFG_DESCRIPTION="$value" ;;
+      "packages.brew|")
+        YAML_CFG_BREW[index]="$value"
+        [[ $n -gt $YAML_CFG_BREW_COUNT ]] && YAML_CFG_BREW_COUNT=$n ;;
+      "packages.cask|")
+        YAML_CFG_CASK[index]="$value"
+        [[ $n -gt $YAML_CFG_CASK_COUNT ]] && YAML_CFG_CASK_COUNT=$n ;;
+      "packages.mas|"*)
+        case "$field" in
+          id)   YAML_CFG_MAS_ID[index]="$value" ;;
+          name) YAML_CFG_MAS_NAME[index]="$value" ;;
+        esac
+        [[ $n -gt $YAML_CFG_MAS_COUNT ]] && YAML_CFG_MAS_COUNT=$n ;;
+      "defaults|"*)
+        case "$field" in
+          domain)      YAML_CFG_DEFAULTS_DOMAIN[index]="$value" ;;
+          key)         YAML_CFG_DEFAULTS_KEY[index]="$value" ;;
+          type)        YAML_CFG_DEFAULTS_TYPE[index]="$value" ;;
+          value)       YAML_CFG_DEFAULTS_VALUE[index]="$value" ;;
+          description) YAML_CFG_DEFAULTS_DESCRIPTION[index]="$value" ;;
+        esac
+        [[ $n -gt $YAML_CFG_DEFAULTS_COUNT ]] && YAML_CFG_DEFAULTS_COUNT=$n ;;
+      "environment|"*)
+        case "$field" in
+          name)  YAML_CFG_ENV_NAME[index]="$value" ;;
+          value) YAML_CFG_ENV_VALUE[index]="$value" ;;
+        esac
+        [[ $n -gt $YAML_CFG_ENV_COUNT ]] && YAML_CFG_ENV_COUNT=$n ;;
+      "aliases|"*)
+        case "$field" in
+          name)        YAML_CFG_ALIAS_NAME[index]="$value" ;;
+          command)     YAML_CFG_ALIAS_COMMAND[index]="$value" ;;
+          description) YAML_CFG_ALIAS_DESCRIPTION[index]="$value" ;;
+        esac
+        [[ $n -gt $YAML_CFG_ALIAS_COUNT ]] && YAML_CFG_ALIAS_COUNT=$n ;;
+    esac
+  done < "$cache"
+
+  YAML_CFG_FILE="$file"
+  YAML_CFG_HASH="$hash"
+  return 0
+}
+
+# Remove compiled config caches.
+# Usage: yaml_config_clear_cache
+yaml_config_clear_cache() {
+  [[ -d "$YAML_CONFIG_CACHE_DIR" ]] || return 0
+  rm -f "$YAML_CONFIG_CACHE_DIR"/*.tsv
+}
+
 # --- Package Installation ---------------------------------------------------
 
+# Validate package names from the loaded config into _YAML_VALID_PACKAGES,
+# reporting and logging each rejected name.
+# Usage: _yaml_valid_packages formula|cask name...
+_yaml_valid_packages() {
+  local kind="$1"
+  shift
+
+  _YAML_VALID_PACKAGES=()
+  local name
+  for name in "$@"; do
+    [[ -n "$name" && "$name" != "null" ]] || continue
+    # Security: Validate package name (S05)
+    if ! sanitize_package_name "$name" >/dev/null 2>&1; then
+      if [[ "$kind" == "cask" ]]; then
+        msg_warning "  ⚠ Skipping invalid cask name: $name"
+        security_log "warning" "Invalid cask name blocked" "$name"
+      else
+        msg_warning "  ⚠ Skipping invalid package name: $name"
+        security_log "warning" "Invalid brew formula name blocked" "$name"
+      fi
+      continue
+    fi
+    _YAML_VALID_PACKAGES+=("$name")
+  done
+}
+
+# Install the missing subset of a package list: one snapshot of what is
+# installed, then one batched `brew install` (see lib/homebrew.sh).
+# Usage: _yaml_install_packages formula|cask name...
+_yaml_install_packages() {
+  local kind="$1"
+  shift
+
+  _yaml_valid_packages "$kind" "$@"
+  [[ ${#_YAML_VALID_PACKAGES[@]} -gt 0 ]] || return 0
+
+  brew_missing "$kind" "${_YAML_VALID_PACKAGES[@]}"
+
+  local name
+  for name in "${_YAML_VALID_PACKAGES[@]}"; do
+    if [[ " ${BREW_MISSING[*]-} " != *" $name "* ]]; then
+      if [[ "$kind" == "cask" ]]; then
+        msg_debug "Cask already installed: $name"
+      else
+        msg_debug "Formula already installed: $name"
+      fi
+    fi
+  done
+
+  # Failures are reported and logged per package inside brew_install_batch; a
+  # failed package must not abort the rest of the role.
+  brew_install_batch "$kind" ${BREW_MISSING[@]+"${BREW_MISSING[@]}"} || true
+}
+
 # Install Homebrew formulae from YAML config
 apply_brew_formulae() {
   local config_file="$1"
-  local count
-  count=$(yaml_array_length "$config_file" ".packages.brew")
+  yaml_config_load "$config_file" || return 1
+  local count="$YAML_CFG_BREW_COUNT"
   
-  if [[ "$count" -eq 0 || "$count" == "null" ]]; then
+  if [[ "$count" -eq 0 ]]; then
     msg_debug "No Homebrew formulae defined in config."
     return 0
   fi
   
   msg_info "Installing $count Homebrew formulae..."
-  
-  for ((i = 0; i < count; i++)); do
-    local formula
-    formula=$(yaml_get "$config_file" ".packages.brew[$i]")
-    
-    if [[ -n "$formula" && "$formula" != "null" ]]; then
-      # Security: Validate package name (S05)
-      if ! sanitize_package_name "$formula" >/dev/null 2>&1; then
-        msg_warning "  ⚠ Skipping invalid package name: $formula"
-        security_log "warning" "Invalid brew formula name blocked" "$formula"
-        continue
-      fi
-      
-      if brew list "$formula" &>/dev/null; then
-        msg_debug "Formula already installed: $formula"
-      else
-        msg_info "  Installing: $formula"
-        brew install "$formula" 2>/dev/null || msg_warning "Failed to install: $formula"
-      fi
-    fi
-  done
+  _yaml_install_packages formula ${YAML_CFG_BREW[@]+"${YAML_CFG_BREW[@]}"}
 }
 
 # Install Homebrew casks from YAML config
 apply_brew_casks() {
   local config_file="$1"
-  local count
-  count=$(yaml_array_length "$config_file" ".packages.cask")
+  yaml_config_load "$config_file" || return 1
+  local count="$YAML_CFG_CASK_COUNT"
   
-  if [[ "$count" -eq 0 || "$count" == "null" ]]; then
+  if [[ "$count" -eq 0 ]]; then
     msg_debug "No Homebrew casks defined in config."
     return 0
   fi
   
   msg_info "Installing $count Homebrew casks..."
-  
-  for ((i = 0; i < count; i++)); do
-    local cask
-    cask=$(yaml_get "$config_file" ".packages.cask[$i]")
-    
-    if [[ -n "$cask" && "$cask" != "null" ]]; then
-      # Security: Validate package name (S05)
-      if ! sanitize_package_name "$cask" >/dev/null 2>&1; then
-        msg_warning "  ⚠ Skipping invalid cask name: $cask"
-        security_log "warning" "Invalid cask name blocked" "$cask"
-        continue
-      fi
-      
-      if brew list --cask "$cask" &>/dev/null; then
-        msg_debug "Cask already installed: $cask"
-      else
-        msg_info "  Installing: $cask"
-        brew install --cask "$cask" 2>/dev/null || msg_warning "Failed to install: $cask"
-      fi
-    fi
-  done
+  _yaml_install_packages cask ${YAML_CFG_CASK[@]+"${YAML_CFG_CASK[@]}"}
 }
 
 # Install Mac App Store apps from YAML config
 apply_mas_apps() {
   local config_file="$1"
-  local count
-  count=$(yaml_array_length "$config_file" ".packages.mas")
+  yaml_config_load "$config_file" || return 1
+  local count="$YAML_CFG_MAS_COUNT"
   
-  if [[ "$count" -eq 0 || "$count" == "null" ]]; then
+  if [[ "$count" -eq 0 ]]; then
     msg_debug "No Mac App Store apps defined in config."
     return 0
   fi
@@ -155,11 +484,13 @@ apply_mas_apps() {
   
   msg_info "Installing $count Mac App Store apps..."
   
+  # One `mas list` for the whole section instead of one per app.
+  local installed
+  installed=$(mas list 2>/dev/null || true)
+  
   for ((i = 0; i < count; i++)); do
-    local app_id
-    local app_name
-    app_id=$(yaml_get "$config_file" ".packages.mas[$i].id")
-    app_name=$(yaml_get "$config_file" ".packages.mas[$i].name")
+    local app_id="${YAML_CFG_MAS_ID[i]:-}"
+    local app_name="${YAML_CFG_MAS_NAME[i]:-}"
     
     if [[ -n "$app_id" && "$app_id" != "null" ]]; then
       # Security: Validate app ID is numeric only (S05)
@@ -169,7 +500,7 @@ apply_mas_apps() {
         continue
       fi
       
-      if mas list | grep -q "^$app_id"; then
+      if [[ $'\n'"$installed" == *$'\n'"$app_id"* ]]; then
         msg_debug "App already installed: $app_name ($app_id)"
       else
         msg_info "  Installing: $app_name ($app_id)"
@@ -184,23 +515,25 @@ apply_mas_apps() {
 # Apply macOS defaults from YAML config
 apply_macos_defaults() {
   local config_file="$1"
-  local count
-  count=$(yaml_array_length "$config_file" ".defaults")
+  yaml_config_load "$config_file" || return 1
+  local count="$YAML_CFG_DEFAULTS_COUNT"
   
-  if [[ "$count" -eq 0 || "$count" == "null" ]]; then
+  if [[ "$count" -eq 0 ]]; then
     msg_debug "No macOS defaults defined in config."
     return 0
   fi
   
   msg_info "Applying $count macOS defaults..."
+
+  # sanitize_defaults_value runs in $(...) below; load it once up front.
+  circus_require_module security
   
   for ((i = 0; i < count; i++)); do
-    local domain key type value description
-    domain=$(yaml_get "$config_file" ".defaults[$i].domain")
-    key=$(yaml_get "$config_file" ".defaults[$i].key")
-    type=$(yaml_get "$config_file" ".defaults[$i].type")
-    value=$(yaml_get "$config_file" ".defaults[$i].value")
-    description=$(yaml_get "$config_file" ".defaults[$i].description")
+    local domain="${YAML_CFG_DEFAULTS_DOMAIN[i]:-}"
+    local key="${YAML_CFG_DEFAULTS_KEY[i]:-}"
+    local type="${YAML_CFG_DEFAULTS_TYPE[i]:-}"
+    local value="${YAML_CFG_DEFAULTS_VALUE[i]:-}"
+    local description="${YAML_CFG_DEFAULTS_DESCRIPTION[i]:-}"
     
     if [[ -n "$domain" && "$domain" != "null" && -n "$key" && "$key" != "null" ]]; then
       # Security: Validate domain format
@@ -249,10 +582,10 @@ apply_macos_defaults() {
 apply_environment() {
   local config_file="$1"
   local env_file="${2:-$HOME/.zshenv.local}"
-  local count
-  count=$(yaml_array_length "$config_file" ".environment")
+  yaml_config_load "$config_file" || return 1
+  local count="$YAML_CFG_ENV_COUNT"
   
-  if [[ "$count" -eq 0 || "$count" == "null" ]]; then
+  if [[ "$count" -eq 0 ]]; then
     msg_debug "No environment variables defined in config."
     return 0
   fi
@@ -272,9 +605,8 @@ apply_environment() {
   {
     echo "$marker_start"
     for ((i = 0; i < count; i++)); do
-      local name value
-      name=$(yaml_get "$config_file" ".environment[$i].name")
-      value=$(yaml_get "$config_file" ".environment[$i].value")
+      local name="${YAML_CFG_ENV_NAME[i]:-}"
+      local value="${YAML_CFG_ENV_VALUE[i]:-}"
       
       if [[ -n "$name" && "$name" != "null" ]]; then
         if ! _yaml_is_identifier "$name"; then
@@ -326,10 +658,10 @@ _yaml_one_line() {
 apply_aliases() {
   local config_file="$1"
   local alias_file="${2:-$HOME/.aliases.local}"
-  local count
-  count=$(yaml_array_length "$config_file" ".aliases")
+  yaml_config_load "$config_file" || return 1
+  local count="$YAML_CFG_ALIAS_COUNT"
   
-  if [[ "$count" -eq 0 || "$count" == "null" ]]; then
+  if [[ "$count" -eq 0 ]]; then
     msg_debug "No aliases defined in config."
     return 0
   fi
@@ -349,10 +681,9 @@ apply_aliases() {
   {
     echo "$marker_start"
     for ((i = 0; i < count; i++)); do
-      local name command description
-      name=$(yaml_get "$config_file" ".aliases[$i].name")
-      command=$(yaml_get "$config_file" ".aliases[$i].command")
-      description=$(yaml_get "$config_file" ".aliases[$i].description")
+      local name="${YAML_CFG_ALIAS_NAME[i]:-}"
+      local command="${YAML_CFG_ALIAS_COMMAND[i]:-}"
+      local description="${YAML_CFG_ALIAS_DESCRIPTION[i]:-}"
       
       if [[ -n "$name" && "$name" != "null" ]]; then
         if ! _yaml_is_alias_name "$name"; then
@@ -387,14 +718,14 @@ apply_role_config() {
     return 1
   fi
   
-  if ! check_yq_installed; then
+  # Parses the file once (or reuses the compiled cache); every applier below
+  # reads the loaded arrays.
+  if ! yaml_config_load "$config_file"; then
     return 1
   fi
   
-  local role_name
-  role_name=$(yaml_get "$config_file" ".metadata.name")
-  local role_desc
-  role_desc=$(yaml_get "$config_file" ".metadata.description")
+  local role_name="$YAML_CFG_NAME"
+  local role_desc="$YAML_CFG_DESCRIPTION"
   
   msg_info "Applying configuration: $role_name"
   [[ -n "$role_desc" && "$role_desc" != "null" ]] && msg_info "  $role_desc"
@@ -427,21 +758,17 @@ validate_config() {
     return 1
   fi
   
-  if ! check_yq_installed; then
-    return 1
-  fi
-  
   msg_info "Validating: $config_file"
   
-  # Check YAML syntax
-  if ! yq eval '.' "$config_file" &>/dev/null; then
+  # Check YAML syntax. A compiled cache entry for this exact content means it
+  # already parsed, so a repeat validation does not run yq at all.
+  if ! yaml_config_load "$config_file"; then
     msg_error "Invalid YAML syntax"
     return 1
   fi
   
   # Check required fields
-  local name
-  name=$(yaml_get "$config_file" ".metadata.name")
+  local name="$YAML_CFG_NAME"
   if [[ -z "$name" || "$name" == "null" ]]; then
     msg_warning "Missing: metadata.name"
   fi
@@ -452,6 +779,7 @@ validate_config() {
 
 # Export functions
 export -f check_yq_installed yaml_get yaml_array_length yaml_foreach
+export -f yaml_config_hash yaml_config_compile yaml_config_load yaml_config_clear_cache
 export -f apply_brew_formulae apply_brew_casks apply_mas_apps
 export -f apply_macos_defaults apply_environment apply_aliases
 export -f apply_role_config validate_config
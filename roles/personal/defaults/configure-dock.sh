@@ -32,8 +32,8 @@ main() {
     dockutil --add "/Applications/VLC.app" --no-restart
     msg_success "Added personal applications to the Dock."
 
-    # Restart the Dock to apply changes
-    killall Dock
+    # Restart the Dock to apply changes (once, at the end of stage 11)
+    defaults_restart --always Dock
   fi
 
   msg_success "Dock configuration complete."
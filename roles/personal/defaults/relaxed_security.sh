@@ -29,33 +29,6 @@
 #
 # ==============================================================================
 
-run_defaults() {
-  # Accept an optional leading -currentHost flag.
-  #
-  # Without this, `run_defaults -currentHost com.apple.screensaver idleTime -int 600`
-  # bound domain="-currentHost", key="com.apple.screensaver", type="idleTime",
-  # value="-int" — and dropped the actual timeout. The emitted command was
-  # `defaults write -currentHost com.apple.screensaver idleTime -int` with no
-  # value, so the screen-lock timeout was never set in any role, while the
-  # summary at the end of this file still reported it as applied.
-  local host_args=()
-  if [ "${1:-}" = "-currentHost" ]; then
-    host_args=(-currentHost)
-    shift
-  fi
-
-  local domain="$1"
-  local key="$2"
-  local type="$3"
-  local value="$4"
-
-  if [ "${DRY_RUN_MODE:-false}" = true ]; then
-    msg_info "[Dry Run] Would set Personal Security preference: '$key' to '$value'"
-  else
-    defaults "${host_args[@]}" write "$domain" "$key" "$type" "$value"
-  fi
-}
-
 msg_info "Applying personal (relaxed) security settings..."
 
 # ==============================================================================
@@ -0,0 +1,123 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         tests/benchmarks/context_hook.sh
+#
+# DESCRIPTION:  Measures the per-`cd` cost of the automatic context hook
+#               (_circus_context_chpwd in circus.plugin.zsh).
+#
+#               A throwaway HOME gets a directory table of 50 mappings, a
+#               marker file, and two contexts of 50 variables each, with their
+#               envs already cached. One shell then changes directory N times
+#               per scenario and calls the hook after each `cd`, the way zsh's
+#               chpwd does:
+#
+#                 same       - between two directories of one context; the
+#                              hook resolves the context and returns.
+#                 unmapped   - between two directories outside any mapping.
+#                 marker     - into and out of a directory with a .fc-context
+#                              file naming the context already active.
+#                 switch     - between directories of the two contexts; every
+#                              call unloads one env and sources the other.
+#
+#               The same loop without the hook is timed first and subtracted.
+#               PATH is empty inside the loops, so a hook that forked would
+#               fail instead of just running slowly.
+#
+# USAGE:        tests/benchmarks/context_hook.sh [changes]
+#
+#   BENCH_SHELL        Shell to measure (default: zsh if installed, else bash).
+#
+# ==============================================================================
+
+set -uo pipefail
+
+PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+CHANGES="${1:-2000}"
+BENCH_SHELL="${BENCH_SHELL:-$(command -v zsh || command -v bash)}"
+
+# shellcheck source=lib/parallel.sh
+source "$PROJECT_ROOT/lib/parallel.sh"
+
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+export HOME="$WORK_DIR/home"
+CONTEXTS="$HOME/.config/circus/contexts"
+mkdir -p "$CONTEXTS" "$HOME/.circus"
+echo "$PROJECT_ROOT" > "$HOME/.circus/root"
+
+for name in alpha beta; do
+  for ((i = 0; i < 50; i++)); do
+    echo "export ${name}_VAR_$i=\"$name value $i\""
+  done > "$CONTEXTS/$name.conf"
+done
+for ((i = 0; i < 48; i++)); do
+  mkdir -p "$HOME/src/project-$i"
+  echo "alpha $HOME/src/project-$i"
+done > "$HOME/.config/circus/context_dirs"
+mkdir -p "$HOME/work/alpha/a" "$HOME/work/alpha/b" "$HOME/work/beta" \
+  "$HOME/other/x" "$HOME/other/y" "$HOME/marked/deep/er"
+echo "alpha $HOME/work/alpha" >> "$HOME/.config/circus/context_dirs"
+echo "beta $HOME/work/beta" >> "$HOME/.config/circus/context_dirs"
+echo "alpha" > "$HOME/marked/.fc-context"
+
+plugin() { bash "$PROJECT_ROOT/lib/plugins/fc-context" "$@" >/dev/null 2>&1; }
+plugin compile alpha
+plugin compile beta
+plugin compile
+
+#
+# Prints the wall time in milliseconds of CHANGES directory changes.
+#
+# @param $1 First directory.
+# @param $2 Second directory.
+# @param $3 "hook" to call the hook after each change.
+#
+time_scenario() {
+  local start
+  now_ms
+  start=$NOW_MS
+  "$BENCH_SHELL" -c '
+    cd "$1"
+    source "$5/profiles/base/zsh/oh-my-zsh-custom/circus/circus.plugin.zsh" >/dev/null 2>&1
+    _circus_ctx_default=""
+    _circus_ctx_root="$5"
+    _circus_context_chpwd
+    a="$1" b="$2" n=$(($4 / 2)) i=0
+    PATH=""
+    if [ "$3" = hook ]; then
+      while [ $i -lt $n ]; do
+        cd "$b"; _circus_context_chpwd || exit 1
+        cd "$a"; _circus_context_chpwd || exit 1
+        i=$((i + 1))
+      done
+    else
+      while [ $i -lt $n ]; do
+        cd "$b"; cd "$a"
+        i=$((i + 1))
+      done
+    fi
+  ' _ "$1" "$2" "$3" "$CHANGES" "$PROJECT_ROOT" || return 1
+  now_ms
+  echo $((NOW_MS - start))
+}
+
+printf 'context chpwd hook, %s directory changes per scenario (%s)\n\n' "$CHANGES" "${BENCH_SHELL##*/}"
+printf '  %-10s %12s\n' "scenario" "us per cd"
+
+for scenario in \
+  "same|$HOME/work/alpha/a|$HOME/work/alpha/b" \
+  "unmapped|$HOME/other/x|$HOME/other/y" \
+  "marker|$HOME/marked|$HOME/marked/deep/er" \
+  "switch|$HOME/work/alpha|$HOME/work/beta"; do
+  IFS='|' read -r name first second <<< "$scenario"
+  base=$(time_scenario "$first" "$second" plain) || exit 1
+  hooked=$(time_scenario "$first" "$second" hook) || {
+    echo "benchmark: $name failed" >&2
+    exit 1
+  }
+  awk -v n="$name" -v b="$base" -v h="$hooked" -v c="$CHANGES" \
+    'BEGIN { printf "  %-10s %12.1f\n", n, (h - b) * 1000 / c }'
+done
@@ -0,0 +1,143 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         tests/benchmarks/context_switch.sh
+#
+# DESCRIPTION:  Measures `fc context switch` on a large context (500 exported
+#               variables by default).
+#
+#               Three variants are timed, each switching from a small context
+#               to the large one:
+#
+#                 legacy     - the previous env generation, reproduced below:
+#                              `echo | sed | cut` per export line and a
+#                              grep/head/cut/sed pipeline per setting, one
+#                              `>>` append per line.
+#                 cold       - the current plugin with an empty env cache
+#                              (single-pass parse, one write).
+#                 cached     - the current plugin switching back to a context
+#                              it has already generated.
+#
+#               Every variant runs under an isolated HOME with init.sh loaded,
+#               so only the switch itself differs.
+#
+# USAGE:        tests/benchmarks/context_switch.sh [variables] [runs]
+#
+# ==============================================================================
+
+set -uo pipefail
+
+PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+VARIABLES="${1:-500}"
+RUNS="${2:-5}"
+
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+export HOME="$WORK_DIR/home"
+CONTEXTS="$HOME/.config/circus/contexts"
+mkdir -p "$CONTEXTS"
+
+# A switch runs `pyenv local` and friends in the current directory.
+cd "$HOME" || exit 1
+
+{
+  echo "# --- Environment Variables ---"
+  for ((i = 0; i < VARIABLES; i++)); do
+    echo "export BENCH_VAR_$i=\"value $i with spaces and = signs\""
+  done
+  echo ""
+  echo "# --- Version Managers ---"
+  echo 'NODE_VERSION="20"'
+  echo 'PYTHON_VERSION="3.12"'
+  echo 'GIT_USER_NAME="Bench Person"'
+  echo 'GIT_USER_EMAIL="bench@example.com"'
+} > "$CONTEXTS/large.conf"
+echo 'export PLACE="small"' > "$CONTEXTS/small.conf"
+
+#
+# The pre-change generation loop, kept verbatim in behaviour so the
+# comparison stays meaningful after lib/plugins/fc-context moves on.
+#
+legacy_get_context_value() {
+  grep "^${2}=" "$1" 2>/dev/null | head -1 | cut -d'=' -f2- | sed 's/^"//;s/"$//'
+}
+
+legacy_generate() {
+  local context_file="$1" env_file="$2"
+  echo "# Auto-generated by fc context switch" > "$env_file"
+  local line var_name value key
+  while IFS= read -r line || [[ -n "$line" ]]; do
+    [[ "$line" =~ ^[[:space:]]*# ]] && continue
+    if [[ "$line" == export\ * ]]; then
+      var_name=$(echo "$line" | sed 's/^export //' | cut -d'=' -f1)
+      value=$(echo "$line" | cut -d'=' -f2- | sed 's/^"//;s/"$//')
+      printf 'export %s=%q\n' "$var_name" "$value" >> "$env_file"
+    fi
+  done < "$context_file"
+  for key in NODE_VERSION PYTHON_VERSION GO_VERSION RUBY_VERSION GIT_USER_NAME GIT_USER_EMAIL; do
+    # The old pipeline failed on a missing key under errexit; tolerate it here.
+    value=$(legacy_get_context_value "$context_file" "$key") || true
+    if [[ -n "$value" ]]; then
+      printf 'export %s=%q\n' "$key" "$value" >> "$env_file"
+    fi
+  done
+  chmod 600 "$env_file"
+}
+
+#
+# Prints the wall time in seconds of one switch to the large context.
+#
+# @param $1 Variant name: legacy, cold or cached.
+#
+time_variant() {
+  local variant="$1"
+  local plugin="$PROJECT_ROOT/lib/plugins/fc-context"
+
+  bash "$plugin" switch small >/dev/null 2>&1
+  [ "$variant" = cold ] && rm -rf "$HOME/.circus/cache/contexts"
+
+  local TIMEFORMAT='%R'
+  if [ "$variant" = legacy ]; then
+    { time bash -c '
+        source "$1/lib/init.sh"
+        eval "$2"
+        legacy_generate "$3" "$HOME/.circus/context_env.sh"
+      ' _ "$PROJECT_ROOT" "$(declare -f legacy_get_context_value legacy_generate)" \
+        "$CONTEXTS/large.conf" >/dev/null 2>&1; } 2>&1
+  else
+    { time bash "$plugin" switch large >/dev/null 2>&1; } 2>&1
+  fi
+
+  local written
+  written=$(grep -c "^export BENCH_VAR_" "$HOME/.circus/context_env.sh")
+  if [ "$written" -ne "$VARIABLES" ]; then
+    echo "benchmark: $variant wrote $written of $VARIABLES variables" >&2
+    return 1
+  fi
+}
+
+printf 'fc context switch, %s variables, best of %s (bash %s)\n\n' "$VARIABLES" "$RUNS" "$BASH_VERSION"
+printf '  %-10s %10s\n' "variant" "seconds"
+
+# Generate the cache once so the first "cached" run is a hit.
+bash "$PROJECT_ROOT/lib/plugins/fc-context" switch large >/dev/null 2>&1
+
+legacy_seconds=""
+for variant in legacy cold cached; do
+  best=""
+  for ((run = 0; run < RUNS; run++)); do
+    seconds=$(time_variant "$variant") || exit 1
+    if [ -z "$best" ] || awk -v a="$seconds" -v b="$best" 'BEGIN { exit !(a < b) }'; then
+      best="$seconds"
+    fi
+  done
+  printf '  %-10s %10s' "$variant" "$best"
+  if [ -n "$legacy_seconds" ]; then
+    awk -v l="$legacy_seconds" -v s="$best" 'BEGIN { if (s > 0) printf "   (%.1fx faster)", l / s }'
+  else
+    legacy_seconds="$best"
+  fi
+  printf '\n'
+done
@@ -0,0 +1,56 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         tests/benchmarks/fc_startup.sh
+#
+# DESCRIPTION:  Measures the fixed cost every `fc` command pays before doing
+#               any work: sourcing lib/init.sh, the dispatcher, and a trivial
+#               plugin going through it.
+#
+#               Each case is run N times and the mean wall time is reported in
+#               milliseconds. The last column lists the lazily loaded modules
+#               (see "Lazy Modules" in lib/init.sh) that sourcing init.sh
+#               pulled in, which should be none.
+#
+#               bin/fc refuses to run as root; run this as a regular user.
+#
+# USAGE:        tests/benchmarks/fc_startup.sh [runs]
+#
+# ==============================================================================
+
+set -uo pipefail
+
+PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+RUNS="${1:-20}"
+
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+#
+# Runs a command RUNS times in an isolated HOME and prints the mean wall time
+# in milliseconds.
+#
+# @param $@ The command and its arguments.
+#
+time_case() {
+  local TIMEFORMAT='%R'
+  local seconds
+  seconds=$( { time (
+      for ((i = 0; i < RUNS; i++)); do
+        HOME="$WORK_DIR" "$@" >/dev/null 2>&1
+      done
+    ); } 2>&1)
+  awk -v s="$seconds" -v n="$RUNS" 'BEGIN { printf "%.1f", s * 1000 / n }'
+}
+
+loaded=$(HOME="$WORK_DIR" bash -c \
+  'source "$1/lib/init.sh" >/dev/null 2>&1; echo "${_CIRCUS_LOADED_MODULES:-}"' \
+  _ "$PROJECT_ROOT")
+
+printf 'fc startup, mean of %s runs (bash %s)\n\n' "$RUNS" "$BASH_VERSION"
+printf '  %-28s %8s\n' "case" "ms"
+printf '  %-28s %8s   lazy modules loaded: %s\n' "source lib/init.sh" \
+  "$(time_case bash -c 'source "$1/lib/init.sh"' _ "$PROJECT_ROOT")" "${loaded:-none}"
+printf '  %-28s %8s\n' "fc --help" "$(time_case "$PROJECT_ROOT/bin/fc" --help)"
+printf '  %-28s %8s\n' "fc caffeine status" "$(time_case "$PROJECT_ROOT/bin/fc" caffeine status)"
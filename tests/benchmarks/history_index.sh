@@ -0,0 +1,92 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         tests/benchmarks/history_index.sh
+#
+# DESCRIPTION:  Measures `fc history stats` and `top` on a large zsh history
+#               (300,000 entries by default, one in fifty spanning lines).
+#
+#               Variants:
+#
+#                 legacy     - the previous implementation, reproduced below:
+#                              the whole file through `sed | grep | tac`, then
+#                              `sort -u` for stats and `sort | uniq -c | sort`
+#                              for top.
+#                 cold       - the current plugin building its index from
+#                              scratch.
+#                 appended   - the current plugin after 100 new entries.
+#
+# USAGE:        tests/benchmarks/history_index.sh [entries]
+#
+# ==============================================================================
+
+set -uo pipefail
+
+PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+ENTRIES="${1:-300000}"
+
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+export HOME="$WORK_DIR/home"
+export SHELL=/bin/zsh
+export HISTFILE="$HOME/.zsh_history"
+mkdir -p "$HOME"
+cd "$HOME" || exit 1
+
+awk -v n="$ENTRIES" 'BEGIN {
+  srand(1)
+  for (i = 0; i < n; i++) {
+    c = int(rand() * 20000)
+    if (i % 50 == 0) {
+      printf ": %d:0;for f in *.log; do\\\n  gzip \"$f\"\\\ndone # %d\n", 1700000000 + i, c
+    } else {
+      printf ": %d:0;cmd%d --option %d\n", 1700000000 + i, c % 60, c
+    }
+  }
+}' > "$HISTFILE"
+
+#
+# The pre-change stats and top pipelines, kept verbatim in behaviour so the
+# comparison stays meaningful after lib/plugins/fc-history moves on.
+#
+legacy_history() {
+  sed 's/^: [0-9]*:[0-9]*;//' "$HISTFILE" | grep -v '^$' | { tac 2>/dev/null || tail -r; }
+}
+
+legacy_run() {
+  wc -l < "$HISTFILE" >/dev/null
+  legacy_history | sort -u | wc -l >/dev/null
+  legacy_history | awk '{print $1}' | sort | uniq -c | sort -rn | head -n 10 >/dev/null
+}
+
+plugin_run() {
+  bash "$PROJECT_ROOT/lib/plugins/fc-history" stats >/dev/null
+  bash "$PROJECT_ROOT/lib/plugins/fc-history" top >/dev/null
+}
+
+#
+# Prints the wall time in seconds of a command.
+#
+seconds() {
+  local TIMEFORMAT='%R'
+  { time "$@" >/dev/null 2>&1; } 2>&1
+}
+
+printf 'fc history stats + top, %s entries (%s)\n\n' "$ENTRIES" "$(du -h "$HISTFILE" | awk '{print $1}')"
+printf '  %-10s %10s\n' "variant" "seconds"
+
+legacy=$(seconds legacy_run)
+printf '  %-10s %10s\n' "legacy" "$legacy"
+
+cold=$(seconds plugin_run)
+printf '  %-10s %10s\n' "cold" "$cold"
+
+for ((i = 0; i < 100; i++)); do
+  printf ': %d:0;appended %d\n' $((1800000000 + i)) "$i"
+done >> "$HISTFILE"
+appended=$(seconds plugin_run)
+printf '  %-10s %10s' "appended" "$appended"
+awk -v l="$legacy" -v s="$appended" 'BEGIN { if (s > 0) printf "   (%.1fx faster than legacy)", l / s }'
+printf '\n'
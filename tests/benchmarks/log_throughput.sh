@@ -0,0 +1,102 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         tests/benchmarks/log_throughput.sh
+#
+# DESCRIPTION:  Measures the cost of file logging through log() in
+#               lib/helpers.sh, per 10,000 messages.
+#
+#               Three variants are timed against the same message stream:
+#
+#                 legacy     - the previous implementation, reproduced below:
+#                              a `date` fork, a `uname` and `stat` fork for the
+#                              rotation check, and a fresh `>>` open per line.
+#                 direct     - the current backend (one open descriptor,
+#                              builtin timestamps, in-memory size tracking).
+#                 buffered   - the current backend with LOG_BUFFERED=true.
+#
+#               Console output is suppressed in every variant so only the file
+#               path is measured.
+#
+# USAGE:        tests/benchmarks/log_throughput.sh [messages]
+#
+# ==============================================================================
+
+set -uo pipefail
+
+PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+MESSAGES="${1:-10000}"
+
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+#
+# The pre-change per-line file path, kept verbatim in behaviour so the
+# comparison stays meaningful after lib/helpers.sh moves on.
+#
+legacy_log_line() {
+  local log_file="$1" message="$2"
+  local file_size
+  if [[ "$(uname)" == "Darwin" ]]; then
+    file_size=$(stat -f%z "$log_file" 2>/dev/null || echo 0)
+  else
+    file_size=$(stat -c%s "$log_file" 2>/dev/null || echo 0)
+  fi
+  [ "$file_size" -ge 104857600 ] && : > "$log_file"
+  local timestamp
+  timestamp=$(date "+%Y-%m-%d %H:%M:%S")
+  echo "[$timestamp] [INFO] $message" >> "$log_file"
+}
+
+#
+# Runs one variant in a fresh bash and prints its wall time in seconds.
+#
+# @param $1 Variant name: legacy, direct or buffered.
+#
+time_variant() {
+  local variant="$1"
+  local log_file="$WORK_DIR/$variant.log"
+
+  local TIMEFORMAT='%R'
+  { time bash -c '
+      variant="$1" messages="$2" log_file="$3" root="$4"
+      export CONSOLE_LOG_LEVEL=5 LOG_MAX_SIZE=104857600
+      if [ "$variant" = legacy ]; then
+        eval "$5"
+        for ((i = 0; i < messages; i++)); do
+          legacy_log_line "$log_file" "benchmark message $i"
+        done
+      else
+        [ "$variant" = buffered ] && export LOG_BUFFERED=true
+        export LOG_FILE_PATH="$log_file"
+        source "$root/lib/helpers.sh"
+        for ((i = 0; i < messages; i++)); do
+          msg_info "benchmark message $i"
+        done
+      fi
+    ' _ "$variant" "$MESSAGES" "$log_file" "$PROJECT_ROOT" "$(declare -f legacy_log_line)"; } 2>&1
+
+  local written
+  written=$(wc -l < "$log_file" | tr -d ' ')
+  if [ "$written" -ne "$MESSAGES" ]; then
+    echo "benchmark: $variant wrote $written of $MESSAGES lines" >&2
+    return 1
+  fi
+}
+
+printf 'log() file backend, %s messages (bash %s)\n\n' "$MESSAGES" "$BASH_VERSION"
+printf '  %-10s %10s %14s\n' "variant" "seconds" "per 10k (s)"
+
+legacy_seconds=""
+for variant in legacy direct buffered; do
+  seconds=$(time_variant "$variant") || exit 1
+  per_10k=$(awk -v s="$seconds" -v n="$MESSAGES" 'BEGIN { printf "%.3f", s * 10000 / n }')
+  printf '  %-10s %10s %14s' "$variant" "$seconds" "$per_10k"
+  if [ -n "$legacy_seconds" ]; then
+    awk -v l="$legacy_seconds" -v s="$seconds" 'BEGIN { if (s > 0) printf "   (%.1fx faster)", l / s }'
+  else
+    legacy_seconds="$seconds"
+  fi
+  printf '\n'
+done
@@ -0,0 +1,309 @@
+#!/usr/bin/env bash
+
+# ==============================================================================
+#
+# FILE:         tests/benchmarks/shell_startup.sh
+#
+# DESCRIPTION:  Measures how long an interactive zsh takes to start with the
+#               circus configuration, and fails when that exceeds the budget
+#               committed in shell_startup.budget.
+#
+#               A throwaway HOME is set up the way stage 09 deploys it: ~/.zshrc
+#               linked to profiles/base/zsh/zshrc.symlink and the circus plugin
+#               linked into ~/.oh-my-zsh/custom/plugins, plus the ~/.circus
+#               root and role records the installer leaves behind. Oh My Zsh
+#               itself is not installed there; a stand-in oh-my-zsh.sh sources
+#               the plugins from the custom directory the same way, so what is
+#               measured is zsh plus the circus environment. Point OMZ_DIR at an
+#               Oh My Zsh checkout to include the framework as well.
+#
+#               The macOS-only commands the env files call (sw_vers, sysctl,
+#               brew, ...) resolve to the mocks in tests_python/mocks and
+#               bin/mocks, so the numbers are comparable on Linux runners.
+#
+#               Reported:
+#                 - p50 and p95 of `zsh -i -c exit` over N runs, after one
+#                   unmeasured run that builds the plugin bundle;
+#                 - the time per sourced file, from one extra run traced with
+#                   timestamped xtrace. Lines of the circus bundle are credited
+#                   to the source file they came from. Tracing slows the shell
+#                   down, so read these as shares, not absolute costs.
+#
+# USAGE:        tests/benchmarks/shell_startup.sh [options]
+#
+#   -n, --runs N       Timed runs (default 20).
+#   --role ROLE        Role recorded in ~/.circus/role (default developer).
+#   --budget FILE      Budget file (default shell_startup.budget next to this).
+#   --no-budget        Report only; never fail on the budget.
+#   --no-breakdown     Skip the traced per-file run.
+#   --top N            Files listed in the breakdown (default 15).
+#
+#   ZSH_BIN            zsh to measure (default: zsh on PATH).
+#   OMZ_DIR            Optional Oh My Zsh checkout to install into the HOME.
+#
+# EXIT STATUS:  0 within budget, 1 over budget, 2 usage or setup error.
+#
+# ==============================================================================
+
+set -uo pipefail
+
+PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/../.." && pwd)"
+BENCH_DIR="$PROJECT_ROOT/tests/benchmarks"
+
+# shellcheck source=lib/parallel.sh
+source "$PROJECT_ROOT/lib/parallel.sh"
+
+RUNS=20
+ROLE="developer"
+BUDGET_FILE="$BENCH_DIR/shell_startup.budget"
+CHECK_BUDGET=true
+BREAKDOWN=true
+TOP=15
+
+while [ $# -gt 0 ]; do
+  case "$1" in
+    -n|--runs) RUNS="${2:-}"; shift 2 ;;
+    --role) ROLE="${2:-}"; shift 2 ;;
+    --budget) BUDGET_FILE="${2:-}"; shift 2 ;;
+    --no-budget) CHECK_BUDGET=false; shift ;;
+    --no-breakdown) BREAKDOWN=false; shift ;;
+    --top) TOP="${2:-}"; shift 2 ;;
+    -h|--help)
+      sed -n '/^# USAGE:/,/^# EXIT STATUS:/p' "${BASH_SOURCE[0]}" | sed 's/^# \{0,1\}//'
+      exit 0
+      ;;
+    *) echo "shell_startup: unknown option: $1" >&2; exit 2 ;;
+  esac
+done
+
+case "$RUNS" in
+  ''|*[!0-9]*|0) echo "shell_startup: --runs needs a positive number" >&2; exit 2 ;;
+esac
+
+# Resolved before the mocks go on PATH: tests_python/mocks/zsh is a stand-in
+# that execs bash.
+ZSH_BIN="${ZSH_BIN:-$(command -v zsh || true)}"
+if [ -z "$ZSH_BIN" ] || [ ! -x "$ZSH_BIN" ]; then
+  echo "shell_startup: zsh not found (set ZSH_BIN)" >&2
+  exit 2
+fi
+
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+BENCH_HOME="$WORK_DIR/home"
+MOCK_BIN="$WORK_DIR/mocks"
+TRACE_DIR="$WORK_DIR/trace"
+
+# --- Environment ---------------------------------------------------------------
+
+#
+# Builds the throwaway HOME: the stage 09 links, the installer's state records,
+# and Oh My Zsh (a checkout or the stand-in).
+#
+setup_home() {
+  mkdir -p "$BENCH_HOME/.circus" "$BENCH_HOME/.oh-my-zsh/custom/plugins"
+
+  ln -s "$PROJECT_ROOT/profiles/base/zsh/zshrc.symlink" "$BENCH_HOME/.zshrc"
+  ln -s "$PROJECT_ROOT/profiles/base/zsh/oh-my-zsh-custom/circus" \
+    "$BENCH_HOME/.oh-my-zsh/custom/plugins/circus"
+
+  echo "$PROJECT_ROOT" > "$BENCH_HOME/.circus/root"
+  echo "$ROLE" > "$BENCH_HOME/.circus/role"
+
+  if [ -n "${OMZ_DIR:-}" ]; then
+    # Copied rather than linked so the custom plugin link lands in this HOME.
+    cp -R "$OMZ_DIR/." "$BENCH_HOME/.oh-my-zsh/"
+    ln -sfn "$PROJECT_ROOT/profiles/base/zsh/oh-my-zsh-custom/circus" \
+      "$BENCH_HOME/.oh-my-zsh/custom/plugins/circus"
+  else
+    cat > "$BENCH_HOME/.oh-my-zsh/oh-my-zsh.sh" <<'EOF'
+# Stand-in for Oh My Zsh written by tests/benchmarks/shell_startup.sh: loads
+# the listed plugins that exist in the custom directory, as OMZ does.
+ZSH_CUSTOM="${ZSH_CUSTOM:-$ZSH/custom}"
+for plugin ($plugins); do
+  if [ -f "$ZSH_CUSTOM/plugins/$plugin/$plugin.plugin.zsh" ]; then
+    source "$ZSH_CUSTOM/plugins/$plugin/$plugin.plugin.zsh"
+  fi
+done
+EOF
+  fi
+}
+
+#
+# Puts the existing command mocks on a PATH of their own. zsh is left out
+# (see ZSH_BIN above) and so is mktemp, whose mock returns one fixed path.
+#
+setup_mocks() {
+  mkdir -p "$MOCK_BIN"
+  local mock name
+  for mock in "$PROJECT_ROOT"/tests_python/mocks/* "$PROJECT_ROOT"/bin/mocks/*; do
+    [ -f "$mock" ] || continue
+    name="${mock##*/}"
+    case "$name" in
+      zsh|mktemp) continue ;;
+    esac
+    ln -sf "$mock" "$MOCK_BIN/$name"
+  done
+}
+
+#
+# Runs one interactive zsh that exits immediately, in a clean environment.
+#
+# @param $@ Extra environment assignments (NAME=value).
+#
+start_shell() {
+  env -i HOME="$BENCH_HOME" PATH="$MOCK_BIN:/usr/local/bin:/usr/bin:/bin" \
+    TERM=xterm-256color LANG=C USER="${USER:-bench}" "$@" \
+    "$ZSH_BIN" -i -c exit </dev/null
+}
+
+# --- Measurement ---------------------------------------------------------------
+
+#
+# Prints the p-th percentile (nearest rank) of the numbers on stdin.
+#
+# @param $1 Percentile, 1-100.
+#
+percentile() {
+  sort -n | awk -v p="$1" '
+    { v[NR] = $1 }
+    END {
+      if (NR == 0) exit 1
+      r = int((p / 100) * NR + 0.999999)
+      if (r < 1) r = 1
+      print v[r]
+    }'
+}
+
+#
+# Runs one traced startup and prints "<ms> <file>" per sourced file, most
+# expensive first. Each trace line is charged the time until the next one.
+#
+breakdown() {
+  mkdir -p "$TRACE_DIR"
+  # ZDOTDIR points zsh at these files instead of the HOME's; they switch on
+  # timestamped tracing and then read the real ones.
+  cat > "$TRACE_DIR/.zshenv" <<'EOF'
+zmodload zsh/datetime
+setopt prompt_subst
+PS4='+${EPOCHREALTIME} %x:%I> '
+setopt xtrace
+[ -f "$HOME/.zshenv" ] && source "$HOME/.zshenv"
+EOF
+  cat > "$TRACE_DIR/.zshrc" <<'EOF'
+source "$HOME/.zshrc"
+EOF
+
+  # Traced from the text bundle, not its .zwc, so trace lines carry the bundle
+  # line numbers the attribution below relies on.
+  local bundle="$BENCH_HOME/.circus/cache/circus.bundle.zsh"
+  rm -f "$bundle.zwc"
+
+  local trace="$WORK_DIR/trace.log"
+  start_shell ZDOTDIR="$TRACE_DIR" >/dev/null 2>"$trace"
+
+  [ -f "$bundle" ] || bundle=/dev/null
+
+  awk -v bundle="$bundle" -v home="$BENCH_HOME/" -v root="$PROJECT_ROOT/" '
+    # The bundle marks where each source file starts: "# --- <path>".
+    BEGIN {
+      while ((getline text < bundle) > 0) {
+        nline++
+        if (text ~ /^# --- \//) { nmark++; mline[nmark] = nline; mfile[nmark] = substr(text, 7) }
+      }
+    }
+    function owner(file, line,   i) {
+      if (file != bundle) return file
+      for (i = nmark; i >= 1; i--) if (line > mline[i]) return mfile[i]
+      return file
+    }
+    function short(f) {
+      if (index(f, root) == 1) return substr(f, length(root) + 1)
+      if (index(f, home) == 1) return "~/" substr(f, length(home) + 1)
+      return f
+    }
+    /^\+[0-9]+\.[0-9]+ / {
+      ts = substr($1, 2) + 0
+      loc = $2
+      sub(/>$/, "", loc)
+      n = split(loc, parts, ":")
+      line = parts[n] + 0
+      file = substr(loc, 1, length(loc) - length(parts[n]) - 1)
+      if (prev_file != "") cost[prev_file] += ts - prev_ts
+      prev_file = owner(file, line)
+      prev_ts = ts
+    }
+    END {
+      for (f in cost) printf "%.1f %s\n", cost[f] * 1000, short(f)
+    }
+  ' "$trace" | sort -rn
+}
+
+# --- Budget --------------------------------------------------------------------
+
+#
+# Reads P50_MS and P95_MS from the budget file without sourcing it.
+#
+read_budget() {
+  BUDGET_P50=""
+  BUDGET_P95=""
+  local key value
+  while IFS='=' read -r key value; do
+    case "$key" in
+      P50_MS) BUDGET_P50="$value" ;;
+      P95_MS) BUDGET_P95="$value" ;;
+    esac
+  done < "$BUDGET_FILE"
+  [ -n "$BUDGET_P50" ] && [ -n "$BUDGET_P95" ]
+}
+
+# --- Main ----------------------------------------------------------------------
+
+setup_home
+setup_mocks
+
+# The first start builds and compiles the plugin bundle; every terminal after
+# that reuses it, so that is the startup worth measuring.
+start_shell >/dev/null 2>&1
+
+samples="$WORK_DIR/samples"
+: > "$samples"
+for ((i = 0; i < RUNS; i++)); do
+  now_ms; start=$NOW_MS
+  start_shell >/dev/null 2>&1
+  now_ms
+  echo $((NOW_MS - start)) >> "$samples"
+done
+
+p50=$(percentile 50 < "$samples")
+p95=$(percentile 95 < "$samples")
+
+printf 'zsh -i -c exit, %s runs, role %s (%s)\n\n' "$RUNS" "$ROLE" "$("$ZSH_BIN" --version 2>/dev/null | head -1)"
+printf '  %-6s %8s\n' "p50" "${p50}ms"
+printf '  %-6s %8s\n' "p95" "${p95}ms"
+
+if [ "$BREAKDOWN" = true ]; then
+  printf '\nPer sourced file (one traced run; tracing adds overhead):\n\n'
+  breakdown | head -n "$TOP" | awk '{ printf "  %8.1fms  %s\n", $1, $2 }'
+fi
+
+[ "$CHECK_BUDGET" = true ] || exit 0
+
+if ! read_budget; then
+  echo "shell_startup: no P50_MS/P95_MS in $BUDGET_FILE" >&2
+  exit 2
+fi
+
+printf '\nBudget (%s): p50 <= %sms, p95 <= %sms\n' "${BUDGET_FILE#"$PROJECT_ROOT"/}" "$BUDGET_P50" "$BUDGET_P95"
+status=0
+if [ "$p50" -gt "$BUDGET_P50" ]; then
+  echo "  FAIL: p50 ${p50}ms is over budget"
+  status=1
+fi
+if [ "$p95" -gt "$BUDGET_P95" ]; then
+  echo "  FAIL: p95 ${p95}ms is over budget"
+  status=1
+fi
+[ "$status" -eq 0 ] && echo "  OK"
+exit "$status"
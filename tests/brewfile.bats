@@ -0,0 +1,191 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         brewfile.bats
+#
+# DESCRIPTION:  Tests for the shared Brewfile index in lib/brewfile.sh and the
+#               commands built on it.
+#
+#               brew and mas are replaced by fakes that record every invocation
+#               and know a fixed set of installed packages.
+#
+# ==============================================================================
+
+load "test_helper"
+
+# --- Setup & Teardown ---------------------------------------------------------
+
+setup() {
+  setup_isolated_home
+
+  export TEST_TEMP_DIR
+  TEST_TEMP_DIR=$(mktemp -d)
+  mkdir -p "$TEST_TEMP_DIR/bin"
+
+  export BREW_CALLS="$TEST_TEMP_DIR/brew_calls"
+  : > "$BREW_CALLS"
+
+  cat > "$TEST_TEMP_DIR/bin/brew" <<'BREW'
+#!/usr/bin/env bash
+echo "brew $*" >> "$BREW_CALLS"
+case "$1 $2" in
+  "list --formula") printf 'git\njq\nwget\n' ;;
+  "list --cask")    printf 'firefox\n' ;;
+esac
+exit 0
+BREW
+  cat > "$TEST_TEMP_DIR/bin/mas" <<'MAS'
+#!/usr/bin/env bash
+echo "mas $*" >> "$BREW_CALLS"
+echo "497799835  Xcode  (15.0)"
+MAS
+  chmod +x "$TEST_TEMP_DIR/bin/brew" "$TEST_TEMP_DIR/bin/mas"
+  export PATH="$TEST_TEMP_DIR/bin:$PATH"
+
+  export BREWFILE="$TEST_TEMP_DIR/Brewfile"
+  cat > "$BREWFILE" <<'EOF'
+# Base packages
+cask_args appdir: "/Applications"
+tap "homebrew/services"
+brew "git"
+brew "ripgrep" # search
+  brew "homebrew/core/jq", args: ["HEAD"]
+cask "firefox"
+cask "user/tap/zed"
+mas "Xcode", id: 497799835
+mas "Keynote", id: 409183694
+# brew "commented-out"
+EOF
+}
+
+teardown() {
+  rm -rf "$TEST_TEMP_DIR"
+  teardown_isolated_home
+}
+
+# Run a snippet with the libraries loaded.
+brewfile_run() {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; source '$PROJECT_ROOT/lib/brewfile.sh'; $1"
+}
+
+# ==============================================================================
+# Index
+# ==============================================================================
+
+@test "brewfile_index: one row per declaration, with tap and source" {
+  brewfile_run 'brewfile_index "$BREWFILE"; cat "$BREWFILE_INDEX"'
+  assert_success
+  assert_output "tap	homebrew/services	homebrew/services	$BREWFILE
+brew	git		$BREWFILE
+brew	ripgrep		$BREWFILE
+brew	jq	homebrew/core	$BREWFILE
+cask	firefox		$BREWFILE
+cask	zed	user/tap	$BREWFILE
+mas	497799835		$BREWFILE
+mas	409183694		$BREWFILE"
+}
+
+@test "brewfile_index: reuses the cached index until a file changes" {
+  brewfile_run 'brewfile_index "$BREWFILE"; echo "brew	stale		x" > "$BREWFILE_INDEX"
+    brewfile_expected formula "$BREWFILE"'
+  assert_success
+  assert_output "stale"
+
+  echo 'brew "fd"' >> "$BREWFILE"
+  brewfile_run 'brewfile_expected formula "$BREWFILE"'
+  assert_success
+  assert_output "fd
+git
+jq
+ripgrep"
+}
+
+@test "brewfile_index: different sets of files get different indexes" {
+  printf 'brew "fd"\n' > "$TEST_TEMP_DIR/Other"
+  brewfile_run 'brewfile_expected formula "$BREWFILE" | paste -sd " " -
+    brewfile_expected formula "$TEST_TEMP_DIR/Other" "$BREWFILE" | paste -sd " " -'
+  assert_success
+  assert_output "git jq ripgrep
+fd git jq ripgrep"
+}
+
+# ==============================================================================
+# Sets
+# ==============================================================================
+
+@test "brewfile_missing: declared but not installed, per kind" {
+  brewfile_run 'brewfile_missing formula "$BREWFILE"; brewfile_missing cask "$BREWFILE"; brewfile_missing mas "$BREWFILE"'
+  assert_success
+  assert_output "ripgrep
+zed
+409183694"
+}
+
+@test "brewfile_orphaned: installed but not declared" {
+  brewfile_run 'brewfile_orphaned formula "$BREWFILE"; brewfile_orphaned cask "$BREWFILE"'
+  assert_success
+  assert_output "wget"
+}
+
+@test "brewfile set operations ask brew once per kind" {
+  brewfile_run 'brewfile_missing formula "$BREWFILE" >/dev/null
+    brewfile_orphaned formula "$BREWFILE" >/dev/null
+    brewfile_missing cask "$BREWFILE" >/dev/null'
+  assert_success
+
+  run sort "$BREW_CALLS"
+  assert_output "brew list --cask -1
+brew list --formula -1"
+}
+
+@test "brewfile_missing: App Store entries never ask brew" {
+  brewfile_run 'brewfile_missing mas "$BREWFILE"'
+  assert_success
+  assert_output "409183694"
+
+  run cat "$BREW_CALLS"
+  assert_output "mas list"
+}
+
+# ==============================================================================
+# Consumers
+# ==============================================================================
+
+@test "fc clean list reports orphans from the shared index" {
+  mkdir -p "$HOME/tree"
+  cp -R "$PROJECT_ROOT/lib" "$HOME/tree/lib"
+  cp "$BREWFILE" "$HOME/tree/Brewfile"
+
+  run bash "$HOME/tree/lib/plugins/fc-clean" list
+  assert_success
+  assert_output "# Orphaned formulae
+wget"
+
+  run sort "$BREW_CALLS"
+  assert_output "brew list --cask -1
+brew list --formula -1"
+}
+
+@test "bootstrap skips brew bundle when the role's packages are installed" {
+  mkdir -p "$HOME/tree/roles/work"
+  printf 'brew "git"\ncask "firefox"\nmas "Xcode", id: 497799835\n' > "$HOME/tree/roles/work/Brewfile"
+
+  local phase="source '$PROJECT_ROOT/lib/init.sh'; DOTFILES_ROOT='$PROJECT_ROOT'
+    source '$PROJECT_ROOT/lib/brewfile.sh'
+    eval \"\$(sed -n '/^install_role_brewfile()/,/^}/p' '$PROJECT_ROOT/lib/bootstrap_phases/homebrew.sh')\"
+    DOTFILES_ROOT='$HOME/tree' BOOTSTRAP_ROLE=work install_role_brewfile"
+
+  run bash -c "$phase"
+  assert_success
+  assert_output --partial "Role packages already installed: work"
+  run grep -c "bundle" "$BREW_CALLS"
+  assert_output "0"
+
+  echo 'brew "ripgrep"' >> "$HOME/tree/roles/work/Brewfile"
+  run bash -c "$phase"
+  assert_success
+  assert_output --partial "Installing 1 missing packages from role Brewfile: work"
+  run grep -c "bundle install" "$BREW_CALLS"
+  assert_output "1"
+}
@@ -0,0 +1,211 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         context_auto.bats
+#
+# DESCRIPTION:  Tests for automatic per-directory context activation: the
+#               directory table and index kept by `fc context map`, and the
+#               chpwd hook in circus.plugin.zsh. zsh calls the hook on every
+#               `cd`; here it is called by hand from bash.
+#
+# ==============================================================================
+
+load "test_helper"
+
+# --- Setup & Teardown ---------------------------------------------------------
+
+setup() {
+  setup_isolated_home
+
+  export PLUGIN="$PROJECT_ROOT/profiles/base/zsh/oh-my-zsh-custom/circus/circus.plugin.zsh"
+  export CONTEXTS="$HOME/.config/circus/contexts"
+  mkdir -p "$CONTEXTS" "$HOME/.circus" "$HOME/src/acme/api" "$HOME/src/other"
+  echo "$PROJECT_ROOT" > "$HOME/.circus/root"
+
+  printf 'export WHERE="acme"\nexport SHARED="acme"\n' > "$CONTEXTS/acme.conf"
+  printf 'export WHERE="work"\n' > "$CONTEXTS/work.conf"
+  printf 'export WHERE="api"\nexport API_ONLY="1"\n' > "$CONTEXTS/api.conf"
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+fc_context() {
+  bash "$PROJECT_ROOT/lib/plugins/fc-context" "$@" >/dev/null
+}
+
+# Runs a snippet in a bash that has sourced the plugin from $HOME.
+# `go DIR` changes directory and calls the hook as zsh would.
+in_shell() {
+  run bash -c "
+    set +e
+    cd \"\$HOME\"
+    source '$PLUGIN' >/dev/null 2>&1
+    go() { cd \"\$1\" && _circus_context_chpwd; }
+    $1"
+}
+
+# ==============================================================================
+# Directory table
+# ==============================================================================
+
+@test "context map: records the directory and rebuilds the index" {
+  fc_context map work "$HOME/src"
+  fc_context map acme "$HOME/src/acme"
+
+  run grep -c "^work $HOME/src$" "$HOME/.config/circus/context_dirs"
+  assert_output "1"
+
+  run bash -c "source '$HOME/.circus/cache/context_dirs.zsh'; echo \"\$_circus_ctx_index_vars\"; printf '%s' \"\$_circus_ctx_d${HOME//[!a-zA-Z0-9]/_}_src_acme\" | cat -A"
+  assert_line --index 0 "_circus_ctx_d${HOME//[!a-zA-Z0-9]/_}_src _circus_ctx_d${HOME//[!a-zA-Z0-9]/_}_src_acme"
+  assert_line --index 1 "\$"
+  assert_line --index 2 "$HOME/src/acme^Iacme"
+}
+
+@test "context map: remapping replaces an entry and unmap removes one" {
+  fc_context map work "$HOME/src"
+  fc_context map acme "$HOME/src"
+  fc_context map api "$HOME/src/acme"
+  fc_context unmap "$HOME/src/acme"
+
+  run cat "$HOME/.config/circus/context_dirs"
+  assert_output "acme $HOME/src"
+}
+
+# ==============================================================================
+# Hook
+# ==============================================================================
+
+@test "context hook: does nothing unless auto-activation is on" {
+  fc_context map acme "$HOME/src/acme"
+
+  in_shell 'cd "$HOME/src/acme"; source "$PLUGIN" >/dev/null 2>&1; echo "[${FC_ACTIVE_CONTEXT:-}]"'
+  assert_output "[]"
+}
+
+@test "context hook: activates the mapped context and restores on leaving" {
+  fc_context map acme "$HOME/src/acme"
+  fc_context auto on
+
+  in_shell '
+    export SHARED=mine
+    go "$HOME/src/acme/api"; echo "$FC_ACTIVE_CONTEXT $WHERE $SHARED"
+    go "$HOME"; echo "[${FC_ACTIVE_CONTEXT:-}] [${WHERE-unset}] $SHARED"'
+  assert_line --index 0 "acme acme acme"
+  assert_line --index 1 "[] [unset] mine"
+}
+
+@test "context hook: the shell starts in the context of its directory" {
+  fc_context map acme "$HOME/src/acme"
+  fc_context auto on
+
+  run bash -c "set +e; cd '$HOME/src/acme'; source '$PLUGIN' >/dev/null 2>&1; echo \"\$FC_ACTIVE_CONTEXT\""
+  assert_output "acme"
+}
+
+@test "context hook: the deepest of marker file and prefix wins" {
+  fc_context map work "$HOME/src"
+  fc_context map acme "$HOME/src/acme/api"
+  fc_context auto on
+  echo "api" > "$HOME/src/acme/.fc-context"
+
+  in_shell '
+    go "$HOME/src/acme"; echo "$FC_ACTIVE_CONTEXT"
+    go "$HOME/src/acme/api"; echo "$FC_ACTIVE_CONTEXT"
+    go "$HOME/src/other"; echo "$FC_ACTIVE_CONTEXT ${API_ONLY-unset}"'
+  assert_line --index 0 "api"
+  assert_line --index 1 "acme"
+  assert_line --index 2 "work unset"
+}
+
+@test "context hook: marker files must name an existing context" {
+  fc_context auto on
+  echo "../../etc/evil" > "$HOME/src/acme/.fc-context"
+  echo "nope" > "$HOME/src/other/.fc-context"
+
+  in_shell '
+    go "$HOME/src/acme"; echo "[${FC_ACTIVE_CONTEXT:-}]"
+    go "$HOME/src/other"; echo "[${FC_ACTIVE_CONTEXT:-}]"'
+  assert_line --index 0 "[]"
+  assert_line --index 1 "[]"
+}
+
+@test "context hook: an unchanged context is left alone, without forks" {
+  fc_context map acme "$HOME/src/acme"
+  fc_context auto on
+
+  in_shell '
+    go "$HOME/src/acme"
+    echo "export WHERE=reloaded" >> "$HOME/.circus/cache/contexts/acme.env"
+    touch -t 200001010000 "$HOME/.config/circus/contexts/acme.conf"
+    PATH="" go "$HOME/src/acme/api"; echo "$WHERE"
+    PATH="" go "$HOME"; PATH="" go "$HOME/src/acme"; echo "$WHERE"'
+  assert_line --index 0 "acme"
+  assert_line --index 1 "reloaded"
+}
+
+@test "context hook: falls back to the switched context outside mapped directories" {
+  fc_context switch work
+  fc_context map acme "$HOME/src/acme"
+  fc_context auto on
+
+  in_shell '
+    echo "$FC_ACTIVE_CONTEXT $WHERE"
+    go "$HOME/src/acme"; echo "$FC_ACTIVE_CONTEXT $WHERE ${SHARED-unset}"
+    go "$HOME"; echo "$FC_ACTIVE_CONTEXT $WHERE ${SHARED-unset}"'
+  assert_line --index 0 "work work"
+  assert_line --index 1 "acme acme acme"
+  assert_line --index 2 "work work unset"
+}
+
+@test "context hook: picks up a hand-edited table and a mapping made in another shell" {
+  fc_context auto on
+
+  in_shell '
+    echo "acme $HOME/src/acme" > "$HOME/.config/circus/context_dirs"
+    touch -t 200001010000 "$HOME/.circus/cache/context_dirs.zsh"
+    go "$HOME/src/acme"; echo "$FC_ACTIVE_CONTEXT"
+    bash "$PROJECT_ROOT/lib/plugins/fc-context" map work "$HOME/src/other" >/dev/null 2>&1
+    go "$HOME/src/other"; echo "$FC_ACTIVE_CONTEXT"'
+  assert_line --index 0 "acme"
+  assert_line --index 1 "work"
+}
+
+@test "context hook: never fetches secrets and does not retry a failed compile" {
+  mkdir -p "$HOME/bin"
+  cat > "$HOME/bin/op" <<'OP'
+#!/usr/bin/env bash
+echo "op $*" >> "$HOME/op.log"
+echo "secret"
+OP
+  chmod +x "$HOME/bin/op"
+  printf 'export TOKEN="from-secrets:op://Vault/api/token"\n' > "$CONTEXTS/vault.conf"
+  fc_context map vault "$HOME/src/other" 2>/dev/null
+  fc_context auto on
+
+  # Mapping compiled the context already and failed without op; start over so
+  # the hook has to compile it itself.
+  local marker="$HOME/.circus/cache/contexts/vault.failed"
+  [ -f "$marker" ]
+  rm -f "$marker"
+  in_shell '
+    export PATH="$HOME/bin:$PATH"
+    go "$HOME/src/other"; echo "[${FC_ACTIVE_CONTEXT:-}] [${TOKEN-unset}]"
+    [ -f "'"$marker"'" ] && echo marked
+    touch -t 200001010000 "$HOME/.config/circus/contexts/vault.conf"
+    touch -t 200001020000 "'"$marker"'"
+    touch -t 200001030000 "$HOME/ref"
+    go "$HOME"; go "$HOME/src/other"
+    [ "'"$marker"'" -nt "$HOME/ref" ] && echo retried || echo skipped
+    touch "$HOME/.config/circus/contexts/vault.conf"
+    go "$HOME"; go "$HOME/src/other"
+    [ "'"$marker"'" -nt "$HOME/ref" ] && echo retried || echo skipped'
+  assert_line --index 0 "[] [unset]"
+  assert_line --index 1 "marked"
+  assert_line --index 2 "skipped"
+  assert_line --index 3 "retried"
+  [ ! -e "$HOME/op.log" ]
+  [ ! -e "$HOME/.circus/cache/contexts/vault.env" ]
+}
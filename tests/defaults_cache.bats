@@ -0,0 +1,205 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         defaults_cache.bats
+#
+# DESCRIPTION:  Tests for the per-run preference domain cache in
+#               `lib/defaults_cache.sh` and its use by `fc defaults status`
+#               and `fc config-audit`.
+#
+#               `defaults` is the file-backed mock from bin/mocks, which logs
+#               every call so the tests can count the exports.
+#
+# ==============================================================================
+
+load 'test_helper'
+
+setup() {
+  setup_isolated_home
+
+  export DEFAULTS_MOCK_DIR="$HOME/defaults"
+  export DEFAULTS_MOCK_LOG="$HOME/defaults.log"
+  export PATH="$PROJECT_ROOT/bin/mocks:$PATH"
+  : > "$DEFAULTS_MOCK_LOG"
+
+  defaults write com.apple.dock tilesize -int 48
+  defaults write com.apple.dock autohide -bool true
+  defaults write com.apple.dock autohide-time-modifier -float 0.30000001192092896
+  defaults write com.apple.dock persistent-others -array one two
+  defaults write com.apple.finder FXPreferredViewStyle -string clmv
+  defaults write com.apple.finder ShowPathbar -bool false
+  defaults write com.apple.screencapture location -string "~/Pictures/A & <B>"
+  : > "$DEFAULTS_MOCK_LOG"
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+# Run a snippet with the cache loaded.
+cache_run() {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; circus_require_module defaults_cache; $1"
+}
+
+# Print the cached value of each domain/key pair, or "unset".
+lookup() {
+  local out="" pair
+  for pair in "$@"; do
+    out="$out
+    if defaults_cache_get ${pair% *} ${pair#* }; then echo \"\$DEFAULTS_CACHE_VALUE\"; else echo unset; fi"
+  done
+  printf '%s\n' "$out"
+}
+
+@test "defaults_cache_get: reports values as defaults read prints them" {
+  cache_run "$(lookup \
+    'com.apple.dock tilesize' \
+    'com.apple.dock autohide' \
+    'com.apple.dock autohide-time-modifier' \
+    'com.apple.finder ShowPathbar' \
+    'com.apple.finder FXPreferredViewStyle' \
+    'com.apple.screencapture location')"
+  assert_success
+  assert_line --index 0 "48"
+  assert_line --index 1 "1"
+  assert_line --index 2 "0.300000011920929"
+  assert_line --index 3 "0"
+  assert_line --index 4 "clmv"
+  assert_line --index 5 "~/Pictures/A & <B>"
+}
+
+@test "defaults_cache_get: exports each domain once" {
+  cache_run "$(lookup \
+    'com.apple.dock tilesize' \
+    'com.apple.dock autohide' \
+    'com.apple.finder ShowPathbar' \
+    'com.apple.dock magnification' \
+    'com.apple.finder FXPreferredViewStyle')"
+  assert_success
+
+  run cat "$DEFAULTS_MOCK_LOG"
+  assert_output "defaults export com.apple.dock -
+defaults export com.apple.finder -"
+}
+
+@test "defaults_cache_get: a key missing from the export is unset without a read" {
+  cache_run "$(lookup 'com.apple.dock magnification' 'com.apple.Safari ShowStatusBar')"
+  assert_success
+  assert_output "unset
+unset"
+
+  run grep -c "defaults read" "$DEFAULTS_MOCK_LOG"
+  assert_output "0"
+}
+
+@test "defaults_cache_get: an array value is read with defaults read" {
+  cache_run "$(lookup 'com.apple.dock persistent-others')"
+  assert_success
+  assert_output "one two"
+
+  run grep -c "defaults read com.apple.dock persistent-others" "$DEFAULTS_MOCK_LOG"
+  assert_output "1"
+}
+
+@test "defaults_cache_get: falls back to per-key reads when the export fails" {
+  cache_run "
+    defaults() { [ \"\$1\" = export ] && return 1; command defaults \"\$@\"; }
+    $(lookup 'com.apple.dock tilesize' 'com.apple.dock magnification')"
+  assert_success
+  assert_output "48
+unset"
+}
+
+@test "_defaults_cache_parse: keeps top-level keys only and decodes strings" {
+  run bash -c "source '$PROJECT_ROOT/lib/defaults_cache.sh'; _defaults_cache_parse" <<'EOF'
+<?xml version="1.0" encoding="UTF-8"?>
+<plist version="1.0">
+<dict>
+	<key>nested</key>
+	<dict>
+		<key>inner</key>
+		<string>hidden</string>
+	</dict>
+	<key>multi</key>
+	<string>two
+lines</string>
+	<key>empty</key>
+	<string></string>
+	<key>when</key>
+	<date>2024-01-01T00:00:00Z</date>
+	<key>a&amp;b</key>
+	<string>&lt;x&gt;</string>
+	<key>n</key><integer>-3</integer>
+</dict>
+</plist>
+EOF
+  assert_success
+  assert_output "$(printf 'read\tnested\t\nread\tmulti\t\nvalue\tempty\t\nread\twhen\t\nvalue\ta&b\t<x>\nvalue\tn\t-3')"
+}
+
+@test "run_defaults invalidates the cached domain" {
+  cache_run "
+    $(lookup 'com.apple.dock tilesize')
+    run_defaults com.apple.dock tilesize -int 64
+    $(lookup 'com.apple.dock tilesize' 'com.apple.finder ShowPathbar' 'com.apple.finder ShowPathbar')"
+  assert_success
+  assert_output "48
+64
+0
+0"
+
+  run grep -c "defaults export com.apple.dock" "$DEFAULTS_MOCK_LOG"
+  assert_output "2"
+}
+
+@test "run_defaults does not load the cache" {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; run_defaults com.apple.dock tilesize -int 64; echo \"[\$_CIRCUS_LOADED_MODULES]\""
+  assert_success
+  assert_output "[]"
+}
+
+@test "fc defaults status exports each domain once" {
+  run env MOCK_UNAME_OUTPUT=Darwin PATH="$PROJECT_ROOT/tests_python/mocks:$PATH" \
+    bash "$PROJECT_ROOT/lib/plugins/fc-defaults" status
+  assert_success
+  assert_output --regexp "dock\.icon-size +48 +48"
+  assert_output --regexp "finder\.default-view +clmv +clmv"
+  assert_output --regexp "dock\.magnification +Off +Off"
+
+  run grep -c "defaults read" "$DEFAULTS_MOCK_LOG"
+  assert_output "0"
+  run bash -c "grep -c 'defaults export' '$DEFAULTS_MOCK_LOG'"
+  assert_output "9"
+}
+
+@test "fc config-audit reads defaults from the domain cache" {
+  mkdir -p "$HOME/bin"
+  printf '#!/usr/bin/env bash\nfor arg in "$@"; do file="$arg"; done\ncat "${file}.props"\n' > "$HOME/bin/yq"
+  chmod +x "$HOME/bin/yq"
+  echo "metadata: {name: audit}" > "$HOME/config.yaml"
+  cat > "$HOME/config.yaml.props" <<'PROPS'
+metadata.name = audit
+defaults.0.domain = com.apple.dock
+defaults.0.key = tilesize
+defaults.0.type = int
+defaults.0.value = 48
+defaults.1.domain = com.apple.dock
+defaults.1.key = autohide
+defaults.1.type = bool
+defaults.1.value = true
+defaults.2.domain = com.apple.dock
+defaults.2.key = magnification
+defaults.2.type = bool
+defaults.2.value = true
+PROPS
+
+  run env PATH="$HOME/bin:$PATH" bash "$PROJECT_ROOT/lib/plugins/fc-config-audit" "$HOME/config.yaml" --defaults
+  assert_failure
+  assert_output --partial "com.apple.dock.tilesize = 48"
+  assert_output --partial "com.apple.dock.autohide = 1"
+  assert_output --partial "com.apple.dock.magnification (NOT SET, expected: true)"
+
+  run cat "$DEFAULTS_MOCK_LOG"
+  assert_output "defaults export com.apple.dock -"
+}
@@ -0,0 +1,170 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         defaults_jobs.bats
+#
+# DESCRIPTION:  Tests for the concurrent runner in stage 11
+#               (`DEFAULTS_JOBS`), which runs defaults scripts on a worker
+#               pool, grouped by the preference domains they write.
+#
+#               `defaults` is the file-backed mock from bin/mocks; `killall` is
+#               a fake that logs the processes it was asked to restart.
+#
+# ==============================================================================
+
+load 'test_helper'
+
+setup() {
+  setup_isolated_home
+
+  export DEFAULTS_MOCK_DIR="$HOME/defaults"
+  export DEFAULTS_MOCK_LOG="$HOME/defaults.log"
+  export KILLALL_LOG="$HOME/killall.log"
+  mkdir -p "$HOME/bin" "$HOME/tree/install" "$HOME/tree/defaults/applications"
+  printf '#!/usr/bin/env bash\necho "$*" >> "$KILLALL_LOG"\n' > "$HOME/bin/killall"
+  chmod +x "$HOME/bin/killall"
+  export PATH="$HOME/bin:$PROJECT_ROOT/bin/mocks:$PATH"
+  cp "$PROJECT_ROOT/install/11-defaults-and-additional-configuration.sh" "$HOME/tree/install/"
+  cp -R "$PROJECT_ROOT/lib" "$HOME/tree/lib"
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+# Write a defaults script into the test tree.
+script() {
+  cat > "$HOME/tree/defaults/applications/$1"
+}
+
+# Run stage 11 against the test tree.
+run_stage() {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; DOTFILES_ROOT='$HOME/tree'; INSTALL_ROLE=''; PRIVACY_PROFILE=''
+    $1
+    source '$HOME/tree/install/11-defaults-and-additional-configuration.sh'"
+}
+
+# Print the groups _defaults_script_groups finds for the given scripts, as
+# "index group lane" rows.
+groups_of() {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; DOTFILES_ROOT='$PROJECT_ROOT'
+    eval \"\$(sed -n '/^_defaults_script_groups()/,/^}/p' '$PROJECT_ROOT/install/11-defaults-and-additional-configuration.sh')\"
+    cd '$HOME/tree/defaults/applications'
+    _defaults_script_groups $* | tr '\t' ' '"
+}
+
+@test "_defaults_script_groups: scripts sharing a domain share a group" {
+  echo 'run_defaults "com.apple.Safari" "A" "-bool" "true"' | script a.sh
+  echo 'run_defaults -currentHost "NSGlobalDomain" "B" "-int" "1"' | script b.sh
+  printf 'run_defaults "com.apple.Music" "C" -int 1\nrun_defaults "com.apple.Safari" "D" -int 1\n' | script c.sh
+  echo 'defaults write -g E -int 1' | script d.sh
+  groups_of a.sh b.sh c.sh d.sh
+  assert_success
+  assert_output "0 0 pool
+1 1 pool
+2 0 pool
+3 1 pool"
+}
+
+@test "_defaults_script_groups: resolves domains held in variables" {
+  printf 'prefs="com.runningwithcrayons.Alfred-Preferences"\nrun_defaults "$prefs" "A" -int 1\n' | script a.sh
+  echo 'run_defaults com.runningwithcrayons.Alfred-Preferences "B" -int 1' | script b.sh
+  printf 'set_pref() {\n  local domain="$1"\n  defaults write "$domain" "$2" -int 1\n}\nset_pref com.apple.Music x\n' | script c.sh
+  echo 'run_defaults "com.apple.Safari" "D" -int 1' | script d.sh
+  groups_of a.sh b.sh c.sh d.sh
+  assert_success
+  assert_output "0 0 pool
+1 0 pool
+2 2 pool
+3 3 pool"
+}
+
+@test "_defaults_script_groups: an unknown domain puts every script in one group" {
+  echo 'run_defaults "com.apple.Safari" "A" -int 1' | script a.sh
+  echo 'run_defaults "$(pick_domain)" "B" -int 1' | script b.sh
+  echo 'run_defaults "com.apple.Music" "C" -int 1' | script c.sh
+  groups_of a.sh b.sh c.sh
+  assert_success
+  assert_output "0 0 pool
+1 0 pool
+2 0 pool"
+}
+
+@test "_defaults_script_groups: scripts that run sudo go to the foreground" {
+  printf 'if sudo tmutil enable; then :; fi\nrun_defaults "com.apple.TimeMachine" "A" -int 1\n' | script a.sh
+  echo 'run_defaults "com.apple.TimeMachine" "B" -int 1' | script b.sh
+  printf '# sudo is mentioned here\nmsg_info "Run sudo mdutil -E / to reindex"\n' | script c.sh
+  groups_of a.sh b.sh c.sh
+  assert_success
+  assert_output "0 0 foreground
+1 0 foreground
+2 2 pool"
+}
+
+@test "DEFAULTS_JOBS: independent scripts run at the same time" {
+  printf 'run_defaults "com.apple.Safari" "A" -int 1\nfor i in $(seq 1 100); do [ -f "$HOME/b.ran" ] && break; sleep 0.05; done\n[ -f "$HOME/b.ran" ]\n' | script a.sh
+  printf 'touch "$HOME/b.ran"\nrun_defaults "com.apple.Music" "B" -int 1\n' | script b.sh
+  run_stage "DEFAULTS_JOBS=2"
+  assert_success
+  assert_output --partial "Running 2 defaults scripts (2 independent groups on 2 workers)"
+  refute_output --partial "did not complete"
+}
+
+@test "DEFAULTS_JOBS: scripts touching the same domain run in order" {
+  printf 'sleep 0.3\ntouch "$HOME/a.ran"\nrun_defaults "com.apple.Safari" "A" -int 1\n' | script a.sh
+  printf '[ -f "$HOME/a.ran" ]\nrun_defaults "com.apple.Safari" "B" -int 1\n' | script b.sh
+  run_stage "DEFAULTS_JOBS=4"
+  assert_success
+  assert_output --partial "(1 independent groups on 1 workers)"
+  refute_output --partial "did not complete"
+}
+
+@test "DEFAULTS_JOBS: declarations are merged into the plan in script order" {
+  printf 'msg_info "from a"\nrun_defaults "com.apple.Safari" "A" -int 1\n' | script a.sh
+  printf 'msg_info "from b"\nrun_defaults "com.apple.Music" "B" -string "x y"\ndefaults_restart Music\n' | script b.sh
+  printf 'msg_info "from c"\nrun_defaults "com.apple.Safari" "A" -int 2\ndefaults_restart Safari\n' | script c.sh
+  run_stage "DEFAULTS_JOBS=3"
+  assert_success
+  assert_output --partial "Defaults: 2 written, 0 already set."
+  # Replayed in the order the stage found the scripts, not the order they ran.
+  local order
+  order=$(find "$HOME/tree/defaults" -name '*.sh' | sed 's|.*/||; s|\.sh$||' | tr -d '\n')
+  assert_output --regexp "from ${order:0:1}.*from ${order:1:1}.*from ${order:2:1}"
+  assert_output --regexp "applications/a\.sh.* [0-9]+ms"
+
+  run defaults read com.apple.Safari A
+  assert_output "2"
+  run defaults read com.apple.Music B
+  assert_output "x y"
+  run cat "$KILLALL_LOG"
+  assert_output --regexp "^(Safari
+Music|Music
+Safari)$"
+}
+
+@test "DEFAULTS_JOBS: a failing script is reported and the others still apply" {
+  printf 'false\nrun_defaults "com.apple.Safari" "A" -int 1\n' | script a.sh
+  printf 'run_defaults "com.apple.Music" "B" -int 1\nexit 3\n' | script b.sh
+  echo 'run_defaults "com.apple.Notes" "C" -int 1' | script c.sh
+  run_stage "DEFAULTS_JOBS=2"
+  assert_success
+  assert_output --regexp "applications/b\.sh.*exit 3"
+  assert_output --partial "Configuration script did not complete: '$HOME/tree/defaults/applications/b.sh' (continuing)."
+  refute_output --partial "a.sh' (continuing)"
+  assert_output --partial "Defaults: 3 written, 0 already set."
+  assert_output --partial "Defaults and additional configuration complete."
+}
+
+@test "DEFAULTS_JOBS: writes directly when the defaults plan is off" {
+  echo 'run_defaults "com.apple.Safari" "A" -int 1' | script a.sh
+  echo 'run_defaults "com.apple.Music" "B" -int 1' | script b.sh
+  run_stage "DEFAULTS_JOBS=2 CIRCUS_DEFAULTS_PLAN=false"
+  assert_success
+  refute_output --partial "already set"
+
+  run defaults read com.apple.Safari A
+  assert_output "1"
+  run defaults read com.apple.Music B
+  assert_output "1"
+}
@@ -0,0 +1,198 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         defaults_plan.bats
+#
+# DESCRIPTION:  Tests for the diff-and-apply engine in `lib/defaults_plan.sh`
+#               and its use by stage 11.
+#
+#               `defaults` is the file-backed mock from bin/mocks; `killall` is
+#               a fake that logs the processes it was asked to restart.
+#
+# ==============================================================================
+
+load 'test_helper'
+
+setup() {
+  setup_isolated_home
+
+  export DEFAULTS_MOCK_DIR="$HOME/defaults"
+  export DEFAULTS_MOCK_LOG="$HOME/defaults.log"
+  export KILLALL_LOG="$HOME/killall.log"
+  mkdir -p "$HOME/bin"
+  printf '#!/usr/bin/env bash\necho "$*" >> "$KILLALL_LOG"\n' > "$HOME/bin/killall"
+  chmod +x "$HOME/bin/killall"
+  export PATH="$HOME/bin:$PROJECT_ROOT/bin/mocks:$PATH"
+
+  defaults write com.apple.dock tilesize -int 48
+  defaults write com.apple.dock autohide -bool false
+  defaults write com.apple.dock autohide-time-modifier -float 0.5
+  defaults write com.apple.finder ShowPathbar -bool true
+  : > "$DEFAULTS_MOCK_LOG"
+  : > "$KILLALL_LOG"
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+# Run a snippet inside an open plan, then apply it.
+plan_run() {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'
+    circus_require_module defaults_plan
+    defaults_plan_begin
+    $1
+    defaults_plan_apply
+    echo \"unchanged=\$DEFAULTS_PLAN_UNCHANGED written=\$DEFAULTS_PLAN_WRITTEN\""
+}
+
+@test "defaults_plan_apply: writes only the keys that differ" {
+  plan_run '
+    run_defaults com.apple.dock tilesize -int 48
+    run_defaults com.apple.dock autohide -bool "false"
+    run_defaults com.apple.dock autohide-time-modifier -float 0.50
+    run_defaults com.apple.dock orientation -string left
+    run_defaults com.apple.finder ShowPathbar -bool false'
+  assert_success
+  assert_output --partial "Defaults: 2 written, 3 already set."
+  assert_line "unchanged=3 written=2"
+
+  run grep -c " write " "$DEFAULTS_MOCK_LOG"
+  assert_output "2"
+  run defaults read com.apple.finder ShowPathbar
+  assert_output "0"
+  run defaults read com.apple.dock orientation
+  assert_output "left"
+}
+
+@test "defaults_plan_apply: reads each domain once" {
+  plan_run '
+    run_defaults com.apple.dock tilesize -int 48
+    run_defaults com.apple.dock autohide -bool false
+    run_defaults com.apple.finder ShowPathbar -bool true'
+  assert_success
+
+  run cat "$DEFAULTS_MOCK_LOG"
+  assert_output "defaults export com.apple.dock -
+defaults export com.apple.finder -"
+}
+
+@test "defaults_plan_apply: the last declaration of a key wins" {
+  plan_run '
+    run_defaults com.apple.dock tilesize -int 36
+    run_defaults com.apple.dock tilesize -int 64'
+  assert_success
+  assert_line "unchanged=0 written=1"
+
+  run defaults read com.apple.dock tilesize
+  assert_output "64"
+}
+
+@test "defaults_plan_apply: -currentHost keys are always written" {
+  plan_run 'run_defaults -currentHost com.apple.screensaver idleTime -int 600'
+  assert_success
+  assert_line "unchanged=0 written=1"
+
+  run grep -c "defaults -currentHost write com.apple.screensaver idleTime -int 600" "$DEFAULTS_MOCK_LOG"
+  assert_output "1"
+}
+
+@test "defaults_plan_apply: restarts each app once, after the writes" {
+  plan_run '
+    DEFAULTS_PLAN_SOURCE=dock.sh
+    run_defaults com.apple.dock tilesize -int 36
+    defaults_restart Dock
+    DEFAULTS_PLAN_SOURCE=mission_control.sh
+    run_defaults com.apple.dock orientation -string left
+    defaults_restart Dock'
+  assert_success
+
+  run cat "$KILLALL_LOG"
+  assert_output "Dock"
+}
+
+@test "defaults_plan_apply: no restart when the script's keys were already set" {
+  plan_run '
+    DEFAULTS_PLAN_SOURCE=finder.sh
+    run_defaults com.apple.finder ShowPathbar -bool true
+    defaults_restart Finder
+    DEFAULTS_PLAN_SOURCE=dock.sh
+    defaults_restart --always Dock'
+  assert_success
+  assert_line "unchanged=1 written=0"
+
+  run cat "$KILLALL_LOG"
+  assert_output "Dock"
+}
+
+@test "defaults_plan_apply: dry-run writes and restarts nothing" {
+  plan_run '
+    DRY_RUN_MODE=true
+    run_defaults com.apple.dock tilesize -int 48
+    run_defaults com.apple.dock tilesize -int 36
+    defaults_restart Dock'
+  assert_success
+  assert_output --partial "[Dry Run] Would set com.apple.dock 'tilesize' to '36'"
+  assert_output --partial "[Dry Run] Would restart Dock to apply changes."
+  assert_output --partial "Defaults: 1 to write, 0 already set."
+
+  run grep -c " write " "$DEFAULTS_MOCK_LOG"
+  assert_output "0"
+  run cat "$KILLALL_LOG"
+  assert_output ""
+}
+
+@test "without a plan, run_defaults and defaults_restart act immediately" {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'
+    run_defaults com.apple.dock tilesize -int 36
+    defaults_restart Dock"
+  assert_success
+
+  run defaults read com.apple.dock tilesize
+  assert_output "36"
+  run cat "$KILLALL_LOG"
+  assert_output "Dock"
+}
+
+@test "Stage 11: a second run writes nothing and restarts nothing" {
+  mkdir -p "$HOME/tree/defaults/interface" "$HOME/tree/install"
+  cp "$PROJECT_ROOT/install/11-defaults-and-additional-configuration.sh" "$HOME/tree/install/"
+  cp -R "$PROJECT_ROOT/lib" "$HOME/tree/lib"
+  cat > "$HOME/tree/defaults/interface/dock.sh" <<'EOF'
+run_defaults "com.apple.dock" "tilesize" "-int" "40"
+run_defaults "com.apple.dock" "show-recents" "-bool" "false"
+defaults_restart Dock
+EOF
+  cat > "$HOME/tree/defaults/interface/finder.sh" <<'EOF'
+run_defaults "com.apple.finder" "ShowPathbar" "-bool" "true"
+defaults_restart Finder
+EOF
+  local stage="source '$PROJECT_ROOT/lib/init.sh'; DOTFILES_ROOT='$HOME/tree'; INSTALL_ROLE=''; PRIVACY_PROFILE=''
+    source '$HOME/tree/install/11-defaults-and-additional-configuration.sh'"
+
+  run bash -c "$stage"
+  assert_success
+  assert_output --partial "Defaults: 2 written, 1 already set."
+  run cat "$KILLALL_LOG"
+  assert_output "Dock"
+
+  : > "$KILLALL_LOG"
+  run bash -c "$stage"
+  assert_success
+  assert_output --partial "Defaults: 0 written, 3 already set."
+  run cat "$KILLALL_LOG"
+  assert_output ""
+}
+
+@test "defaults_plan_apply: writing several keys does not re-read the domain" {
+  plan_run '
+    run_defaults com.apple.dock tilesize -int 36
+    run_defaults com.apple.dock orientation -string left
+    run_defaults com.apple.dock autohide -bool true'
+  assert_success
+  assert_line "unchanged=0 written=3"
+
+  run grep -c "defaults export com.apple.dock" "$DEFAULTS_MOCK_LOG"
+  assert_output "1"
+}
@@ -733,7 +733,10 @@ LOG
 @test "sudo and secure-temp cleanup both survive being registered together" {
   # The regression: before composition, only the second registrar's handler
   # remained, so one of the two cleanups silently never ran.
+  # security.sh is loaded on first use; load it before overriding its
+  # functions so the load does not replace the overrides.
   run bash -c "source '$PROJECT_ROOT/lib/init.sh' >/dev/null 2>&1
+               circus_require_module security
                set +e; trap - ERR
                sudo_drop() { echo 'ran-sudo-drop'; }
                secure_temp_cleanup() { echo 'ran-temp-cleanup'; }
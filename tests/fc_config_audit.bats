@@ -0,0 +1,149 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         fc_config_audit.bats
+#
+# DESCRIPTION:  Tests for `fc config-audit`, which compares a YAML role config
+#               against the live system.
+#
+#               `yq` is a fake that prints `<config>.props`, `brew` and `mas`
+#               are fakes that log their calls, and `defaults` is the
+#               file-backed mock from bin/mocks.
+#
+# ==============================================================================
+
+load 'test_helper'
+
+setup() {
+  setup_isolated_home
+
+  export DEFAULTS_MOCK_DIR="$HOME/defaults"
+  export DEFAULTS_MOCK_LOG="$HOME/defaults.log"
+  export TOOL_LOG="$HOME/tools.log"
+  mkdir -p "$HOME/bin"
+  printf '#!/usr/bin/env bash\nfor arg in "$@"; do file="$arg"; done\ncat "${file}.props"\n' > "$HOME/bin/yq"
+  cat > "$HOME/bin/brew" <<'EOF'
+#!/usr/bin/env bash
+echo "brew $*" >> "$TOOL_LOG"
+case "$*" in
+  "list --formula -1") printf 'git\njq\n' ;;
+  "list --cask -1") printf 'iterm2\n' ;;
+esac
+EOF
+  cat > "$HOME/bin/mas" <<'EOF'
+#!/usr/bin/env bash
+echo "mas $*" >> "$TOOL_LOG"
+echo "497799835  Xcode  (15.0)"
+EOF
+  chmod +x "$HOME/bin/yq" "$HOME/bin/brew" "$HOME/bin/mas"
+  export PATH="$HOME/bin:$PROJECT_ROOT/bin/mocks:$PATH"
+
+  defaults write com.apple.dock tilesize -int 48
+  defaults write com.apple.finder ShowPathbar -bool false
+  : > "$DEFAULTS_MOCK_LOG"
+  printf "alias ll='ls -la'\n" > "$HOME/.aliases.local"
+
+  echo "metadata: {name: audit}" > "$HOME/config.yaml"
+  cat > "$HOME/config.yaml.props" <<'PROPS'
+metadata.name = audit
+packages.brew.0 = git
+packages.brew.1 = ripgrep
+packages.cask.0 = iterm2
+packages.mas.0.id = 497799835
+packages.mas.0.name = Xcode
+packages.mas.1.id = 409183694
+packages.mas.1.name = Keynote
+defaults.0.domain = com.apple.dock
+defaults.0.key = tilesize
+defaults.0.type = int
+defaults.0.value = 48
+defaults.1.domain = com.apple.finder
+defaults.1.key = ShowPathbar
+defaults.1.type = bool
+defaults.1.value = true
+aliases.0.name = ll
+aliases.0.command = ls -la
+aliases.1.name = gs
+aliases.1.command = git status
+PROPS
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+audit() {
+  run bash "$PROJECT_ROOT/lib/plugins/fc-config-audit" "$HOME/config.yaml" "$@"
+}
+
+@test "fc config-audit: reports every section in order" {
+  audit
+  assert_failure
+  assert_output --regexp "Formulae:.*git.*ripgrep \(MISSING\).*Casks:.*iterm2.*App Store:.*Xcode \(497799835\).*Keynote \(409183694\) \(MISSING\).*Defaults:.*tilesize = 48.*ShowPathbar \(expected: true, actual: 0\).*Aliases:.*ll.*gs \(NOT DEFINED\)"
+  assert_output --partial "✅ OK:      5"
+  assert_output --partial "❌ Drift:   4"
+}
+
+@test "fc config-audit: asks brew and mas once each" {
+  audit --packages
+  assert_failure
+
+  run sort "$TOOL_LOG"
+  assert_output "brew list --cask -1
+brew list --formula -1
+mas list"
+}
+
+@test "fc config-audit: --summary prints only the totals" {
+  audit --summary
+  assert_failure
+  refute_output --partial "Formulae:"
+  refute_output --partial "ripgrep"
+  assert_output --partial "❌ Drift:   4"
+}
+
+@test "fc config-audit: --json prints a drift report" {
+  command -v python3 >/dev/null 2>&1 || skip "python3 not available"
+  bash "$PROJECT_ROOT/lib/plugins/fc-config-audit" "$HOME/config.yaml" --json > "$HOME/report.json" || true
+
+  run python3 -c '
+import json, sys
+report = json.load(open(sys.argv[1]))
+print(report["name"], report["status"], report["summary"])
+for item in report["items"]:
+    print(item["section"], item["item"], item["status"], item.get("label"), item["expected"], item["actual"])
+' "$HOME/report.json"
+  assert_success
+  assert_output "audit drift {'ok': 5, 'drift': 4, 'extra': 0, 'skipped': 0}
+formulae git ok None None None
+formulae ripgrep missing None None None
+casks iterm2 ok None None None
+mas 497799835 ok Xcode (497799835) None None
+mas 409183694 missing Keynote (409183694) None None
+defaults com.apple.dock.tilesize ok None 48 48
+defaults com.apple.finder.ShowPathbar drift None true 0
+aliases ll ok None None None
+aliases gs missing None None None"
+}
+
+@test "fc config-audit: a clean system exits 0" {
+  printf 'metadata.name = audit\npackages.brew.0 = jq\ndefaults.0.domain = com.apple.dock\ndefaults.0.key = tilesize\ndefaults.0.value = 48\n' > "$HOME/config.yaml.props"
+  audit --json
+  assert_success
+  assert_output --partial '"status": "clean"'
+}
+
+@test "fc config-audit: --json escapes control characters in config values" {
+  command -v python3 >/dev/null 2>&1 || skip "python3 not available"
+  sed -i.bak 's/^defaults.1.value = true$/defaults.1.value = page\\fbreak/' "$HOME/config.yaml.props"
+  bash "$PROJECT_ROOT/lib/plugins/fc-config-audit" "$HOME/config.yaml" --json > "$HOME/report.json" || true
+
+  run python3 -c '
+import json, sys
+report = json.load(open(sys.argv[1]))
+print(repr([item["expected"] for item in report["items"] if item["section"] == "defaults"]))
+' "$HOME/report.json"
+  assert_success
+  assert_output "['48', 'page\\x0cbreak']"
+}
@@ -0,0 +1,146 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         fc_context_cache.bats
+#
+# DESCRIPTION:  Tests for the single-pass context parser and the per-context
+#               env cache used by `fc context switch`.
+#
+#               op is a fake that answers each secret with the contents of
+#               $HOME/secret-value, so tests can rotate it.
+#
+# ==============================================================================
+
+load "test_helper"
+
+# --- Setup & Teardown ---------------------------------------------------------
+
+setup() {
+  setup_isolated_home
+
+  mkdir -p "$HOME/bin" "$HOME/.config/circus/contexts"
+  cat > "$HOME/bin/op" <<'OP'
+#!/usr/bin/env bash
+case "$1" in
+  user) exit 0 ;;
+  read) cat "$HOME/secret-value" ;;
+esac
+OP
+  chmod +x "$HOME/bin/op"
+  echo "first" > "$HOME/secret-value"
+  export PATH="$HOME/bin:$PATH"
+
+  export CONTEXTS="$HOME/.config/circus/contexts"
+  export ENV_FILE="$HOME/.circus/context_env.sh"
+  export CACHE_DIR="$HOME/.circus/cache/contexts"
+
+  cat > "$CONTEXTS/work.conf" <<'CONF'
+# --- Environment Variables ---
+export ZETA="last"
+export ALPHA="it's $HOME; (not) *expanded*"
+export URL=https://example.com/?a=b
+export EMPTY=""
+
+# --- Version Managers ---
+NODE_VERSION="20"
+GIT_USER_NAME="Work Person"
+NODE_VERSION="ignored, the first one wins"
+CONF
+
+  cat > "$CONTEXTS/home.conf" <<'CONF'
+export PLACE="home"
+CONF
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+switch() {
+  run bash "$PROJECT_ROOT/lib/plugins/fc-context" switch "$1"
+}
+
+# ==============================================================================
+# Parsing
+# ==============================================================================
+
+@test "context switch: exports keep their order and exact values" {
+  switch work
+  assert_success
+
+  run grep "^export " "$ENV_FILE"
+  assert_line --index 0 "export ZETA=last"
+  assert_line --index 2 "export URL=https://example.com/\\?a=b"
+  assert_line --index 3 "export EMPTY=''"
+  assert_line --index 4 "export FC_CONTEXT_NODE_VERSION=20"
+
+  run bash -c "source '$ENV_FILE'; printf '%s' \"\$ALPHA\""
+  assert_output "it's \$HOME; (not) *expanded*"
+}
+
+@test "context switch: a context without settings switches cleanly" {
+  switch home
+  assert_success
+
+  run grep "^export " "$ENV_FILE"
+  assert_output "export PLACE=home
+export FC_ACTIVE_CONTEXT=home"
+}
+
+@test "context switch: the env file is private" {
+  switch work
+  run bash -c "stat -c %a '$ENV_FILE' 2>/dev/null || stat -f %Lp '$ENV_FILE'"
+  assert_output "600"
+}
+
+# ==============================================================================
+# Cache
+# ==============================================================================
+
+@test "context switch: switching back reuses the cached env" {
+  switch work
+  echo "# from cache" >> "$CACHE_DIR/work.env"
+
+  switch home
+  switch work
+  assert_success
+  run grep -c "# from cache" "$ENV_FILE"
+  assert_output "1"
+}
+
+@test "context switch: editing the context file regenerates the env" {
+  switch work
+  echo "# from cache" >> "$CACHE_DIR/work.env"
+  echo 'export ADDED="yes"' >> "$CONTEXTS/work.conf"
+
+  switch home
+  switch work
+  run grep -c "# from cache" "$ENV_FILE"
+  assert_output "0"
+  run grep "export ADDED=yes" "$ENV_FILE"
+  assert_success
+}
+
+@test "context switch: a rotated secret regenerates the env" {
+  echo 'export TOKEN="from-secrets:op://Vault/token"' >> "$CONTEXTS/home.conf"
+
+  switch home
+  run grep "TOKEN" "$ENV_FILE"
+  assert_output "export TOKEN=first"
+
+  echo "second" > "$HOME/secret-value"
+  switch work
+  switch home
+  run grep "TOKEN" "$ENV_FILE"
+  assert_output "export TOKEN=second"
+}
+
+@test "context delete: drops the cached env" {
+  switch work
+  [ -f "$CACHE_DIR/work.env" ]
+
+  run bash -c "echo y | bash '$PROJECT_ROOT/lib/plugins/fc-context' delete work"
+  assert_success
+  [ ! -f "$CACHE_DIR/work.env" ]
+}
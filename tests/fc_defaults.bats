@@ -394,3 +394,128 @@ setup() {
   assert_success
   assert_output --partial "Available macOS Defaults Tweaks"
 }
+
+# ==============================================================================
+# TWEAK TABLE AND TWEAK PACKS
+# ==============================================================================
+#
+# These run the plugin directly with the macOS mocks on PATH, so they also run
+# on Linux.
+
+# Run the plugin as if on macOS, with HOME set to a fresh directory.
+run_defaults_plugin() {
+  run env HOME="$PACK_HOME" MOCK_UNAME_OUTPUT=Darwin \
+    PATH="$PROJECT_ROOT/tests_python/mocks:$PROJECT_ROOT/bin/mocks:$PATH" \
+    bash "$DEFAULTS_PLUGIN" "$@"
+}
+
+# Write a tweak pack from stdin.
+make_pack() {
+  mkdir -p "$PACK_HOME/.config/circus/tweaks"
+  cat > "$PACK_HOME/.config/circus/tweaks/$1.tweaks"
+}
+
+setup_pack_home() {
+  PACK_HOME=$(mktemp -d)
+}
+
+@test "fc defaults list keeps categories and names in sorted order" {
+  setup_pack_home
+  run_defaults_plugin list
+  assert_success
+  assert_line --index 1 "  Dock:"
+  assert_line --index 2 --regexp "^    dock\.autohide +Auto-hide the Dock when not in use$"
+  assert_line --index 3 --regexp "^    dock\.autohide-delay "
+  rm -rf "$PACK_HOME"
+}
+
+@test "fc defaults loads tweaks and categories from a tweak pack" {
+  setup_pack_home
+  make_pack extra <<'PACK'
+# Extra tweaks
+category|mail|Mail|Mail.app settings
+
+mail.plain-text|com.apple.mail|SendFormat|string|Plain|MIME|Compose in plain text|killall Mail
+dock.icon-size|com.apple.dock|tilesize|int|36|64|Smaller Dock icons
+PACK
+
+  run_defaults_plugin list
+  assert_success
+  assert_output --partial "  Mail:"
+  assert_output --regexp "mail\.plain-text +Compose in plain text"
+  assert_output --regexp "dock\.icon-size +Smaller Dock icons"
+
+  run_defaults_plugin apply mail.plain-text --dry-run
+  assert_success
+  assert_output --partial "Would run: defaults write com.apple.mail SendFormat -string Plain"
+  assert_output --partial "Would run: killall Mail"
+
+  run_defaults_plugin apply dock.icon-size --dry-run
+  assert_success
+  assert_output --partial "Would run: defaults write com.apple.dock tilesize -int 36"
+  refute_output --partial "killall Dock"
+  rm -rf "$PACK_HOME"
+}
+
+@test "fc defaults skips invalid tweak pack lines with a warning" {
+  setup_pack_home
+  make_pack broken <<'PACK'
+good.one|com.example|Key|bool|true|false|A good tweak|
+bad name|com.example|Key|bool|true|false|Space in name|
+good.two|com.example|Key|color|red|blue|Unknown type|
+bad.domain|com.example;touch /tmp/x|Key|bool|true|false|Shell in domain|
+bad.traversal|com..example|Key|bool|true|false|Dotted domain|
+bad.key|com.example|-delete|bool|true|false|Flag as key|
+bad.restart|com.example|Key|bool|true|false|Shell in restart|killall Dock; rm -rf ~
+bad.command|com.example|Key|bool|true|false|Not killall|open -a Calculator
+PACK
+
+  run_defaults_plugin list
+  assert_success
+  assert_output --partial "good.one"
+  refute_output --partial "good.two"
+  refute_output --partial "bad."
+  local line
+  for line in 2 3 4 5 6 7 8; do
+    assert_output --partial "broken.tweaks:$line"
+  done
+  rm -rf "$PACK_HOME"
+}
+
+@test "fc defaults restarts a tweak's process with killall, never eval" {
+  setup_pack_home
+  make_pack restart <<'PACK'
+mail.plain-text|com.apple.mail|SendFormat|string|Plain|MIME|Compose in plain text|killall Mail
+PACK
+  mkdir -p "$PACK_HOME/bin"
+  cat > "$PACK_HOME/bin/killall" <<'KILLALL'
+#!/usr/bin/env bash
+printf '%s\n' "$*" >> "$HOME/killall.log"
+KILLALL
+  chmod +x "$PACK_HOME/bin/killall"
+
+  run env HOME="$PACK_HOME" MOCK_UNAME_OUTPUT=Darwin \
+    PATH="$PACK_HOME/bin:$PROJECT_ROOT/tests_python/mocks:$PROJECT_ROOT/bin/mocks:$PATH" \
+    bash "$DEFAULTS_PLUGIN" apply mail.plain-text
+  assert_success
+  assert_output --partial "Applied!"
+
+  run cat "$PACK_HOME/killall.log"
+  assert_output -- "-- Mail"
+  rm -rf "$PACK_HOME"
+}
+
+@test "fc defaults finds a tweak in a pack of thousands" {
+  setup_pack_home
+  awk 'BEGIN { for (i = 1; i <= 3000; i++) printf "bulk.t%d|com.example.bulk|K%d|int|%d|0|Bulk tweak %d|\n", i, i, i, i }' |
+    make_pack bulk
+
+  run_defaults_plugin apply bulk.t2999 --dry-run
+  assert_success
+  assert_output --partial "Would run: defaults write com.example.bulk K2999 -int 2999"
+
+  run_defaults_plugin apply bulk.t3001 --dry-run
+  assert_failure
+  assert_output --partial "Unknown tweak: bulk.t3001"
+  rm -rf "$PACK_HOME"
+}
@@ -18,6 +18,33 @@ setup() {
   export FC_COMMAND="$PROJECT_ROOT/bin/fc"
 }
 
+teardown() {
+  teardown_isolated_home
+}
+
+# Lay out a tree with its own Brewfile and a fake `brew` in an isolated HOME.
+# The fake lists git, jq and the iterm2 cask, sleeping BREW_DELAY seconds first.
+healthcheck_tree() {
+  setup_isolated_home
+  mkdir -p "$HOME/tree" "$HOME/bin"
+  cp -R "$PROJECT_ROOT/lib" "$HOME/tree/lib"
+  cat > "$HOME/bin/brew" <<'EOF'
+#!/usr/bin/env bash
+sleep "${BREW_DELAY:-0}"
+case "$*" in
+  *--formula*) printf 'git\njq\n' ;;
+  *--cask*) printf 'iterm2\n' ;;
+esac
+EOF
+  chmod +x "$HOME/bin/brew"
+  export PATH="$HOME/bin:$PATH"
+}
+
+# Run the plugin from the test tree, bypassing bin/fc.
+healthcheck() {
+  run bash "$HOME/tree/lib/plugins/fc-healthcheck" "$@"
+}
+
 # ==============================================================================
 # Help and Usage Tests
 # ==============================================================================
@@ -107,6 +134,68 @@ setup() {
   assert_output --partial "Git Configuration"
 }
 
+# ==============================================================================
+# Dependency, Concurrency and JSON Tests
+# ==============================================================================
+
+@test "fc healthcheck deps reports the set difference across Brewfiles" {
+  healthcheck_tree
+  mkdir -p "$HOME/tree/roles/work"
+  printf 'brew "git"\nbrew "ripgrep"\ncask "iterm2"\n' > "$HOME/tree/Brewfile"
+  printf 'brew "ripgrep"\nbrew "homebrew/core/jq"\ncask "zed"\n' > "$HOME/tree/roles/work/Brewfile"
+  healthcheck deps
+  assert_success
+  assert_output --partial "2 package(s) not installed"
+  assert_output --partial "Missing formulae: ripgrep"
+  assert_output --partial "Missing casks: zed"
+}
+
+@test "fc healthcheck deps passes when everything is installed" {
+  healthcheck_tree
+  printf 'brew "git"\ncask "iterm2"\n' > "$HOME/tree/Brewfile"
+  healthcheck deps
+  assert_success
+  assert_output --partial "All Brewfile packages installed"
+}
+
+@test "fc healthcheck reports checks in a fixed order" {
+  healthcheck_tree
+  printf 'brew "git"\n' > "$HOME/tree/Brewfile"
+  BREW_DELAY=0.5 healthcheck
+  assert_success
+  assert_output --regexp "SSH Permissions.*Git Configuration.*Broken Symlinks.*Dependencies.*Summary:"
+}
+
+@test "fc healthcheck fails a check that runs out of time" {
+  healthcheck_tree
+  printf 'brew "git"\n' > "$HOME/tree/Brewfile"
+  BREW_DELAY=5 HEALTHCHECK_TIMEOUT=1 healthcheck
+  assert_success
+  assert_output --partial "Timed out after 1s"
+  assert_output --partial "Broken Symlinks"
+}
+
+@test "fc healthcheck --json reports each check with its duration" {
+  command -v python3 >/dev/null 2>&1 || skip "python3 not available"
+  healthcheck_tree
+  printf 'brew "git"\nbrew "ripgrep"\n' > "$HOME/tree/Brewfile"
+  bash "$HOME/tree/lib/plugins/fc-healthcheck" --json > "$HOME/report.json"
+
+  run python3 -c '
+import json, sys
+report = json.load(open(sys.argv[1]))
+assert report["duration_ms"] >= 0
+for check in report["checks"]:
+    assert isinstance(check["duration_ms"], int)
+    print(check["name"], check["status"], check["message"], check["details"])
+' "$HOME/report.json"
+  assert_success
+  assert_line --index 0 --regexp "^ssh "
+  assert_line --index 1 --regexp "^git "
+  assert_line --index 2 "symlinks pass No broken symlinks found []"
+  assert_line --index 3 "deps warn 1 package(s) not installed ['Missing formulae: ripgrep']"
+}
+
 # ==============================================================================
 # Error Handling Tests
 # ==============================================================================
@@ -0,0 +1,145 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         fc_history_index.bats
+#
+# DESCRIPTION:  Tests for the incremental history index behind
+#               `fc history stats`, `top` and `clean`.
+#
+# ==============================================================================
+
+load "test_helper"
+
+# --- Setup & Teardown ---------------------------------------------------------
+
+setup() {
+  setup_isolated_home
+  export SHELL=/bin/zsh
+  export HISTFILE="$HOME/.zsh_history"
+
+  # Entry 3 is a multi-line command, saved by zsh with trailing backslashes.
+  printf '%s\n' \
+    ': 1700000000:0;git status' \
+    ': 1700000001:0;ls -la' \
+    ': 1700000002:0;for f in *; do\' \
+    '  echo $f\' \
+    'done' \
+    ': 1700000003:0;git status' \
+    ': 1700000004:0;git push' > "$HISTFILE"
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+history() {
+  run bash "$PROJECT_ROOT/lib/plugins/fc-history" "$@"
+}
+
+index_value() {
+  sed -n "s/^$1=//p" "$HOME"/.circus/cache/history/*/meta
+}
+
+# ==============================================================================
+# Index
+# ==============================================================================
+
+@test "history index: counts multi-line entries once, ignoring timestamps" {
+  history stats
+  assert_success
+  assert_output --partial "Total entries:            5"
+  assert_output --partial "Unique commands:          4"
+  assert_output --partial "Duplicate ratio:          20.0%"
+}
+
+@test "history index: new lines are added from the recorded offset" {
+  history stats
+  printf '%s\n' ': 1700000005:0;ls -la' ': 1700000006:0;make test' >> "$HISTFILE"
+
+  history stats
+  assert_output --partial "Total entries:            7"
+  assert_output --partial "Unique commands:          5"
+
+  run index_value offset
+  assert_output "$(wc -c < "$HISTFILE" | tr -d ' ')"
+}
+
+@test "history index: a half-written entry waits for the next run" {
+  history stats
+  printf '%s' ': 1700000005:0;echo one\' >> "$HISTFILE"
+  printf '\n%s' 'two' >> "$HISTFILE"
+
+  history stats
+  assert_output --partial "Total entries:            5"
+
+  printf '\n' >> "$HISTFILE"
+  history stats
+  assert_output --partial "Total entries:            6"
+  assert_output --partial "Unique commands:          5"
+}
+
+@test "history index: a file rewritten in place is indexed again" {
+  history stats
+  sed 's/git status/gut status/' "$HISTFILE" > "$HOME/rewritten"
+  cat "$HOME/rewritten" > "$HISTFILE"
+
+  history top
+  assert_line --partial "2  gut"
+  assert_line --partial "1  git"
+}
+
+@test "history index: a shrunk file is indexed again" {
+  history stats
+  printf '%s\n' ': 1700000000:0;make' > "$HISTFILE"
+
+  history stats
+  assert_output --partial "Total entries:            1"
+}
+
+@test "history index: bash timestamp lines belong to the next entry" {
+  export SHELL=/bin/bash
+  export HISTFILE="$HOME/.bash_history"
+  printf '%s\n' '#1700000000' 'git status' '#1700000001' 'git status' 'ls' > "$HISTFILE"
+
+  history stats
+  assert_output --partial "Total entries:            3"
+  assert_output --partial "Unique commands:          2"
+}
+
+# ==============================================================================
+# Actions
+# ==============================================================================
+
+@test "history top: ranks commands by their first word" {
+  history top --count 2
+  assert_success
+  assert_line --index 1 "      3  git"
+  assert_line --index 2 "      1  for"
+}
+
+@test "history clean: keeps the last occurrence of each entry whole" {
+  history clean
+  assert_success
+  assert_output --partial "Removed 1 duplicate entries"
+
+  run cat "$HISTFILE"
+  assert_output ': 1700000001:0;ls -la
+: 1700000002:0;for f in *; do\
+  echo $f\
+done
+: 1700000003:0;git status
+: 1700000004:0;git push'
+
+  [ -f "$HISTFILE.backup" ]
+}
+
+@test "history clean: leaves a file without duplicates alone" {
+  history clean
+  rm "$HISTFILE.backup"
+
+  history clean
+  assert_success
+  assert_output --partial "No duplicate entries"
+  [ ! -f "$HISTFILE.backup" ]
+}
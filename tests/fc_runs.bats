@@ -0,0 +1,137 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         fc_runs.bats
+#
+# DESCRIPTION:  Tests for the fc runs command, which lists installer run
+#               records and compares the latest run with earlier ones.
+#
+# ==============================================================================
+
+load "test_helper"
+
+# --- Setup & Teardown ---------------------------------------------------------
+
+setup() {
+  setup_isolated_home
+  export FC_COMMAND="$PROJECT_ROOT/bin/fc"
+  mkdir -p "$HOME/.circus/runs"
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+# Write a run record with one stage and one preflight check.
+# @param $1 Record name (sorts by time)
+# @param $2 Stage milliseconds
+# @param $3 Optional exit status (default 0)
+# @param $4 Optional role (default developer)
+write_run() {
+  cat > "$HOME/.circus/runs/$1.json" <<RECORD
+{
+  "version": 1,
+  "started_at": "$1",
+  "exit_status": ${3:-0},
+  "role": "${4:-developer}",
+  "privacy_profile": "",
+  "dry_run": false,
+  "jobs": 1,
+  "total_ms": $2,
+  "stages": [
+    {"id": "03-homebrew-installation", "title": "Homebrew & Packages", "status": "done", "ms": $2}
+  ],
+  "preflight": [
+    {"name": "Shell Version", "status": "passed", "ms": 10}
+  ]
+}
+RECORD
+}
+
+# ==============================================================================
+# Help and Listing
+# ==============================================================================
+
+@test "fc runs --help shows usage information" {
+  run "$FC_COMMAND" runs --help
+  assert_success
+  assert_output --partial "Usage: fc runs"
+  assert_output --partial "compare"
+  assert_output --partial "--threshold"
+}
+
+@test "fc runs list fails helpfully with no history" {
+  rm -rf "$HOME/.circus/runs"
+  run "$FC_COMMAND" runs list
+  assert_failure
+  assert_output --partial "No installer runs recorded yet"
+}
+
+@test "fc runs list shows each run" {
+  write_run 20260101T000000Z 1000
+  write_run 20260102T000000Z 1200 1
+
+  run "$FC_COMMAND" runs list
+  assert_success
+  assert_output --partial "20260101T000000Z"
+  assert_output --regexp "20260102T000000Z +developer +false +failed"
+}
+
+@test "fc runs show prints stage and check timings" {
+  write_run 20260101T000000Z 61234
+
+  run "$FC_COMMAND" runs show
+  assert_success
+  assert_output --partial "Homebrew & Packages"
+  assert_output --partial "61.234s"
+  assert_output --partial "Shell Version"
+}
+
+# ==============================================================================
+# Comparison
+# ==============================================================================
+
+@test "fc runs compare flags a stage slower than the threshold" {
+  write_run 20260101T000000Z 10000
+  write_run 20260102T000000Z 12000
+  write_run 20260103T000000Z 11000
+  write_run 20260104T000000Z 20000
+
+  run "$FC_COMMAND" runs compare
+  assert_failure
+  assert_output --partial "median of 3 earlier run(s)"
+  assert_output --regexp "Homebrew & Packages +11.000s +20.000s +81%.*SLOWER"
+}
+
+@test "fc runs compare passes when the latest run is within the threshold" {
+  write_run 20260101T000000Z 10000
+  write_run 20260102T000000Z 11000
+
+  run "$FC_COMMAND" runs compare
+  assert_success
+  assert_output --partial "No regressions"
+}
+
+@test "fc runs compare ignores failed runs and other roles in the baseline" {
+  write_run 20260101T000000Z 10000
+  write_run 20260102T000000Z 1000 1
+  write_run 20260103T000000Z 1000 0 personal
+  write_run 20260104T000000Z 11000
+
+  run "$FC_COMMAND" runs compare
+  assert_success
+  assert_output --partial "median of 1 earlier run(s)"
+}
+
+@test "fc runs compare honours --threshold and --min-ms" {
+  write_run 20260101T000000Z 10000
+  write_run 20260102T000000Z 11000
+
+  run "$FC_COMMAND" runs compare --threshold 5
+  assert_failure
+  assert_output --partial "SLOWER"
+
+  run "$FC_COMMAND" runs compare --threshold 5 --min-ms 2000
+  assert_success
+}
@@ -0,0 +1,171 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         fc_secrets_sync.bats
+#
+# DESCRIPTION:  Tests for `fc secrets sync`: one authentication per backend,
+#               batched and concurrent fetches, and destinations written
+#               after every fetch has finished.
+#
+#               op, vault and security are fakes that log every call and
+#               answer each secret with "value-of-<path>".
+#
+# ==============================================================================
+
+load "test_helper"
+
+# --- Setup & Teardown ---------------------------------------------------------
+
+setup() {
+  setup_isolated_home
+
+  export TOOL_LOG="$HOME/tools.log"
+  export SECRETS_ENV_FILE="$HOME/.zshenv.local"
+  : > "$TOOL_LOG"
+  mkdir -p "$HOME/bin" "$HOME/.config/circus"
+
+  cat > "$HOME/bin/op" <<'OP'
+#!/usr/bin/env bash
+echo "op $*" >> "$TOOL_LOG"
+case "$1" in
+  user) exit 0 ;;
+  read) [ "$2" = "op://Vault/missing/field" ] && exit 1; echo "value-of-${2#op://}" ;;
+  inject)
+    template=$(cat)
+    [[ "$template" == *"op://Vault/missing/field"* ]] && exit 1
+    sed 's|{{ op://\([^ ]*\) }}|value-of-\1|' <<< "$template"
+    ;;
+esac
+OP
+  cat > "$HOME/bin/vault" <<'VAULT'
+#!/usr/bin/env bash
+echo "vault $*" >> "$TOOL_LOG"
+case "$1 $2" in
+  "token lookup") exit 0 ;;
+  "kv get")
+    for path; do :; done
+    printf '{"data": {"data": {"user": "%s-user", "password": "%s-password"}}}\n' "$path" "$path"
+    ;;
+esac
+VAULT
+  cat > "$HOME/bin/security" <<'SECURITY'
+#!/usr/bin/env bash
+echo "security $*" >> "$TOOL_LOG"
+sleep "${SECURITY_DELAY:-0}"
+echo "value-of-$3"
+SECURITY
+  chmod +x "$HOME/bin/op" "$HOME/bin/vault" "$HOME/bin/security"
+  export PATH="$HOME/bin:$PATH"
+
+  printf 'export KEEP=1\n' > "$SECRETS_ENV_FILE"
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+secrets_sync() {
+  run bash "$PROJECT_ROOT/lib/plugins/fc-secrets" sync
+}
+
+# ==============================================================================
+# Tests
+# ==============================================================================
+
+@test "fc secrets sync: authenticates once per backend and batches op reads" {
+  cat > "$HOME/.config/circus/secrets.conf" <<'CONF'
+"op://Vault/github/token" "env:GITHUB_TOKEN"
+"op://Vault/aws/key" "env:AWS_KEY"
+"op://Vault/db/password" "~/.config/db/password" "600"
+CONF
+  secrets_sync
+  assert_success
+  assert_output --partial "Synced 3 of 3 secrets successfully."
+
+  run grep -c "^op user" "$TOOL_LOG"
+  assert_output "1"
+  run grep -c "^op inject" "$TOOL_LOG"
+  assert_output "1"
+  run grep -c "^op read" "$TOOL_LOG"
+  assert_output "0"
+
+  run cat "$HOME/.config/db/password"
+  assert_output "value-of-Vault/db/password"
+}
+
+@test "fc secrets sync: a failed op batch falls back to one read per secret" {
+  cat > "$HOME/.config/circus/secrets.conf" <<'CONF'
+"op://Vault/github/token" "env:GITHUB_TOKEN"
+"op://Vault/missing/field" "env:MISSING"
+CONF
+  secrets_sync
+  assert_failure
+  assert_output --partial "Failed to fetch: op://Vault/missing/field"
+  assert_output --partial "Synced 1 of 2 secrets. 1 failed."
+
+  run grep -c "^op read" "$TOOL_LOG"
+  assert_output "2"
+  run grep "GITHUB_TOKEN" "$SECRETS_ENV_FILE"
+  assert_output "export GITHUB_TOKEN=value-of-Vault/github/token"
+}
+
+@test "fc secrets sync: fields of one Vault secret come from a single read" {
+  command -v jq >/dev/null 2>&1 || skip "jq not available"
+  cat > "$HOME/.config/circus/secrets.conf" <<'CONF'
+"vault://secret/data/db#user" "env:DB_USER"
+"vault://secret/data/db#password" "env:DB_PASSWORD"
+"vault://secret/data/api#password" "env:API_PASSWORD"
+CONF
+  secrets_sync
+  assert_success
+
+  run grep -c "^vault token lookup" "$TOOL_LOG"
+  assert_output "1"
+  run grep -c "^vault kv get" "$TOOL_LOG"
+  assert_output "2"
+  run grep "^export DB_\|^export API_" "$SECRETS_ENV_FILE"
+  assert_output "export DB_USER=secret/data/db-user
+export DB_PASSWORD=secret/data/db-password
+export API_PASSWORD=secret/data/api-password"
+}
+
+@test "fc secrets sync: secrets without a batch API are fetched concurrently" {
+  export SECURITY_DELAY=1 SECRETS_JOBS=4
+  cat > "$HOME/.config/circus/secrets.conf" <<'CONF'
+"keychain://one/a" "env:ONE"
+"keychain://two/a" "env:TWO"
+"keychain://three/a" "env:THREE"
+"keychain://four/a" "env:FOUR"
+CONF
+  local start end
+  start=$(date +%s)
+  secrets_sync
+  end=$(date +%s)
+
+  assert_success
+  # One after another, the four fetches would take at least 4 seconds.
+  [ $((end - start)) -lt 3 ]
+  assert_output --regexp "one/a.*two/a.*three/a.*four/a"
+}
+
+@test "fc secrets sync: the env file is rewritten once, keeping other lines" {
+  cat > "$HOME/.config/circus/secrets.conf" <<'CONF'
+"op://Vault/github/token" "env:GITHUB_TOKEN"
+"keychain://api/prod" "env:API_KEY"
+CONF
+  secrets_sync
+  assert_success
+  secrets_sync
+  assert_success
+
+  run cat "$SECRETS_ENV_FILE"
+  assert_output "export KEEP=1
+
+# --- fc-secrets managed (DO NOT EDIT BELOW) ---
+export GITHUB_TOKEN=value-of-Vault/github/token
+export API_KEY=value-of-api
+# --- fc-secrets end ---"
+  run stat -c '%a' "$SECRETS_ENV_FILE"
+  assert_output "600"
+}
@@ -0,0 +1,161 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         fc_update_pipeline.bats
+#
+# DESCRIPTION:  Tests for the package pipeline in `fc update`: concurrent
+#               outdated checks, parallel downloads before any upgrade, and a
+#               dry run that prints exactly what a real run would execute.
+#
+#               brew, mas and softwareupdate are fakes that log every call,
+#               with the time it was made, and can be slowed down.
+#
+# ==============================================================================
+
+load "test_helper"
+
+# --- Setup & Teardown ---------------------------------------------------------
+
+setup() {
+  setup_isolated_home
+
+  export TOOL_LOG="$HOME/tools.log"
+  : > "$TOOL_LOG"
+  mkdir -p "$HOME/bin"
+
+  cat > "$HOME/bin/brew" <<'BREW'
+#!/usr/bin/env bash
+echo "$(date +%s) brew $*" >> "$TOOL_LOG"
+case "$*" in
+  "outdated --formula --verbose")
+    sleep "${CHECK_DELAY:-0}"
+    printf 'jq (1.6) < 1.7\nwget (1.21) < 1.24\n'
+    ;;
+  "outdated --cask --verbose")
+    sleep "${CASK_DELAY:-${CHECK_DELAY:-0}}"
+    printf 'firefox (120.0) != 121.0\n'
+    ;;
+esac
+exit 0
+BREW
+  cat > "$HOME/bin/mas" <<'MAS'
+#!/usr/bin/env bash
+echo "$(date +%s) mas $*" >> "$TOOL_LOG"
+if [ "$1" = "outdated" ]; then
+  sleep "${CHECK_DELAY:-0}"
+  echo "497799835 Xcode (15.0 -> 15.1)"
+fi
+exit 0
+MAS
+  cat > "$HOME/bin/softwareupdate" <<'SWU'
+#!/usr/bin/env bash
+echo "$(date +%s) softwareupdate $*" >> "$TOOL_LOG"
+sleep "${CHECK_DELAY:-0}"
+echo "Software Update found the following new or updated software:"
+echo "* Label: macOS Sonoma 14.2.1-23C71"
+SWU
+  chmod +x "$HOME/bin/brew" "$HOME/bin/mas" "$HOME/bin/softwareupdate"
+  export PATH="$HOME/bin:$PATH"
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+fc_update() {
+  run bash "$PROJECT_ROOT/lib/plugins/fc-update" "$@"
+}
+
+# Prints the logged calls without their timestamps.
+tool_calls() {
+  cut -d' ' -f2- "$TOOL_LOG"
+}
+
+# ==============================================================================
+# Checks
+# ==============================================================================
+
+@test "fc update: the four outdated checks run at the same time" {
+  export CHECK_DELAY=2
+  local start end
+  start=$(date +%s)
+  fc_update --packages --os --dry-run
+  end=$(date +%s)
+
+  assert_success
+  # Run one after another, the checks would take at least 8 seconds.
+  [ $((end - start)) -lt 6 ]
+  assert_output --regexp "Homebrew formulae +2 to update.*Homebrew casks +1 to update.*Mac App Store +1 to update.*macOS +1 to update"
+}
+
+@test "fc update: a check that times out is reported and its upgrade skipped" {
+  export CASK_DELAY=5 UPDATE_CHECK_TIMEOUT=1
+  fc_update --packages
+  assert_success
+  assert_output --partial "timed out after 1s"
+  assert_output --partial "Skipping Homebrew casks: the outdated check did not complete."
+
+  run grep -c "upgrade --cask" "$TOOL_LOG"
+  assert_output "0"
+}
+
+# ==============================================================================
+# Dry Run
+# ==============================================================================
+
+@test "fc update --dry-run: prints the exact commands and changes nothing" {
+  fc_update --packages --os --dry-run
+  assert_success
+  assert_output --partial "[DRY-RUN] Would run: brew update"
+  assert_output --partial "[DRY-RUN] Would run: brew fetch --formula jq wget"
+  assert_output --partial "[DRY-RUN] Would run: brew fetch --cask firefox"
+  assert_output --partial "[DRY-RUN] Would run: brew upgrade --formula jq wget"
+  assert_output --partial "[DRY-RUN] Would run: brew upgrade --cask firefox"
+  assert_output --partial "[DRY-RUN] Would run: mas upgrade 497799835"
+  assert_output --partial "[DRY-RUN] Would run: sudo softwareupdate -ia --verbose"
+
+  run tool_calls
+  refute_output --partial "brew update"
+  refute_output --partial "fetch"
+  refute_output --partial "upgrade"
+}
+
+# ==============================================================================
+# Real Run
+# ==============================================================================
+
+@test "fc update --packages: downloads everything before the first upgrade" {
+  fc_update --packages
+  assert_success
+  assert_output --partial "Downloaded 3 packages"
+
+  # mas outdated may start alongside brew update; the brew checks wait for it.
+  run sh -c "cut -d' ' -f2- '$TOOL_LOG' | grep '^brew' | head -1"
+  assert_output "brew update"
+
+  run tool_calls
+  assert_line "brew fetch --formula jq"
+  assert_line "brew fetch --formula wget"
+  assert_line "brew fetch --cask firefox"
+
+  # From the first upgrade on, the log holds only the upgrades, in order.
+  run sh -c "cut -d' ' -f2- '$TOOL_LOG' | sed -n '/upgrade/,\$p'"
+  assert_output "brew upgrade --formula jq wget
+brew upgrade --cask firefox
+mas upgrade 497799835"
+}
+
+@test "fc update --packages: nothing outdated means nothing downloaded or upgraded" {
+  printf '#!/usr/bin/env bash\necho "0 brew $*" >> "$TOOL_LOG"\n' > "$HOME/bin/brew"
+  printf '#!/usr/bin/env bash\necho "0 mas $*" >> "$TOOL_LOG"\n' > "$HOME/bin/mas"
+  fc_update --packages
+  assert_success
+  assert_output --partial "All Homebrew formulae are up to date."
+  assert_output --partial "All Homebrew casks are up to date."
+  assert_output --partial "All Mac App Store apps are up to date."
+
+  run tool_calls
+  refute_output --partial "fetch"
+  refute_output --partial "upgrade"
+}
@@ -301,3 +301,88 @@ teardown() {
   # Clean up
   rm -f "$LOG_FILE_PATH"
 }
+
+@test "Log rotation should happen mid-run from the in-memory size count" {
+  export LOG_FILE_PATH="/tmp/test_rotation.log"
+  export LOG_MAX_SIZE=100
+  export LOG_ROTATE_COUNT=2
+  export CONSOLE_LOG_LEVEL=$LOG_LEVEL_CRITICAL
+  rm -f "$LOG_FILE_PATH" "${LOG_FILE_PATH}".*
+
+  # No file exists up front, so only the tracked size can trigger rotation.
+  run bash -c ". '$PROJECT_ROOT/lib/helpers.sh'; for i in 1 2 3 4 5 6; do msg_info \"line \$i\"; done"
+  assert_success
+
+  assert [ -f "${LOG_FILE_PATH}.1" ]
+  run cat "$LOG_FILE_PATH"
+  assert_output --partial "line 6"
+  refute_output --partial "line 1"
+
+  rm -f "$LOG_FILE_PATH" "${LOG_FILE_PATH}".*
+}
+
+# --- Test Cases for the Log File Backend -------------------------------------
+
+@test "log() keeps a single descriptor open on the log file" {
+  export LOG_FILE_PATH="/tmp/test.log"
+  export CONSOLE_LOG_LEVEL=$LOG_LEVEL_CRITICAL
+
+  # If log() reopened the file per line, deleting it mid-run would make the
+  # next line recreate it. With one descriptor the write goes to the unlinked
+  # inode and no new file appears.
+  run bash -c ". '$PROJECT_ROOT/lib/helpers.sh'; msg_info 'first'; rm -f '$LOG_FILE_PATH'; msg_info 'second'; [ ! -e '$LOG_FILE_PATH' ]"
+  assert_success
+}
+
+@test "log() reopens when LOG_FILE_PATH changes" {
+  export CONSOLE_LOG_LEVEL=$LOG_LEVEL_CRITICAL
+  rm -f /tmp/test.log /tmp/test_second.log
+
+  run bash -c "LOG_FILE_PATH=/tmp/test.log; . '$PROJECT_ROOT/lib/helpers.sh'; msg_info 'one'; LOG_FILE_PATH=/tmp/test_second.log; msg_info 'two'"
+  assert_success
+
+  run cat /tmp/test.log
+  assert_output --partial "one"
+  refute_output --partial "two"
+  run cat /tmp/test_second.log
+  assert_output --partial "two"
+
+  rm -f /tmp/test_second.log
+}
+
+@test "LOG_BUFFERED=true holds lines until exit" {
+  export LOG_FILE_PATH="/tmp/test.log"
+  export CONSOLE_LOG_LEVEL=$LOG_LEVEL_CRITICAL
+  export LOG_BUFFERED=true
+
+  run bash -c ". '$PROJECT_ROOT/lib/helpers.sh'; msg_info 'held'; grep -c held '$LOG_FILE_PATH' || true"
+  assert_success
+  assert_output "0"
+
+  run cat "$LOG_FILE_PATH"
+  assert_output --partial "[INFO] held"
+}
+
+@test "LOG_BUFFERED=true flushes immediately at ERROR" {
+  export LOG_FILE_PATH="/tmp/test.log"
+  export CONSOLE_LOG_LEVEL=$LOG_LEVEL_CRITICAL
+  export LOG_BUFFERED=true
+
+  run bash -c ". '$PROJECT_ROOT/lib/helpers.sh'; msg_info 'before'; msg_error 'boom' 2>/dev/null; cat '$LOG_FILE_PATH'"
+  assert_success
+  assert_output --partial "[INFO] before"
+  assert_output --partial "[ERROR] boom"
+}
+
+@test "LOG_BUFFERED=true does not lose lines logged inside a subshell" {
+  export LOG_FILE_PATH="/tmp/test.log"
+  export CONSOLE_LOG_LEVEL=$LOG_LEVEL_CRITICAL
+  export LOG_BUFFERED=true
+
+  run bash -c ". '$PROJECT_ROOT/lib/helpers.sh'; msg_info 'parent'; x=\$(msg_info 'child')"
+  assert_success
+
+  run cat "$LOG_FILE_PATH"
+  assert_output --partial "[INFO] parent"
+  assert_output --partial "[INFO] child"
+}
@@ -0,0 +1,250 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         homebrew.bats
+#
+# DESCRIPTION:  Tests for the batched install path and the query cache in
+#               lib/homebrew.sh.
+#
+#               brew is replaced by a fake that records every invocation, knows
+#               a fixed set of installed packages, and refuses to install any
+#               package named in $FAKE_BREW_BROKEN.
+#
+# ==============================================================================
+
+load "test_helper"
+
+# --- Setup & Teardown ---------------------------------------------------------
+
+setup() {
+  setup_isolated_home
+
+  export TEST_TEMP_DIR
+  TEST_TEMP_DIR=$(mktemp -d)
+  mkdir -p "$TEST_TEMP_DIR/bin"
+
+  export BREW_CALLS="$TEST_TEMP_DIR/brew_calls"
+  export FAKE_BREW_BROKEN=""
+  : > "$BREW_CALLS"
+
+  cat > "$TEST_TEMP_DIR/bin/brew" <<'BREW'
+#!/usr/bin/env bash
+echo "$*" >> "$BREW_CALLS"
+case "$1 $2" in
+  "list --formula") printf 'git\njq\n' ;;
+  "list --cask")    printf 'firefox\n' ;;
+  "outdated --broken") exit 1 ;;
+  install*)
+    for arg in "$@"; do
+      for broken in $FAKE_BREW_BROKEN; do
+        [ "$arg" = "$broken" ] && exit 1
+      done
+    done
+    ;;
+esac
+exit 0
+BREW
+  chmod +x "$TEST_TEMP_DIR/bin/brew"
+  export PATH="$TEST_TEMP_DIR/bin:$PATH"
+}
+
+teardown() {
+  rm -rf "$TEST_TEMP_DIR"
+  teardown_isolated_home
+}
+
+# Run a snippet with the libraries loaded.
+brew_run() {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; source '$PROJECT_ROOT/lib/homebrew.sh'; $1"
+}
+
+# ==============================================================================
+# Snapshot and set difference
+# ==============================================================================
+
+@test "brew_missing: computes the missing set from one snapshot" {
+  brew_run "brew_missing formula git ripgrep jq fd && echo \"\${BREW_MISSING[*]}\""
+  assert_success
+  assert_output "ripgrep fd"
+
+  run grep -c '^list' "$BREW_CALLS"
+  assert_output "2"
+}
+
+@test "brew_is_installed: matches tap-qualified names on their short name" {
+  brew_run "brew_is_installed formula homebrew/core/jq && echo yes"
+  assert_success
+  assert_output "yes"
+}
+
+@test "brew_is_installed: formulae and casks are separate sets" {
+  brew_run "brew_is_installed cask git || echo no"
+  assert_output "no"
+}
+
+# ==============================================================================
+# Batched installation
+# ==============================================================================
+
+@test "brew_install_batch: installs the whole set with one brew install" {
+  brew_run "brew_install_batch formula ripgrep fd bat"
+  assert_success
+
+  run grep '^install' "$BREW_CALLS"
+  assert_output "install ripgrep fd bat"
+}
+
+@test "brew_install_batch: passes --cask for casks" {
+  brew_run "brew_install_batch cask slack zoom"
+  assert_success
+
+  run grep '^install' "$BREW_CALLS"
+  assert_output "install --cask slack zoom"
+}
+
+@test "brew_install_batch: falls back to per-package installs when the batch fails" {
+  export FAKE_BREW_BROKEN="fd"
+  brew_run "brew_install_batch formula ripgrep fd bat || echo \"failed=\${BREW_FAILED[*]}\""
+  assert_output --partial "Failed to install: fd"
+  assert_output --partial "failed=fd"
+
+  run grep '^install' "$BREW_CALLS"
+  assert_line --index 0 "install ripgrep fd bat"
+  assert_line --index 1 "install ripgrep"
+  assert_line --index 2 "install fd"
+  assert_line --index 3 "install bat"
+}
+
+@test "brew_install_batch: records each failure in the security log" {
+  export FAKE_BREW_BROKEN="fd"
+  brew_run "brew_install_batch formula ripgrep fd || true"
+
+  run cat "$HOME/.circus/security.log"
+  assert_output --partial "Homebrew formula install failed | context: fd"
+}
+
+@test "brew_install_batch: CIRCUS_BREW_BATCH=false installs one at a time" {
+  export CIRCUS_BREW_BATCH=false
+  brew_run "brew_install_batch formula ripgrep fd || true"
+  assert_success
+
+  run grep -c '^install' "$BREW_CALLS"
+  assert_output "2"
+}
+
+@test "brew_install_batch: dry run installs nothing" {
+  export DRY_RUN_MODE=true
+  brew_run "brew_install_batch formula ripgrep fd || true"
+  assert_success
+  assert_output --partial "[Dry Run] Would run: brew install ripgrep fd"
+
+  run grep -c '^install' "$BREW_CALLS"
+  assert_output "0"
+}
+
+# ==============================================================================
+# Query cache
+# ==============================================================================
+
+@test "brew_query: a second query within the TTL is answered from the cache" {
+  brew_run "brew_query list --formula -1; brew_query list --formula -1"
+  assert_success
+  assert_output "git
+jq
+git
+jq"
+
+  run grep -c '^list --formula' "$BREW_CALLS"
+  assert_output "1"
+  run cat "$HOME/.circus/cache/brew/list_--formula_-1.out"
+  assert_line --index 1 "git"
+}
+
+@test "brew_query: the cache is shared between processes" {
+  brew_run "brew_snapshot_installed"
+  brew_run "brew_missing formula git ripgrep && echo \"\${BREW_MISSING[*]}\""
+  assert_output "ripgrep"
+
+  run grep -c '^list' "$BREW_CALLS"
+  assert_output "2"
+}
+
+@test "brew_query: an expired entry is refreshed" {
+  export BREW_CACHE_TTL=0
+  brew_run "brew_query list --formula -1 >/dev/null; brew_query list --formula -1 >/dev/null"
+
+  run grep -c '^list --formula' "$BREW_CALLS"
+  assert_output "2"
+}
+
+@test "brew_query: a change to the Cellar invalidates the entry" {
+  export HOMEBREW_PREFIX="$TEST_TEMP_DIR/prefix"
+  mkdir -p "$HOMEBREW_PREFIX/Cellar"
+  touch -t 202001010000 "$HOMEBREW_PREFIX/Cellar"
+  brew_run "brew_query list --formula -1 >/dev/null"
+  touch -t 202101010000 "$HOMEBREW_PREFIX/Cellar"
+  brew_run "brew_query list --formula -1 >/dev/null; brew_query list --formula -1 >/dev/null"
+
+  run grep -c '^list --formula' "$BREW_CALLS"
+  assert_output "2"
+}
+
+@test "brew_query: CIRCUS_BREW_CACHE=false always asks brew" {
+  export CIRCUS_BREW_CACHE=false
+  brew_run "brew_query list --formula -1 >/dev/null; brew_query list --formula -1 >/dev/null"
+
+  run grep -c '^list --formula' "$BREW_CALLS"
+  assert_output "2"
+  [ ! -d "$HOME/.circus/cache/brew" ]
+}
+
+@test "brew_query: failed queries are not cached" {
+  brew_run "brew_query outdated --broken || echo failed"
+  brew_run "brew_query outdated --broken || echo failed"
+
+  run grep -c '^outdated' "$BREW_CALLS"
+  assert_output "2"
+}
+
+@test "brew_query: concurrent writers leave one complete entry" {
+  brew_run "for i in 1 2 3 4 5 6; do brew_query list --formula -1 > \"\$TEST_TEMP_DIR/out.\$i\" & done; wait
+    cat \"\$TEST_TEMP_DIR\"/out.* | sort | uniq -c | awk '{print \$1, \$2}'"
+  assert_success
+  assert_output "6 git
+6 jq"
+
+  run ls -A "$HOME/.circus/cache/brew"
+  assert_output "list_--formula_-1.out"
+}
+
+@test "brew_install_batch: an install drops the query cache" {
+  brew_run "brew_snapshot_installed; brew_install_batch formula ripgrep"
+  assert_success
+  brew_run "brew_snapshot_installed"
+
+  run grep -c '^list --formula' "$BREW_CALLS"
+  assert_output "2"
+}
+
+# ==============================================================================
+# YAML appliers
+# ==============================================================================
+
+@test "apply_brew_formulae: skips installed and invalid names, batches the rest" {
+  local config="$TEST_TEMP_DIR/config.yaml"
+  echo "packages: {}" > "$config"
+  cat > "$TEST_TEMP_DIR/bin/yq" <<'YQ'
+#!/usr/bin/env bash
+printf '%s\n' 'packages.brew.0 = git' 'packages.brew.1 = ripgrep' \
+  'packages.brew.2 = bad;name' 'packages.brew.3 = fd'
+YQ
+  chmod +x "$TEST_TEMP_DIR/bin/yq"
+
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; source '$PROJECT_ROOT/lib/yaml_config.sh'; apply_brew_formulae '$config'"
+  assert_success
+  assert_output --partial "Skipping invalid package name: bad;name"
+
+  run grep '^install' "$BREW_CALLS"
+  assert_output "install ripgrep fd"
+}
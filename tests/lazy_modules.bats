@@ -0,0 +1,114 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         lazy_modules.bats
+#
+# DESCRIPTION:  Tests for the lazily loaded libraries declared in
+#               `lib/init.sh` (lib/security.sh and lib/ui_extra.sh).
+#
+# ==============================================================================
+
+load 'test_helper'
+
+setup() {
+  setup_isolated_home
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+# Run a snippet after sourcing init.sh.
+init_run() {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; $1"
+}
+
+# Public functions a library defines, sorted.
+module_functions() {
+  grep -oE '^[a-z][a-z0-9_]*\(\)' "$PROJECT_ROOT/lib/$1.sh" | tr -d '()' | sort -u
+}
+
+# Functions whose definition after init.sh is a stub for the given module.
+module_stubs() {
+  bash -c "source '$PROJECT_ROOT/lib/init.sh'
+    for fn in \$(compgen -A function); do
+      case \"\$(declare -f \"\$fn\")\" in
+        *'_circus_load_module $1 '*) echo \"\$fn\" ;;
+      esac
+    done" | sort -u
+}
+
+@test "init.sh loads neither lazy module" {
+  init_run 'echo "[$_CIRCUS_LOADED_MODULES]"; echo "${SECURITY_PACKAGE_PATTERN:-unset}"'
+  assert_success
+  assert_line --index 0 "[]"
+  assert_line --index 1 "unset"
+}
+
+@test "every public security.sh function has a stub" {
+  run diff <(module_functions security) <(module_stubs security)
+  assert_success
+}
+
+@test "every public ui_extra.sh function has a stub" {
+  run diff <(module_functions ui_extra) <(module_stubs ui_extra)
+  assert_success
+}
+
+@test "a stub loads its module once and forwards its arguments" {
+  init_run '
+    sanitize_package_name "ripgrep"
+    sanitize_domain "com.apple.dock"
+    echo "[$_CIRCUS_LOADED_MODULES]"
+  '
+  assert_success
+  assert_line --index 0 "ripgrep"
+  assert_line --index 1 "com.apple.dock"
+  assert_line --index 2 "[ security]"
+}
+
+@test "a stub preserves the exit status of the real function" {
+  init_run 'sanitize_package_name "bad;name" >/dev/null 2>&1 || echo "rc=$?"'
+  assert_output --partial "rc=1"
+}
+
+@test "lazily loaded globals are global, not locals of the loader" {
+  init_run 'secure_temp_cleanup; declare -p SECURE_TEMP_FILES SECURITY_PACKAGE_PATTERN >/dev/null && echo ok'
+  assert_success
+  assert_output "ok"
+}
+
+@test "stubs are exported to child shells" {
+  init_run 'bash -c "sanitize_package_name jq"'
+  assert_success
+  assert_output "jq"
+}
+
+@test "a stub whose module does not define it fails instead of recursing" {
+  init_run '
+    circus_lazy_module security not_a_security_function
+    not_a_security_function || echo "rc=$?"
+  '
+  assert_output --partial "does not define not_a_security_function()"
+  assert_output --partial "rc=127"
+}
+
+@test "circus_require_module loads a module into the current shell once" {
+  init_run '
+    circus_require_module security ui_extra
+    circus_require_module security
+    echo "[$_CIRCUS_LOADED_MODULES]"
+    [ "$(type -t ui_stages_init)" = function ] && echo "$UI_HAS_GUM"
+  '
+  assert_success
+  assert_line --index 0 "[ security ui_extra]"
+  assert_line --index 1 --regexp "^(true|false)$"
+}
+
+@test "die_if_root does not load security.sh for a regular user" {
+  [ "$EUID" -ne 0 ] || skip "running as root"
+  init_run 'die_if_root; echo "[$_CIRCUS_LOADED_MODULES]"'
+  assert_success
+  assert_output "[]"
+}
@@ -0,0 +1,99 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         parallel.bats
+#
+# DESCRIPTION:  Unit tests for the clock, timeout and worker pool in
+#               `lib/parallel.sh`.
+#
+# ==============================================================================
+
+load 'test_helper'
+
+setup() {
+  export TEST_TEMP_DIR
+  TEST_TEMP_DIR=$(mktemp -d)
+}
+
+teardown() {
+  rm -rf "$TEST_TEMP_DIR"
+}
+
+# Run a snippet with the library loaded.
+parallel_run() {
+  run bash -c "source '$PROJECT_ROOT/lib/helpers.sh'; source '$PROJECT_ROOT/lib/parallel.sh'; $1"
+}
+
+# --- now_ms -------------------------------------------------------------------
+
+@test "now_ms: sets NOW_MS to a millisecond timestamp" {
+  parallel_run 'now_ms; a=$NOW_MS; sleep 0.2; now_ms; echo "$a $NOW_MS"'
+  assert_success
+
+  local before after
+  read -r before after <<< "$output"
+  [ "${#before}" -ge 13 ]
+  [ $((after - before)) -ge 150 ]
+}
+
+# --- run_with_timeout ---------------------------------------------------------
+
+@test "run_with_timeout: passes through the command's exit status" {
+  parallel_run 'rc=0; run_with_timeout 5 bash -c "exit 3" || rc=$?; echo "rc=$rc"'
+  assert_success
+  assert_output "rc=3"
+}
+
+@test "run_with_timeout: returns 124 and kills the command at the limit" {
+  parallel_run "rc=0; run_with_timeout 1 bash -c 'sleep 20; touch $TEST_TEMP_DIR/finished' || rc=\$?; echo \"rc=\$rc\""
+  assert_success
+  assert_output "rc=124"
+
+  sleep 0.2
+  [ ! -e "$TEST_TEMP_DIR/finished" ]
+}
+
+@test "run_with_timeout: a fast command is not held up by the watchdog" {
+  parallel_run 'now_ms; start=$NOW_MS; run_with_timeout 30 true; now_ms; echo $((NOW_MS - start))'
+  assert_success
+  [ "$output" -lt 1000 ]
+}
+
+@test "run_with_timeout: runs shell functions" {
+  parallel_run 'greet() { echo "hello $1"; }; run_with_timeout 5 greet world'
+  assert_success
+  assert_output "hello world"
+}
+
+# --- Worker pool --------------------------------------------------------------
+
+@test "pool: never runs more than the configured number of jobs" {
+  parallel_run "
+    job() {
+      echo start >> '$TEST_TEMP_DIR/events'
+      sleep 0.3
+      echo end >> '$TEST_TEMP_DIR/events'
+    }
+    pool_init 2
+    for i in 1 2 3 4 5; do pool_spawn job; done
+    pool_wait
+  "
+  assert_success
+
+  local running=0 peak=0 event
+  while read -r event; do
+    if [ "$event" = start ]; then running=$((running + 1)); else running=$((running - 1)); fi
+    [ "$running" -gt "$peak" ] && peak=$running
+  done < "$TEST_TEMP_DIR/events"
+  [ "$peak" -eq 2 ]
+  [ "$(grep -c end "$TEST_TEMP_DIR/events")" -eq 5 ]
+}
+
+@test "pool: jobs run concurrently" {
+  parallel_run 'now_ms; start=$NOW_MS; pool_init 4; for i in 1 2 3 4; do pool_spawn sleep 1; done; pool_wait; now_ms; echo $((NOW_MS - start))'
+  assert_success
+  # One after another, the four jobs would take at least 4000ms.
+  [ "$output" -ge 1000 ]
+  [ "$output" -lt 2500 ]
+}
@@ -0,0 +1,131 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         plugin_index.bats
+#
+# DESCRIPTION:  Unit tests for the generated plugin index in
+#               `lib/plugin_index.sh` and its use by `lib/interactive.sh`.
+#
+# ==============================================================================
+
+load 'test_helper'
+
+setup() {
+  setup_isolated_home
+  PLUGINS="$HOME/plugins"
+  mkdir -p "$PLUGINS"
+
+  make_plugin caffeine <<'EOF'
+#!/usr/bin/env bash
+# DESCRIPTION:  Prevent the system from sleeping.
+#
+# ACTIONS:
+#   on          - Prevent sleep
+#   off         - Allow sleep
+#
+# EXAMPLES:
+#   fc caffeine on
+EOF
+
+  make_plugin redis <<'EOF'
+#!/usr/bin/env bash
+# DESCRIPTION:
+#   Manages the Redis server.
+case "$1" in
+  stop) ;;
+  start) ;;
+  status) ;;
+  start) ;;
+esac
+EOF
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+# Write an executable plugin from stdin.
+make_plugin() {
+  cat > "$PLUGINS/fc-$1"
+  chmod +x "$PLUGINS/fc-$1"
+}
+
+# Run a snippet with the library loaded.
+index_run() {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; source '$PROJECT_ROOT/lib/plugin_index.sh'; $1"
+}
+
+@test "plugin_index_load: reads names, descriptions and actions" {
+  index_run "
+    plugin_index_load '$PLUGINS'
+    for i in \"\${!PLUGIN_INDEX_NAMES[@]}\"; do
+      echo \"\${PLUGIN_INDEX_NAMES[i]}=\${PLUGIN_INDEX_DESCRIPTIONS[i]}\"
+    done
+    plugin_index_actions caffeine
+  "
+  assert_success
+  assert_line --index 0 "caffeine=Prevent the system from sleeping."
+  assert_line --index 1 "redis=Manages the Redis server."
+  assert_line --index 2 "on          - Prevent sleep"
+  assert_line --index 3 "off         - Allow sleep"
+  refute_output --partial "fc caffeine on"
+}
+
+@test "plugin_index_actions: falls back to sorted unique case labels" {
+  index_run "plugin_index_load '$PLUGINS'; plugin_index_actions redis | paste -sd, -"
+  assert_success
+  assert_output "start,status,stop"
+}
+
+@test "plugin_index_load: writes the cache and reuses it while fresh" {
+  index_run "plugin_index_load '$PLUGINS'"
+  assert_success
+  [ -f "$HOME/.circus/cache/plugin_index.tsv" ]
+
+  index_run "plugin_index_is_fresh '$PLUGINS'"
+  assert_success
+}
+
+@test "plugin_index_is_fresh: a modified plugin makes the index stale" {
+  index_run "plugin_index_load '$PLUGINS'"
+  touch -d '+1 minute' "$PLUGINS/fc-redis"
+
+  index_run "plugin_index_is_fresh '$PLUGINS'"
+  assert_failure
+}
+
+@test "plugin_index_load: picks up a new plugin" {
+  index_run "plugin_index_load '$PLUGINS'"
+  make_plugin wifi <<'EOF'
+#!/usr/bin/env bash
+# DESCRIPTION:  Manage Wi-Fi.
+EOF
+  touch -d '+1 minute' "$PLUGINS"
+
+  index_run "plugin_index_load '$PLUGINS'; echo \"\${PLUGIN_INDEX_NAMES[*]}\""
+  assert_success
+  assert_output "caffeine redis wifi"
+}
+
+@test "plugin_index_is_fresh: an index for another plugin directory is stale" {
+  index_run "plugin_index_load '$PLUGINS'"
+  mkdir -p "$HOME/other"
+
+  index_run "plugin_index_is_fresh '$HOME/other'"
+  assert_failure
+}
+
+@test "plugin_index_load: skips plugins that are not executable" {
+  chmod -x "$PLUGINS/fc-redis"
+  index_run "plugin_index_load '$PLUGINS'; echo \"\${PLUGIN_INDEX_NAMES[*]}\""
+  assert_success
+  assert_output "caffeine"
+}
+
+@test "get_all_commands: lists plugins from the index" {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; source '$PROJECT_ROOT/lib/interactive.sh'; get_all_commands '$PLUGINS'"
+  assert_success
+  assert_line --index 0 "caffeine        Prevent the system from sleeping."
+  assert_line --index 1 "redis           Manages the Redis server."
+}
@@ -394,3 +394,29 @@ teardown() {
   # At least 10 non-critical checks should exist
   assert [ "$output" -ge 10 ]
 }
+
+@test "Critical checks run in the foreground with stdin and no time limit" {
+  local root="$INSTALLER_TEST_HOME/root"
+  mkdir -p "$root/install/preflight"
+  ln -s "$PROJECT_ROOT/lib" "$root/lib"
+  # The critical check outlives the non-critical limit and reads its answer
+  # from the installer's stdin; the non-critical one simply hangs.
+  cat > "$root/install/preflight/slow-critical.sh" <<'CHECK'
+sleep 2
+read -r answer
+[ "$answer" = "yes" ]
+CHECK
+  echo "sleep 30" > "$root/install/preflight/slow-optional.sh"
+
+  run bash -c "
+    source '$PROJECT_ROOT/lib/init.sh'
+    export DOTFILES_ROOT='$root' PREFLIGHT_CHECK_TIMEOUT=1
+    source <(sed '/^main\$/d' '$PROJECT_ROOT/install/00-preflight-checks.sh')
+    PREFLIGHT_CHECKS=('slow-critical.sh|Slow Critical|yes' 'slow-optional.sh|Slow Optional|no')
+    run_preflight_checks_parallel
+    echo \"results=\${CHECK_RESULTS[*]} critical_failures=\$CRITICAL_FAILURES\"
+  " <<< "yes"
+  assert_success
+  assert_output --partial "Warning (timed out after 1s)"
+  assert_output --partial "results=passed warned critical_failures=0"
+}
@@ -0,0 +1,126 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         run_history.bats
+#
+# DESCRIPTION:  Unit tests for the installer run records written and read by
+#               `lib/run_history.sh`.
+#
+# ==============================================================================
+
+load 'test_helper'
+
+setup() {
+  setup_isolated_home
+}
+
+teardown() {
+  teardown_isolated_home
+}
+
+# Run a snippet with the library loaded.
+history_run() {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; source '$PROJECT_ROOT/lib/run_history.sh'; $1"
+}
+
+@test "run_history_finish: writes a JSON record of stages and checks" {
+  history_run '
+    INSTALL_ROLE=developer DRY_RUN_MODE=true STAGE_JOBS=4
+    run_history_start
+    run_history_check "Shell Version" passed 12
+    run_history_stage 03-homebrew "Homebrew & Packages" done 48211
+    run_history_stage 04-macos "macOS \"Settings\"" uptodate 0
+    run_history_finish 0
+  '
+  assert_success
+
+  local record
+  record=$(ls "$HOME/.circus/runs/"*.json)
+  run cat "$record"
+  assert_output --partial '"exit_status": 0,'
+  assert_output --partial '"role": "developer",'
+  assert_output --partial '"dry_run": true,'
+  assert_output --partial '"jobs": 4,'
+  assert_output --partial '{"id": "03-homebrew", "title": "Homebrew & Packages", "status": "done", "ms": 48211},'
+  assert_output --partial '{"id": "04-macos", "title": "macOS \"Settings\"", "status": "uptodate", "ms": 0}'
+  assert_output --partial '{"name": "Shell Version", "status": "passed", "ms": 12}'
+
+  if command -v python3 >/dev/null 2>&1; then
+    python3 -m json.tool "$record" > /dev/null
+  fi
+}
+
+@test "run_history_read: loads what run_history_finish wrote" {
+  history_run '
+    INSTALL_ROLE=work
+    run_history_start
+    run_history_check "Battery & Power" warned 7
+    run_history_stage 03-homebrew "Homebrew & Packages" done 1500
+    run_history_stage 04-macos "macOS \"Settings\"" failed 20
+    run_history_finish 1
+    run_history_read "$(run_history_files | tail -1)"
+    echo "$RUN_ROLE $RUN_EXIT_STATUS $RUN_DRY_RUN"
+    echo "${RUN_STAGE_IDS[*]} / ${RUN_STAGE_STATUS[*]} / ${RUN_STAGE_MS[*]}"
+    echo "${RUN_STAGE_TITLES[1]}"
+    echo "${RUN_CHECK_NAMES[0]} ${RUN_CHECK_STATUS[0]} ${RUN_CHECK_MS[0]}"
+  '
+  assert_success
+  assert_line --index 0 "work 1 false"
+  assert_line --index 1 "03-homebrew 04-macos / done failed / 1500 20"
+  assert_line --index 2 'macOS "Settings"'
+  assert_line --index 3 "Battery & Power warned 7"
+}
+
+@test "run_history_finish: records the stage that was running as failed" {
+  history_run '
+    run_history_start
+    run_history_stage_begin 01-intro "Welcome"
+    run_history_finish
+    run_history_read "$(run_history_files | tail -1)"
+    echo "$RUN_EXIT_STATUS ${RUN_STAGE_IDS[*]} ${RUN_STAGE_STATUS[*]}"
+  '
+  assert_success
+  assert_output "1 01-intro failed"
+}
+
+@test "run_history: nothing is recorded without run_history_start" {
+  history_run '
+    run_history_stage 03-homebrew "Homebrew" done 10
+    run_history_finish 0
+    run_history_files | wc -l
+  '
+  assert_success
+  assert_output --regexp '^ *0$'
+}
+
+@test "run_history: a second source keeps the run being recorded" {
+  history_run "
+    run_history_start
+    source '$PROJECT_ROOT/lib/run_history.sh'
+    run_history_stage 00-preflight Preflight done 10
+    run_history_finish 0
+    run_history_files | wc -l
+  "
+  assert_success
+  assert_output --regexp '^ *1$'
+}
+
+@test "run_history_finish: keeps only RUN_HISTORY_KEEP records" {
+  mkdir -p "$HOME/.circus/runs"
+  local n
+  for n in 1 2 3 4; do
+    echo '{}' > "$HOME/.circus/runs/2026010${n}T000000Z-1.json"
+  done
+
+  history_run '
+    RUN_HISTORY_KEEP=3
+    run_history_start
+    run_history_finish 0
+    run_history_files | xargs -n1 basename
+  '
+  assert_success
+  refute_output --partial "20260101T"
+  refute_output --partial "20260102T"
+  assert_output --partial "20260103T"
+}
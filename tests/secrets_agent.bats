@@ -0,0 +1,177 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         secrets_agent.bats
+#
+# DESCRIPTION:  Tests for the secrets cache agent in lib/secrets_agent.sh and
+#               its use by `fc secrets get` and `fc context switch`.
+#
+#               op is a fake that logs every call and answers each secret with
+#               "value-of-<path>".
+#
+# ==============================================================================
+
+load "test_helper"
+
+# --- Setup & Teardown ---------------------------------------------------------
+
+setup() {
+  command -v perl >/dev/null 2>&1 || skip "perl not available"
+  setup_isolated_home
+
+  export TOOL_LOG="$HOME/tools.log"
+  : > "$TOOL_LOG"
+  mkdir -p "$HOME/bin"
+  cat > "$HOME/bin/op" <<'OP'
+#!/usr/bin/env bash
+echo "op $*" >> "$TOOL_LOG"
+case "$1" in
+  user) exit 0 ;;
+  read) echo "value-of-${2#op://}" ;;
+esac
+OP
+  chmod +x "$HOME/bin/op"
+  export PATH="$HOME/bin:$PATH"
+}
+
+teardown() {
+  if [ -n "${ISOLATED_TEST_HOME:-}" ]; then
+    agent secrets_agent_stop
+    teardown_isolated_home
+  fi
+}
+
+# Run a snippet with the agent library loaded.
+agent() {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; source '$PROJECT_ROOT/lib/secrets_agent.sh'; $1"
+}
+
+# ==============================================================================
+# Agent
+# ==============================================================================
+
+@test "secrets agent: socket directory is private" {
+  agent 'secrets_agent_start && stat -c %a "$SECRETS_AGENT_DIR" 2>/dev/null || stat -f %Lp "$SECRETS_AGENT_DIR"'
+  assert_success
+  assert_output "700"
+}
+
+@test "secrets agent: stores values exactly and answers misses" {
+  agent 'secrets_agent_start
+    printf "line one\nline two\n" | secrets_agent_put "op://My Vault/item/field"
+    value=$(secrets_agent_get "op://My Vault/item/field"; echo .)
+    printf "%q\n" "${value%.}"
+    secrets_agent_get "op://My Vault/other" || echo "miss $?"'
+  assert_success
+  assert_output "\$'line one\\nline two\\n'
+miss 1"
+}
+
+@test "secrets agent: entries expire after their TTL" {
+  agent 'secrets_agent_start
+    printf "short" | secrets_agent_put "op://v/short" 1
+    printf "long" | secrets_agent_put "op://v/long" 60
+    sleep 2
+    secrets_agent_get "op://v/short" || echo "expired"
+    secrets_agent_get "op://v/long"; echo
+    secrets_agent_entries'
+  assert_success
+  assert_output "expired
+long
+1"
+}
+
+@test "secrets agent: forget and flush drop entries" {
+  agent 'secrets_agent_start
+    printf a | secrets_agent_put "op://v/a"
+    printf b | secrets_agent_put "op://v/b"
+    printf c | secrets_agent_put "op://v/c"
+    secrets_agent_forget "op://v/a"
+    secrets_agent_entries
+    secrets_agent_flush
+    secrets_agent_entries'
+  assert_success
+  assert_output "2
+0"
+}
+
+@test "secrets agent: lookups fail fast when it is not running" {
+  agent 'secrets_agent_get "op://v/a" || echo "status $?"; secrets_agent_running || echo "not running"'
+  assert_success
+  assert_output "status 2
+not running"
+}
+
+# ==============================================================================
+# Consumers
+# ==============================================================================
+
+@test "fc secrets get: served from the agent after the first fetch" {
+  run bash "$PROJECT_ROOT/lib/plugins/fc-secrets" agent start
+  assert_success
+
+  run bash "$PROJECT_ROOT/lib/plugins/fc-secrets" get op://Vault/github/token
+  assert_output "value-of-Vault/github/token"
+  run bash "$PROJECT_ROOT/lib/plugins/fc-secrets" get op://Vault/github/token
+  assert_output "value-of-Vault/github/token"
+
+  run grep -c "^op read" "$TOOL_LOG"
+  assert_output "1"
+
+  run bash "$PROJECT_ROOT/lib/plugins/fc-secrets" agent status
+  assert_output --partial "running, 1 cached secrets"
+}
+
+@test "fc secrets get: falls back to the backend without an agent" {
+  run bash "$PROJECT_ROOT/lib/plugins/fc-secrets" get op://Vault/github/token
+  run bash "$PROJECT_ROOT/lib/plugins/fc-secrets" get op://Vault/github/token
+  assert_success
+  assert_output "value-of-Vault/github/token"
+
+  run grep -c "^op read" "$TOOL_LOG"
+  assert_output "2"
+}
+
+@test "fc secrets get: never aborts on the agent hand-off without an agent" {
+  # A value larger than a pipe buffer makes a writer with no reader fail
+  # every time rather than now and then.
+  cat > "$HOME/bin/op" <<'OP'
+#!/usr/bin/env bash
+case "$1" in
+  user) exit 0 ;;
+  read) head -c 100000 /dev/zero | tr '\0' x ;;
+esac
+OP
+  local i
+  for i in 1 2 3 4 5 6 7 8 9 10; do
+    run bash "$PROJECT_ROOT/lib/plugins/fc-secrets" get op://Vault/big/token
+    assert_success
+    refute_output --partial "unexpected error"
+    [ "${#output}" -eq 100000 ]
+  done
+}
+
+@test "fc context switch: resolves cached secrets without calling the backend" {
+  mkdir -p "$HOME/.config/circus/contexts"
+  cat > "$HOME/.config/circus/contexts/work.conf" <<'CONF'
+# --- Environment Variables ---
+export GITHUB_TOKEN="from-secrets:op://Vault/github/token"
+export PLAIN="plain"
+NODE_VERSION=""
+PYTHON_VERSION=""
+GO_VERSION=""
+RUBY_VERSION=""
+GIT_USER_NAME=""
+GIT_USER_EMAIL=""
+ON_ACTIVATE=""
+CONF
+  agent 'secrets_agent_start; printf cached-token | secrets_agent_put "op://Vault/github/token"'
+
+  run bash "$PROJECT_ROOT/lib/plugins/fc-context" switch work
+  assert_success
+  run grep "GITHUB_TOKEN" "$HOME/.circus/context_env.sh"
+  assert_output --partial "cached-token"
+  run cat "$TOOL_LOG"
+  assert_output ""
+}
@@ -126,3 +126,64 @@ set_role() {
   # zsh uses "alias: no such alias: dps"
   assert_output --partial "not found"
 }
+
+# --- Bundle Tests -----------------------------------------------------------
+
+@test "Bundle: the plugin writes a bundle of its sources" {
+  local bundle="$HOME/.circus/cache/circus.bundle.zsh"
+  [ -f "$bundle" ]
+  run grep -c "^# --- .*/aliases/git.aliases.sh$" "$bundle"
+  assert_output "1"
+}
+
+@test "Bundle: an unchanged bundle is reused" {
+  local bundle="$HOME/.circus/cache/circus.bundle.zsh"
+  echo "# marker" >> "$bundle"
+  touch -d '+1 minute' "$bundle"
+
+  set +e
+  source "$PROJECT_ROOT/profiles/base/zsh/oh-my-zsh-custom/circus/circus.plugin.zsh"
+  set -e
+
+  run tail -1 "$bundle"
+  assert_output "# marker"
+}
+
+@test "Bundle: changing the role rebuilds the bundle" {
+  set_role "developer"
+  run grep -c "roles/developer/aliases/docker.aliases.sh$" "$HOME/.circus/cache/circus.bundle.zsh"
+  assert_output "1"
+
+  set_role "personal"
+  run grep -c "roles/developer/" "$HOME/.circus/cache/circus.bundle.zsh"
+  assert_output "0"
+}
+
+@test "Bundle: a newer context file is picked up" {
+  echo 'export CIRCUS_TEST_CONTEXT=one' > "$HOME/.circus/context_env.sh"
+  set_role "personal"
+  [ "$CIRCUS_TEST_CONTEXT" = "one" ]
+
+  echo 'export CIRCUS_TEST_CONTEXT=two' > "$HOME/.circus/context_env.sh"
+  touch -d '+1 minute' "$HOME/.circus/context_env.sh"
+  set_role "personal"
+  [ "$CIRCUS_TEST_CONTEXT" = "two" ]
+}
+
+@test "Bundle: falls back to sourcing files when the cache is not writable" {
+  rm -rf "$HOME/.circus/cache"
+  touch "$HOME/.circus/cache"
+  unalias fwlist
+
+  set +e
+  source "$PROJECT_ROOT/profiles/base/zsh/oh-my-zsh-custom/circus/circus.plugin.zsh"
+  set -e
+
+  run alias fwlist
+  assert_success
+}
+
+@test "Bundle: state files are read without command substitution" {
+  run bash -c "grep -vE '^[[:space:]]*#' '$PROJECT_ROOT/profiles/base/zsh/oh-my-zsh-custom/circus/circus.plugin.zsh' | grep -E '\\\$\\(cat '"
+  assert_failure
+}
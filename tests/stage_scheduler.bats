@@ -0,0 +1,310 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         stage_scheduler.bats
+#
+# DESCRIPTION:  Tests for the dependency-aware stage scheduler in
+#               `lib/stage_scheduler.sh`, using throwaway stage scripts that
+#               record when they start and finish.
+#
+# ==============================================================================
+
+load "test_helper"
+
+# --- Setup & Teardown ---------------------------------------------------------
+
+setup() {
+  setup_isolated_home
+
+  export TEST_TEMP_DIR
+  TEST_TEMP_DIR=$(mktemp -d)
+  export STAGE_DIR="$TEST_TEMP_DIR/stages"
+  export EVENTS="$TEST_TEMP_DIR/events"
+  mkdir -p "$STAGE_DIR"
+  : > "$EVENTS"
+}
+
+teardown() {
+  rm -rf "$TEST_TEMP_DIR"
+  teardown_isolated_home
+}
+
+# Write a stage script that logs start/end events and sleeps in between.
+# @param $1 File name
+# @param $2 Seconds to sleep
+# @param $3 Optional extra shell code to run in the stage
+make_stage() {
+  cat > "$STAGE_DIR/$1" <<STAGE
+echo "start $1" >> "\$EVENTS"
+echo "output from $1"
+sleep $2
+${3:-}
+echo "end $1" >> "\$EVENTS"
+STAGE
+}
+
+# Run the scheduler over the given stage definitions.
+schedule() {
+  local jobs="$1"
+  shift
+  local defs=""
+  local def
+  for def in "$@"; do
+    defs="$defs '$def'"
+  done
+  run bash -c "
+    source '$PROJECT_ROOT/lib/init.sh'
+    source '$PROJECT_ROOT/lib/stage_scheduler.sh'
+    DOTFILES_ROOT='$TEST_TEMP_DIR'
+    STAGE_JOBS=$jobs
+    stages_define $defs
+    ui_stages_init a b c d
+    stages_run
+  "
+}
+
+# Line number of an event in the events file.
+event_line() {
+  grep -n "^$1\$" "$EVENTS" | cut -d: -f1
+}
+
+# ==============================================================================
+# Ordering
+# ==============================================================================
+
+@test "stages_run: one job runs stages in list order" {
+  make_stage 01-a.sh 0
+  make_stage 02-b.sh 0
+  make_stage 03-c.sh 0
+
+  schedule 1 "01-a.sh|A|||isolated" "02-b.sh|B|||isolated" "03-c.sh|C|||isolated"
+  assert_success
+
+  run cat "$EVENTS"
+  assert_output "$(printf 'start 01-a.sh\nend 01-a.sh\nstart 02-b.sh\nend 02-b.sh\nstart 03-c.sh\nend 03-c.sh')"
+}
+
+@test "stages_run: a stage waits for its dependencies" {
+  make_stage 01-a.sh 0.5
+  make_stage 02-b.sh 0
+  make_stage 03-c.sh 0
+
+  schedule 4 "01-a.sh|A|||isolated" "02-b.sh|B||01|isolated" "03-c.sh|C|||isolated"
+  assert_success
+
+  [ "$(event_line 'end 01-a.sh')" -lt "$(event_line 'start 02-b.sh')" ]
+  # C has no dependencies, so it does not wait for A.
+  [ "$(event_line 'start 03-c.sh')" -lt "$(event_line 'end 01-a.sh')" ]
+}
+
+@test "stages_run: independent isolated stages overlap" {
+  make_stage 01-a.sh 1
+  make_stage 02-b.sh 1
+  make_stage 03-c.sh 1
+
+  SECONDS=0
+  schedule 3 "01-a.sh|A|||isolated" "02-b.sh|B|||isolated" "03-c.sh|C|||isolated"
+  assert_success
+  [ "$SECONDS" -lt 3 ]
+}
+
+@test "stages_run: jobs caps the number of concurrent stages" {
+  make_stage 01-a.sh 0.5
+  make_stage 02-b.sh 0.5
+  make_stage 03-c.sh 0.5
+
+  schedule 2 "01-a.sh|A|||isolated" "02-b.sh|B|||isolated" "03-c.sh|C|||isolated"
+  assert_success
+
+  # C can only start once A or B has ended.
+  local first_end
+  first_end=$(grep -n '^end' "$EVENTS" | head -1 | cut -d: -f1)
+  [ "$first_end" -lt "$(event_line 'start 03-c.sh')" ]
+}
+
+@test "stages_run: buffered output is replayed in stage order" {
+  make_stage 01-a.sh 1
+  make_stage 02-b.sh 0
+
+  schedule 2 "01-a.sh|A|||isolated" "02-b.sh|B|||isolated"
+  assert_success
+
+  # B finished first, but its output follows A's.
+  [ "$(event_line 'end 02-b.sh')" -lt "$(event_line 'end 01-a.sh')" ]
+  local a_line b_line
+  a_line=$(echo "$output" | grep -n "output from 01-a.sh" | cut -d: -f1)
+  b_line=$(echo "$output" | grep -n "output from 02-b.sh" | cut -d: -f1)
+  [ "$a_line" -lt "$b_line" ]
+}
+
+@test "stages_run: an inline stage's variables reach later stages" {
+  make_stage 01-a.sh 0 'export STAGE_A_VALUE=from-a'
+  make_stage 02-b.sh 0 'echo "b sees ${STAGE_A_VALUE:-nothing}"'
+
+  schedule 2 "01-a.sh|A|||inline" "02-b.sh|B||01|isolated"
+  assert_success
+  assert_output --partial "b sees from-a"
+}
+
+@test "stages_run: an inline stage waits for earlier stages to be replayed" {
+  make_stage 01-a.sh 0.5
+  make_stage 02-b.sh 0
+
+  schedule 4 "01-a.sh|A|||isolated" "02-b.sh|B|||inline"
+  assert_success
+  [ "$(event_line 'end 01-a.sh')" -lt "$(event_line 'start 02-b.sh')" ]
+}
+
+# ==============================================================================
+# Failures and validation
+# ==============================================================================
+
+@test "stages_run: a failing isolated stage stops the run and shows its output" {
+  make_stage 01-a.sh 0 'false'
+  make_stage 02-b.sh 0
+
+  schedule 4 "01-a.sh|A|||isolated" "02-b.sh|B||01|isolated"
+  assert_failure
+  assert_output --partial "output from 01-a.sh"
+  assert_output --partial "Installation stage failed: A"
+  refute_output --partial "output from 02-b.sh"
+}
+
+@test "stages_run: a missing stage file is fatal" {
+  schedule 4 "01-missing.sh|Missing|||isolated"
+  assert_failure
+  assert_output --partial "Critical installation stage not found"
+}
+
+@test "stages_define: rejects a dependency on an unknown or later stage" {
+  make_stage 01-a.sh 0
+  make_stage 02-b.sh 0
+
+  schedule 1 "01-a.sh|A||02|isolated" "02-b.sh|B|||isolated"
+  assert_failure
+  assert_output --partial "depends on '02', which is not an earlier stage"
+}
+
+@test "stages_define: rejects an unknown mode" {
+  make_stage 01-a.sh 0
+
+  schedule 1 "01-a.sh|A|||sideways"
+  assert_failure
+  assert_output --partial "unknown mode: sideways"
+}
+
+# ==============================================================================
+# Fingerprints
+# ==============================================================================
+
+@test "stages_run: a stage whose inputs are unchanged is skipped as up to date" {
+  make_stage 01-a.sh 0
+  echo "pkg" > "$TEST_TEMP_DIR/Brewfile"
+
+  schedule 1 "01-a.sh|A|||inline|Brewfile"
+  assert_success
+  assert [ -f "$HOME/.circus/fingerprints/01-a" ]
+
+  : > "$EVENTS"
+  schedule 1 "01-a.sh|A|||inline|Brewfile"
+  assert_success
+  assert_output --partial "Up to date"
+  [ ! -s "$EVENTS" ]
+}
+
+@test "stages_run: changing an input, the role or the script re-runs the stage" {
+  make_stage 01-a.sh 0
+  mkdir -p "$TEST_TEMP_DIR/roles/work"
+  echo "pkg" > "$TEST_TEMP_DIR/roles/work/Brewfile"
+  export INSTALL_ROLE=work
+
+  schedule 1 "01-a.sh|A|||inline|roles/{role}/Brewfile"
+  echo "other" >> "$TEST_TEMP_DIR/roles/work/Brewfile"
+  : > "$EVENTS"
+  schedule 1 "01-a.sh|A|||inline|roles/{role}/Brewfile"
+  assert_success
+  [ "$(event_line 'start 01-a.sh')" = 1 ]
+
+  export INSTALL_ROLE=personal
+  : > "$EVENTS"
+  schedule 1 "01-a.sh|A|||inline|roles/{role}/Brewfile"
+  [ "$(event_line 'start 01-a.sh')" = 1 ]
+
+  make_stage 01-a.sh 0 "echo changed"
+  : > "$EVENTS"
+  schedule 1 "01-a.sh|A|||inline|roles/{role}/Brewfile"
+  [ "$(event_line 'start 01-a.sh')" = 1 ]
+}
+
+@test "stages_run: a changed dependency re-runs its dependents" {
+  make_stage 01-a.sh 0
+  make_stage 02-b.sh 0
+  mkdir -p "$TEST_TEMP_DIR/conf"
+  echo "one" > "$TEST_TEMP_DIR/conf/a"
+
+  schedule 2 "01-a.sh|A|||isolated|conf" "02-b.sh|B||01|isolated|-"
+  assert_success
+
+  echo "two" > "$TEST_TEMP_DIR/conf/new"
+  : > "$EVENTS"
+  schedule 2 "01-a.sh|A|||isolated|conf" "02-b.sh|B||01|isolated|-"
+  assert_success
+  [ -n "$(event_line 'start 01-a.sh')" ]
+  [ -n "$(event_line 'start 02-b.sh')" ]
+
+  : > "$EVENTS"
+  schedule 2 "01-a.sh|A|||isolated|conf" "02-b.sh|B||01|isolated|-"
+  assert_success
+  [ ! -s "$EVENTS" ]
+}
+
+@test "stages_run: FORCE_MODE ignores fingerprints" {
+  make_stage 01-a.sh 0
+
+  schedule 1 "01-a.sh|A|||inline|-"
+  export FORCE_MODE=true
+  : > "$EVENTS"
+  schedule 1 "01-a.sh|A|||inline|-"
+  assert_success
+  [ "$(event_line 'start 01-a.sh')" = 1 ]
+}
+
+@test "stages_run: dry runs and failures record no fingerprint" {
+  make_stage 01-a.sh 0
+  make_stage 02-b.sh 0 "false"
+
+  DRY_RUN_MODE=true schedule 1 "01-a.sh|A|||inline|-"
+  assert_success
+  [ ! -e "$HOME/.circus/fingerprints/01-a" ]
+
+  schedule 2 "02-b.sh|B|||isolated|-"
+  assert_failure
+  [ ! -e "$HOME/.circus/fingerprints/02-b" ]
+}
+
+@test "stages_run: stages without inputs always run" {
+  make_stage 01-a.sh 0
+
+  schedule 1 "01-a.sh|A|||inline"
+  : > "$EVENTS"
+  schedule 1 "01-a.sh|A|||inline"
+  [ "$(event_line 'start 01-a.sh')" = 1 ]
+  [ ! -d "$HOME/.circus/fingerprints" ]
+}
+
+# ==============================================================================
+# install.sh stage table
+# ==============================================================================
+
+@test "install.sh: every stage dependency resolves" {
+  run bash -c "
+    source '$PROJECT_ROOT/lib/init.sh'
+    source '$PROJECT_ROOT/lib/stage_scheduler.sh'
+    eval \"\$(sed -n '/local INSTALL_STAGES=(/,/^  )/p' '$PROJECT_ROOT/install.sh' | sed 's/^  local //')\"
+    stages_define \"\${INSTALL_STAGES[@]}\"
+    echo \"\${#_STAGE_FILE[@]} stages\"
+  "
+  assert_success
+  assert_output "15 stages"
+}
@@ -132,7 +132,7 @@ load 'test_helper'
 
   run ruby -ryaml -e 'puts (YAML.load_file(".github/workflows/ci.yml")["jobs"] || {}).keys.sort.join(",")'
   assert_success
-  assert_output "installer,shellcheck,smoke,tests"
+  assert_output "installer,shell-startup,shellcheck,smoke,tests"
 }
 
 @test "no workflow run-block line starts at column 1" {
@@ -0,0 +1,204 @@
+#!/usr/bin/env bats
+
+# ==============================================================================
+#
+# FILE:         yaml_config.bats
+#
+# DESCRIPTION:  Tests for the single-pass loader and compiled-config cache in
+#               lib/yaml_config.sh.
+#
+#               yq is replaced by a fake that prints canned `-o=props` output
+#               and counts its invocations, so the tests run without yq and can
+#               prove how often it is launched.
+#
+# ==============================================================================
+
+load "test_helper"
+
+# --- Setup & Teardown ---------------------------------------------------------
+
+setup() {
+  setup_isolated_home
+
+  export TEST_TEMP_DIR
+  TEST_TEMP_DIR=$(mktemp -d)
+  mkdir -p "$TEST_TEMP_DIR/bin"
+
+  export YQ_CALLS="$TEST_TEMP_DIR/yq_calls"
+  : > "$YQ_CALLS"
+
+  # The props file next to each config stands in for what yq would print;
+  # the node file answers single-node lookups.
+  cat > "$TEST_TEMP_DIR/bin/yq" <<'YQ'
+#!/usr/bin/env bash
+echo "$*" >> "$YQ_CALLS"
+for arg in "$@"; do file="$arg"; done
+case "$*" in
+  *-o=props*) cat "${file}.props" ;;
+  *) cat "${file}.node" ;;
+esac
+YQ
+  chmod +x "$TEST_TEMP_DIR/bin/yq"
+  export PATH="$TEST_TEMP_DIR/bin:$PATH"
+
+  CONFIG="$TEST_TEMP_DIR/config.yaml"
+  echo "metadata: {name: test}" > "$CONFIG"
+  cat > "$CONFIG.props" <<'PROPS'
+# A comment yq carried through
+metadata.name = test-role
+metadata.description = A test role
+packages.brew.0 = git
+packages.brew.1 = jq
+packages.cask.0 = firefox
+packages.mas.0.name = Xcode
+packages.mas.0.id = 497799835
+defaults.0.domain = com.apple.dock
+defaults.0.key = autohide
+defaults.0.type = bool
+defaults.0.value = true
+defaults.1.domain = NSGlobalDomain
+defaults.1.key = AppleShowAllExtensions
+defaults.1.type = bool
+defaults.1.value = false
+environment.0.name = EDITOR
+environment.0.value = code --wait
+aliases.0.name = gl
+aliases.0.command = git log --pretty=\t"%h"\n --root=C:\\
+aliases.0.description = Short log
+PROPS
+}
+
+teardown() {
+  rm -rf "$TEST_TEMP_DIR"
+  teardown_isolated_home
+}
+
+# Run a snippet with the libraries loaded.
+yaml_run() {
+  run bash -c "source '$PROJECT_ROOT/lib/init.sh'; source '$PROJECT_ROOT/lib/yaml_config.sh'; $1"
+}
+
+# ==============================================================================
+# Loading
+# ==============================================================================
+
+@test "yaml_config_load: populates every section from one yq call" {
+  yaml_run "yaml_config_load '$CONFIG' && echo \"\$YAML_CFG_NAME|\$YAML_CFG_BREW_COUNT|\${YAML_CFG_BREW[1]}|\${YAML_CFG_CASK[0]}|\${YAML_CFG_MAS_ID[0]}|\$YAML_CFG_DEFAULTS_COUNT|\${YAML_CFG_DEFAULTS_VALUE[1]}|\${YAML_CFG_ENV_VALUE[0]}\""
+  assert_success
+  assert_output "test-role|2|jq|firefox|497799835|2|false|code --wait"
+
+  run wc -l < "$YQ_CALLS"
+  assert_output "1"
+}
+
+@test "yaml_config_load: unescapes tabs, newlines and backslashes" {
+  yaml_run "yaml_config_load '$CONFIG' && [ \"\${YAML_CFG_ALIAS_COMMAND[0]}\" = \$'git log --pretty=\\t\"%h\"\\n --root=C:\\\\' ] && echo same"
+  assert_success
+  assert_output "same"
+}
+
+@test "yaml_config_load: a second process reuses the compiled cache" {
+  yaml_run "yaml_config_load '$CONFIG'"
+  assert_success
+  yaml_run "yaml_config_load '$CONFIG' && echo \"\$YAML_CFG_NAME\""
+  assert_success
+  assert_output "test-role"
+
+  run wc -l < "$YQ_CALLS"
+  assert_output "1"
+
+  run bash -c "ls '$HOME/.circus/cache/yaml'/*.tsv | wc -l"
+  assert_output "1"
+}
+
+@test "yaml_config_load: changed content is recompiled" {
+  yaml_run "yaml_config_load '$CONFIG'"
+  echo "# edited" >> "$CONFIG"
+  yaml_run "yaml_config_load '$CONFIG'"
+  assert_success
+
+  run wc -l < "$YQ_CALLS"
+  assert_output "2"
+}
+
+@test "yaml_config_load: keeps sequence values that yq flattens to children" {
+  cat >> "$CONFIG.props" <<'PROPS'
+defaults.2.domain = com.apple.finder
+defaults.2.key = FavoriteTags
+defaults.2.type = array
+defaults.2.value.0 = Red
+defaults.2.value.1 = Blue Tag
+PROPS
+  printf '%s\n' "- Red" "- Blue Tag" > "$CONFIG.node"
+
+  yaml_run "yaml_config_load '$CONFIG' && printf '%s|%s' \"\$YAML_CFG_DEFAULTS_COUNT\" \"\${YAML_CFG_DEFAULTS_VALUE[2]}\""
+  assert_success
+  assert_output "3|- Red
+- Blue Tag"
+
+  run grep -c '\.defaults\[2\]\.value' "$YQ_CALLS"
+  assert_output "1"
+
+  # The rejoined value comes straight from the cache next time.
+  yaml_run "yaml_config_load '$CONFIG' && echo \"\${YAML_CFG_DEFAULTS_VALUE[2]}\""
+  assert_success
+  assert_line --index 1 "- Blue Tag"
+  run wc -l < "$YQ_CALLS"
+  assert_output "2"
+}
+
+@test "yaml_config_load: reloads a file edited within the same process" {
+  yaml_run "yaml_config_load '$CONFIG' && echo \"\$YAML_CFG_NAME\"
+    yaml_config_load '$CONFIG' && echo \"\$YAML_CFG_NAME\"
+    echo '# edited' >> '$CONFIG'
+    sed 's/test-role/edited-role/' '$CONFIG.props' > '$CONFIG.props.new'
+    mv '$CONFIG.props.new' '$CONFIG.props'
+    yaml_config_load '$CONFIG' && echo \"\$YAML_CFG_NAME\""
+  assert_success
+  assert_output "test-role
+test-role
+edited-role"
+
+  run wc -l < "$YQ_CALLS"
+  assert_output "2"
+}
+
+@test "yaml_config_load: fails cleanly when yq cannot parse the file" {
+  rm -f "$CONFIG.props"
+  cat > "$TEST_TEMP_DIR/bin/yq" <<'YQ'
+#!/usr/bin/env bash
+exit 1
+YQ
+  yaml_run "yaml_config_load '$CONFIG'"
+  assert_failure
+  assert_output --partial "Failed to parse YAML"
+}
+
+# ==============================================================================
+# Consumers
+# ==============================================================================
+
+@test "apply_role_config-style appliers share one load" {
+  yaml_run "apply_environment '$CONFIG' '$TEST_TEMP_DIR/env' && apply_aliases '$CONFIG' '$TEST_TEMP_DIR/aliases'"
+  assert_success
+
+  run cat "$TEST_TEMP_DIR/env"
+  assert_output --partial "export EDITOR=code\\ --wait"
+
+  run grep -c '^alias gl=' "$TEST_TEMP_DIR/aliases"
+  assert_output "1"
+
+  run wc -l < "$YQ_CALLS"
+  assert_output "1"
+}
+
+@test "validate_config: uses the cache on repeat runs" {
+  yaml_run "validate_config '$CONFIG'"
+  assert_success
+  assert_output --partial "Configuration is valid"
+  yaml_run "validate_config '$CONFIG'"
+  assert_success
+
+  run wc -l < "$YQ_CALLS"
+  assert_output "1"
+}
@@ -243,6 +243,35 @@ class TestBooleanFlags:
         assert result.returncode == 0
 
 
+# ==============================================================================
+# Tests for --jobs option
+# ==============================================================================
+
+class TestJobsOption:
+    """Tests for the --jobs option."""
+
+    def test_positive_jobs_accepted(self):
+        """--jobs with a positive number should be accepted."""
+        result = run_installer(['--jobs', '4', '--help'])
+        assert result.returncode == 0
+
+    def test_zero_jobs_rejected(self):
+        """--jobs 0 should be rejected."""
+        result = run_installer(['--jobs', '0'])
+        assert result.returncode != 0
+        assert 'positive number' in result.stdout + result.stderr
+
+    def test_non_numeric_jobs_rejected(self):
+        """--jobs with a non-number should be rejected."""
+        result = run_installer(['--jobs', 'many'])
+        assert result.returncode != 0
+
+    def test_missing_jobs_value_rejected(self):
+        """--jobs without a value should be rejected."""
+        result = run_installer(['--jobs'])
+        assert result.returncode != 0
+
+
 # ==============================================================================
 # Tests for unknown arguments
 # ==============================================================================
@@ -13,6 +13,8 @@ scripts that return controlled outputs.
 
 import subprocess
 import os
+import re
+import time
 import tempfile
 import shutil
 import pytest
@@ -557,6 +559,136 @@ class TestFilePermissionsCheck:
                 os.chmod(tmpdir, 0o755)
 
 
+# ==============================================================================
+# Tests for the 00-preflight-checks.sh runner
+# ==============================================================================
+
+STAGE_PATH = os.path.join(PROJECT_ROOT, 'install', '00-preflight-checks.sh')
+INIT_PATH = os.path.join(PROJECT_ROOT, 'lib', 'init.sh')
+
+
+def run_preflight_stage(env_overrides: dict = None) -> subprocess.CompletedProcess:
+    """Run the whole preflight stage non-interactively, continuing past critical failures."""
+    env = os.environ.copy()
+    env['INTERACTIVE_MODE'] = 'false'
+    env['FORCE_MODE'] = 'true'
+    env['PARANOID_MODE'] = 'false'
+    if env_overrides:
+        env.update(env_overrides)
+
+    result = subprocess.run(
+        ['bash', '-c', f'source "{INIT_PATH}"; source "{STAGE_PATH}"'],
+        capture_output=True,
+        text=True,
+        errors='replace',
+        env=env
+    )
+    result.stdout = re.sub(r'\x1b\[[0-9;]*[A-Za-z]', '', result.stdout)
+    return result
+
+
+def make_slow_mock(tmpdir: str, name: str, seconds: float) -> str:
+    """Wrap one of the mocks so that it sleeps before answering."""
+    path = os.path.join(tmpdir, name)
+    with open(path, 'w') as f:
+        f.write(f'#!/usr/bin/env bash\nsleep {seconds}\nexec "{os.path.join(MOCKS_DIR, name)}" "$@"\n')
+    os.chmod(path, 0o755)
+    return path
+
+
+def result_line(output: str, display_name: str) -> str:
+    """Return the summary row for one check."""
+    for line in output.splitlines():
+        if display_name in line:
+            return line
+    return ''
+
+
+class TestPreflightRunner:
+    """Tests for the parallel preflight runner and its per-check timeouts."""
+
+    def slow_env(self, tmpdir: str, seconds: float) -> dict:
+        # Battery and WiFi are both non-critical and only consult their
+        # commands on macOS, so the uname mock has to claim Darwin.
+        return {
+            'HOME': tmpdir,
+            'UNAME_CMD': os.path.join(MOCKS_DIR, 'uname'),
+            'MOCK_UNAME_OUTPUT': 'Darwin',
+            'PMSET_CMD': make_slow_mock(tmpdir, 'pmset', seconds),
+            'NETWORKSETUP_CMD': make_slow_mock(tmpdir, 'networksetup', seconds),
+        }
+
+    def test_parallel_runner_overlaps_slow_checks(self):
+        """Two 1.5s checks take ~1.5s with workers and ~3s without."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env = self.slow_env(tmpdir, 1.5)
+
+            start = time.monotonic()
+            sequential = run_preflight_stage({**env, 'PREFLIGHT_JOBS': '1'})
+            sequential_time = time.monotonic() - start
+
+            start = time.monotonic()
+            parallel = run_preflight_stage({**env, 'PREFLIGHT_JOBS': '4'})
+            parallel_time = time.monotonic() - start
+
+        assert sequential.returncode == 0, sequential.stderr
+        assert parallel.returncode == 0, parallel.stderr
+        assert sequential_time >= 3.0
+        assert parallel_time < sequential_time - 1.0
+        assert 'Passed' in result_line(parallel.stdout, 'Network Connectivity')
+        assert 'Passed' in result_line(parallel.stdout, 'Battery & Power')
+
+    def test_parallel_runner_keeps_check_order(self):
+        """Results print in PREFLIGHT_CHECKS order even when a check finishes last."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result = run_preflight_stage({**self.slow_env(tmpdir, 1), 'PREFLIGHT_JOBS': '4'})
+
+        names = ['macOS Detection', 'Battery & Power', 'Network Connectivity',
+                 'Xcode CLI Tools', 'Installation Sanity']
+        positions = [result.stdout.find(name) for name in names]
+        assert -1 not in positions
+        assert positions == sorted(positions)
+
+    def test_rows_report_duration_in_milliseconds(self):
+        """Each row ends with how long the check took."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result = run_preflight_stage({**self.slow_env(tmpdir, 0.5), 'PREFLIGHT_JOBS': '4'})
+
+        line = result_line(result.stdout, 'Network Connectivity')
+        duration = int(line.rsplit(' ', 1)[1].rstrip('ms'))
+        assert duration >= 500
+
+    def test_slow_check_times_out_as_warning(self):
+        """A hung non-critical check is killed at its timeout and only warns."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env = self.slow_env(tmpdir, 30)
+            start = time.monotonic()
+            result = run_preflight_stage({**env, 'PREFLIGHT_CHECK_TIMEOUT': '1'})
+            elapsed = time.monotonic() - start
+
+        assert elapsed < 10
+        assert 'timed out after 1s' in result_line(result.stdout, 'Network Connectivity')
+        assert 'timed out after 1s' in result_line(result.stdout, 'Battery & Power')
+        assert 'Failed (Critical' not in result_line(result.stdout, 'Network Connectivity')
+
+    def test_critical_check_is_never_timed_out(self):
+        """A critical check slower than the limit runs to completion in the foreground."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env = {
+                'HOME': tmpdir,
+                'XCODE_SELECT_CMD': make_slow_mock(tmpdir, 'xcode-select', 2),
+                'PREFLIGHT_CHECK_TIMEOUT': '1',
+            }
+            start = time.monotonic()
+            result = run_preflight_stage(env)
+            elapsed = time.monotonic() - start
+
+        line = result_line(result.stdout, 'Xcode CLI Tools')
+        assert elapsed >= 2
+        assert 'timed out' not in line
+        assert int(line.rsplit(' ', 1)[1].rstrip('ms')) >= 2000
+
+
 # ==============================================================================
 # Integration test for running all checks
 # ==============================================================================